@@ -1,6 +1,5 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
-from flask_mysqldb import MySQL
 import os
 import configparser
 from routes.institution_routes import institution_bp
@@ -12,6 +11,14 @@ from routes.department_routes import department_bp
 from routes.auth_routes import auth_bp
 from routes.user_routes import user_bp
 from routes.analytics_routes import analytics_bp
+from routes.search_routes import search_bp
+from routes.autocomplete_routes import autocomplete_bp
+from routes.match_routes import match_bp
+from routes.facet_routes import facets_bp
+from utils.data_versions import data_versions
+from utils.db_pool import PooledMySQL, PoolTimeout
+from utils.query_cache import query_cache
+from utils.shared_cache import shared_cache
 """
 Filename: app.py
 Author: Lucas Matheson
@@ -44,8 +51,15 @@ app.config["MYSQL_DB"] = config.get("Database", "db_name", fallback="collab_conn
 app.config["MYSQL_CURSORCLASS"] = config.get(
     "Database", "db_cursorclass", fallback="DictCursor"
 )
+# Optional read replica; utils/data_access.py sends @reads routes there
+app.config["MYSQL_REPLICA_HOST"] = config.get("Replica", "db_host", fallback="")
+app.config["MYSQL_REPLICA_PORT"] = config.getint("Replica", "db_port", fallback=3306)
+app.config["MYSQL_REPLICA_USER"] = config.get("Replica", "db_user", fallback="")
+app.config["MYSQL_REPLICA_PASSWORD"] = config.get("Replica", "db_password", fallback="")
+app.config["MYSQL_REPLICA_DB"] = config.get("Replica", "db_name", fallback="")
 
-mysql = MySQL(app)
+# Same mysql.connection interface as flask_mysqldb, backed by a bounded pool ([DatabasePool])
+mysql = PooledMySQL(app)
 
 # Define your routes here
 app.register_blueprint(institution_bp)
@@ -57,6 +71,16 @@ app.register_blueprint(department_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(user_bp)
 app.register_blueprint(analytics_bp)
+app.register_blueprint(search_bp)
+app.register_blueprint(autocomplete_bp)
+app.register_blueprint(match_bp)
+app.register_blueprint(facets_bp)
+
+# Successful writes bump the data versions behind ETag/Last-Modified
+app.after_request(data_versions.after_write)
+
+# Hear about writes handled by other workers (no-op without [SharedCache] url)
+shared_cache.start()
 
 
 @app.route("/health")
@@ -82,5 +106,22 @@ def health():
     return f'Connected to MySQL! Current tables: {", ".join(output)}'
 
 
+@app.route("/health/pool")
+def pool_health():
+    """Connection pool size, checkout wait times, timeouts and suspected leaks."""
+    return jsonify({"status": "success", "data": mysql.stats()})
+
+
+@app.route("/health/query-cache")
+def query_cache_health():
+    """Stored procedure result cache: hit ratio, entries and bytes, per procedure."""
+    return jsonify({"status": "success", "data": query_cache.stats()})
+
+
+@app.errorhandler(PoolTimeout)
+def pool_exhausted(e):
+    return jsonify({"status": "error", "message": str(e)}), 503
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5001)
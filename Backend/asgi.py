@@ -0,0 +1,120 @@
+"""
+Filename: asgi.py
+
+ASGI entry point for high-concurrency deployments.
+
+The read endpoints that spend almost all their time waiting on MySQL,
+GET /person/<id>, /project/<id>/people and /department/<id>/people, run
+here as async Starlette handlers on an aiomysql pool
+(utils/async_db.py). They share their SQL, stored procedures and response
+shaping with the Flask routes, so both answer the same requests with the
+same bodies. Everything else, other methods on the same paths included,
+falls through to the Flask app, mounted underneath as WSGI.
+
+Run with: uvicorn asgi:app --port 5001 (add --workers N for more processes)
+"""
+
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+from app import app as flask_app
+from routes.department_routes import DEPARTMENT_PEOPLE_QUERY, with_expertises
+from routes.person_routes import person_context, person_query
+from routes.project_routes import PROJECT_PEOPLE_QUERY
+from utils.async_db import async_mysql
+from utils.data_access import identity_from
+from utils.db_pool import PoolTimeout
+from utils.fields import PERSON_FIELDS
+from utils.logger import log_info, log_error
+
+
+def json_response(body, status=200):
+    # Flask's encoder, so dates and decimals come out as they do from jsonify;
+    # the same open CORS policy as CORS(app) (preflights go to Flask)
+    return Response(flask_app.json.dumps(body), status_code=status, media_type="application/json",
+                    headers={"Access-Control-Allow-Origin": "*"})
+
+
+def _caller(request):
+    return identity_from(request.headers.get("authorization", ""), request.client.host if request.client else None)
+
+
+async def _run(label, work):
+    try:
+        return await work()
+    except PoolTimeout as e:
+        return json_response({"status": "error", "message": str(e)}, 503)
+    except Exception as e:
+        log_error(f"Error fetching {label}: {str(e)}")
+        return json_response({"status": "error", "message": str(e)}, 500)
+
+
+async def get_person_full(request):
+    """Async GET /person/<id>; same body as person_routes.get_person_full."""
+    person_id = request.path_params["person_id"]
+    try:
+        fields = PERSON_FIELDS.parse(request.query_params.get("fields"))
+    except ValueError as e:
+        return json_response({"status": "error", "message": str(e)}, 400)
+
+    async def work():
+        if fields is None:
+            rows = await async_mysql.callproc("SelectPersonFullContextByID", [person_id], caller=_caller(request))
+        else:
+            rows = await async_mysql.fetchall(person_query(fields), (person_id,), caller=_caller(request))
+        if not rows:
+            return json_response({"status": "not_found", "message": "Person not found"}, 404)
+        return json_response({"status": "success", "data": person_context(rows[0], fields)})
+    return await _run(f"full person context {person_id}", work)
+
+
+async def get_people_by_project(request):
+    """Async GET /project/<id>/people; same body as project_routes.get_people_by_project."""
+    project_id = request.path_params["project_id"]
+
+    async def work():
+        results = await async_mysql.fetchall(PROJECT_PEOPLE_QUERY, (project_id,), caller=_caller(request))
+        return json_response({"status": "success", "data": results, "count": len(results)})
+    return await _run(f"people for project_id={project_id}", work)
+
+
+async def get_department_people(request):
+    """Async GET /department/<id>/people; same body as department_routes.get_department_people."""
+    department_id = request.path_params["department_id"]
+
+    async def work():
+        people = with_expertises(await async_mysql.fetchall(DEPARTMENT_PEOPLE_QUERY, (department_id,),
+                                                            caller=_caller(request)))
+        return json_response({"status": "success", "data": people, "count": len(people)})
+    return await _run(f"people in department {department_id}", work)
+
+
+async def async_pool_health(request):
+    return json_response({"status": "success", "data": async_mysql.stats()})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await async_mysql.start()
+    log_info("ASGI app started")
+    try:
+        yield
+    finally:
+        await async_mysql.close()
+
+
+app = Starlette(
+    routes=[
+        Route("/person/{person_id:int}", get_person_full, methods=["GET"]),
+        Route("/project/{project_id:int}/people", get_people_by_project, methods=["GET"]),
+        Route("/department/{department_id:int}/people", get_department_people, methods=["GET"]),
+        Route("/health/async-pool", async_pool_health, methods=["GET"]),
+        # Everything else, and other methods on the paths above, is served by Flask
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ],
+    lifespan=lifespan
+)
@@ -0,0 +1,104 @@
+import re
+from app import app, mysql
+
+"""
+Filename: backfill_collaboration.py
+
+One-shot tool that brings an existing database up to date with the
+Collaboration edge table and the CollaboratorRecommendation table that
+sits next to it. db_init.py creates the table for new databases and
+the WorkedOn procedures keep it current from then on; databases initialized
+before the table existed need this run once.
+
+It creates the tables if missing, reinstalls the procedures that maintain it,
+fills it from WorkedOn with BackfillCollaboration and adds its indexes.
+
+To run - python backfill_collaboration.py
+"""
+
+TABLES_FILE = "./sql/tables/create_all_tables.sql"
+TABLES = ["Collaboration", "CollaboratorRecommendation"]
+INDEX_FILE = "./sql/indexes/collaboration_indexes.sql"
+
+# Procedures that read or write Collaboration, reinstalled so older copies
+# without the maintenance calls are replaced
+PROCEDURE_FILES = [
+    "./sql/procedures/collaboration_procedures.sql",
+    "./sql/procedures/workedon_crud.sql",
+    "./sql/procedures/project_procedures.sql",
+    "./sql/procedures/person_procedures.sql",
+]
+
+
+def create_collaboration_tables(cursor):
+    with open(TABLES_FILE, "r") as f:
+        sql_script = f.read()
+
+    statements = [stmt.strip() for stmt in sql_script.split(";") if stmt.strip()]
+    for table in TABLES:
+        pattern = rf"CREATE TABLE IF NOT EXISTS {table}\b"
+        statement = next((stmt for stmt in statements if re.search(pattern, stmt)), None)
+        if statement is None:
+            raise RuntimeError(f"{table} table definition not found in {TABLES_FILE}")
+        cursor.execute(statement)
+        mysql.connection.commit()
+        print(f"{table} table ready")
+
+
+def reinstall_procedures(cursor):
+    pattern = r"CREATE\s+PROCEDURE[\s\S]*?END;"
+    name_pattern = r"CREATE\s+PROCEDURE\s+(\w+)"
+
+    for file_path in PROCEDURE_FILES:
+        with open(file_path, "r") as f:
+            sql_script = f.read()
+
+        for procedure in re.findall(pattern, sql_script, flags=re.IGNORECASE):
+            name = re.search(name_pattern, procedure, flags=re.IGNORECASE).group(1)
+            cursor.execute(f"DROP PROCEDURE IF EXISTS {name}")
+            cursor.execute(procedure)
+            mysql.connection.commit()
+    print("Collaboration procedures installed")
+
+
+def create_indexes(cursor):
+    with open(INDEX_FILE, "r") as f:
+        sql_script = f.read()
+
+    for statement in sql_script.split(";"):
+        create_index = statement.strip()
+        if not create_index:
+            continue
+        try:
+            cursor.execute(create_index)
+        except Exception as e:
+            # Duplicate key name: the index is already there
+            print(f"Skipping index: {e}")
+    mysql.connection.commit()
+
+
+def backfill():
+    with app.app_context():
+        cursor = mysql.connection.cursor()
+        try:
+            create_collaboration_tables(cursor)
+            reinstall_procedures(cursor)
+
+            cursor.callproc("BackfillCollaboration")
+            result = cursor.fetchone()
+            while cursor.nextset():
+                pass
+            mysql.connection.commit()
+            print(f"Backfilled {result['collaboration_count'] if result else 0} collaborations")
+
+            create_indexes(cursor)
+        except Exception as e:
+            mysql.connection.rollback()
+            print(f"Collaboration backfill failed: {e}")
+            raise
+        finally:
+            cursor.close()
+
+
+if __name__ == "__main__":
+    backfill()
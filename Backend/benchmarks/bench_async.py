@@ -0,0 +1,89 @@
+"""
+Filename: bench_async.py
+
+Load test of the read endpoints served by asgi.py against the Flask
+deployments.
+
+Start the servers to compare, each on its own port, e.g.:
+
+  python app.py                                            (app.run, port 5001)
+  gunicorn -w 4 -b 127.0.0.1:5002 app:app                  (gunicorn, sync workers)
+  uvicorn asgi:app --port 5003 --workers 4                 (ASGI + aiomysql)
+
+and point the script at them. For every target and every --concurrency
+level, it keeps that many requests in flight for --duration seconds,
+cycling through --paths, which default to the three async read routes.
+It prints requests/sec, median / p99 latency and errors (non-2xx or
+failed connections).
+
+To run - python benchmarks/bench_async.py --target app.run=http://127.0.0.1:5001 \
+           --target gunicorn=http://127.0.0.1:5002 --target asgi=http://127.0.0.1:5003 \
+           [--concurrency 50 500 2000] [--duration 15]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+PATHS = ["/person/1", "/project/1/people", "/department/1/people"]
+
+
+async def load(base_url, paths, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        async def worker(offset):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(paths[i % len(paths)])
+                    if response.status_code >= 300:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                i += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': 1000 * statistics.median(latencies) if latencies else 0.0,
+        'p99': 1000 * latencies[int(0.99 * (len(latencies) - 1))] if latencies else 0.0,
+        'errors': errors,
+        'requests': len(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True, metavar="NAME=URL")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per run")
+    parser.add_argument("--paths", nargs="+", default=PATHS)
+    args = parser.parse_args()
+    targets = [target.split("=", 1) for target in args.target]
+
+    header = f"{'target':<10} {'in flight':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for concurrency in args.concurrency:
+        for name, url in targets:
+            r = asyncio.run(load(url, args.paths, concurrency, args.duration))
+            print(f"{name:<10} {concurrency:>9} {r['rps']:>9.1f} {r['p50']:>9.2f} {r['p99']:>9.2f} "
+                  f"{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
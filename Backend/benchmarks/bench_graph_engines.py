@@ -0,0 +1,116 @@
+"""
+Filename: bench_graph_engines.py
+
+Compares the two collaboration graph engines on synthetic graphs:
+networkx (greedy_modularity_communities) and the SciPy CSR engine in
+utils/sparse_graph.py (vectorized Louvain).
+
+Graphs are planted-partition graphs with about five edges per node, so
+both engines have real community structure to find. For each size the
+script reports community detection time, the time for degree/density/
+clustering statistics, the number of communities and their modularity
+(scored the same way for both engines).
+
+networkx is skipped above --networkx-max-edges, since greedy modularity
+takes minutes at 100k edges and hours at 1M.
+
+To run - python benchmarks/bench_graph_engines.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sparse_graph import SparseGraph
+
+
+def planted_partition_edges(edge_count, seed=0, community_size=40, internal_ratio=0.8):
+    """Random undirected edges, most of them inside fixed-size blocks."""
+    rng = np.random.default_rng(seed)
+    node_count = max(community_size * 2, edge_count // 5)
+
+    internal = int(edge_count * internal_ratio)
+    block = rng.integers(0, node_count // community_size, size=internal) * community_size
+    sources = np.concatenate([
+        block + rng.integers(0, community_size, size=internal),
+        rng.integers(0, node_count, size=edge_count - internal)
+    ])
+    targets = np.concatenate([
+        block + rng.integers(0, community_size, size=internal),
+        rng.integers(0, node_count, size=edge_count - internal)
+    ])
+
+    a = np.minimum(sources, targets)
+    b = np.maximum(sources, targets)
+    keep = a != b
+    pairs = np.unique(np.stack([a[keep], b[keep]], axis=1), axis=0)
+    return node_count, pairs
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def bench_sparse(node_ids, pairs):
+    graph, build = timed(lambda: SparseGraph.from_edges(node_ids, pairs[:, 0], pairs[:, 1]))
+    labels, detect = timed(graph.louvain)
+    _, stats = timed(lambda: (graph.degree(), graph.density(), graph.average_clustering()))
+    return graph, labels, build, detect, stats
+
+
+def bench_networkx(node_ids, pairs, graph):
+    def build():
+        G = nx.Graph()
+        G.add_nodes_from(node_ids)
+        G.add_edges_from(pairs.tolist())
+        return G
+
+    G, build_time = timed(build)
+    communities, detect = timed(lambda: nx.community.greedy_modularity_communities(G))
+    _, stats = timed(lambda: (dict(G.degree()), nx.density(G), nx.average_clustering(G)))
+
+    labels = np.zeros(len(node_ids), dtype=np.int64)
+    for comm_id, members in enumerate(communities):
+        labels[[graph.index_of(node_id) for node_id in members]] = comm_id
+    return labels, build_time, detect, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--networkx-max-edges", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    header = f"{'engine':<9} {'edges':>9} {'nodes':>8} {'build s':>8} {'detect s':>9} {'stats s':>8} {'comms':>6} {'modularity':>10}"
+    print(header)
+    print("-" * len(header))
+
+    for size in args.sizes:
+        node_count, pairs = planted_partition_edges(size, seed=args.seed)
+        node_ids = np.arange(1, node_count + 1)
+        pairs = pairs + 1
+
+        graph, labels, build, detect, stats = bench_sparse(node_ids, pairs)
+        print(f"{'sparse':<9} {len(pairs):>9} {node_count:>8} {build:>8.3f} {detect:>9.3f} {stats:>8.3f} "
+              f"{labels.max() + 1:>6} {graph.modularity(labels):>10.4f}")
+
+        if len(pairs) > args.networkx_max_edges:
+            print(f"{'networkx':<9} {len(pairs):>9} {node_count:>8} {'skipped (raise --networkx-max-edges to run)':>44}")
+            continue
+
+        labels, build, detect, stats = bench_networkx(node_ids, pairs, graph)
+        print(f"{'networkx':<9} {len(pairs):>9} {node_count:>8} {build:>8.3f} {detect:>9.3f} {stats:>8.3f} "
+              f"{labels.max() + 1:>6} {graph.modularity(labels):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
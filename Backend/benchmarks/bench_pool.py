@@ -0,0 +1,101 @@
+"""
+Filename: bench_pool.py
+
+Requests per second through the Flask app with a connection per request
+(flask_mysqldb.MySQL, as app.py used to do) and with the PooledMySQL
+connection pool.
+
+The script imports the app and uses the database from config.ini
+[Database], which must hold some data. For each mode it runs --threads
+client threads, and each thread sends --requests GETs, cycling through
+--paths. It then prints requests/sec and median / p95 latency, plus the
+pool's wait and timeout counters for the pooled run. Only reads are
+sent.
+
+To run - python benchmarks/bench_pool.py [--threads 16] [--requests 200] [--paths /person/1 /project/1/people]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from flask_mysqldb import MySQL
+
+PATHS = ["/person/1", "/project/1/people", "/department/1/people", "/person/all?limit=20"]
+
+
+def run(flask_app, paths, threads, requests):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(offset):
+        client = flask_app.test_client()
+        mine = []
+        for i in range(requests):
+            start = time.perf_counter()
+            response = client.get(paths[(offset + i) % len(paths)])
+            mine.append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': 1000 * statistics.median(latencies),
+        'p95': 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+        'errors': errors[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per thread")
+    parser.add_argument("--paths", nargs="+", default=PATHS)
+    args = parser.parse_args()
+
+    flask_app = app_module.app
+    pooled = app_module.mysql
+    # Both register a teardown; each only closes/returns what it opened
+    per_request = MySQL(flask_app)
+
+    results = {}
+    for mode, mysql in (("per-request", per_request), ("pooled", pooled)):
+        app_module.mysql = mysql
+        run(flask_app, args.paths, 2, 5)
+        results[mode] = run(flask_app, args.paths, args.threads, args.requests)
+    app_module.mysql = pooled
+
+    header = f"{'mode':<12} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7} {'speedup':>8}"
+    print(header)
+    print("-" * len(header))
+    baseline = results["per-request"]["rps"]
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['rps']:>9.1f} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['errors']:>7} "
+              f"{r['rps'] / baseline:>7.1f}x")
+    stats = pooled.stats()
+    print(f"\npool: size {stats['size']}/{stats['max_size']}, checkouts {stats['checkouts']}, "
+          f"waited {stats['waits']}, avg wait {stats['avg_wait_ms']} ms, max wait {stats['max_wait_ms']} ms, "
+          f"timeouts {stats['timeouts']}, created {stats['created']}")
+
+
+if __name__ == "__main__":
+    main()
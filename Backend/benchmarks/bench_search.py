@@ -0,0 +1,208 @@
+"""
+Filename: bench_search.py
+
+Compares the LIKE '%term%' scans used by /user/search-profile with the
+FULLTEXT queries behind /search, on a synthetic Person table.
+
+The script creates a scratch database (collab_connect_search_bench by
+default) on the server from config.ini [Database], fills Person with
+--rows synthetic researchers, builds idx_person_search and
+idx_person_expertise, then for each term times:
+
+  like      person_name/bio/expertise LIKE '%term%' (full scan)
+  natural   the /search person query, NATURAL LANGUAGE MODE
+  boolean   the /search person query, BOOLEAN MODE with a prefix (term*)
+
+and prints the median over --repeat runs and the rows MySQL expects to
+examine (EXPLAIN). The scratch database is dropped unless --keep is given;
+re-running with --keep skips the load.
+
+To run - python benchmarks/bench_search.py [--rows 1000000] [--repeat 5] [--keep]
+"""
+
+import argparse
+import configparser
+import os
+import random
+import statistics
+import sys
+import time
+
+import MySQLdb
+import MySQLdb.cursors
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.search import person_search_sql
+
+FIELDS = [
+    "Computer Science", "Biology", "Chemistry", "Physics", "Mathematics",
+    "Economics", "Psychology", "Engineering", "Ecology", "Linguistics"
+]
+TOPICS = [
+    "machine learning", "genomics", "catalysis", "quantum optics", "graph theory",
+    "labor markets", "cognition", "robotics", "marine ecosystems", "phonology",
+    "protein folding", "distributed systems", "climate modeling", "epidemiology",
+    "neural networks", "materials science", "number theory", "game theory"
+]
+FILLER = (
+    "research group studies methods data analysis collaboration students lab "
+    "funding publications university program models experiments field theory"
+).split()
+FIRST = ["Ada", "Grace", "Alan", "Marie", "Niels", "Rosalind", "Claude", "Emmy", "Srinivasa", "Lise"]
+LAST = ["Lovelace", "Hopper", "Turing", "Curie", "Bohr", "Franklin", "Shannon", "Noether", "Ramanujan", "Meitner"]
+
+TERMS = ["genomics", "quantum", "turing", "robotics"]
+BATCH = 10_000
+
+
+def connect(db=None):
+    config = configparser.ConfigParser()
+    config.read(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.ini"))
+    kwargs = dict(
+        host=config.get("Database", "db_host", fallback="127.0.0.1"),
+        port=config.getint("Database", "db_port", fallback=3306),
+        user=config.get("Database", "db_user", fallback="root"),
+        passwd=config.get("Database", "db_password", fallback=""),
+        cursorclass=MySQLdb.cursors.DictCursor,
+        charset="utf8mb4"
+    )
+    if db:
+        kwargs["db"] = db
+    return MySQLdb.connect(**kwargs)
+
+
+def person_rows(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        topics = rng.sample(TOPICS, 3)
+        bio = " ".join(rng.choices(FILLER, k=rng.randint(12, 30)) + [topics[0]] + rng.choices(FILLER, k=8))
+        yield (
+            f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+            bio,
+            topics[0], topics[1], topics[2],
+            rng.choice(FIELDS)
+        )
+
+
+def load(conn, rows, seed):
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE Person (
+            person_id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+            person_name VARCHAR(150) NOT NULL,
+            person_email VARCHAR(150),
+            bio TEXT,
+            expertise_1 VARCHAR(100),
+            expertise_2 VARCHAR(100),
+            expertise_3 VARCHAR(100),
+            main_field VARCHAR(100) NOT NULL
+        )
+    """)
+    insert = ("INSERT INTO Person (person_name, bio, expertise_1, expertise_2, expertise_3, main_field) "
+              "VALUES (%s, %s, %s, %s, %s, %s)")
+    batch = []
+    started = time.perf_counter()
+    for row in person_rows(rows, seed):
+        batch.append(row)
+        if len(batch) == BATCH:
+            cursor.executemany(insert, batch)
+            conn.commit()
+            batch = []
+    if batch:
+        cursor.executemany(insert, batch)
+        conn.commit()
+    print(f"loaded {rows} rows in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    cursor.execute("CREATE FULLTEXT INDEX idx_person_search ON Person(person_name, bio)")
+    cursor.execute("CREATE FULLTEXT INDEX idx_person_expertise ON Person(expertise_1, expertise_2, expertise_3)")
+    print(f"built FULLTEXT indexes in {time.perf_counter() - started:.1f}s")
+    cursor.close()
+
+
+def like_query(term):
+    pattern = f"%{term}%"
+    sql = """
+        SELECT person_id, person_name, main_field, bio, expertise_1, expertise_2, expertise_3
+        FROM Person
+        WHERE person_name LIKE %s OR bio LIKE %s
+           OR expertise_1 LIKE %s OR expertise_2 LIKE %s OR expertise_3 LIKE %s
+        LIMIT 20
+    """
+    return sql, (pattern,) * 5
+
+
+def fulltext_query(term, mode):
+    q = f"{term}*" if mode == "boolean" else term
+    return person_search_sql(mode), (q, q, q, q, 20, 0)
+
+
+def median_ms(conn, sql, params, repeat):
+    cursor = conn.cursor()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        times.append((time.perf_counter() - started) * 1000)
+    cursor.close()
+    return statistics.median(times)
+
+
+def examined_rows(conn, sql, params):
+    cursor = conn.cursor()
+    cursor.execute("EXPLAIN " + sql, params)
+    rows = sum(int(row.get("rows") or 0) for row in cursor.fetchall())
+    cursor.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--terms", nargs="+", default=TERMS)
+    parser.add_argument("--database", default="collab_connect_search_bench")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database for later runs")
+    args = parser.parse_args()
+
+    server = connect()
+    cursor = server.cursor()
+    cursor.execute("SELECT COUNT(*) AS n FROM information_schema.TABLES "
+                   "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'Person'", (args.database,))
+    exists = cursor.fetchone()["n"] > 0
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    cursor.close()
+
+    conn = connect(args.database)
+    try:
+        if not exists:
+            load(conn, args.rows, args.seed)
+        else:
+            print(f"reusing {args.database}")
+
+        header = f"{'term':<10} {'query':<8} {'median ms':>10} {'explain rows':>13} {'speedup':>8}"
+        print(header)
+        print("-" * len(header))
+        for term in args.terms:
+            sql, params = like_query(term)
+            baseline = median_ms(conn, sql, params, args.repeat)
+            print(f"{term:<10} {'like':<8} {baseline:>10.1f} {examined_rows(conn, sql, params):>13} {'1.0x':>8}")
+            for mode in ("natural", "boolean"):
+                sql, params = fulltext_query(term, mode)
+                ms = median_ms(conn, sql, params, args.repeat)
+                print(f"{term:<10} {mode:<8} {ms:>10.1f} {examined_rows(conn, sql, params):>13} "
+                      f"{baseline / ms if ms else float('inf'):>7.1f}x")
+    finally:
+        conn.close()
+        if not args.keep:
+            cursor = server.cursor()
+            cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+            cursor.close()
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -149,6 +149,7 @@ def create_procedures():
         "./sql/procedures/workedon_crud.sql",
         "./sql/procedures/worksin_crud.sql",
         "./sql/procedures/user_procedures.sql",
+        "./sql/procedures/collaboration_procedures.sql",
     ]
     
     cursor = mysql.connection.cursor()
@@ -183,6 +184,7 @@ def create_indexes():
         "./sql/indexes/person_indexes.sql",
         "./sql/indexes/workedon_indexes.sql",
         "./sql/indexes/worksin_indexes.sql",
+        "./sql/indexes/collaboration_indexes.sql",
     ]
     try:
         for file_path in index_file_paths:
@@ -1,185 +1,347 @@
 from flask import Blueprint, jsonify, request
-import networkx as nx
-from collections import defaultdict
+import configparser
+import threading
+from collections import OrderedDict
 from utils.logger import log_info, log_error
+from utils.affiliation_matrix import LEVELS, collaboration_matrix
+from utils.authorization import verify_operator
+from utils.centrality import CentralityService
+from utils.collab_graph import CollaborationGraph, collab_graph, network_statistics, node_size
+from utils.data_access import reads, writes
+from utils.data_versions import conditional
+from utils.graph_layout import GraphLayout
+from utils.jwt_utils import token_required
+from utils.network_timeline import GRANULARITIES, NetworkTimeline, parse_period, period_label
+from utils.recommendations import CollaboratorRecommender
+from utils.shared_cache import shared_cache
+from utils.versioned_cache import VersionedCache
 
 # Author: Wyatt McCurdy — analytics network endpoints and metrics
 
 # Blueprint for analytics-related endpoints
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/api/analytics')
 
-# Cache for network data
-_network_cache = {
-    'data': None,
-    'include_isolated': False
-}
+config = configparser.ConfigParser()
+config.read("config.ini")
 
+# How often the in-memory graph is rebuilt from scratch. Writes keep it
+# current in between; the rebuild only refreshes community detection.
+NETWORK_REBUILD_MINUTES = config.getint("Analytics", "network_rebuild_minutes", fallback=60)
 
+# Community detection backend: 'networkx' or 'sparse' (CSR arrays, vectorized Louvain)
+GRAPH_ENGINE = config.get("Analytics", "graph_engine", fallback="networkx")
+if GRAPH_ENGINE not in CollaborationGraph.ENGINES:
+    log_error(f"Unknown graph_engine '{GRAPH_ENGINE}' in config.ini, using networkx")
+    GRAPH_ENGINE = "networkx"
+collab_graph.engine = GRAPH_ENGINE
 
+# Serve the previous snapshot while a newer one is materialized in the background
+NETWORK_STALE_WHILE_REVALIDATE = config.getboolean("Analytics", "stale_while_revalidate", fallback=False)
 
+# Filtered /network slices kept at once; each filter combination is an entry
+SLICE_CACHE_SIZE = 256
 
-def _build_collaboration_network(mysql, include_isolated=False):
+# Bounds for /network/ego so a single request cannot walk the whole graph
+EGO_MAX_DEPTH = 3
+EGO_DEFAULT_LIMIT = 200
+EGO_MAX_LIMIT = 2000
+
+# Bounds and cache size for /path
+PATH_DEFAULT_DEPTH = 6
+PATH_MAX_DEPTH = 8
+PATH_CACHE_SIZE = 1024
+
+# Server-side layout: target edge length in pixels and force iterations
+# for a full layout (incremental updates use fewer)
+LAYOUT_SPACING = config.getfloat("Analytics", "layout_spacing", fallback=250.0)
+LAYOUT_ITERATIONS = config.getint("Analytics", "layout_iterations", fallback=50)
+
+# Centrality: worker threads, and the betweenness sample count (0 derives
+# it from the target error epsilon at confidence 1 - delta)
+CENTRALITY_WORKERS = config.getint("Analytics", "centrality_workers", fallback=1)
+BETWEENNESS_SAMPLES = config.getint("Analytics", "betweenness_samples", fallback=0)
+BETWEENNESS_EPSILON = config.getfloat("Analytics", "betweenness_epsilon", fallback=0.05)
+BETWEENNESS_DELTA = config.getfloat("Analytics", "betweenness_delta", fallback=0.1)
+CENTRALITY_METRICS = ('pagerank', 'eigenvector', 'betweenness')
+CENTRALITY_DEFAULT_TOP = 20
+CENTRALITY_MAX_TOP = 1000
+
+# Largest matrix returned as nested lists; bigger ones need format=sparse
+MATRIX_DENSE_MAX = 500
+
+# Weight of collaboration-graph structure against shared expertise
+RECOMMENDATION_ALPHA = config.getfloat("Analytics", "recommendation_alpha", fallback=0.7)
+
+# Suggestions stored per researcher by the batch precompute, and the
+# largest k a request may ask for
+RECOMMENDATION_STORED_K = 50
+RECOMMENDATION_DEFAULT_K = 20
+RECOMMENDATION_INSERT_CHUNK = 5000
+
+_rebuild_lock = threading.Lock()
+_scheduler = {'timer': None}
+
+# One entry per parameter combination, stamped with the graph version
+_network_cache = VersionedCache(stale_while_revalidate=NETWORK_STALE_WHILE_REVALIDATE)
+_slice_cache = VersionedCache(max_entries=SLICE_CACHE_SIZE)
+
+# One timeline per granularity; while writes bump the graph version the
+# previous timeline keeps being served as the new one is rebuilt
+_timeline_cache = VersionedCache(stale_while_revalidate=True)
+
+# Institution/department matrices per (level, weighted), per graph version
+_matrix_cache = VersionedCache()
+
+# Recently requested paths, least recently used evicted first
+_path_cache = OrderedDict()
+_path_cache_lock = threading.Lock()
+
+_recommender = CollaboratorRecommender(collab_graph, alpha=RECOMMENDATION_ALPHA)
+
+_centrality = CentralityService(
+    collab_graph,
+    workers=CENTRALITY_WORKERS,
+    samples=BETWEENNESS_SAMPLES,
+    epsilon=BETWEENNESS_EPSILON,
+    delta=BETWEENNESS_DELTA
+)
+
+# Node positions for the network view, carried across graph versions
+_layout = GraphLayout(collab_graph, spacing=LAYOUT_SPACING, iterations=LAYOUT_ITERATIONS)
+
+# Tables _load_collaboration_graph reads
+GRAPH_TABLES = {'Person', 'WorksIn', 'Department', 'Institution', 'Collaboration', 'WorkedOn', 'Project', 'Project_Tag'}
+
+
+def _on_remote_write(message):
+    """A write on another worker: reload the graph (and so every graph-versioned cache) on next use."""
+    tables = message.get('tables')
+    if tables is None or GRAPH_TABLES.intersection(tables):
+        collab_graph.mark_stale()
+
+
+shared_cache.on("tables", _on_remote_write)
+shared_cache.on("reset", lambda message: collab_graph.mark_stale())
+
+
+def _load_collaboration_graph(mysql):
+    """Reload the shared collaboration graph from the database."""
+    log_info("Loading collaboration graph from database")
+    cursor = mysql.connection.cursor()
+    cursor.execute("START TRANSACTION")
+
+    # Fetch all researchers with their info
+    cursor.execute("""
+        SELECT p.person_id, p.person_name, p.main_field,
+               d.department_name, i.institution_name,
+               GROUP_CONCAT(p.expertise_1, ',', p.expertise_2, ',', p.expertise_3) as expertise_str
+        FROM Person p
+        LEFT JOIN WorksIn wi ON p.person_id = wi.person_id
+        LEFT JOIN Department d ON wi.department_id = d.department_id
+        LEFT JOIN Institution i ON d.institution_id = i.institution_id
+        GROUP BY p.person_id, p.person_name, p.main_field, d.department_name, i.institution_name
+    """)
+
+    people = {}
+    for row in cursor.fetchall():
+        expertise = []
+        if row['expertise_str']:
+            expertise = [e.strip() for e in row['expertise_str'].split(',') if e.strip()]
+
+        people[row['person_id']] = {
+            'label': row['person_name'],
+            'institution': row['institution_name'],
+            'department': row['department_name'],
+            'expertise': expertise,
+            'main_field': row['main_field']
+        }
+
+    # Co-authorship edges come from the materialized Collaboration table,
+    # so this is a plain scan rather than a WorkedOn self-join
+    cursor.execute("SELECT person_a, person_b, weight FROM Collaboration")
+    edges = [(row['person_a'], row['person_b'], row['weight']) for row in cursor.fetchall()]
+
+    # Project memberships, needed to apply later WorkedOn deltas, with the
+    # dates each person was on the project for time-window slices and the
+    # timeline (an open end_date on any role keeps the membership open-ended)
+    cursor.execute("""
+        SELECT person_id, project_id,
+               MIN(start_date) AS start_date,
+               CASE WHEN COUNT(*) > COUNT(end_date) THEN NULL ELSE MAX(end_date) END AS end_date
+        FROM WorkedOn
+        GROUP BY person_id, project_id
+    """)
+    memberships = [
+        (row['person_id'], row['project_id'], row['start_date'], row['end_date'])
+        for row in cursor.fetchall()
+    ]
+
+    # Affiliations and project tags for the slice indexes
+    cursor.execute("""
+        SELECT a.person_id, a.department_id, d.institution_id
+        FROM (
+            SELECT person_id, department_id FROM WorksIn
+            UNION
+            SELECT person_id, department_id FROM Person WHERE department_id IS NOT NULL
+        ) a
+        JOIN Department d ON d.department_id = a.department_id
+    """)
+    affiliations = [
+        (row['person_id'], row['department_id'], row['institution_id'])
+        for row in cursor.fetchall()
+    ]
+
+    cursor.execute("""
+        SELECT project_id, tag_name, 1 AS is_primary FROM Project WHERE tag_name IS NOT NULL
+        UNION ALL
+        SELECT project_id, tag_name, 0 AS is_primary FROM Project_Tag
+    """)
+    project_tags = [
+        (row['project_id'], row['tag_name'], row['is_primary'])
+        for row in cursor.fetchall()
+    ]
+
+    mysql.connection.commit()
+    cursor.close()
+
+    collab_graph.load(people, memberships, edges, affiliations, project_tags)
+
+
+def _rebuild_graph(mysql, only_if_unloaded=False):
+    """Full rebuild, serialized so concurrent callers do not stack up.
+
+    With ``only_if_unloaded`` the callers that queued behind the first
+    load find the graph ready and return without reading the database.
+    """
+    with _rebuild_lock:
+        if only_if_unloaded and collab_graph.loaded:
+            return
+        _load_collaboration_graph(mysql)
+    _centrality.refresh()
+    _schedule_rebuild()
+
+
+def _scheduled_rebuild():
+    from app import app, mysql
+    try:
+        with app.app_context():
+            log_info("Scheduled collaboration graph rebuild")
+            _rebuild_graph(mysql)
+            _store_recommendations(mysql)
+    except Exception as e:
+        log_error(f"Scheduled collaboration graph rebuild failed: {str(e)}")
+        _schedule_rebuild()
+
+
+def _schedule_rebuild():
+    """(Re)arm the periodic full rebuild."""
+    if NETWORK_REBUILD_MINUTES <= 0:
+        return
+    if _scheduler['timer'] is not None:
+        _scheduler['timer'].cancel()
+    timer = threading.Timer(NETWORK_REBUILD_MINUTES * 60, _scheduled_rebuild)
+    timer.daemon = True
+    timer.start()
+    _scheduler['timer'] = timer
+
+
+def _add_positions(network):
+    """Attach the precomputed ``x``/``y`` of the full view to each node."""
+    positions = _layout.positions()
+    for node in network['nodes']:
+        node['x'], node['y'] = positions.get(node['id'], (0.0, 0.0))
+    return network
+
+
+def _network_snapshot(include_isolated):
+    """Snapshot of the graph with precomputed ``x``/``y`` per node."""
+    return _add_positions(collab_graph.snapshot(include_isolated))
+
+
+def _network_slice(include_isolated, filters):
+    """Filtered subnetwork with the same ``x``/``y`` as the full view."""
+    return _add_positions(collab_graph.slice(include_isolated=include_isolated, **filters))
+
+
+def _slice_filters(args):
+    """Slice filters present in the query string, or raise ValueError."""
+    filters = {}
+    for name in ('institution_id', 'department_id', 'start_year', 'end_year'):
+        value = args.get(name)
+        if value not in (None, ''):
+            try:
+                filters[name] = int(value)
+            except ValueError:
+                raise ValueError(f"{name} must be an integer")
+    for name in ('tag', 'main_field'):
+        value = (args.get(name) or '').strip()
+        if value:
+            filters[name] = value
+    if filters.get('start_year') is not None and filters.get('end_year') is not None \
+            and filters['start_year'] > filters['end_year']:
+        raise ValueError("start_year must not be after end_year")
+    return filters
+
+
+def _build_collaboration_network(mysql, include_isolated=False, force_rebuild=False, filters=None):
     """Build collaboration network from database WorkedOn relationships."""
     try:
         log_info(f"Building collaboration network - include_isolated: {include_isolated}")
-        cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        
-        # Fetch all researchers with their info
-        cursor.execute("""
-            SELECT p.person_id, p.person_name, p.main_field,
-                   d.department_name, i.institution_name,
-                   GROUP_CONCAT(p.expertise_1, ',', p.expertise_2, ',', p.expertise_3) as expertise_str
-            FROM Person p
-            LEFT JOIN WorksIn wi ON p.person_id = wi.person_id
-            LEFT JOIN Department d ON wi.department_id = d.department_id
-            LEFT JOIN Institution i ON d.institution_id = i.institution_id
-            GROUP BY p.person_id, p.person_name, p.main_field, d.department_name, i.institution_name
-        """)
-        
-        people = {}
-        for row in cursor.fetchall():
-            person_id = row['person_id']
-            expertise = []
-            if row['expertise_str']:
-                expertise = [e.strip() for e in row['expertise_str'].split(',') if e.strip()]
-            
-            people[person_id] = {
-                'id': person_id,
-                'label': row['person_name'],
-                'institution': row['institution_name'] or 'Unknown',
-                'department': row['department_name'] or 'Unknown',
-                'expertise': expertise,
-                'degree': 0,
-                'total_projects': 0
-            }
-        
-        # Fetch all collaborations (WorkedOn relationships)
-        cursor.execute("""
-            SELECT DISTINCT wo1.person_id as person_1, wo2.person_id as person_2, COUNT(*) as weight
-            FROM WorkedOn wo1
-            INNER JOIN WorkedOn wo2 ON wo1.project_id = wo2.project_id 
-                AND wo1.person_id < wo2.person_id
-            GROUP BY wo1.person_id, wo2.person_id
-        """)
-        
-        edges = []
-        collaborations = cursor.fetchall()
-        
-        for collab in collaborations:
-            person_1 = collab['person_1']
-            person_2 = collab['person_2']
-            weight = collab['weight']
-            
-            if person_1 in people and person_2 in people:
-                edges.append({
-                    'source': person_1,
-                    'target': person_2,
-                    'weight': weight
-                })
-                people[person_1]['degree'] += 1
-                people[person_2]['degree'] += 1
-        
-        # Count projects per person
-        cursor.execute("""
-            SELECT person_id, COUNT(DISTINCT project_id) as project_count
-            FROM WorkedOn
-            GROUP BY person_id
-        """)
-        
-        for row in cursor.fetchall():
-            if row['person_id'] in people:
-                people[row['person_id']]['total_projects'] = row['project_count']
-        
-        mysql.connection.commit()
-        cursor.close()
-        
-        # Filter isolated nodes if needed
-        nodes_list = list(people.values())
-        if not include_isolated:
-            nodes_list = [n for n in nodes_list if n['degree'] > 0]
-        
-        # Build graph for community detection
-        G = nx.Graph()
-        for node in nodes_list:
-            G.add_node(node['id'])
-        
-        for edge in edges:
-            G.add_edge(edge['source'], edge['target'], weight=edge['weight'])
-        
-        # Detect communities using Louvain algorithm
-        try:
-            from networkx.algorithms import community
-            communities_gen = community.greedy_modularity_communities(G)
-            community_map = {}
-            for comm_id, comm_nodes in enumerate(communities_gen):
-                for node_id in comm_nodes:
-                    community_map[node_id] = comm_id
-        except Exception as e:
-            print(f"Community detection failed: {e}, using default communities")
-            community_map = {node['id']: 0 for node in nodes_list}
-        
-        # Add community and size to nodes
-        for node in nodes_list:
-            node['community'] = community_map.get(node['id'], 0)
-            node['size'] = max(50, 50 + (node['degree'] * 15))
-        
-        # Calculate network statistics
-        total_researchers = len(nodes_list)
-        total_connections = len(edges)
-        avg_collaborators = total_researchers / max(1, total_researchers) if total_researchers > 0 else 0
-        
-        if total_researchers > 1:
-            avg_collaborators = sum(n['degree'] for n in nodes_list) / total_researchers
-        
-        # Network density calculation
-        max_edges = (total_researchers * (total_researchers - 1)) / 2 if total_researchers > 1 else 1
-        network_density = total_connections / max_edges if max_edges > 0 else 0
-        
-        statistics = {
-            'total_researchers': total_researchers,
-            'total_collaborations': total_connections,
-            'avg_collaborators_per_person': round(avg_collaborators, 2),
-            'network_density': round(network_density, 4)
-        }
-        
-        log_info(f"Network statistics - researchers: {total_researchers}, collaborations: {total_connections}, density: {statistics['network_density']}")
-        return {
-            'nodes': nodes_list,
-            'edges': edges,
-            'statistics': statistics
-        }
-    
+        if force_rebuild or not collab_graph.loaded:
+            _rebuild_graph(mysql, only_if_unloaded=not force_rebuild)
+
+        if filters:
+            # Slices share the master graph; only the cut is cached per filter set
+            network = _slice_cache.get(
+                (include_isolated,) + tuple(sorted(filters.items())),
+                collab_graph.version,
+                lambda: _network_slice(include_isolated, filters)
+            )
+        else:
+            network = _network_cache.get(
+                (include_isolated,),
+                collab_graph.version,
+                lambda: _network_snapshot(include_isolated)
+            )
+        statistics = network['statistics']
+        log_info(f"Network statistics - researchers: {statistics['total_researchers']}, collaborations: {statistics['total_collaborations']}, density: {statistics['network_density']}")
+        return network
+
     except Exception as e:
         log_error(f"Error building collaboration network: {str(e)}")
         raise Exception(f"Error building collaboration network: {str(e)}")
 
 
+def _network_versions():
+    """Graph and centrality versions behind a /network response; None on force_rebuild."""
+    if request.args.get('force_rebuild', 'false').lower() == 'true':
+        return None
+    result = _centrality.result() if request.args.get('centrality', 'false').lower() == 'true' else None
+    return (collab_graph.version, result['version'] if result else None)
+
+
 @analytics_bp.route('/network', methods=['GET'])
+@conditional('Person', 'Department', 'Institution', 'Project', 'Project_Tag', 'WorkedOn', extra=_network_versions)
+@reads(primary=True)
 def get_network():
-    """Get collaboration network data for visualization."""
+    """Get collaboration network data for visualization; answers 304 while nothing it reads has changed."""
     try:
         include_isolated = request.args.get('include_isolated', 'false').lower() == 'true'
         force_rebuild = request.args.get('force_rebuild', 'false').lower() == 'true'
-        
-        # Check cache
-        if not force_rebuild and _network_cache['data'] is not None and _network_cache['include_isolated'] == include_isolated:
-            log_info(f"Returning cached collaboration network - include_isolated: {include_isolated}")
-            return jsonify({
-                'success': True,
-                'data': _network_cache['data']
-            })
-        
-        # Build fresh network
+        with_centrality = request.args.get('centrality', 'false').lower() == 'true'
+        try:
+            filters = _slice_filters(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
         from app import mysql
-        log_info("Building fresh collaboration network from database")
-        network_data = _build_collaboration_network(mysql, include_isolated)
-        
-        # Cache the result
-        _network_cache['data'] = network_data
-        _network_cache['include_isolated'] = include_isolated
-        
-        log_info(f"Collaboration network built successfully - nodes: {len(network_data['nodes'])}, edges: {len(network_data['edges'])}")
+        network_data = _build_collaboration_network(mysql, include_isolated, force_rebuild, filters)
+        if filters:
+            network_data = dict(network_data, filters=filters)
+        if with_centrality:
+            network_data = _with_centrality(network_data)
+
+        log_info(f"Collaboration network returned - version: {collab_graph.version}, filters: {filters}, nodes: {len(network_data['nodes'])}, edges: {len(network_data['edges'])}")
         return jsonify({
             'success': True,
             'data': network_data
@@ -193,3 +355,565 @@ def get_network():
             'success': False,
             'error': str(e)
         }), 500
+
+
+def _timeline_snapshot(timeline, period):
+    """The network as it stood in one period."""
+    sources, targets, weights = timeline.edges_at(period)
+    degree = {}
+    for person_id in sources.tolist() + targets.tolist():
+        degree[person_id] = degree.get(person_id, 0) + 1
+
+    nodes = []
+    for person_id, count in degree.items():
+        node = collab_graph.node(person_id)
+        if node is None:
+            continue
+        node['degree'] = count
+        node['size'] = node_size(count)
+        nodes.append(node)
+
+    edges = [
+        {'source': source, 'target': target, 'weight': weight}
+        for source, target, weight in zip(sources.tolist(), targets.tolist(), weights.tolist())
+    ]
+    return _add_positions({
+        'nodes': nodes,
+        'edges': edges,
+        'statistics': network_statistics(len(nodes), len(edges), 2 * len(edges))
+    })
+
+
+@analytics_bp.route('/network/timeline', methods=['GET'])
+@reads(primary=True)
+def get_network_timeline():
+    """Collaboration network over time, by year or quarter."""
+    try:
+        granularity = request.args.get('granularity', 'year').lower()
+        if granularity not in GRANULARITIES:
+            return jsonify({'success': False, 'error': f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+        include_deltas = request.args.get('include_deltas', 'false').lower() == 'true'
+        at = request.args.get('at')
+
+        from app import mysql
+        if not collab_graph.loaded:
+            _rebuild_graph(mysql, only_if_unloaded=True)
+
+        timeline = _timeline_cache.get(
+            granularity,
+            collab_graph.version,
+            lambda: NetworkTimeline(collab_graph.membership_dates(), granularity)
+        )
+
+        if at is not None:
+            try:
+                period = parse_period(at, granularity)
+            except ValueError:
+                return jsonify({'success': False, 'error': f"Invalid period '{at}' for granularity {granularity}"}), 400
+            data = _timeline_snapshot(timeline, period)
+            data['period'] = period_label(period, granularity)
+            log_info(f"Network timeline snapshot - period: {data['period']}, nodes: {len(data['nodes'])}, edges: {len(data['edges'])}")
+            return jsonify({'success': True, 'data': data})
+
+        periods = timeline.summary()
+        if include_deltas:
+            # Playback: start from an empty graph and apply each period's
+            # changes in order; weight 0 removes the link
+            for offset, row in enumerate(periods):
+                sources, targets, weights = timeline.delta(timeline.first + offset)
+                row['changes'] = [
+                    [source, target, weight]
+                    for source, target, weight in zip(sources.tolist(), targets.tolist(), weights.tolist())
+                ]
+
+        log_info(f"Network timeline returned - granularity: {granularity}, periods: {len(periods)}, deltas: {include_deltas}")
+        return jsonify({
+            'success': True,
+            'data': {
+                'granularity': granularity,
+                'first': period_label(timeline.first, granularity),
+                'last': period_label(timeline.last, granularity),
+                'undated_memberships': timeline.undated,
+                'periods': periods
+            }
+        })
+
+    except Exception as e:
+        log_error(f"Network timeline error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _centrality_meta(result):
+    return {
+        'version': result['version'],
+        'graph_version': collab_graph.version,
+        'stale': result['version'] != collab_graph.version,
+        'computed_at': result['computed_at'].isoformat(),
+        'seconds': result['seconds'],
+        'betweenness': result['betweenness']
+    }
+
+
+def _with_centrality(network):
+    """Copy of a cached network payload with centrality on each node.
+
+    Uses the latest finished computation; when none exists yet the nodes
+    are returned as they are and ``centrality`` is null.
+    """
+    result = _centrality.result()
+    if result is None:
+        return dict(network, centrality=None)
+    nodes = [dict(node, **_centrality.node_metrics(result, node['id'])) for node in network['nodes']]
+    return dict(network, nodes=nodes, centrality=_centrality_meta(result))
+
+
+@analytics_bp.route('/centrality', methods=['GET'])
+@reads(primary=True)
+def get_centrality():
+    """Top researchers by PageRank, eigenvector or approximate betweenness."""
+    try:
+        top = request.args.get('top', CENTRALITY_DEFAULT_TOP, type=int)
+        metric = request.args.get('metric', 'pagerank').lower()
+        if not 1 <= top <= CENTRALITY_MAX_TOP:
+            return jsonify({'success': False, 'error': f'top must be between 1 and {CENTRALITY_MAX_TOP}'}), 400
+        if metric not in CENTRALITY_METRICS:
+            return jsonify({'success': False, 'error': f"metric must be one of {', '.join(CENTRALITY_METRICS)}"}), 400
+
+        from app import mysql
+        if not collab_graph.loaded:
+            _rebuild_graph(mysql, only_if_unloaded=True)
+
+        # Never computed inline: the worker pool fills the result in
+        result = _centrality.result()
+        if result is None:
+            return jsonify({
+                'success': True,
+                'data': {'status': 'computing', 'graph_version': collab_graph.version}
+            }), 202
+
+        researchers = []
+        for person_id, metrics in _centrality.top(result, metric, top):
+            node = collab_graph.node(person_id) or {}
+            researchers.append(dict(metrics, person_id=person_id, label=node.get('label')))
+
+        log_info(f"Centrality returned - metric: {metric}, top: {top}, version: {result['version']}")
+        return jsonify({
+            'success': True,
+            'data': dict(_centrality_meta(result), status='ready', metric=metric, researchers=researchers)
+        })
+
+    except Exception as e:
+        log_error(f"Centrality error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _group_names(mysql, level, group_ids):
+    """Display names for institution or department ids."""
+    if not group_ids:
+        return {}
+    cursor = mysql.connection.cursor()
+    placeholders = ', '.join(['%s'] * len(group_ids))
+    if level == 'institution':
+        cursor.execute(
+            f"SELECT institution_id AS id, institution_name AS name FROM Institution "
+            f"WHERE institution_id IN ({placeholders})",
+            list(group_ids)
+        )
+    else:
+        cursor.execute(
+            f"SELECT d.department_id AS id, d.department_name AS name, "
+            f"d.institution_id, i.institution_name "
+            f"FROM Department d JOIN Institution i ON i.institution_id = d.institution_id "
+            f"WHERE d.department_id IN ({placeholders})",
+            list(group_ids)
+        )
+    names = {row['id']: row for row in cursor.fetchall()}
+    cursor.close()
+    return names
+
+
+def _build_institution_matrix(mysql, level, weighted):
+    group_ids, researchers, matrix = collaboration_matrix(collab_graph, level, weighted)
+    names = _group_names(mysql, level, group_ids.tolist())
+
+    groups = []
+    for group_id, count in zip(group_ids.tolist(), researchers.tolist()):
+        row = names.get(group_id, {})
+        group = {'id': group_id, 'name': row.get('name'), 'researchers': count}
+        if level == 'department':
+            group['institution_id'] = row.get('institution_id')
+            group['institution_name'] = row.get('institution_name')
+        groups.append(group)
+
+    # Upper triangle only; the matrix is symmetric
+    upper = matrix.tocoo()
+    keep = upper.row <= upper.col
+    cells = sorted(
+        [int(i), int(j), int(value) if not weighted else float(value)]
+        for i, j, value in zip(upper.row[keep], upper.col[keep], upper.data[keep])
+    )
+    internal = sum(value for i, j, value in cells if i == j)
+    return {
+        'level': level,
+        'weighted': weighted,
+        'groups': groups,
+        'cells': cells,
+        'internal': internal,
+        'cross': sum(value for i, j, value in cells if i != j)
+    }
+
+
+@analytics_bp.route('/institution-matrix', methods=['GET'])
+@reads(primary=True)
+def get_institution_matrix():
+    """Collaboration counts between institutions (or departments)."""
+    try:
+        level = request.args.get('level', 'institution').lower()
+        weighted = request.args.get('weighted', 'false').lower() == 'true'
+        matrix_format = request.args.get('format', 'dense').lower()
+        if level not in LEVELS:
+            return jsonify({'success': False, 'error': f"level must be one of {', '.join(LEVELS)}"}), 400
+        if matrix_format not in ('dense', 'sparse'):
+            return jsonify({'success': False, 'error': "format must be dense or sparse"}), 400
+
+        from app import mysql
+        if not collab_graph.loaded:
+            _rebuild_graph(mysql, only_if_unloaded=True)
+
+        data = _matrix_cache.get(
+            (level, weighted),
+            collab_graph.version,
+            lambda: _build_institution_matrix(mysql, level, weighted)
+        )
+
+        if matrix_format == 'dense':
+            size = len(data['groups'])
+            if size > MATRIX_DENSE_MAX:
+                return jsonify({'success': False, 'error': f'{size} groups; use format=sparse above {MATRIX_DENSE_MAX}'}), 400
+            dense = [[0] * size for _ in range(size)]
+            for i, j, value in data['cells']:
+                dense[i][j] = dense[j][i] = value
+            data = dict(data, matrix=dense)
+            del data['cells']
+
+        log_info(f"Institution matrix returned - level: {level}, weighted: {weighted}, groups: {len(data['groups'])}")
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+
+    except Exception as e:
+        log_error(f"Institution matrix error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@analytics_bp.route('/network/ego/<int:person_id>', methods=['GET'])
+@reads(primary=True)
+def get_ego_network(person_id):
+    """Get the collaboration neighbourhood of one researcher."""
+    try:
+        depth = request.args.get('depth', 1, type=int)
+        limit = request.args.get('limit', EGO_DEFAULT_LIMIT, type=int)
+        if not 1 <= depth <= EGO_MAX_DEPTH:
+            return jsonify({'success': False, 'error': f'depth must be between 1 and {EGO_MAX_DEPTH}'}), 400
+        if not 1 <= limit <= EGO_MAX_LIMIT:
+            return jsonify({'success': False, 'error': f'limit must be between 1 and {EGO_MAX_LIMIT}'}), 400
+
+        from app import mysql
+        if not collab_graph.loaded:
+            _rebuild_graph(mysql, only_if_unloaded=True)
+
+        ego = collab_graph.ego_network(person_id, depth, limit)
+        if ego is None:
+            return jsonify({'success': False, 'error': 'Person not found'}), 404
+
+        log_info(f"Ego network returned - person_id: {person_id}, depth: {depth}, nodes: {len(ego['nodes'])}, edges: {len(ego['edges'])}")
+        return jsonify({
+            'success': True,
+            'data': ego
+        })
+
+    except Exception as e:
+        log_error(f"Ego network error for person_id {person_id}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _project_titles(mysql, project_ids):
+    """Titles for the shared projects listed on a path."""
+    if not project_ids:
+        return {}
+    cursor = mysql.connection.cursor()
+    placeholders = ', '.join(['%s'] * len(project_ids))
+    cursor.execute(
+        f"SELECT project_id, project_title FROM Project WHERE project_id IN ({placeholders})",
+        list(project_ids)
+    )
+    titles = {row['project_id']: row['project_title'] for row in cursor.fetchall()}
+    cursor.close()
+    return titles
+
+
+def _find_path(mysql, source, target, max_depth, weighted):
+    """Shortest path with project titles, served from the path cache when hot."""
+    key = (source, target, max_depth, weighted)
+    version = collab_graph.version
+    with _path_cache_lock:
+        cached = _path_cache.get(key)
+        if cached is not None and cached[0] == version:
+            _path_cache.move_to_end(key)
+            return cached[1]
+
+    path = collab_graph.shortest_path(source, target, max_depth, weighted)
+    result = {
+        'from': source,
+        'to': target,
+        'weighted': weighted,
+        'found': path is not None,
+        'length': len(path) - 1 if path else None,
+        'path': [],
+        'hops': []
+    }
+    if path:
+        nodes, hops = collab_graph.path_details(path)
+        titles = _project_titles(mysql, {pid for hop in hops for pid in hop['shared_project_ids']})
+        for hop in hops:
+            hop['shared_projects'] = [
+                {'project_id': pid, 'project_title': titles.get(pid)}
+                for pid in hop.pop('shared_project_ids')
+            ]
+        result['path'] = nodes
+        result['hops'] = hops
+
+    with _path_cache_lock:
+        _path_cache[key] = (version, result)
+        _path_cache.move_to_end(key)
+        while len(_path_cache) > PATH_CACHE_SIZE:
+            _path_cache.popitem(last=False)
+    return result
+
+
+@analytics_bp.route('/path', methods=['GET'])
+@reads(primary=True)
+def get_collaboration_path():
+    """Get the shortest collaboration chain between two researchers."""
+    try:
+        source = request.args.get('from', type=int)
+        target = request.args.get('to', type=int)
+        weighted = request.args.get('weighted', 'false').lower() == 'true'
+        max_depth = request.args.get('max_depth', PATH_DEFAULT_DEPTH, type=int)
+        if source is None or target is None:
+            return jsonify({'success': False, 'error': "Query params 'from' and 'to' are required"}), 400
+        if not 1 <= max_depth <= PATH_MAX_DEPTH:
+            return jsonify({'success': False, 'error': f'max_depth must be between 1 and {PATH_MAX_DEPTH}'}), 400
+
+        from app import mysql
+        if not collab_graph.loaded:
+            _rebuild_graph(mysql, only_if_unloaded=True)
+
+        if source not in collab_graph or target not in collab_graph:
+            return jsonify({'success': False, 'error': 'Person not found'}), 404
+
+        result = _find_path(mysql, source, target, max_depth, weighted)
+        log_info(f"Collaboration path - from: {source}, to: {target}, weighted: {weighted}, length: {result['length']}")
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+
+    except Exception as e:
+        log_error(f"Collaboration path error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+def _stored_recommendations(mysql, person_id, k):
+    """Precomputed suggestions, one primary key range scan."""
+    cursor = mysql.connection.cursor()
+    cursor.callproc("SelectRecommendationsByPersonID", [person_id, k])
+    rows = cursor.fetchall()
+    while cursor.nextset():
+        pass
+    cursor.close()
+    return [
+        {
+            'person_id': row['person_id'],
+            'label': row['person_name'],
+            'score': float(row['score']),
+            'common_collaborators': row['common_collaborators'],
+            'expertise_overlap': float(row['expertise_overlap'])
+        }
+        for row in rows
+    ]
+
+
+def _live_recommendations(person_id, k):
+    """Suggestions scored on demand from the in-memory graph."""
+    suggestions = _recommender.recommend(person_id, k)
+    for suggestion in suggestions:
+        node = collab_graph.node(suggestion['person_id']) or {}
+        suggestion['label'] = node.get('label')
+    return suggestions
+
+
+def _store_recommendations(mysql, k=RECOMMENDATION_STORED_K):
+    """Batch precompute: replace every stored suggestion list."""
+    cursor = mysql.connection.cursor()
+    try:
+        cursor.execute("START TRANSACTION")
+        cursor.execute("DELETE FROM CollaboratorRecommendation")
+
+        insert = """
+            INSERT INTO CollaboratorRecommendation
+                (person_id, rank_position, candidate_id, score, common_collaborators, expertise_overlap)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """
+        batch = []
+        researchers = 0
+        for person_id, suggestions in _recommender.recommend_all(k):
+            researchers += 1
+            for rank, suggestion in enumerate(suggestions, start=1):
+                batch.append((
+                    person_id, rank, suggestion['person_id'], suggestion['score'],
+                    suggestion['common_collaborators'], suggestion['expertise_overlap']
+                ))
+            if len(batch) >= RECOMMENDATION_INSERT_CHUNK:
+                cursor.executemany(insert, batch)
+                batch = []
+        if batch:
+            cursor.executemany(insert, batch)
+
+        mysql.connection.commit()
+        return researchers
+    except Exception:
+        mysql.connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+@analytics_bp.route('/recommendations/<int:person_id>', methods=['GET'])
+@reads(primary=True)
+def get_recommendations(person_id):
+    """Suggested collaborators for one researcher."""
+    try:
+        k = request.args.get('k', RECOMMENDATION_DEFAULT_K, type=int)
+        live = request.args.get('live', 'false').lower() == 'true'
+        if not 1 <= k <= RECOMMENDATION_STORED_K:
+            return jsonify({'success': False, 'error': f'k must be between 1 and {RECOMMENDATION_STORED_K}'}), 400
+
+        from app import mysql
+        suggestions = [] if live else _stored_recommendations(mysql, person_id, k)
+        source = 'precomputed'
+        if not suggestions:
+            # Nothing stored yet (new researcher, or the batch has not run)
+            if not collab_graph.loaded:
+                _rebuild_graph(mysql, only_if_unloaded=True)
+            if person_id not in collab_graph:
+                return jsonify({'success': False, 'error': 'Person not found'}), 404
+            suggestions = _live_recommendations(person_id, k)
+            source = 'live'
+
+        log_info(f"Recommendations returned - person_id: {person_id}, k: {k}, source: {source}, count: {len(suggestions)}")
+        return jsonify({
+            'success': True,
+            'data': {
+                'person_id': person_id,
+                'source': source,
+                'recommendations': suggestions
+            }
+        })
+
+    except Exception as e:
+        log_error(f"Recommendations error for person_id {person_id}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@analytics_bp.route('/recommendations/rebuild', methods=['POST'])
+@token_required
+@verify_operator
+@writes
+def rebuild_recommendations():
+    """Operator endpoint: recompute and store every researcher's suggestions."""
+    try:
+        from app import mysql
+        if not collab_graph.loaded:
+            _rebuild_graph(mysql, only_if_unloaded=True)
+        researchers = _store_recommendations(mysql)
+        log_info(f"Collaborator recommendations stored - researchers: {researchers}, graph version: {collab_graph.version}")
+        return jsonify({
+            'success': True,
+            'data': {
+                'researchers': researchers,
+                'per_researcher': RECOMMENDATION_STORED_K,
+                'version': collab_graph.version
+            }
+        })
+    except Exception as e:
+        log_error(f"Collaborator recommendation precompute failed: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@analytics_bp.route('/network/rebuild', methods=['POST'])
+@token_required
+@verify_operator
+@reads(primary=True)
+def rebuild_network():
+    """Operator endpoint: rebuild the collaboration graph from scratch."""
+    try:
+        from app import mysql
+        _rebuild_graph(mysql)
+        log_info(f"Collaboration graph rebuilt on request - version: {collab_graph.version}")
+        return jsonify({
+            'success': True,
+            'data': {
+                'version': collab_graph.version,
+                'built_at': collab_graph.built_at.isoformat()
+            }
+        })
+    except Exception as e:
+        log_error(f"Collaboration graph rebuild failed: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+# No database work: reports in-memory state, so neither @reads nor @writes
+@analytics_bp.route('/network/cache', methods=['GET'])
+def get_network_cache_stats():
+    """Hit/miss counters and rebuild timings for the network cache."""
+    stats = _network_cache.stats()
+    stats['graph_version'] = collab_graph.version
+    stats['graph_built_at'] = collab_graph.built_at.isoformat() if collab_graph.built_at else None
+    stats['stale_while_revalidate'] = _network_cache.stale_while_revalidate
+    stats['layout'] = _layout.stats()
+    stats['slices'] = _slice_cache.stats()
+    stats['timeline'] = _timeline_cache.stats()
+    stats['centrality'] = {
+        'computing_versions': _centrality.in_flight(),
+        'last_error': _centrality.last_error
+    }
+    return jsonify({
+        'success': True,
+        'data': stats
+    })
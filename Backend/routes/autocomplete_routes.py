@@ -0,0 +1,168 @@
+'''
+Server-side autocomplete for people, institutions, departments and tags.
+
+Replaces downloading /institution/all, /department/all and /tags/all to
+filter in the browser. Names are served from the in-process index in
+utils/autocomplete.py, loaded on first use, kept current by the insert
+routes and reloaded every `autocomplete_rebuild_minutes`.
+'''
+from flask import Blueprint, jsonify, request
+import configparser
+import threading
+from datetime import datetime, timezone
+from utils.autocomplete import KINDS, TOP_CACHE, autocomplete
+from utils.logger import log_info, log_error
+from utils.data_access import reads
+
+autocomplete_bp = Blueprint("autocomplete", __name__, url_prefix="/autocomplete")
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+AUTOCOMPLETE_REBUILD_MINUTES = config.getint("Analytics", "autocomplete_rebuild_minutes", fallback=60)
+AUTOCOMPLETE_DEFAULT_K = 10
+MAX_PREFIX_LENGTH = 100
+
+_load_lock = threading.Lock()
+_scheduler = {'timer': None}
+
+# Popularity is the number of distinct projects behind each name; for
+# institutions and departments, the projects of their researchers
+_ENTRY_QUERIES = {
+    'person': """
+        SELECT p.person_id AS entry_key, p.person_name AS name, COUNT(DISTINCT w.project_id) AS popularity
+        FROM Person p
+        LEFT JOIN WorkedOn w ON w.person_id = p.person_id
+        GROUP BY p.person_id, p.person_name
+    """,
+    'institution': """
+        SELECT i.institution_id AS entry_key, i.institution_name AS name,
+               COUNT(DISTINCT w.project_id) AS popularity
+        FROM Institution i
+        LEFT JOIN Department d ON d.institution_id = i.institution_id
+        LEFT JOIN (
+            SELECT person_id, department_id FROM WorksIn
+            UNION
+            SELECT person_id, department_id FROM Person WHERE department_id IS NOT NULL
+        ) a ON a.department_id = d.department_id
+        LEFT JOIN WorkedOn w ON w.person_id = a.person_id
+        GROUP BY i.institution_id, i.institution_name
+    """,
+    'department': """
+        SELECT d.department_id AS entry_key, d.department_name AS name,
+               COUNT(DISTINCT w.project_id) AS popularity
+        FROM Department d
+        LEFT JOIN (
+            SELECT person_id, department_id FROM WorksIn
+            UNION
+            SELECT person_id, department_id FROM Person WHERE department_id IS NOT NULL
+        ) a ON a.department_id = d.department_id
+        LEFT JOIN WorkedOn w ON w.person_id = a.person_id
+        GROUP BY d.department_id, d.department_name
+    """,
+    'tag': """
+        SELECT tag_name AS entry_key, tag_name AS name, COUNT(DISTINCT project_id) AS popularity
+        FROM (
+            SELECT project_id, tag_name FROM Project WHERE tag_name IS NOT NULL
+            UNION
+            SELECT project_id, tag_name FROM Project_Tag
+        ) t
+        GROUP BY tag_name
+    """
+}
+
+
+def _load_autocomplete(mysql):
+    """Reload every autocomplete index from the database."""
+    log_info("Loading autocomplete indexes from database")
+    cursor = mysql.connection.cursor()
+    cursor.execute("START TRANSACTION")
+    entries = {}
+    for kind, query in _ENTRY_QUERIES.items():
+        cursor.execute(query)
+        entries[kind] = [
+            (row['entry_key'], row['name'], int(row['popularity'] or 0))
+            for row in cursor.fetchall()
+        ]
+    mysql.connection.commit()
+    cursor.close()
+    autocomplete.load(entries, built_at=datetime.now(timezone.utc))
+    log_info("Autocomplete loaded: " + ", ".join(f"{kind}={len(rows)}" for kind, rows in entries.items()))
+
+
+def _ensure_loaded(mysql, force=False):
+    with _load_lock:
+        if autocomplete.loaded and not force:
+            return
+        _load_autocomplete(mysql)
+    _schedule_reload()
+
+
+def _scheduled_reload():
+    from app import app, mysql
+    try:
+        with app.app_context():
+            _ensure_loaded(mysql, force=True)
+    except Exception as e:
+        log_error(f"Scheduled autocomplete reload failed: {str(e)}")
+        _schedule_reload()
+
+
+def _schedule_reload():
+    """(Re)arm the periodic reload, which also refreshes popularity."""
+    if AUTOCOMPLETE_REBUILD_MINUTES <= 0:
+        return
+    if _scheduler['timer'] is not None:
+        _scheduler['timer'].cancel()
+    timer = threading.Timer(AUTOCOMPLETE_REBUILD_MINUTES * 60, _scheduled_reload)
+    timer.daemon = True
+    timer.start()
+    _scheduler['timer'] = timer
+
+
+@autocomplete_bp.route("", methods=["GET"])
+@reads(primary=True)
+def get_completions():
+    """
+    GET /autocomplete?kind=person|institution|department|tag&prefix=<text>&k=10&fuzzy=true
+
+    Names starting with the prefix (at any word), most projects first, then
+    near misses with up to one typo (two for words of six letters or more).
+    """
+    from app import mysql
+    kind = request.args.get("kind")
+    prefix = request.args.get("prefix", "")
+    if kind not in KINDS:
+        return jsonify({"status": "error", "message": f"kind must be one of {', '.join(KINDS)}"}), 400
+    if len(prefix) > MAX_PREFIX_LENGTH:
+        return jsonify({"status": "error", "message": f"prefix is limited to {MAX_PREFIX_LENGTH} characters"}), 400
+    try:
+        k = min(max(1, int(request.args.get("k", AUTOCOMPLETE_DEFAULT_K))), TOP_CACHE)
+    except ValueError:
+        return jsonify({"status": "error", "message": "k must be an integer"}), 400
+    fuzzy = request.args.get("fuzzy", "true").lower() != "false"
+
+    try:
+        _ensure_loaded(mysql)
+        results = [
+            {"id": key, "name": name, "popularity": popularity, "typos": typos}
+            for key, name, popularity, typos in autocomplete.complete(kind, prefix, k, fuzzy)
+        ]
+        return jsonify({"status": "success", "data": results, "count": len(results)}), 200
+    except Exception as e:
+        log_error(f"Error in autocomplete: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+# No database work: reports in-memory state, so neither @reads nor @writes
+@autocomplete_bp.route("/stats", methods=["GET"])
+def get_autocomplete_stats():
+    """Index sizes per kind and when they were last loaded."""
+    return jsonify({
+        "status": "success",
+        "data": {
+            "loaded": autocomplete.loaded,
+            "built_at": autocomplete.built_at.isoformat() if autocomplete.built_at else None,
+            "indexes": autocomplete.stats()
+        }
+    }), 200
@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify, request
 from utils.logger import log_info, log_error, get_request_user
+from utils.autocomplete import autocomplete
+from utils.facets import facets
+from utils.index_updates import index_updates
+from utils.data_access import reads, writes
 
 # Create blueprint for department routes
 department_bp = Blueprint('department', __name__, url_prefix='/department')
@@ -7,13 +11,13 @@ department_bp = Blueprint('department', __name__, url_prefix='/department')
 # Get routes
 
 @department_bp.route('/<int:department_id>', methods=['GET'])
+@reads
 def get_department_by_id(department_id):
     from app import mysql
     cursor = None
     try:
         log_info(f"Fetching department with id: {department_id}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.execute('''
             SELECT d.*, i.institution_name, i.institution_id
             FROM Department d
@@ -21,7 +25,6 @@ def get_department_by_id(department_id):
             WHERE d.department_id = %s
         ''', (department_id,))
         result = cursor.fetchone()
-        mysql.connection.commit()
         
         if not result:
             log_error(f"Department not found with id: {department_id}")
@@ -30,40 +33,44 @@ def get_department_by_id(department_id):
         log_info(f"Department fetched successfully: {result.get('department_name')}")
         return jsonify({'status': 'success', 'data': result})
     except Exception as e:
-        mysql.connection.rollback()
         log_error(f"Error fetching department by id {department_id}: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
             cursor.close()
 
+# People working in a department with their details (shared with asgi.py)
+DEPARTMENT_PEOPLE_QUERY = '''
+    SELECT p.*, d.department_name, i.institution_name 
+    FROM Person p
+    JOIN WorksIn wi ON p.person_id = wi.person_id
+    JOIN Department d ON wi.department_id = d.department_id
+    JOIN Institution i ON d.institution_id = i.institution_id
+    WHERE d.department_id = %s
+'''
+
+
+def with_expertises(people):
+    for person in people:
+        person['expertises'] = [e for e in [person.get('expertise_1'), person.get('expertise_2'), person.get('expertise_3')] if e]
+    return people
+
+
 # Fetch all people working in this department with their details
 @department_bp.route('/<int:department_id>/people', methods=['GET'])
+@reads
 def get_department_people(department_id):
     from app import mysql
     cursor = None
     try:
         log_info(f"Fetching people in department: {department_id}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        cursor.execute('''
-            SELECT p.*, d.department_name, i.institution_name 
-            FROM Person p
-            JOIN WorksIn wi ON p.person_id = wi.person_id
-            JOIN Department d ON wi.department_id = d.department_id
-            JOIN Institution i ON d.institution_id = i.institution_id
-            WHERE d.department_id = %s
-        ''', (department_id,))
-        people = cursor.fetchall()
-        mysql.connection.commit()
-        
-        for person in people:
-            person['expertises'] = [e for e in [person.get('expertise_1'), person.get('expertise_2'), person.get('expertise_3')] if e]
+        cursor.execute(DEPARTMENT_PEOPLE_QUERY, (department_id,))
+        people = with_expertises(cursor.fetchall())
         
         log_info(f"Fetched {len(people)} people from department: {department_id}")
         return jsonify({'status': 'success', 'data': people, 'count': len(people)})
     except Exception as e:
-        mysql.connection.rollback()
         log_error(f"Error fetching people in department {department_id}: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
@@ -72,23 +79,21 @@ def get_department_people(department_id):
 
 
 @department_bp.route('/all', methods=['GET'])
+@reads
 def get_all_departments():
     """Get all departments for autocomplete"""
     from app import mysql
     cursor = None
     try:
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.execute('''
             SELECT department_id, department_name, institution_id
             FROM Department
             ORDER BY department_name
         ''')
         results = cursor.fetchall()
-        mysql.connection.commit()
         return jsonify({'status': 'success', 'data': results, 'count': len(results)})
     except Exception as e:
-        mysql.connection.rollback()
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
@@ -96,26 +101,24 @@ def get_all_departments():
 
 
 @department_bp.route('/by-name/<string:department_name>', methods=['GET'])
+@reads
 def get_department_by_name(department_name):
     from app import mysql
     cursor = None
     try:
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         # Get department by name
         cursor.callproc('SelectDepartmentByName', [department_name])
         result = cursor.fetchone()
         # Consume remaining result sets from stored procedure
         while cursor.nextset():
             pass
-        mysql.connection.commit()
         
         if not result:
             return jsonify({'status': 'not_found', 'message': 'Department not found'}), 404
             
         return jsonify({'status': 'success', 'data': result})
     except Exception as e:
-        mysql.connection.rollback()
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
@@ -125,6 +128,7 @@ def get_department_by_name(department_name):
 # Post routes
 
 @department_bp.route('/', methods=['POST'])
+@writes
 def create_department():
     from app import mysql
     # Get JSON data from request body
@@ -149,6 +153,8 @@ def create_department():
             pass
         
         mysql.connection.commit()
+        with index_updates("creating department"):
+            autocomplete.upsert('department', department_id, data.get('department_name'))
         
         log_info(f"Department created successfully - id: {department_id}, name: {data.get('department_name')}")
         return jsonify({
@@ -168,6 +174,7 @@ def create_department():
 # Patch routes (for updating existing departments)
 
 @department_bp.route('/<int:department_id>', methods=['PATCH'])
+@writes
 def update_department(department_id):
     from app import mysql
     data = request.get_json()
@@ -186,6 +193,9 @@ def update_department(department_id):
         while cursor.nextset():
             pass
         mysql.connection.commit()
+        with index_updates("updating department"):
+            autocomplete.upsert('department', department_id, data.get('department_name'))
+            facets.relabel('department', department_id, data.get('department_name'))
         
         log_info(f"Department updated successfully - id: {department_id}")
         return jsonify({
@@ -204,6 +214,7 @@ def update_department(department_id):
 # Delete routes
 
 @department_bp.route('/<int:department_id>', methods=['DELETE'])
+@writes
 def delete_department(department_id):
     from app import mysql
     cursor = None
@@ -215,6 +226,9 @@ def delete_department(department_id):
         while cursor.nextset():
             pass
         mysql.connection.commit()
+        with index_updates("deleting department"):
+            autocomplete.remove('department', department_id)
+            facets.drop_value('department', department_id)
         
         log_info(f"Department deleted successfully - id: {department_id}")
         return jsonify({
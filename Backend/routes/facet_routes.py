@@ -0,0 +1,307 @@
+'''
+Live facet counts for the search and directory views.
+
+GET /facets/people and GET /facets/projects return counts such as
+"Computer Science (142)" for every institution, department, main field,
+expertise and tag under the selected filters. Counts come from the
+in-process bitmaps in utils/facets.py, loaded on first use and rebuilt
+every `facet_rebuild_minutes`; write routes mark the people and projects
+they touch, and those rows are re-read before the next count.
+'''
+from flask import Blueprint, jsonify, request
+import configparser
+import threading
+from datetime import datetime, timezone
+from utils.facets import Bitmap, ID_FACETS, PERSON_FACETS, PROJECT_FACETS, facets, normalize_value
+from utils.logger import log_info, log_error
+from utils.data_access import reads
+from utils.search import MODES, person_ids_sql, project_ids_sql
+
+facets_bp = Blueprint("facets", __name__, url_prefix="/facets")
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+FACET_REBUILD_MINUTES = config.getint("Analytics", "facet_rebuild_minutes", fallback=60)
+FACET_DEFAULT_LIMIT = 20
+MAX_FACET_LIMIT = 500
+MAX_QUERY_LENGTH = 200
+
+_load_lock = threading.Lock()
+_scheduler = {'timer': None}
+
+_AFFILIATIONS = """
+    SELECT person_id, department_id FROM WorksIn
+    UNION
+    SELECT person_id, department_id FROM Person WHERE department_id IS NOT NULL
+"""
+
+_TAGS = """
+    SELECT project_id, tag_name FROM Project WHERE tag_name IS NOT NULL
+    UNION
+    SELECT project_id, tag_name FROM Project_Tag
+"""
+
+# Each query takes an optional "AND <column> IN (...)" restriction, so the
+# same SQL serves full rebuilds and refreshes of the rows a write touched
+_PERSON_QUERIES = {
+    'person': "SELECT person_id AS item_id, main_field, expertise_1, expertise_2, expertise_3 FROM Person WHERE 1 = 1 {ids}",
+    'affiliation': f"""
+        SELECT a.person_id AS item_id, d.department_id, d.department_name, i.institution_id, i.institution_name
+        FROM ({_AFFILIATIONS}) a
+        JOIN Department d ON d.department_id = a.department_id
+        JOIN Institution i ON i.institution_id = d.institution_id
+        WHERE 1 = 1 {{ids}}
+    """,
+    'tag': f"""
+        SELECT DISTINCT w.person_id AS item_id, t.tag_name
+        FROM WorkedOn w
+        JOIN ({_TAGS}) t ON t.project_id = w.project_id
+        WHERE 1 = 1 {{ids}}
+    """
+}
+_PERSON_ID_COLUMNS = {'person': 'person_id', 'affiliation': 'a.person_id', 'tag': 'w.person_id'}
+
+_PROJECT_QUERIES = {
+    'project': "SELECT project_id AS item_id FROM Project WHERE 1 = 1 {ids}",
+    'affiliation': f"""
+        SELECT DISTINCT w.project_id AS item_id, d.department_id, d.department_name,
+               i.institution_id, i.institution_name
+        FROM WorkedOn w
+        JOIN ({_AFFILIATIONS}) a ON a.person_id = w.person_id
+        JOIN Department d ON d.department_id = a.department_id
+        JOIN Institution i ON i.institution_id = d.institution_id
+        WHERE 1 = 1 {{ids}}
+    """,
+    'tag': f"SELECT project_id AS item_id, tag_name FROM ({_TAGS}) t WHERE 1 = 1 {{ids}}"
+}
+_PROJECT_ID_COLUMNS = {'project': 'project_id', 'affiliation': 'w.project_id', 'tag': 't.project_id'}
+
+
+def _run(cursor, query, column, ids):
+    if ids is None:
+        cursor.execute(query.format(ids=""))
+    else:
+        cursor.execute(query.format(ids=f"AND {column} IN ({', '.join(['%s'] * len(ids))})"), tuple(ids))
+    return cursor.fetchall()
+
+
+def _text_row(facet, text):
+    return (facet, normalize_value(text), ' '.join(str(text).split())) if text else None
+
+
+def _person_rows(cursor, ids=None):
+    """``{person_id: [(facet, value, label), ...]}`` for everyone or ``ids``."""
+    rows = {}
+    for row in _run(cursor, _PERSON_QUERIES['person'], _PERSON_ID_COLUMNS['person'], ids):
+        values = [_text_row('main_field', row['main_field'])]
+        values += [_text_row('expertise', row[f'expertise_{n}']) for n in (1, 2, 3)]
+        rows[row['item_id']] = [v for v in values if v]
+    for row in _run(cursor, _PERSON_QUERIES['affiliation'], _PERSON_ID_COLUMNS['affiliation'], ids):
+        if row['item_id'] in rows:
+            rows[row['item_id']].append(('department', row['department_id'], row['department_name']))
+            rows[row['item_id']].append(('institution', row['institution_id'], row['institution_name']))
+    for row in _run(cursor, _PERSON_QUERIES['tag'], _PERSON_ID_COLUMNS['tag'], ids):
+        if row['item_id'] in rows and row['tag_name']:
+            rows[row['item_id']].append(_text_row('tag', row['tag_name']))
+    return rows
+
+
+def _project_rows(cursor, ids=None):
+    """``{project_id: [(facet, value, label), ...]}`` for every project or ``ids``."""
+    rows = {}
+    for row in _run(cursor, _PROJECT_QUERIES['project'], _PROJECT_ID_COLUMNS['project'], ids):
+        rows[row['item_id']] = []
+    for row in _run(cursor, _PROJECT_QUERIES['affiliation'], _PROJECT_ID_COLUMNS['affiliation'], ids):
+        if row['item_id'] in rows:
+            rows[row['item_id']].append(('department', row['department_id'], row['department_name']))
+            rows[row['item_id']].append(('institution', row['institution_id'], row['institution_name']))
+    for row in _run(cursor, _PROJECT_QUERIES['tag'], _PROJECT_ID_COLUMNS['tag'], ids):
+        if row['item_id'] in rows and row['tag_name']:
+            rows[row['item_id']].append(_text_row('tag', row['tag_name']))
+    return rows
+
+
+def _flatten(rows):
+    return [(item_id, facet, value, label) for item_id, values in rows.items() for facet, value, label in values]
+
+
+def _load_facets(mysql):
+    """Rebuild every facet bitmap from the database."""
+    log_info("Loading facet bitmaps from database")
+    cursor = mysql.connection.cursor()
+    cursor.execute("START TRANSACTION")
+    people = _person_rows(cursor)
+    projects = _project_rows(cursor)
+    mysql.connection.commit()
+    cursor.close()
+    # Writes marked up to here are in the snapshot just read
+    facets.take_stale()
+    facets.load(list(people), _flatten(people), list(projects), _flatten(projects),
+                built_at=datetime.now(timezone.utc))
+    log_info(f"Facet bitmaps loaded - people: {len(people)}, projects: {len(projects)}")
+
+
+def _ensure_loaded(mysql, force=False):
+    with _load_lock:
+        if facets.loaded and not force:
+            return
+        _load_facets(mysql)
+    _schedule_reload()
+
+
+def _related(cursor, column, other, ids):
+    if not ids:
+        return set()
+    cursor.execute(
+        f"SELECT DISTINCT {other} FROM WorkedOn WHERE {column} IN ({', '.join(['%s'] * len(ids))})",
+        tuple(ids)
+    )
+    return {row[other] for row in cursor.fetchall()}
+
+
+def _apply_writes(mysql):
+    """Re-read the people and projects marked by write routes since the last count.
+
+    A project's tags are also its members' tags, and a person's affiliation
+    is also their projects', so each side pulls in the other.
+    """
+    person_ids, project_ids = facets.take_stale()
+    if not person_ids and not project_ids:
+        return
+    cursor = mysql.connection.cursor()
+    try:
+        people = sorted(person_ids | _related(cursor, 'project_id', 'person_id', sorted(project_ids)))
+        projects = sorted(project_ids | _related(cursor, 'person_id', 'project_id', sorted(person_ids)))
+        person_rows = _person_rows(cursor, people) if people else {}
+        project_rows = _project_rows(cursor, projects) if projects else {}
+    except Exception:
+        facets.mark_stale(person_ids, project_ids)
+        raise
+    finally:
+        cursor.close()
+    facets.apply(
+        {person_id: person_rows.get(person_id) for person_id in people},
+        {project_id: project_rows.get(project_id) for project_id in projects}
+    )
+
+
+def _scheduled_reload():
+    from app import app, mysql
+    try:
+        with app.app_context():
+            _ensure_loaded(mysql, force=True)
+    except Exception as e:
+        log_error(f"Scheduled facet reload failed: {str(e)}")
+        _schedule_reload()
+
+
+def _schedule_reload():
+    """(Re)arm the periodic full rebuild."""
+    if FACET_REBUILD_MINUTES <= 0:
+        return
+    if _scheduler['timer'] is not None:
+        _scheduler['timer'].cancel()
+    timer = threading.Timer(FACET_REBUILD_MINUTES * 60, _scheduled_reload)
+    timer.daemon = True
+    timer.start()
+    _scheduler['timer'] = timer
+
+
+def _parse_filters(args, facet_names):
+    """``{facet: [values]}`` from repeated query parameters (?tag=a&tag=b)."""
+    filters = {}
+    for facet in facet_names:
+        values = [v for v in args.getlist(facet) if v.strip()]
+        if not values:
+            continue
+        if facet in ID_FACETS:
+            filters[facet] = [int(v) for v in values]
+        else:
+            filters[facet] = [normalize_value(v) for v in values]
+    return filters
+
+
+def _search_hits(mysql, kind, q, mode):
+    """Bitmap of the people or projects matching a full-text query."""
+    cursor = mysql.connection.cursor()
+    try:
+        if kind == 'person':
+            cursor.execute(person_ids_sql(mode), (q, q))
+        else:
+            cursor.execute(project_ids_sql(mode), (q,))
+        return Bitmap.from_ids([row['item_id'] for row in cursor.fetchall()])
+    finally:
+        cursor.close()
+
+
+def _facet_counts(kind, facet_names):
+    from app import mysql
+    q = (request.args.get("q") or "").strip()
+    mode = request.args.get("mode", "natural")
+    if len(q) > MAX_QUERY_LENGTH:
+        return jsonify({"status": "error", "message": f"Query is limited to {MAX_QUERY_LENGTH} characters"}), 400
+    if mode not in MODES:
+        return jsonify({"status": "error", "message": f"mode must be one of {', '.join(MODES)}"}), 400
+    requested = [f for f in request.args.get("facets", ",".join(facet_names)).split(",") if f]
+    unknown = [f for f in requested if f not in facet_names]
+    if unknown:
+        return jsonify({"status": "error", "message": f"facets must be among {', '.join(facet_names)}"}), 400
+    try:
+        filters = _parse_filters(request.args, facet_names)
+        limit = min(max(1, int(request.args.get("limit", FACET_DEFAULT_LIMIT))), MAX_FACET_LIMIT)
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit, institution and department must be integers"}), 400
+
+    try:
+        _ensure_loaded(mysql)
+        _apply_writes(mysql)
+        within = _search_hits(mysql, kind, q, mode) if q else None
+        total, counts = facets.counts(kind, filters, requested, limit, within)
+        data = {
+            "total": total,
+            "facets": {
+                facet: [
+                    {"value": value, "label": label, "count": count,
+                     "selected": value in filters.get(facet, ())}
+                    for value, label, count in values
+                ]
+                for facet, values in counts.items()
+            }
+        }
+        return jsonify({"status": "success", "data": data}), 200
+    except Exception as e:
+        log_error(f"Error computing {kind} facets: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@facets_bp.route("/people", methods=["GET"])
+@reads(primary=True)
+def get_person_facets():
+    """
+    GET /facets/people?main_field=Biology&institution=3&institution=7&q=<text>&facets=tag,expertise&limit=20
+
+    People counts per institution, department, main_field, expertise and
+    tag. Values of one facet are OR-ed, different facets are AND-ed, and
+    each facet's counts ignore its own filter. `q` restricts the counts to
+    full-text search hits.
+    """
+    return _facet_counts('person', PERSON_FACETS)
+
+
+@facets_bp.route("/projects", methods=["GET"])
+@reads(primary=True)
+def get_project_facets():
+    """
+    GET /facets/projects?tag=Genomics&institution=3&q=<text>&limit=20
+
+    Project counts per tag and per institution/department of the members.
+    """
+    return _facet_counts('project', PROJECT_FACETS)
+
+
+# No database work: reports in-memory state, so neither @reads nor @writes
+@facets_bp.route("/stats", methods=["GET"])
+def get_facet_stats():
+    """Bitmap sizes and when they were last rebuilt."""
+    return jsonify({"status": "success", "data": facets.stats()}), 200
@@ -7,21 +7,24 @@ Date: November 27, 2025
 This file contains the routes for managing institutions in the CollabConnect application
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from utils.logger import log_info, log_error, get_request_user
+from utils.pagination import PageRequest, count_rows, page_response, row_counts
+from utils.streaming import stream_format, stream_query
+from utils.data_access import reads, writes
 
 
 institution_bp = Blueprint('institution', __name__, url_prefix='/institution')
 
 
 @institution_bp.route("/one/<int:id>", methods=['GET'])  
+@reads
 def get_institution(id: int):
     from app import mysql 
     cursor = None
     try:
         log_info(f"Fetching institution with id: {id}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.callproc('GetDepartmentsAndPeopleByInstitutionId', [id])
         
         results = cursor.fetchall()
@@ -29,8 +32,6 @@ def get_institution(id: int):
         while cursor.nextset():
             pass
         
-        mysql.connection.commit()
-        
         if not results:
             log_error(f"Institution not found with id: {id}")
             return jsonify({"status": "error", "message": "Institution not found"}), 404
@@ -55,7 +56,6 @@ def get_institution(id: int):
         })
         
     except Exception as e:
-        mysql.connection.rollback()
         log_error(f"Error fetching institution {id}: {str(e)}")
         return jsonify({
             "status": "error",
@@ -66,6 +66,7 @@ def get_institution(id: int):
             cursor.close()
         
 @institution_bp.route("/all", methods=['GET'])
+@reads
 def get_all_institutions():
     """Get all institutions for autocomplete"""
     from app import mysql
@@ -73,18 +74,15 @@ def get_all_institutions():
     try:
         log_info("Fetching all institutions")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.execute('''
             SELECT institution_id, institution_name, institution_type, city, state
             FROM Institution
             ORDER BY institution_name
         ''')
         results = cursor.fetchall()
-        mysql.connection.commit()
         log_info(f"Fetched {len(results)} institutions")
         return jsonify({'status': 'success', 'data': results, 'count': len(results)})
     except Exception as e:
-        mysql.connection.rollback()
         log_error(f"Error fetching all institutions: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
@@ -92,42 +90,94 @@ def get_all_institutions():
             cursor.close()
 
 
+# Same rows as GetAllInstitutionsDepartmentsAndPeople
+_DETAILS_QUERY = '''
+    SELECT * FROM Institution as inst 
+    LEFT JOIN Department as dept on 
+    dept.institution_id = inst.institution_id
+    LEFT JOIN Person as p ON
+    p.department_id = dept.department_id
+    {where}
+'''
+_DETAILS_ORDER = " ORDER BY inst.institution_id, dept.department_id, p.person_id"
+
+
+def _add_expertises(curr):
+    curr['expertises'] = [
+        curr.get('expertise_1'),
+        curr.get('expertise_2'),
+        curr.get('expertise_3')
+    ]
+    return curr
+
+
 @institution_bp.route("/all-details")
+@reads
 def get_all_institutions_departments_people():
-    
+    """
+    One row per institution/department/person.
+
+    GET /institution/all-details?after=<next>&limit=50&count=true pages by
+    institution_id: a page holds every row of up to `limit` institutions,
+    and `total` counts institutions. ?all=true returns everything as before;
+    add stream=true (or format=ndjson) to stream it from a server-side cursor.
+    """
     from app import mysql 
+    try:
+        page = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    fmt = stream_format(request.args)
+    if page.unpaginated and fmt:
+        log_info(f"[{get_request_user()}] Streaming all institutions, departments, and people as {fmt}")
+        return stream_query(mysql, _DETAILS_QUERY.format(where="") + _DETAILS_ORDER, fmt=fmt,
+                            transform=_add_expertises, label="institution/department/people records")
     cursor = None
     try:
-        log_info(f"[{get_request_user()}] Fetching all institutions, departments, and people")
+        log_info(f"[{get_request_user()}] Fetching institutions, departments, and people - after: {page.after}, limit: {page.limit}, all: {page.unpaginated}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        cursor.callproc('GetAllInstitutionsDepartmentsAndPeople')
-        
-        # Fetch all results from the procedure
-        results = cursor.fetchall()
-        if results is None:
+        next_token = None
+        if page.unpaginated:
+            cursor.callproc('GetAllInstitutionsDepartmentsAndPeople')
+            
+            # Fetch all results from the procedure
+            results = cursor.fetchall()
+            if results is None:
+                results = []
+            # Consume remaining result sets from stored procedure
+            while cursor.nextset():
+                pass
+        else:
+            after_sql, params = page.after_clause("institution_id", prefix="WHERE")
+            cursor.execute(
+                f"SELECT institution_id FROM Institution {after_sql} ORDER BY institution_id LIMIT %s",
+                params + (page.limit + 1,)
+            )
+            institution_ids, next_token = page.page(
+                [row['institution_id'] for row in cursor.fetchall()], lambda institution_id: (institution_id,)
+            )
             results = []
-        # Consume remaining result sets from stored procedure
-        while cursor.nextset():
-            pass
-        mysql.connection.commit()
-        log_info("Transaction committed for fetching institutions/departments/people")
+            if institution_ids:
+                # Same rows as GetAllInstitutionsDepartmentsAndPeople, for this page only
+                where = f"WHERE inst.institution_id IN ({', '.join(['%s'] * len(institution_ids))})"
+                cursor.execute(_DETAILS_QUERY.format(where=where) + _DETAILS_ORDER, tuple(institution_ids))
+                results = list(cursor.fetchall())
+        total = None
+        if page.with_total:
+            total = row_counts.get(('Institution',), lambda: count_rows(cursor, "SELECT COUNT(*) AS total FROM Institution"))
 
         for curr in results:
-            curr['expertises'] = [
-                curr.get('expertise_1'),
-                curr.get('expertise_2'),
-                curr.get('expertise_3')
-            ]
+            _add_expertises(curr)
         log_info(f"Fetched {len(results)} institution/department/people records")
+        if not page.unpaginated:
+            return jsonify(page_response(results, next_token, total))
         return jsonify({
             "status": "success",
             "data": results,
             "count": len(results)
         })
     except Exception as e:
-        mysql.connection.rollback()
-        log_error(f"Transaction rolled back for fetching institutions/departments/people: {str(e)}")
+        log_error(f"Error fetching institutions/departments/people: {str(e)}")
         return jsonify({
             "status": "error",
             "message": str(e)
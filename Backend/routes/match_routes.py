@@ -0,0 +1,257 @@
+'''
+Expertise matching: rank researchers for a free-text project description.
+
+The "expertise match operation" the idx_project_search comment refers to.
+Researchers are scored by cosine similarity of TF-IDF/LSA vectors built
+from their profile and WorkedOn projects (utils/expertise_match.py). The
+index is built on first use, persisted under `expertise_index_dir` and
+memory-mapped by every worker. Profile and project writes mark researchers
+stale; they are re-embedded before the next match in this worker, and a
+full rebuild runs every `expertise_rebuild_minutes`.
+'''
+from flask import Blueprint, jsonify, request
+import configparser
+import os
+import threading
+from utils.expertise_match import expertise_index, query_document, document_terms
+from utils.jwt_utils import token_required
+from utils.authorization import verify_operator
+from utils.logger import log_info, log_error
+from utils.data_access import reads
+
+match_bp = Blueprint("match", __name__, url_prefix="/match")
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+EXPERTISE_INDEX_DIR = config.get("Analytics", "expertise_index_dir", fallback="")
+EXPERTISE_DIMENSIONS = config.getint("Analytics", "expertise_dimensions", fallback=128)
+EXPERTISE_REBUILD_MINUTES = config.getint("Analytics", "expertise_rebuild_minutes", fallback=360)
+MATCH_DEFAULT_K = 10
+MAX_K = 50
+MAX_BATCH = 20
+MAX_TEXT_LENGTH = 5000
+
+if EXPERTISE_INDEX_DIR:
+    expertise_index.directory = os.path.abspath(EXPERTISE_INDEX_DIR)
+expertise_index.dimensions = EXPERTISE_DIMENSIONS
+
+_build_lock = threading.Lock()
+_scheduler = {'timer': None}
+
+
+def _fetch_documents(cursor, person_ids=None):
+    """Researcher documents and names, for everyone or the given ids."""
+    person_where = project_where = ""
+    params = ()
+    if person_ids is not None:
+        if not person_ids:
+            return {}, {}
+        placeholders = ", ".join(["%s"] * len(person_ids))
+        person_where = f"WHERE p.person_id IN ({placeholders})"
+        project_where = f"WHERE w.person_id IN ({placeholders})"
+        params = tuple(person_ids)
+
+    cursor.execute(f"""
+        SELECT p.person_id, p.person_name, p.bio, p.main_field,
+               p.expertise_1, p.expertise_2, p.expertise_3
+        FROM Person p
+        {person_where}
+    """, params)
+    documents, names = {}, {}
+    for row in cursor.fetchall():
+        documents[row['person_id']] = {
+            'bio': row['bio'],
+            'main_field': row['main_field'],
+            'expertise': [row['expertise_1'], row['expertise_2'], row['expertise_3']],
+            'projects': []
+        }
+        names[row['person_id']] = row['person_name']
+
+    cursor.execute(f"""
+        SELECT w.person_id, pr.project_title, pr.project_description
+        FROM WorkedOn w
+        JOIN Project pr ON pr.project_id = w.project_id
+        {project_where}
+    """, params)
+    for row in cursor.fetchall():
+        document = documents.get(row['person_id'])
+        if document is not None:
+            document['projects'].append((row['project_title'], row['project_description']))
+    return documents, names
+
+
+def _project_members(cursor, project_ids):
+    if not project_ids:
+        return set()
+    cursor.execute(
+        "SELECT DISTINCT person_id FROM WorkedOn WHERE project_id IN ("
+        + ", ".join(["%s"] * len(project_ids)) + ")",
+        tuple(project_ids)
+    )
+    return {row['person_id'] for row in cursor.fetchall()}
+
+
+def _build_index(mysql):
+    """Embed every researcher and switch all workers to the new build."""
+    log_info("Building expertise index from database")
+    cursor = mysql.connection.cursor()
+    cursor.execute("START TRANSACTION")
+    documents, _ = _fetch_documents(cursor)
+    mysql.connection.commit()
+    cursor.close()
+    # Edits up to here are in the snapshot just read
+    expertise_index.take_stale()
+    expertise_index.build(documents)
+    stats = expertise_index.stats()
+    log_info(f"Expertise index built - build: {stats['build']}, people: {stats['people']}, "
+             f"terms: {stats['terms']}, dimensions: {stats['dimensions']}")
+
+
+def _ensure_loaded(mysql, force=False):
+    with _build_lock:
+        if force:
+            _build_index(mysql)
+        elif expertise_index.loaded:
+            expertise_index.refresh_build()
+            return
+        elif not expertise_index.open():
+            _build_index(mysql)
+    _schedule_rebuild()
+
+
+def _apply_edits(mysql):
+    """Re-embed researchers whose profile or projects changed since the last match."""
+    person_ids, project_ids = expertise_index.take_stale()
+    if not person_ids and not project_ids:
+        return
+    cursor = mysql.connection.cursor()
+    try:
+        person_ids = set(person_ids) | _project_members(cursor, sorted(project_ids))
+        documents, _ = _fetch_documents(cursor, sorted(person_ids))
+    except Exception:
+        expertise_index.mark_stale(person_ids, project_ids)
+        raise
+    finally:
+        cursor.close()
+    expertise_index.upsert(documents)
+    for person_id in person_ids - set(documents):
+        expertise_index.remove(person_id)
+
+
+def _scheduled_rebuild():
+    from app import app, mysql
+    try:
+        with app.app_context():
+            _ensure_loaded(mysql, force=True)
+    except Exception as e:
+        log_error(f"Scheduled expertise index rebuild failed: {str(e)}")
+        _schedule_rebuild()
+
+
+def _schedule_rebuild():
+    """(Re)arm the periodic rebuild, which also refreshes the vocabulary."""
+    if EXPERTISE_REBUILD_MINUTES <= 0:
+        return
+    if _scheduler['timer'] is not None:
+        _scheduler['timer'].cancel()
+    timer = threading.Timer(EXPERTISE_REBUILD_MINUTES * 60, _scheduled_rebuild)
+    timer.daemon = True
+    timer.start()
+    _scheduler['timer'] = timer
+
+
+def _parse_queries(data):
+    """Query documents from ``{title, description}`` or ``{projects: [...]}``."""
+    projects = data.get('projects')
+    if projects is None:
+        projects = [{'title': data.get('title'), 'description': data.get('description')}]
+    if not isinstance(projects, list) or not 1 <= len(projects) <= MAX_BATCH:
+        raise ValueError(f"projects must be a list of 1 to {MAX_BATCH} items")
+    queries = []
+    for project in projects:
+        title = (project.get('title') or '').strip() if isinstance(project, dict) else ''
+        description = (project.get('description') or '').strip() if isinstance(project, dict) else ''
+        if not title and not description:
+            raise ValueError("Each project needs a title or description")
+        if len(title) + len(description) > MAX_TEXT_LENGTH:
+            raise ValueError(f"Title and description are limited to {MAX_TEXT_LENGTH} characters")
+        queries.append(query_document(title, description))
+    return queries
+
+
+@match_bp.route("/people", methods=["POST"])
+@reads(primary=True)
+def match_people():
+    """
+    POST /match/people
+    {"title": "...", "description": "...", "k": 10, "exclude": [person_id, ...]}
+
+    Researchers ranked by how well their expertise, bio and past projects
+    fit the project. Several projects can be matched at once with
+    {"projects": [{"title": ..., "description": ...}, ...]}; the response
+    then holds one result list per project.
+    """
+    from app import mysql
+    data = request.get_json(silent=True) or {}
+    try:
+        queries = _parse_queries(data)
+        k = min(max(1, int(data.get('k', MATCH_DEFAULT_K))), MAX_K)
+        exclude = [int(person_id) for person_id in data.get('exclude') or []]
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    cursor = None
+    try:
+        _ensure_loaded(mysql)
+        _apply_edits(mysql)
+        ranked = expertise_index.top_k(queries, k=k, exclude=exclude)
+
+        cursor = mysql.connection.cursor()
+        documents, names = _fetch_documents(cursor, sorted({p for batch in ranked for p, _ in batch}))
+        results = []
+        for query, batch in zip(queries, ranked):
+            query_terms = document_terms(query)
+            results.append([
+                {
+                    "person_id": person_id,
+                    "person_name": names.get(person_id),
+                    "score": score,
+                    "matched_terms": expertise_index.model.shared_terms(
+                        query_terms, document_terms(documents.get(person_id, {})))
+                }
+                for person_id, score in batch
+            ])
+
+        log_info(f"Expertise match - projects: {len(queries)}, k: {k}, build: {expertise_index.stats()['build']}")
+        if 'projects' not in data:
+            return jsonify({"status": "success", "data": results[0], "count": len(results[0])}), 200
+        return jsonify({"status": "success", "data": results, "count": len(results)}), 200
+    except Exception as e:
+        log_error(f"Error in expertise match: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if cursor:
+            cursor.close()
+
+
+@match_bp.route("/rebuild", methods=["POST"])
+@token_required
+@verify_operator
+@reads(primary=True)
+def rebuild_match_index():
+    """Operator endpoint: refit the vocabulary and re-embed every researcher."""
+    from app import mysql
+    try:
+        _ensure_loaded(mysql, force=True)
+        return jsonify({"status": "success", "data": expertise_index.stats()}), 200
+    except Exception as e:
+        log_error(f"Expertise index rebuild failed: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+# No database work: reports in-memory state, so neither @reads nor @writes
+@match_bp.route("/stats", methods=["GET"])
+def get_match_stats():
+    """Current build, its size and how many researchers were edited since."""
+    return jsonify({"status": "success", "data": expertise_index.stats()}), 200
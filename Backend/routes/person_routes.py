@@ -1,5 +1,15 @@
 from utils.logger import log_info, log_error, get_request_user
 from utils.jwt_utils import token_required
+from utils.autocomplete import autocomplete
+from utils.collab_graph import collab_graph
+from utils.expertise_match import expertise_index
+from utils.data_versions import conditional
+from utils.facets import facets
+from utils.index_updates import index_updates
+from utils.fields import PERSON_FIELDS, PROJECT_FIELDS
+from utils.pagination import PageRequest, count_rows, page_response, row_counts
+from utils.streaming import stream_format, stream_query
+from utils.data_access import reads, writes
 from flask import Blueprint, jsonify, request
 
 # Author: Wyatt McCurdy — person CRUD and profile endpoints
@@ -9,6 +19,7 @@ person_bp = Blueprint('person', __name__, url_prefix='/person')
 
 
 @person_bp.route('', methods=['POST'])
+@writes
 def create_person():
     """Create a new person profile"""
     from app import mysql
@@ -44,6 +55,14 @@ def create_person():
             pass
         
         mysql.connection.commit()
+        with index_updates("creating person"):
+            collab_graph.upsert_person(person_id, label=person_name,
+                                       expertise=[expertise_1, expertise_2, expertise_3],
+                                       main_field=main_field)
+            autocomplete.upsert('person', person_id, person_name)
+            row_counts.invalidate('Person')
+            expertise_index.mark_stale(person_ids=[person_id])
+            facets.mark_stale(person_ids=[person_id])
         
         return jsonify({
             'status': 'success',
@@ -58,54 +77,102 @@ def create_person():
             cursor.close()
 
 
+# Person with department, institution and claim status; PERSON_FIELDS expressions refer to these aliases
+_PEOPLE_FROM = """
+    FROM Person p
+    LEFT JOIN Department d ON p.department_id = d.department_id
+    LEFT JOIN Institution i ON d.institution_id = i.institution_id
+    LEFT JOIN User u ON p.person_id = u.person_id
+"""
+
+# GetAllPeople plus claim status
+_ALL_PEOPLE_QUERY = """
+    SELECT 
+        p.*,
+        d.department_name,
+        d.institution_id,
+        i.institution_name,
+        i.city,
+        i.state,
+        CASE WHEN u.person_id IS NOT NULL THEN TRUE ELSE FALSE END AS is_claimed
+""" + _PEOPLE_FROM
+
+
+def _normalize_person_row(row):
+    # Normalize expertise fields into a list for each person, excluding nulls
+    if 'expertise_1' in row:
+        row['expertises'] = [e for e in [row.get('expertise_1'), row.get('expertise_2'), row.get('expertise_3')] if e]
+    # Convert is_claimed to boolean
+    if 'is_claimed' in row:
+        row['is_claimed'] = bool(row['is_claimed'])
+    return row
+
+
+def _people_query(fields):
+    """The people list query for a PERSON_FIELDS selection (None for every column)."""
+    if fields is None:
+        return _ALL_PEOPLE_QUERY
+    return PERSON_FIELDS.select(fields) + _PEOPLE_FROM
+
+
 @person_bp.route('/all', methods=['GET'])
+@conditional('Person', 'Department', 'Institution', 'User')
+@reads
 def get_all_people():
-    """Return all people using the GetAllPeople stored procedure."""
+    """
+    Return people with their department, institution and claim status.
+
+    GET /person/all?after=<next>&limit=50&count=true pages by person_id;
+    ?all=true returns everyone in one response as before, and
+    ?all=true&stream=true (or &format=ndjson) streams it from a server-side cursor.
+    ?fields= picks the columns (see utils/fields.py); pages default to the
+    summary projection, ?all=true to every column.
+    Responses carry an ETag; a matching If-None-Match gets 304.
+    """
     from app import mysql
+    try:
+        page = PageRequest.from_args(request.args)
+        fields = PERSON_FIELDS.parse(request.args.get('fields'), default='full' if page.unpaginated else 'summary')
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    def shape(row):
+        return PERSON_FIELDS.prune(_normalize_person_row(row), fields)
+
+    query = _people_query(fields)
+    fmt = stream_format(request.args)
+    if page.unpaginated and fmt:
+        log_info(f"Streaming all people as {fmt}")
+        return stream_query(mysql, query + " ORDER BY p.person_id", fmt=fmt,
+                            transform=shape, label='people')
     cursor = None
     try:
-        log_info("Fetching all people")
+        log_info(f"Fetching people - after: {page.after}, limit: {page.limit}, all: {page.unpaginated}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        log_info("Transaction started for fetching people")
         
-        # Modified query to include claim status
-        query = """
-            SELECT 
-                p.*,
-                d.department_name,
-                d.institution_id,
-                i.institution_name,
-                i.city,
-                i.state,
-                CASE WHEN u.person_id IS NOT NULL THEN TRUE ELSE FALSE END AS is_claimed
-            FROM Person p
-            LEFT JOIN Department d ON p.department_id = d.department_id
-            LEFT JOIN Institution i ON d.institution_id = i.institution_id
-            LEFT JOIN User u ON p.person_id = u.person_id
-        """
-        cursor.execute(query)
+        if page.unpaginated:
+            cursor.execute(query)
+        else:
+            after_sql, params = page.after_clause('p.person_id', prefix='WHERE')
+            cursor.execute(query + f" {after_sql} ORDER BY p.person_id LIMIT %s", params + (page.limit + 1,))
         results = cursor.fetchall()
+        total = None
+        if page.with_total:
+            total = row_counts.get(('Person',), lambda: count_rows(cursor, "SELECT COUNT(*) AS total FROM Person"))
         
-        mysql.connection.commit()
-        log_info("Transaction committed for fetching people")
-
-        # Normalize expertise fields into a list for each person, excluding nulls
-        for row in results:
-            if 'expertise_1' in row:
-                row['expertises'] = [e for e in [row.get('expertise_1'), row.get('expertise_2'), row.get('expertise_3')] if e]
-            # Convert is_claimed to boolean
-            row['is_claimed'] = bool(row.get('is_claimed'))
+        results = [shape(row) for row in results]
             
         log_info(f"Fetched {len(results)} people")
-        return jsonify({
-            'status': 'success',
-            'data': results,
-            'count': len(results)
-        })
+        if page.unpaginated:
+            return jsonify({
+                'status': 'success',
+                'data': results,
+                'count': len(results)
+            })
+        results, next_token = page.page(results, lambda row: (row['person_id'],))
+        return jsonify(page_response(results, next_token, total))
     except Exception as e:
-        mysql.connection.rollback()
-        log_error(f"Transaction rolled back for fetching people: {str(e)}")
+        log_error(f"Error fetching people: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
@@ -113,6 +180,7 @@ def get_all_people():
 
 
 @person_bp.route('/by-name/<string:person_name>', methods=['GET'])
+@reads
 def get_person_by_name(person_name: str):
     """Return a single person record by name using SelectPersonByName."""
     from app import mysql
@@ -120,15 +188,11 @@ def get_person_by_name(person_name: str):
     try:
         log_info(f"Fetching person by name: {person_name}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        log_info("Transaction started for fetching person by name")
         cursor.callproc('SelectPersonByName', [person_name])
         result = cursor.fetchone()
         # Consume remaining result sets from stored procedure
         while cursor.nextset():
             pass
-        mysql.connection.commit()
-        log_info("Transaction committed for fetching person by name")
         if not result:
             log_info(f"Person not found: {person_name}")
             return jsonify({'status': 'not_found', 'message': 'Person not found'}), 404
@@ -136,8 +200,7 @@ def get_person_by_name(person_name: str):
         log_info(f"Person found: {person_name}")
         return jsonify({'status': 'success', 'data': result})
     except Exception as e:
-        mysql.connection.rollback()
-        log_error(f"Transaction rolled back for fetching person by name: {str(e)}")
+        log_error(f"Error fetching person by name: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
@@ -146,6 +209,7 @@ def get_person_by_name(person_name: str):
 
 @person_bp.route('/<int:person_id>', methods=['PUT'])
 @token_required
+@writes
 def update_person(person_id: int):
     """Update a person profile using UpdatePerson stored procedure."""
     from app import mysql
@@ -220,6 +284,22 @@ def update_person(person_id: int):
         
         mysql.connection.commit()
         log_info(f"Person profile updated successfully: person_id={person_id}")
+        with index_updates("updating person"):
+            collab_graph.upsert_person(
+                person_id,
+                label=data.get('person_name'),
+                institution=institution_name if department_id else None,
+                department=department_name if department_id else None,
+                expertise=[data.get('expertise_1'), data.get('expertise_2'), data.get('expertise_3')],
+                main_field=data.get('expertise_1'),
+                department_id=department_id,
+                institution_id=institution_id if department_id else None
+            )
+            autocomplete.upsert('person', person_id, data.get('person_name'))
+            autocomplete.upsert('institution', institution_id, institution_name)
+            autocomplete.upsert('department', department_id, department_name)
+            expertise_index.mark_stale(person_ids=[person_id])
+            facets.mark_stale(person_ids=[person_id])
         
         return jsonify({
             'status': 'success',
@@ -237,6 +317,7 @@ def update_person(person_id: int):
 
 @person_bp.route('/<int:person_id>', methods=['DELETE'])
 @token_required
+@writes
 def delete_person(person_id: int):
     """Unclaim and delete user account, preserving Person data for future claims."""
     from app import mysql
@@ -292,48 +373,65 @@ def delete_person(person_id: int):
             cursor.close()
 
 
+def person_context(person, fields=None):
+    """Split a full-context row into person/department/institution (shared with asgi.py)."""
+    # Build expertises list excluding nulls
+    person = PERSON_FIELDS.prune(_normalize_person_row(person), fields)
+
+    # Build structured response separating concerns
+    institution_fields = {k: v for k, v in person.items() if k.startswith('institution_') or k in ['street', 'city', 'state', 'zipcode']}
+    department_fields = {k: v for k, v in person.items() if k.startswith('department_')}
+    person_fields = {k: v for k, v in person.items() if k.startswith('person_') or k in ['bio', 'expertise_1', 'expertise_2', 'expertise_3', 'main_field', 'expertises', 'is_claimed']}
+    return {
+        'person': person_fields,
+        'department': department_fields,
+        'institution': institution_fields
+    }
+
+
+def person_query(fields):
+    """SQL for one person's selected fields, parameterized by person_id (shared with asgi.py)."""
+    return _people_query(fields) + " WHERE p.person_id = %s"
+
+
 @person_bp.route('/<int:person_id>', methods=['GET'])
+@reads
 def get_person_full(person_id: int):
-    """Return full person context including department and institution using SelectPersonFullContextByID."""
+    """
+    Return full person context including department and institution using SelectPersonFullContextByID.
+
+    ?fields= selects only the listed PERSON_FIELDS instead.
+    """
     from app import mysql
+    try:
+        fields = PERSON_FIELDS.parse(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     cursor = None
     try:
         log_info(f"Fetching full person context: person_id={person_id}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        log_info("Transaction started for fetching full person context")
-        cursor.callproc('SelectPersonFullContextByID', [person_id])
-        person = cursor.fetchone()
-        # Consume remaining result sets from stored procedure
-        while cursor.nextset():
-            pass
-        mysql.connection.commit()
-        log_info("Transaction committed for fetching full person context")
+        if fields is None:
+            cursor.callproc('SelectPersonFullContextByID', [person_id])
+            person = cursor.fetchone()
+            # Consume remaining result sets from stored procedure
+            while cursor.nextset():
+                pass
+        else:
+            cursor.execute(person_query(fields), (person_id,))
+            person = cursor.fetchone()
 
         if not person:
             log_info(f"Person not found: person_id={person_id}")
             return jsonify({'status': 'not_found', 'message': 'Person not found'}), 404
 
-        # Build expertises list excluding nulls
-        person['expertises'] = [e for e in [person.get('expertise_1'), person.get('expertise_2'), person.get('expertise_3')] if e]
-
-        # Build structured response separating concerns
-        institution_fields = {k: v for k, v in person.items() if k.startswith('institution_') or k in ['street', 'city', 'state', 'zipcode']}
-        department_fields = {k: v for k, v in person.items() if k.startswith('department_')}
-        person_fields = {k: v for k, v in person.items() if k.startswith('person_') or k in ['bio', 'expertise_1', 'expertise_2', 'expertise_3', 'main_field', 'expertises']}
-
         log_info(f"Full person context returned: person_id={person_id}")
         return jsonify({
             'status': 'success',
-            'data': {
-                'person': person_fields,
-                'department': department_fields,
-                'institution': institution_fields
-            }
+            'data': person_context(person, fields)
         })
     except Exception as e:
-        mysql.connection.rollback()
-        log_error(f"Transaction rolled back for fetching full person context: {str(e)}")
+        log_error(f"Error fetching full person context: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
@@ -341,21 +439,26 @@ def get_person_full(person_id: int):
 
 
 @person_bp.route('/<int:person_id>/projects', methods=['GET'])
+@reads
 def get_person_projects(person_id: int):
-    """Return list of projects for a person using SelectProjectsByPersonID."""
+    """Return list of projects for a person using SelectProjectsByPersonID, or only the ?fields= given."""
     from app import mysql
+    try:
+        fields = PROJECT_FIELDS.parse(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     cursor = None
     try:
         log_info(f"Fetching projects for person_id={person_id}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        log_info("Transaction started for fetching projects for person")
-        cursor.callproc('SelectProjectsByPersonID', [person_id])
-        projects = cursor.fetchall()
-        while cursor.nextset():
-            pass
-        mysql.connection.commit()
-        log_info("Transaction committed for fetching projects for person")
+        if fields is None:
+            cursor.callproc('SelectProjectsByPersonID', [person_id])
+            projects = cursor.fetchall()
+            while cursor.nextset():
+                pass
+        else:
+            cursor.execute(PROJECT_FIELDS.select(fields) + " FROM Project p WHERE p.person_id = %s", (person_id,))
+            projects = [PROJECT_FIELDS.prune(row, fields) for row in cursor.fetchall()]
         log_info(f"Fetched {len(projects)} projects for person_id={person_id}")
         return jsonify({
             'status': 'success',
@@ -363,8 +466,34 @@ def get_person_projects(person_id: int):
             'count': len(projects)
         })
     except Exception as e:
-        mysql.connection.rollback()
-        log_error(f"Transaction rolled back for fetching projects for person: {str(e)}")
+        log_error(f"Error fetching projects for person: {str(e)}")
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    finally:
+        if cursor:
+            cursor.close()
+
+
+@person_bp.route('/<int:person_id>/collaborators', methods=['GET'])
+@reads
+def get_person_collaborators(person_id: int):
+    """Return everyone a person has worked with using SelectCollaboratorsByPersonID."""
+    from app import mysql
+    cursor = None
+    try:
+        log_info(f"Fetching collaborators for person_id={person_id}")
+        cursor = mysql.connection.cursor()
+        cursor.callproc('SelectCollaboratorsByPersonID', [person_id])
+        collaborators = cursor.fetchall()
+        while cursor.nextset():
+            pass
+        log_info(f"Fetched {len(collaborators)} collaborators for person_id={person_id}")
+        return jsonify({
+            'status': 'success',
+            'data': collaborators,
+            'count': len(collaborators)
+        })
+    except Exception as e:
+        log_error(f"Error fetching collaborators: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
@@ -9,36 +9,90 @@ from utils.logger import log_info, log_error, get_request_user
 from utils.jwt_utils import token_required
 from utils.authorization import verify_project_ownership
 from utils.validators import validate_project_data, sanitize_string
+from utils.autocomplete import autocomplete
+from utils.collab_graph import collab_graph
+from utils.expertise_match import expertise_index
+from utils.data_versions import conditional
+from utils.facets import facets
+from utils.index_updates import index_updates
+from utils.fields import PROJECT_FIELDS
+from utils.pagination import PageRequest, count_rows, page_response, row_counts
+from utils.streaming import stream_format, stream_query
+from utils.data_access import reads, writes
 
 project_bp = Blueprint("project", __name__, url_prefix="/project")
 
 
+def _select_projects(fields):
+    """``SELECT ... FROM Project p`` for a PROJECT_FIELDS selection (None for every column)."""
+    if fields is None:
+        return "SELECT p.* FROM Project p"
+    return PROJECT_FIELDS.select(fields) + " FROM Project p"
+
+
 @project_bp.route("/all", methods=["GET"])
+@conditional("Project")
+@reads
 def get_all_projects():
+    """
+    GET /project/all?after=<next>&limit=50&count=true pages by project_id;
+    ?all=true returns every project (GetAllProjects) as before, and
+    ?all=true&stream=true (or &format=ndjson) streams it from a server-side cursor.
+    ?fields= picks the columns (see utils/fields.py); pages default to the
+    summary projection, ?all=true to every column.
+    Responses carry an ETag; a matching If-None-Match gets 304.
+    """
     from app import mysql
     try:
-        log_info(f"[{get_request_user()}] Fetching all projects")
+        page = PageRequest.from_args(request.args)
+        fields = PROJECT_FIELDS.parse(request.args.get("fields"), default="full" if page.unpaginated else "summary")
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    fmt = stream_format(request.args)
+    if page.unpaginated and fmt:
+        log_info(f"[{get_request_user()}] Streaming all projects as {fmt}")
+        return stream_query(mysql, _select_projects(fields) + " ORDER BY p.project_id", fmt=fmt,
+                            transform=lambda row: PROJECT_FIELDS.prune(row, fields), label="projects")
+    cursor = None
+    try:
+        log_info(f"[{get_request_user()}] Fetching projects - after: {page.after}, limit: {page.limit}, all: {page.unpaginated}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        cursor.callproc("GetAllProjects")
-        results = cursor.fetchall()
-        # Consume remaining result sets from stored procedure
-        while cursor.nextset():
-            pass
-        mysql.connection.commit()
-        cursor.close()
+        if page.unpaginated and fields is None:
+            cursor.callproc("GetAllProjects")
+            results = cursor.fetchall()
+            # Consume remaining result sets from stored procedure
+            while cursor.nextset():
+                pass
+        elif page.unpaginated:
+            cursor.execute(_select_projects(fields) + " ORDER BY p.project_id")
+            results = cursor.fetchall()
+        else:
+            after_sql, params = page.after_clause("p.project_id", prefix="WHERE")
+            cursor.execute(f"{_select_projects(fields)} {after_sql} ORDER BY p.project_id LIMIT %s", params + (page.limit + 1,))
+            results = cursor.fetchall()
+        results = [PROJECT_FIELDS.prune(row, fields) for row in results]
+        total = None
+        if page.with_total:
+            total = row_counts.get(("Project",), lambda: count_rows(cursor, "SELECT COUNT(*) AS total FROM Project"))
         log_info(f"Fetched {len(results)} projects")
-        return jsonify({
-            "status": "success",
-            "data": results,
-            "count": len(results)
-        }), 200
+        if page.unpaginated:
+            return jsonify({
+                "status": "success",
+                "data": results,
+                "count": len(results)
+            }), 200
+        results, next_token = page.page(results, lambda row: (row["project_id"],))
+        return jsonify(page_response(results, next_token, total)), 200
     except Exception as e:
         log_error(f"Error fetching projects: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if cursor:
+            cursor.close()
 
 
 @project_bp.route("/", methods=["POST"])
+@writes
 def create_project():
     from app import mysql
     cursor = None
@@ -68,6 +122,7 @@ def create_project():
             data["start_date"],
             data["end_date"]
         ])
+        result = cursor.fetchone()
         
         # Consume stored procedure results
         while cursor.nextset():
@@ -76,6 +131,10 @@ def create_project():
         # Commit the transaction 
         mysql.connection.commit()
         log_info("Transaction committed for project creation")
+        with index_updates("creating project"):
+            autocomplete.record('tag', data["tag_name"], data["tag_name"])
+            facets.mark_stale(project_ids=[result['project_id'] if result else None])
+            row_counts.invalidate("Project")
         
         log_info(f"Project created: title={data['title']}, description={data['description']}, "
                 f"person_id={data['person_id']}, start_date={data['start_date']}, "
@@ -101,6 +160,7 @@ def create_project():
 @project_bp.route("/<int:project_id>", methods=["PUT"])
 @token_required
 @verify_project_ownership
+@writes
 def update_project(project_id: int):
     from app import mysql
     cursor = None
@@ -142,6 +202,11 @@ def update_project(project_id: int):
         # Commit the transaction
         mysql.connection.commit()
         log_info("Transaction committed for project update")
+        with index_updates("updating project"):
+            if tag_name:
+                collab_graph.set_project_tag(project_id, tag_name)
+            expertise_index.mark_stale(project_ids=[project_id])
+            facets.mark_stale(project_ids=[project_id])
         
         log_info(f"Project updated: id={project_id}, title={project_title}, "
                 f"description={project_description}, start_date={data.get('start_date')}, "
@@ -167,6 +232,7 @@ def update_project(project_id: int):
 @project_bp.route("/<int:project_id>", methods=["DELETE"])
 @token_required
 @verify_project_ownership
+@writes
 def delete_project(project_id: int):
     from app import mysql
     cursor = None
@@ -190,6 +256,14 @@ def delete_project(project_id: int):
         # Commit the transaction
         mysql.connection.commit()
         log_info("Transaction committed for project deletion")
+        with index_updates("deleting project"):
+            # Members are gone from WorkedOn now, so take them from the graph
+            members = collab_graph.project_members(project_id)
+            expertise_index.mark_stale(person_ids=members)
+            facets.mark_stale(person_ids=members, project_ids=[project_id])
+            row_counts.invalidate("Project")
+            row_counts.invalidate("Project_Tag")
+            collab_graph.remove_project(project_id)
         
         log_info(f"Project deleted: project_id={project_id}")
         return jsonify({"status": "success", "message": "Project deleted successfully"}), 200
@@ -211,20 +285,27 @@ def delete_project(project_id: int):
 
 
 @project_bp.route("/by-person", methods=["GET"])
+@reads
 def get_projects_by_person():
     from app import mysql
     try:
         person_id = request.args.get("person_id")
         if not person_id:
             return jsonify({"status": "error", "message": "Query param 'person_id' is required"}), 400
+        try:
+            fields = PROJECT_FIELDS.parse(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        cursor.callproc("SelectProjectsByPersonID", [person_id])
-        results = cursor.fetchall()
-        # Consume remaining result sets from stored procedure
-        while cursor.nextset():
-            pass
-        mysql.connection.commit()
+        if fields is None:
+            cursor.callproc("SelectProjectsByPersonID", [person_id])
+            results = cursor.fetchall()
+            # Consume remaining result sets from stored procedure
+            while cursor.nextset():
+                pass
+        else:
+            cursor.execute(_select_projects(fields) + " WHERE p.person_id = %s", (person_id,))
+            results = [PROJECT_FIELDS.prune(row, fields) for row in cursor.fetchall()]
         cursor.close()
         return jsonify({"status": "success", "data": results, "count": len(results)}), 200
     except Exception as e:
@@ -232,72 +313,81 @@ def get_projects_by_person():
 
 
 @project_bp.route("/<int:project_id>", methods=["GET"])
+@reads
 def get_project_by_id(project_id: int):
     from app import mysql
     try:
+        try:
+            fields = PROJECT_FIELDS.parse(request.args.get("fields"))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        cursor.callproc("SelectProjectByID", [project_id])
-        result = cursor.fetchone()
-        # Consume remaining result sets from stored procedure
-        while cursor.nextset():
-            pass
-        mysql.connection.commit()
+        if fields is None:
+            cursor.callproc("SelectProjectByID", [project_id])
+            result = cursor.fetchone()
+            # Consume remaining result sets from stored procedure
+            while cursor.nextset():
+                pass
+        else:
+            cursor.execute(_select_projects(fields) + " WHERE p.project_id = %s", (project_id,))
+            result = PROJECT_FIELDS.prune(cursor.fetchone(), fields)
         cursor.close()
         return jsonify({"status": "success", "data": result}), 200
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+# People on a project with their affiliation (shared with asgi.py)
+PROJECT_PEOPLE_QUERY = """
+    SELECT 
+        p.person_id,
+        p.person_name,
+        p.person_email,
+        p.department_id,
+        d.department_name,
+        i.institution_id,
+        i.institution_name
+    FROM WorkedOn w
+    JOIN Person p ON w.person_id = p.person_id
+    LEFT JOIN Department d ON p.department_id = d.department_id
+    LEFT JOIN Institution i ON d.institution_id = i.institution_id
+    WHERE w.project_id = %s
+    ORDER BY p.person_name ASC
+"""
+
+
 @project_bp.route("/<int:project_id>/people", methods=["GET"])
+@reads
 def get_people_by_project(project_id: int):
     from app import mysql
+    cursor = None
     try:
         log_info(f"Fetching people for project_id={project_id}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        query = (
-            """
-            SELECT 
-                p.person_id,
-                p.person_name,
-                p.person_email,
-                p.department_id,
-                d.department_name,
-                i.institution_id,
-                i.institution_name
-            FROM WorkedOn w
-            JOIN Person p ON w.person_id = p.person_id
-            LEFT JOIN Department d ON p.department_id = d.department_id
-            LEFT JOIN Institution i ON d.institution_id = i.institution_id
-            WHERE w.project_id = %s
-            ORDER BY p.person_name ASC
-            """
-        )
-        cursor.execute(query, [project_id])
+        cursor.execute(PROJECT_PEOPLE_QUERY, [project_id])
         results = cursor.fetchall()
-        mysql.connection.commit()
-        cursor.close()
         log_info(f"Fetched {len(results)} people for project_id={project_id}")
         return jsonify({"status": "success", "data": results, "count": len(results)}), 200
     except Exception as e:
         log_error(f"Error fetching people for project_id={project_id}: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if cursor:
+            cursor.close()
 
 @project_bp.route("/num-projects-per-person", methods=['GET'])
+@reads
 def get_num_projects_per_person():
     from app import mysql 
     
     try:
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.callproc('SelectNumProjectsPerPerson')
         
         results = cursor.fetchall()
         # Consume remaining result sets from stored procedure
         while cursor.nextset():
             pass
-        mysql.connection.commit()
         cursor.close()
         out = {}
         for curr in results:
@@ -6,11 +6,18 @@ It defines endpoints for associating and dissociating tags with projects.
 '''
 from flask import Blueprint, jsonify, request
 from utils.logger import log_info, log_error
+from utils.autocomplete import autocomplete
+from utils.facets import facets
+from utils.index_updates import index_updates
+from utils.fields import PROJECT_FIELDS
+from utils.pagination import PageRequest, count_rows, page_response, row_counts
+from utils.data_access import reads, writes
 
 project_tag_bp = Blueprint("project_tag", __name__, url_prefix="/project_tag")
 
 
 @project_tag_bp.route("/add", methods=["POST"])
+@writes
 def add_tag_to_project():
     from app import mysql
     try:
@@ -29,6 +36,10 @@ def add_tag_to_project():
             pass
         mysql.connection.commit()
         log_info("Transaction committed for add tag to project")
+        with index_updates("adding project tag"):
+            autocomplete.record("tag", data["tag_name"], data["tag_name"])
+            facets.mark_stale(project_ids=[data["project_id"]])
+            row_counts.invalidate("Project_Tag")
         cursor.close()
         log_info(f"Tag added to project: project_id={data['project_id']}, tag_name={data['tag_name']}")
         return jsonify({"status": "success", "message": "Tag added to project successfully"}), 201
@@ -39,6 +50,7 @@ def add_tag_to_project():
 
 
 @project_tag_bp.route("/remove", methods=["DELETE"])
+@writes
 def remove_tag_from_project():
     from app import mysql
     try:
@@ -57,6 +69,10 @@ def remove_tag_from_project():
             pass
         mysql.connection.commit()
         log_info("Transaction committed for remove tag from project")
+        with index_updates("removing project tag"):
+            autocomplete.bump("tag", data["tag_name"], -1)
+            facets.mark_stale(project_ids=[data["project_id"]])
+            row_counts.invalidate("Project_Tag")
         cursor.close()
         log_info(f"Tag removed from project: project_id={data['project_id']}, tag_name={data['tag_name']}")
         return jsonify({"status": "success", "message": "Tag removed from project successfully"}), 200
@@ -67,6 +83,7 @@ def remove_tag_from_project():
 
 
 @project_tag_bp.route("/by-project", methods=["GET"])
+@reads
 def get_project_tags():
     from app import mysql
     try:
@@ -75,13 +92,11 @@ def get_project_tags():
             log_error("Missing query param 'project_id' in get_project_tags")
             return jsonify({"status": "error", "message": "Query param 'project_id' is required"}), 400
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.callproc("GetProjectTags", [project_id])
         results = cursor.fetchall()
         # Consume remaining result sets from stored procedure
         while cursor.nextset():
             pass
-        mysql.connection.commit()
         cursor.close()
         return jsonify({"status": "success", "data": results, "count": len(results)}), 200
     except Exception as e:
@@ -90,23 +105,53 @@ def get_project_tags():
 
 
 @project_tag_bp.route("/by-tag", methods=["GET"])
+@reads
 def get_projects_by_tag():
+    """
+    GET /project_tag/by-tag?tag_name=<tag>&after=<next>&limit=50&count=true pages
+    by project_id; ?all=true returns every project with the tag as before.
+    ?fields= picks the columns (see utils/fields.py); pages default to the
+    summary projection, ?all=true to every column.
+    """
     from app import mysql
     try:
         tag_name = request.args.get("tag_name")
         if not tag_name:
             log_error("Missing query param 'tag_name' in get_projects_by_tag")
             return jsonify({"status": "error", "message": "Query param 'tag_name' is required"}), 400
+        try:
+            page = PageRequest.from_args(request.args)
+            fields = PROJECT_FIELDS.parse(request.args.get("fields"), default="full" if page.unpaginated else "summary")
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
-        cursor.callproc("GetProjectsByTag", [tag_name])
-        results = cursor.fetchall()
-        # Consume remaining result sets from stored procedure
-        while cursor.nextset():
-            pass
-        mysql.connection.commit()
+        if page.unpaginated and fields is None:
+            cursor.callproc("GetProjectsByTag", [tag_name])
+            results = cursor.fetchall()
+            # Consume remaining result sets from stored procedure
+            while cursor.nextset():
+                pass
+        else:
+            select = "SELECT p.*" if fields is None else PROJECT_FIELDS.select(fields)
+            after_sql, params = page.after_clause("p.project_id")
+            limit_sql, limit = ("", ()) if page.unpaginated else ("LIMIT %s", (page.limit + 1,))
+            cursor.execute(f"""
+                {select} FROM Project p
+                INNER JOIN Project_Tag pt ON p.project_id = pt.project_id
+                WHERE pt.tag_name = %s {after_sql}
+                ORDER BY p.project_id
+                {limit_sql}
+            """, (tag_name,) + params + limit)
+            results = [PROJECT_FIELDS.prune(row, fields) for row in cursor.fetchall()]
+        total = None
+        if page.with_total:
+            total = row_counts.get(("Project_Tag", tag_name), lambda: count_rows(
+                cursor, "SELECT COUNT(*) AS total FROM Project_Tag WHERE tag_name = %s", (tag_name,)))
         cursor.close()
-        return jsonify({"status": "success", "data": results, "count": len(results)}), 200
+        if page.unpaginated:
+            return jsonify({"status": "success", "data": results, "count": len(results)}), 200
+        results, next_token = page.page(list(results), lambda row: (row["project_id"],))
+        return jsonify(page_response(results, next_token, total)), 200
     except Exception as e:
         log_error(f"Error getting projects by tag: {str(e)} | tag_name={tag_name}")
         return jsonify({"status": "error", "message": str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,108 @@
+'''
+Unified full-text search over researchers and projects.
+
+Matching runs on the FULLTEXT indexes (idx_person_search,
+idx_person_expertise, idx_project_search) instead of LIKE '%term%' scans;
+see utils/search.py for the queries and snippet highlighting.
+'''
+from flask import Blueprint, jsonify, request
+from utils.logger import log_info, log_error
+from utils.data_access import reads
+from utils.search import (
+    MODES, TYPES, merge_by_relevance, person_count_sql, person_result,
+    person_search_sql, project_count_sql, project_result, project_search_sql,
+    query_terms
+)
+
+search_bp = Blueprint("search", __name__, url_prefix="/search")
+
+MAX_QUERY_LENGTH = 200
+MAX_PER_PAGE = 100
+# type=all ranks every hit above the page, so how deep it can go is capped
+MAX_MERGED_DEPTH = 1000
+
+
+def _search_people(cursor, q, mode, limit, offset, terms):
+    cursor.execute(person_search_sql(mode), (q, q, q, q, limit, offset))
+    results = [person_result(row, terms) for row in cursor.fetchall()]
+    cursor.execute(person_count_sql(mode), (q, q))
+    return results, cursor.fetchone()["total"]
+
+
+def _search_projects(cursor, q, mode, limit, offset, terms):
+    cursor.execute(project_search_sql(mode), (q, q, limit, offset))
+    results = [project_result(row, terms) for row in cursor.fetchall()]
+    cursor.execute(project_count_sql(mode), (q,))
+    return results, cursor.fetchone()["total"]
+
+
+@search_bp.route("", methods=["GET"])
+@reads
+def search():
+    """
+    GET /search?q=<text>&type=person|project|all&mode=natural|boolean&page=1&per_page=20
+
+    Results are ranked by relevance. With type=all, each type's relevance is
+    scaled by its best hit before people and projects are merged.
+    """
+    from app import mysql
+    q = (request.args.get("q") or "").strip()
+    search_type = request.args.get("type", "all")
+    mode = request.args.get("mode", "natural")
+    if not q:
+        return jsonify({"status": "error", "message": "Parameter 'q' is required"}), 400
+    if len(q) > MAX_QUERY_LENGTH:
+        return jsonify({"status": "error", "message": f"Query is limited to {MAX_QUERY_LENGTH} characters"}), 400
+    if search_type not in TYPES:
+        return jsonify({"status": "error", "message": f"type must be one of {', '.join(TYPES)}"}), 400
+    if mode not in MODES:
+        return jsonify({"status": "error", "message": f"mode must be one of {', '.join(MODES)}"}), 400
+    try:
+        page = max(1, int(request.args.get("page", 1)))
+        per_page = min(max(1, int(request.args.get("per_page", 20))), MAX_PER_PAGE)
+    except ValueError:
+        return jsonify({"status": "error", "message": "page and per_page must be integers"}), 400
+
+    offset = (page - 1) * per_page
+    if search_type == "all" and offset + per_page > MAX_MERGED_DEPTH:
+        return jsonify({
+            "status": "error",
+            "message": f"type=all is limited to the first {MAX_MERGED_DEPTH} results; search one type to go further"
+        }), 400
+    terms = query_terms(q)
+    cursor = None
+    try:
+        log_info(f"Search: q={q!r} type={search_type} mode={mode} page={page}")
+        cursor = mysql.connection.cursor()
+        if search_type == "all":
+            # Merged pages need every hit ranked above the page from both
+            # lists, and the top hit of each for scaling
+            people, people_total = _search_people(cursor, q, mode, offset + per_page, 0, terms)
+            projects, projects_total = _search_projects(cursor, q, mode, offset + per_page, 0, terms)
+            results = merge_by_relevance(people, projects)[offset:offset + per_page]
+            total = people_total + projects_total
+            counts = {"person": people_total, "project": projects_total}
+        elif search_type == "person":
+            results, total = _search_people(cursor, q, mode, per_page, offset, terms)
+            counts = {"person": total}
+        else:
+            results, total = _search_projects(cursor, q, mode, per_page, offset, terms)
+            counts = {"project": total}
+
+        log_info(f"Search returned {len(results)} of {total} results")
+        return jsonify({
+            "status": "success",
+            "data": results,
+            "count": len(results),
+            "total": total,
+            "counts": counts,
+            "page": page,
+            "per_page": per_page,
+            "mode": mode
+        }), 200
+    except Exception as e:
+        log_error(f"Error in search: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        if cursor:
+            cursor.close()
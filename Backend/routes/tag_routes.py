@@ -6,31 +6,57 @@ It includes endpoints for creating, updating, deleting, and retrieving tags.
 '''
 from flask import Blueprint, jsonify, request
 from utils.logger import log_info, log_error
+from utils.pagination import PageRequest, count_rows, page_response, row_counts
+from utils.data_access import reads, writes
 
 tags_bp = Blueprint("tags", __name__, url_prefix="/tags")
 
 
 @tags_bp.route("/all", methods=["GET"])
+@reads
 def get_all_tags():
+    """
+    GET /tags/all?after=<next>&limit=50&count=true pages by tag_name;
+    ?all=true returns every tag (GetAllTags) as before.
+    """
     from app import mysql
     try:
-        log_info("Fetching all tags")
+        page = PageRequest.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    try:
+        log_info(f"Fetching tags - after: {page.after}, limit: {page.limit}, all: {page.unpaginated}")
         cursor = mysql.connection.cursor()
-        cursor.callproc("GetAllTags")
-        results = cursor.fetchall()
+        if page.unpaginated:
+            cursor.callproc("GetAllTags")
+            results = cursor.fetchall()
+            while cursor.nextset():
+                pass
+        else:
+            after_sql, params = page.after_clause("tag_name", prefix="WHERE")
+            cursor.execute(f"SELECT * FROM Tag {after_sql} ORDER BY tag_name LIMIT %s",
+                           tuple(str(v) for v in params) + (page.limit + 1,))
+            results = cursor.fetchall()
+        total = None
+        if page.with_total:
+            total = row_counts.get(("Tag",), lambda: count_rows(cursor, "SELECT COUNT(*) AS total FROM Tag"))
         cursor.close()
         log_info(f"Fetched {len(results)} tags")
-        return jsonify({
-            "status": "success",
-            "data": results,
-            "count": len(results)
-        }), 200
+        if page.unpaginated:
+            return jsonify({
+                "status": "success",
+                "data": results,
+                "count": len(results)
+            }), 200
+        results, next_token = page.page(list(results), lambda row: (row["tag_name"],))
+        return jsonify(page_response(results, next_token, total)), 200
     except Exception as e:
         log_error(f"Error fetching tags: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
 @tags_bp.route("/", methods=["POST"])
+@writes
 def create_tag():
     from app import mysql
     try:
@@ -48,6 +74,7 @@ def create_tag():
             pass
         mysql.connection.commit()
         log_info("Transaction committed for tag creation")
+        row_counts.invalidate("Tag")
         cursor.close()
         log_info(f"Tag created: name={name}")
         return jsonify({"status": "success", "message": "Tag created successfully"}), 201
@@ -58,6 +85,7 @@ def create_tag():
 
 
 @tags_bp.route("/<int:tag_id>", methods=["DELETE"])
+@writes
 def delete_tag(tag_id: int):
     from app import mysql
     try:
@@ -70,6 +98,7 @@ def delete_tag(tag_id: int):
             pass
         mysql.connection.commit()
         log_info("Transaction committed for tag deletion")
+        row_counts.invalidate("Tag")
         cursor.close()
         log_info(f"Tag deleted: tag_id={tag_id}")
         return jsonify({"status": "success", "message": "Tag deleted successfully"}), 200
@@ -80,6 +109,7 @@ def delete_tag(tag_id: int):
 
 
 @tags_bp.route("/rename", methods=["PUT"])
+@writes
 def rename_tag():
     from app import mysql
     try:
@@ -108,6 +138,7 @@ def rename_tag():
 
 
 @tags_bp.route("/usage", methods=["GET"])
+@reads
 def get_tag_usage():
     from app import mysql
     try:
@@ -116,13 +147,11 @@ def get_tag_usage():
             log_error("Missing query param 'tag_name' in get_tag_usage")
             return jsonify({"status": "error", "message": "Query param 'tag_name' is required"}), 400
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.callproc("GetTagUsageCount", [tag_name])
         result = cursor.fetchone() or {}
         # Consume remaining result sets from stored procedure
         while cursor.nextset():
             pass
-        mysql.connection.commit()
         cursor.close()
         log_info(f"Tag usage checked: tag_name={tag_name}, usage_count={result.get('usage_count', 0)}")
         return jsonify({
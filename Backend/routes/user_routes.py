@@ -9,10 +9,17 @@ from utils.jwt_utils import token_required
 from utils.authorization import verify_user_access
 from utils.validators import validate_project_data, validate_email, sanitize_string
 from utils.logger import log_info, log_error
+from utils.autocomplete import autocomplete
+from utils.collab_graph import collab_graph
+from utils.expertise_match import expertise_index
+from utils.facets import facets
+from utils.index_updates import index_updates
+from utils.data_access import reads, writes
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/user/<int:user_id>', methods=['GET'])
+@reads
 def get_user(user_id):
     """Get user profile information by user ID"""
     from app import mysql
@@ -20,13 +27,11 @@ def get_user(user_id):
     try:
         log_info(f"Fetching user profile for user_id: {user_id}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.callproc('SelectUserById', [user_id])
         user = cursor.fetchone()
         
         while cursor.nextset():
             pass
-        mysql.connection.commit()
         
         if not user:
             log_error(f"User not found for user_id: {user_id}")
@@ -54,13 +59,13 @@ def get_user(user_id):
             }
         }), 200
     except Exception as e:
-        mysql.connection.rollback()
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
             cursor.close()
 
 @user_bp.route('/user/search-profile', methods=['GET'])
+@reads
 def search_profile():
     """Search for Person profiles to claim"""
     from app import mysql
@@ -76,7 +81,6 @@ def search_profile():
     try:
         log_info(f"Searching profiles with name: {name}, email: {email}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         query = """
             SELECT 
                 p.person_id,
@@ -97,7 +101,6 @@ def search_profile():
         search_term = f"%{name if name else email}%"
         cursor.execute(query, (search_term, search_term))
         results = cursor.fetchall()
-        mysql.connection.commit()
         
         profiles = []
         for row in results:
@@ -113,7 +116,6 @@ def search_profile():
         
         return jsonify({'status': 'success', 'data': profiles}), 200
     except Exception as e:
-        mysql.connection.rollback()
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
@@ -122,6 +124,7 @@ def search_profile():
 @user_bp.route('/user/<int:user_id>/claim-person/<int:person_id>', methods=['POST'])
 @token_required
 @verify_user_access
+@writes
 def claim_person(user_id, person_id):
     """Link user account to existing person profile"""
     from app import mysql
@@ -165,6 +168,7 @@ def claim_person(user_id, person_id):
             cursor.close()
 
 @user_bp.route('/user/<int:user_id>/projects', methods=['GET'])
+@reads
 def get_user_projects(user_id):
     """Get all projects for a user"""
     from app import mysql
@@ -172,7 +176,6 @@ def get_user_projects(user_id):
     try:
         log_info(f"Fetching projects for user_id: {user_id}")
         cursor = mysql.connection.cursor()
-        cursor.execute("START TRANSACTION")
         cursor.callproc('SelectUserById', [user_id])
         user = cursor.fetchone()
         
@@ -180,7 +183,6 @@ def get_user_projects(user_id):
             pass
         
         if not user or not user.get('person_id'):
-            mysql.connection.commit()
             log_error(f"No person profile found for user_id: {user_id}")
             return jsonify({'status': 'error', 'message': 'No person profile'}), 404
         
@@ -201,7 +203,6 @@ def get_user_projects(user_id):
         
         cursor.execute(query, (user['person_id'],))
         projects = cursor.fetchall()
-        mysql.connection.commit()
         
         project_list = []
         for row in projects:
@@ -217,7 +218,6 @@ def get_user_projects(user_id):
         
         return jsonify({'status': 'success', 'data': project_list}), 200
     except Exception as e:
-        mysql.connection.rollback()
         return jsonify({'status': 'error', 'message': str(e)}), 500
     finally:
         if cursor:
@@ -226,6 +226,7 @@ def get_user_projects(user_id):
 @user_bp.route('/user/<int:user_id>/projects', methods=['POST'])
 @token_required
 @verify_user_access
+@writes
 def add_user_project(user_id):
     """Add a new project for the user"""
     from app import mysql
@@ -296,6 +297,17 @@ def add_user_project(user_id):
         while cursor.nextset():
             pass
         mysql.connection.commit()
+        with index_updates("adding user project"):
+            collab_graph.set_project_tag(project_id, data.get('tag_name'))
+            collab_graph.add_membership(
+                person_id, project_id,
+                start_date=data.get('start_date'),
+                end_date=data.get('end_date')
+            )
+            autocomplete.bump('person', person_id)
+            autocomplete.record('tag', data.get('tag_name'), data.get('tag_name'))
+            expertise_index.mark_stale(person_ids=[person_id])
+            facets.mark_stale(person_ids=[person_id], project_ids=[project_id])
         
         return jsonify({
             'status': 'success',
@@ -311,6 +323,7 @@ def add_user_project(user_id):
 
 @user_bp.route('/user/create-profile-with-affiliation', methods=['POST'])
 @token_required
+@writes
 def create_profile_with_affiliation():
     """Create complete profile with institution/department relationships"""
     from app import mysql
@@ -423,6 +436,22 @@ def create_profile_with_affiliation():
         while cursor.nextset():
             pass
         mysql.connection.commit()
+        with index_updates("creating user profile"):
+            collab_graph.upsert_person(
+                person_id,
+                label=data['person_name'],
+                institution=data.get('institution_name') if department_id else None,
+                department=data.get('department_name') if department_id else None,
+                expertise=[data.get('expertise_1'), data.get('expertise_2'), data.get('expertise_3')],
+                main_field=data.get('expertise_1', 'General'),
+                department_id=department_id,
+                institution_id=institution_id if department_id else None
+            )
+            autocomplete.upsert('person', person_id, data['person_name'])
+            autocomplete.upsert('institution', institution_id, data.get('institution_name'))
+            autocomplete.upsert('department', department_id, data.get('department_name'))
+            expertise_index.mark_stale(person_ids=[person_id])
+            facets.mark_stale(person_ids=[person_id])
         
         from utils.jwt_utils import generate_access_token
         user_email = request.current_user.get('email')
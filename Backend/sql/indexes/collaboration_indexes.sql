@@ -0,0 +1,5 @@
+-- Purpose: Secondary indexes for the Collaboration edge table.
+-- The primary key (person_a, person_b) already serves lookups by person_a.
+
+-- Reverse direction, so "collaborators of X" is two range scans instead of a full scan
+CREATE INDEX idx_collaboration_person_b ON Collaboration (person_b, person_a);
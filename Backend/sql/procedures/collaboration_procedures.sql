@@ -0,0 +1,117 @@
+-- Filename: collaboration_procedures.sql
+-- The purpose of this file is to maintain the Collaboration table, the
+-- materialized co-authorship edges derived from WorkedOn.
+--
+-- The WorkedOn procedures (workedon_crud.sql), DeleteProject and DeletePerson
+-- collect the person pairs a write can affect into the session temporary
+-- table tmp_collaboration_pairs and then call RefreshCollaborationPairs, which
+-- recomputes only those rows. BackfillCollaboration rebuilds the whole table
+-- once for data that was loaded before it existed.
+
+-- Creates (or empties) the per-session list of pairs to recompute
+CREATE PROCEDURE PrepareCollaborationPairs()
+BEGIN
+    CREATE TEMPORARY TABLE IF NOT EXISTS tmp_collaboration_pairs (
+        person_a BIGINT UNSIGNED NOT NULL,
+        person_b BIGINT UNSIGNED NOT NULL,
+        PRIMARY KEY (person_a, person_b)
+    );
+    DELETE FROM tmp_collaboration_pairs;
+END;
+
+-- Queues every pair between a person and the other members of a project
+CREATE PROCEDURE QueueCollaborationPairsForMember(
+    IN p_person_id  BIGINT UNSIGNED,
+    IN p_project_id BIGINT UNSIGNED
+)
+BEGIN
+    INSERT IGNORE INTO tmp_collaboration_pairs (person_a, person_b)
+    SELECT DISTINCT LEAST(p_person_id, w.person_id), GREATEST(p_person_id, w.person_id)
+    FROM WorkedOn w
+    WHERE w.project_id = p_project_id
+      AND w.person_id <> p_person_id;
+END;
+
+-- Queues every pair of members of a project
+CREATE PROCEDURE QueueCollaborationPairsForProject(
+    IN p_project_id BIGINT UNSIGNED
+)
+BEGIN
+    INSERT IGNORE INTO tmp_collaboration_pairs (person_a, person_b)
+    SELECT DISTINCT w1.person_id, w2.person_id
+    FROM WorkedOn w1
+    JOIN WorkedOn w2 ON w1.project_id = w2.project_id
+        AND w1.person_id < w2.person_id
+    WHERE w1.project_id = p_project_id;
+END;
+
+-- Recomputes weight and year range for the queued pairs from WorkedOn
+CREATE PROCEDURE RefreshCollaborationPairs()
+BEGIN
+    DELETE c FROM Collaboration c
+    JOIN tmp_collaboration_pairs t
+      ON c.person_a = t.person_a AND c.person_b = t.person_b;
+
+    INSERT INTO Collaboration (person_a, person_b, weight, first_year, last_year)
+    SELECT t.person_a,
+           t.person_b,
+           COUNT(DISTINCT w1.project_id),
+           MIN(YEAR(COALESCE(w1.start_date, w2.start_date))),
+           MAX(YEAR(COALESCE(w1.end_date, w2.end_date, w1.start_date, w2.start_date)))
+    FROM tmp_collaboration_pairs t
+    JOIN WorkedOn w1 ON w1.person_id = t.person_a
+    JOIN WorkedOn w2 ON w2.person_id = t.person_b AND w2.project_id = w1.project_id
+    GROUP BY t.person_a, t.person_b;
+
+    DELETE FROM tmp_collaboration_pairs;
+END;
+
+-- One-shot rebuild of the whole table from WorkedOn
+CREATE PROCEDURE BackfillCollaboration()
+BEGIN
+    DELETE FROM Collaboration;
+
+    INSERT INTO Collaboration (person_a, person_b, weight, first_year, last_year)
+    SELECT w1.person_id,
+           w2.person_id,
+           COUNT(DISTINCT w1.project_id),
+           MIN(YEAR(COALESCE(w1.start_date, w2.start_date))),
+           MAX(YEAR(COALESCE(w1.end_date, w2.end_date, w1.start_date, w2.start_date)))
+    FROM WorkedOn w1
+    JOIN WorkedOn w2 ON w1.project_id = w2.project_id
+        AND w1.person_id < w2.person_id
+    GROUP BY w1.person_id, w2.person_id;
+
+    SELECT COUNT(*) AS collaboration_count FROM Collaboration;
+END;
+
+-- Everyone a person has worked with, strongest ties first
+CREATE PROCEDURE SelectCollaboratorsByPersonID(IN PersonID BIGINT UNSIGNED)
+BEGIN
+    SELECT p.person_id, p.person_name, p.main_field,
+           c.weight, c.first_year, c.last_year
+    FROM (
+        SELECT person_b AS person_id, weight, first_year, last_year
+        FROM Collaboration WHERE person_a = PersonID
+        UNION ALL
+        SELECT person_a AS person_id, weight, first_year, last_year
+        FROM Collaboration WHERE person_b = PersonID
+    ) c
+    JOIN Person p ON p.person_id = c.person_id
+    ORDER BY c.weight DESC, p.person_name ASC;
+END;
+
+-- Precomputed collaborator suggestions for a person, best first
+CREATE PROCEDURE SelectRecommendationsByPersonID(
+    IN PersonID BIGINT UNSIGNED,
+    IN K        INT
+)
+BEGIN
+    SELECT r.rank_position, r.candidate_id AS person_id, p.person_name, p.main_field,
+           r.score, r.common_collaborators, r.expertise_overlap, r.computed_at
+    FROM CollaboratorRecommendation r
+    JOIN Person p ON p.person_id = r.candidate_id
+    WHERE r.person_id = PersonID
+    ORDER BY r.rank_position
+    LIMIT K;
+END;
@@ -64,6 +64,10 @@ BEGIN
     -- Delete related records first (WorksIn doesn't have CASCADE)
     DELETE FROM WorksIn WHERE person_id = p_person_id;
     
+    -- Drop this person's co-authorship edges; no other pair changes
+    DELETE FROM Collaboration WHERE person_a = p_person_id;
+    DELETE FROM Collaboration WHERE person_b = p_person_id;
+    
     -- WorkedOn has CASCADE, so it will be deleted automatically
     -- But we can explicitly delete it for clarity
     DELETE FROM WorkedOn WHERE person_id = p_person_id;
@@ -185,10 +185,16 @@ BEGIN
     -- Lock related Project_Tag rows to prevent race conditions
     SELECT COUNT(*) FROM Project_Tag WHERE project_id = ProjectID FOR UPDATE;
     
+    -- Remember the co-authorship pairs this project contributes to
+    CALL PrepareCollaborationPairs();
+    CALL QueueCollaborationPairsForProject(ProjectID);
+    
     -- Delete related records first (cascading delete)
     DELETE FROM Project_Tag WHERE project_id = ProjectID;
     DELETE FROM WorkedOn WHERE project_id = ProjectID;
     
+    CALL RefreshCollaborationPairs();
+    
     -- Delete the project
     DELETE FROM Project WHERE project_id = ProjectID;
 END;
@@ -40,6 +40,11 @@ BEGIN
     ON DUPLICATE KEY UPDATE
         project_role = VALUES(project_role),
         end_date     = VALUES(end_date);
+    
+    -- Keep the materialized co-authorship edges in step
+    CALL PrepareCollaborationPairs();
+    CALL QueueCollaborationPairsForMember(p_person_id, p_project_id);
+    CALL RefreshCollaborationPairs();
 END;
 
 CREATE PROCEDURE sp_update_workedon_role (
@@ -98,6 +103,11 @@ BEGIN
     WHERE person_id = p_person_id
       AND project_id = p_project_id
       AND start_date = p_start_date;
+    
+    -- The end date feeds Collaboration.last_year
+    CALL PrepareCollaborationPairs();
+    CALL QueueCollaborationPairsForMember(p_person_id, p_project_id);
+    CALL RefreshCollaborationPairs();
 END;
 
 CREATE PROCEDURE sp_delete_workedon (
@@ -121,10 +131,16 @@ BEGIN
         SET MESSAGE_TEXT = 'WorkedOn relationship not found';
     END IF;
     
+    -- Remember who this person shared the project with before the row goes
+    CALL PrepareCollaborationPairs();
+    CALL QueueCollaborationPairsForMember(p_person_id, p_project_id);
+    
     DELETE FROM WorkedOn
     WHERE person_id = p_person_id
       AND project_id = p_project_id
       AND start_date = p_start_date;
+    
+    CALL RefreshCollaborationPairs();
 END;
 
 CREATE PROCEDURE sp_get_workedon_for_project (
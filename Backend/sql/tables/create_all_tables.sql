@@ -98,6 +98,43 @@ CREATE TABLE IF NOT EXISTS WorkedOn (
         ON UPDATE CASCADE ON DELETE CASCADE
 );
 
+-- Materialized co-authorship edges, one row per pair (person_a < person_b).
+-- Maintained by the WorkedOn procedures (see collaboration_procedures.sql)
+CREATE TABLE IF NOT EXISTS Collaboration (
+    person_a    BIGINT UNSIGNED NOT NULL,
+    person_b    BIGINT UNSIGNED NOT NULL,
+    weight      INT UNSIGNED    NOT NULL,
+    first_year  SMALLINT        DEFAULT NULL,
+    last_year   SMALLINT        DEFAULT NULL,
+    PRIMARY KEY (person_a, person_b),
+    CONSTRAINT ck_collaboration_order CHECK (person_a < person_b),
+    CONSTRAINT fk_collaboration_person_a
+        FOREIGN KEY (person_a) REFERENCES Person(person_id)
+        ON UPDATE CASCADE ON DELETE CASCADE,
+    CONSTRAINT fk_collaboration_person_b
+        FOREIGN KEY (person_b) REFERENCES Person(person_id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+-- Precomputed collaborator suggestions, ranked in batch so reads are a
+-- single primary key range scan
+CREATE TABLE IF NOT EXISTS CollaboratorRecommendation (
+    person_id             BIGINT UNSIGNED NOT NULL,
+    rank_position         SMALLINT UNSIGNED NOT NULL,
+    candidate_id          BIGINT UNSIGNED NOT NULL,
+    score                 DECIMAL(6,4)    NOT NULL,
+    common_collaborators  INT UNSIGNED    NOT NULL DEFAULT 0,
+    expertise_overlap     DECIMAL(6,4)    NOT NULL DEFAULT 0,
+    computed_at           TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (person_id, rank_position),
+    CONSTRAINT fk_recommendation_person
+        FOREIGN KEY (person_id) REFERENCES Person(person_id)
+        ON UPDATE CASCADE ON DELETE CASCADE,
+    CONSTRAINT fk_recommendation_candidate
+        FOREIGN KEY (candidate_id) REFERENCES Person(person_id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+
 -- 3.5. WorksIn
 CREATE TABLE WorksIn (
     worksin_id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
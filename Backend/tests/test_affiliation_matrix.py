@@ -0,0 +1,73 @@
+"""
+Unit tests for the institution/department collaboration matrix.
+
+The sparse Bᵀ·C·B product is checked against counting edges directly; no
+database is needed.
+
+To run: pytest tests/test_affiliation_matrix.py -v
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from utils.affiliation_matrix import collaboration_matrix
+from utils.collab_graph import CollaborationGraph
+
+
+def _graph():
+    people = {n: {'label': f'P{n}'} for n in range(1, 7)}
+    # 10: 1, 2, 3 -- 11: 3, 4 -- 12: 4, 5 (twice through 13) -- 6 is isolated
+    memberships = [(1, 10), (2, 10), (3, 10), (3, 11), (4, 11), (4, 12), (5, 12), (4, 13), (5, 13)]
+    # Institutions 100 and 200; person 3 belongs to both
+    affiliations = [(1, 1, 100), (2, 2, 100), (3, 2, 100), (3, 3, 200), (4, 3, 200), (5, 4, 200), (6, 4, 200)]
+    graph = CollaborationGraph()
+    graph.load(people, memberships, affiliations=affiliations)
+    return graph
+
+
+def _cells(group_ids, matrix):
+    coo = matrix.tocoo()
+    return {
+        (int(group_ids[i]), int(group_ids[j])): value
+        for i, j, value in zip(coo.row, coo.col, coo.data)
+        if i <= j
+    }
+
+
+def test_institution_counts():
+    group_ids, researchers, matrix = collaboration_matrix(_graph())
+
+    assert group_ids.tolist() == [100, 200]
+    assert researchers.tolist() == [3, 4]
+    # 100: 1-2, 1-3, 2-3; 200: 3-4, 4-5; across: 1-3, 2-3 (3 is in 200), 3-4 (3 is in 100)
+    assert _cells(group_ids, matrix) == {(100, 100): 3, (200, 200): 2, (100, 200): 3}
+
+
+def test_weighted_department_counts():
+    group_ids, _, matrix = collaboration_matrix(_graph(), level='department', weighted=True)
+    assert _cells(group_ids, matrix) == {(1, 2): 2, (1, 3): 1, (2, 2): 1, (2, 3): 2, (3, 3): 1, (3, 4): 2}
+
+
+def test_matches_direct_count_on_random_graph():
+    rng = random.Random(3)
+    people = {n: {'label': str(n)} for n in range(200)}
+    memberships = [(rng.randrange(200), project) for project in range(150) for _ in range(rng.randint(1, 5))]
+    affiliations = [(n, n % 7, n % 5) for n in range(200) if n % 11]
+    graph = CollaborationGraph()
+    graph.load(people, memberships, affiliations=affiliations)
+
+    group_ids, _, matrix = collaboration_matrix(graph)
+    institutions = graph.affiliations()
+    expected = Counter()
+    for person_1, person_2, _ in graph.edge_list():
+        for a in institutions.get(person_1, ()):
+            for b in institutions.get(person_2, ()):
+                expected[(min(a, b), max(a, b))] += 1
+    assert _cells(group_ids, matrix) == dict(expected)
+
+
+def test_unknown_level():
+    with pytest.raises(ValueError):
+        collaboration_matrix(_graph(), level='country')
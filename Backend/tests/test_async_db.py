@@ -0,0 +1,106 @@
+"""
+Unit tests for the async read pools behind asgi.py.
+
+Fake pools stand in for aiomysql ones, so no database is needed.
+
+To run: pytest tests/test_async_db.py -v
+"""
+
+import asyncio
+
+import pytest
+
+import utils.async_db as async_db
+from utils import data_access
+from utils.async_db import AsyncMySQL
+from utils.db_pool import PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.sets = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=()):
+        self.conn.statements.append(sql)
+
+    async def callproc(self, name, args=()):
+        self.conn.statements.append(f"CALL {name}")
+        self.sets = 2
+
+    async def fetchall(self):
+        return [{'server': self.conn.pool.name}]
+
+    async def nextset(self):
+        self.sets -= 1
+        return self.sets > 0
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    async def commit(self):
+        self.commits += 1
+
+
+class FakePool:
+    def __init__(self, name, blocked=False):
+        self.name = name
+        self.conn = FakeConnection(self)
+        self.blocked = blocked
+        self.released = 0
+        self.size, self.freesize, self.minsize, self.maxsize = 1, 1, 1, 1
+
+    async def acquire(self):
+        if self.blocked:
+            await asyncio.sleep(60)
+        return self.conn
+
+    def release(self, conn):
+        self.released += 1
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(data_access, 'sticky', data_access.Stickiness(seconds=60))
+    mysql = AsyncMySQL()
+    mysql.pool = FakePool('primary')
+    mysql.replica_pool = FakePool('replica')
+    return mysql
+
+
+def test_reads_use_the_replica_unless_the_caller_is_sticky(db):
+    assert asyncio.run(db.fetchall("SELECT 1", caller="user:7")) == [{'server': 'replica'}]
+    data_access.sticky.mark("user:7")
+    assert asyncio.run(db.fetchall("SELECT 1", caller="user:7")) == [{'server': 'primary'}]
+    assert asyncio.run(db.callproc("SelectProjectByID", [1], caller="user:8")) == [{'server': 'replica'}]
+    assert db.replica_pool.released == 2 and db.pool.released == 1
+
+    db.replica_pool = None
+    assert asyncio.run(db.fetchall("SELECT 1", caller="user:8")) == [{'server': 'primary'}]
+
+
+def test_read_only_mode_wraps_reads_in_a_transaction(db, monkeypatch):
+    monkeypatch.setattr(data_access, 'READ_MODE', 'read_only')
+    asyncio.run(db.fetchall("SELECT 1"))
+    assert db.replica_pool.conn.statements == ["START TRANSACTION READ ONLY", "SELECT 1"]
+    assert db.replica_pool.conn.commits == 1
+
+
+def test_full_pool_times_out(db, monkeypatch):
+    monkeypatch.setattr(async_db, 'ASYNC_CHECKOUT_TIMEOUT', 0.01)
+    db.replica_pool.blocked = True
+    with pytest.raises(PoolTimeout):
+        asyncio.run(db.fetchall("SELECT 1"))
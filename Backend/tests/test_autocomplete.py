@@ -0,0 +1,108 @@
+"""
+Unit tests for the trie/trigram autocomplete index.
+
+Incremental updates are checked against an index loaded from scratch with
+the same rows; no database is needed.
+
+To run: pytest tests/test_autocomplete.py -v
+"""
+
+import random
+
+from utils.autocomplete import Autocomplete, AutocompleteIndex, prefix_distance, tokens_of
+
+TAGS = [
+    ('quantum computing', 'Quantum Computing', 12),
+    ('quantum optics', 'Quantum Optics', 3),
+    ('machine learning', 'Machine Learning', 40),
+    ('machine vision', 'Machine Vision', 5),
+    ('marine biology', 'Marine Biology', 7),
+    ('genomics', 'Genomics', 9),
+]
+
+
+def _index(rows=TAGS):
+    index = AutocompleteIndex()
+    index.load(rows)
+    return index
+
+
+def _keys(results):
+    return [row[0] for row in results]
+
+
+def test_tokens_start_at_every_word():
+    assert tokens_of('Jane  Smith-Jones') == ['jane smith jones', 'smith jones', 'jones']
+    assert tokens_of('Zoë') == ['zoe']
+
+
+def test_prefix_matches_ranked_by_popularity():
+    index = _index()
+    assert _keys(index.complete('ma')) == ['machine learning', 'marine biology', 'machine vision']
+    assert _keys(index.complete('Ma', k=1)) == ['machine learning']
+    assert _keys(index.complete('opt')) == ['quantum optics']
+    assert _keys(index.complete('machine v')) == ['machine vision']
+    assert index.complete('') == []
+
+
+def test_typos_fill_remaining_slots():
+    index = _index()
+    assert index.complete('quantm') == [
+        ('quantum computing', 'Quantum Computing', 12, 1),
+        ('quantum optics', 'Quantum Optics', 3, 1),
+    ]
+    assert _keys(index.complete('genmoics')) == ['genomics']
+    assert index.complete('genmoics', fuzzy=False) == []
+    # Exact completions come before fuzzy ones
+    assert index.complete('marine', k=3) == [
+        ('marine biology', 'Marine Biology', 7, 0),
+        ('machine learning', 'Machine Learning', 40, 2),
+        ('machine vision', 'Machine Vision', 5, 2),
+    ]
+    assert index.complete('gen x') == []
+
+
+def test_prefix_distance():
+    assert prefix_distance('quantm', 'quantum', 2) == 1
+    assert prefix_distance('qua', 'quantum', 2) == 0
+    assert prefix_distance('xyzzy', 'quantum', 1) == 2
+
+
+def test_incremental_updates_match_fresh_load():
+    rng = random.Random(5)
+    letters = 'abcde'
+    rows = {}
+    index = AutocompleteIndex()
+    index.load([])
+    for step in range(1500):
+        key = rng.randrange(120)
+        op = rng.random()
+        if op < 0.5:
+            name = ' '.join(''.join(rng.choice(letters) for _ in range(rng.randint(2, 6))) for _ in range(rng.randint(1, 3)))
+            popularity = rng.randrange(30)
+            rows[key] = (name, popularity)
+            index.upsert(key, name, popularity)
+        elif op < 0.8 and key in rows:
+            delta = rng.choice([-2, -1, 1, 3])
+            rows[key] = (rows[key][0], max(0, rows[key][1] + delta))
+            index.bump(key, delta)
+        elif key in rows:
+            del rows[key]
+            index.remove(key)
+
+    fresh = _index([(key, name, popularity) for key, (name, popularity) in rows.items()])
+    for prefix in ['a', 'b', 'ab', 'cde', 'e', 'ab c', 'dd', 'abcd']:
+        for k in (1, 5, 60):
+            assert index.complete(prefix, k=k, fuzzy=False) == fresh.complete(prefix, k=k, fuzzy=False)
+
+
+def test_deltas_before_load_are_ignored():
+    autocomplete = Autocomplete()
+    autocomplete.upsert('tag', 'genomics', 'Genomics', 1)
+    autocomplete.load({'tag': TAGS[:1]})
+    assert _keys(autocomplete.complete('tag', 'gen')) == []
+
+    autocomplete.upsert('tag', 'genomics', 'Genomics')
+    autocomplete.bump('tag', 'genomics', 2)
+    assert autocomplete.complete('tag', 'gen') == [('genomics', 'Genomics', 2, 0)]
+    assert autocomplete.complete('person', 'gen') == []
@@ -0,0 +1,115 @@
+"""
+Unit tests for the centrality metrics and the background service.
+
+Metrics are checked against networkx on the same graph; no database is
+needed.
+
+To run: pytest tests/test_centrality.py -v
+"""
+
+import threading
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import utils.centrality as centrality
+from utils.centrality import (
+    CentralityService, betweenness_error_bound, betweenness_samples_for,
+    eigenvector, pagerank, sampled_betweenness
+)
+from utils.collab_graph import CollaborationGraph
+from utils.sparse_graph import SparseGraph
+
+
+@pytest.fixture
+def weighted():
+    G = nx.powerlaw_cluster_graph(250, 3, 0.3, seed=2)
+    for a, b in G.edges:
+        G[a][b]['weight'] = 1 + (a * b) % 3
+    edges = np.array([(a, b, G[a][b]['weight']) for a, b in G.edges])
+    graph = SparseGraph.from_edges(list(G.nodes), edges[:, 0], edges[:, 1], edges[:, 2])
+    order = [graph.index_of(v) for v in G.nodes]
+    return G, graph, order
+
+
+def test_pagerank_and_eigenvector_match_networkx(weighted):
+    G, graph, order = weighted
+
+    expected = nx.pagerank(G, tol=1e-10)
+    assert pagerank(graph.adjacency)[order] == pytest.approx([expected[v] for v in G.nodes], abs=1e-7)
+
+    expected = nx.eigenvector_centrality(G, weight='weight', tol=1e-10, max_iter=2000)
+    assert eigenvector(graph.adjacency)[order] == pytest.approx([expected[v] for v in G.nodes], abs=1e-6)
+
+
+def test_betweenness_exact_with_every_source(weighted):
+    G, graph, order = weighted
+    expected = nx.betweenness_centrality(G)
+    assert sampled_betweenness(graph.adjacency, samples=len(G))[order] == pytest.approx(
+        [expected[v] for v in G.nodes], abs=1e-12
+    )
+
+
+def test_sampled_betweenness_within_error_bound(weighted):
+    G, graph, order = weighted
+    exact = nx.betweenness_centrality(G)
+    expected = np.array([exact[v] for v in G.nodes])
+    samples = 120
+    estimate = sampled_betweenness(graph.adjacency, samples=samples, seed=1)[order]
+    assert np.abs(estimate - expected).max() <= betweenness_error_bound(len(G), samples)
+
+
+def test_sample_count_and_error_bound_agree():
+    samples = betweenness_samples_for(10_000, epsilon=0.05, delta=0.1)
+    assert betweenness_error_bound(10_000, samples, delta=0.1) <= 0.05
+    assert betweenness_samples_for(100, epsilon=0.001) == 100
+    assert betweenness_error_bound(100, 100) == 0.0
+
+
+def test_service_computes_per_graph_version():
+    people = {n: {'label': f'P{n}'} for n in range(6)}
+    memberships = [(0, 1), (1, 1), (1, 2), (2, 2), (2, 3), (3, 3), (3, 4), (4, 4), (4, 5), (5, 5)]
+    graph = CollaborationGraph()
+    graph.load(people, memberships)
+    service = CentralityService(graph, samples=0, epsilon=0.1)
+
+    result = service.wait(timeout=30)
+    assert result['version'] == graph.version
+    assert result['betweenness']['exact']
+    top = service.top(result, 'betweenness', 2)
+    assert sorted(person_id for person_id, _ in top) == [2, 3]
+
+    graph.add_membership(0, 5)
+    assert service.result()['version'] < graph.version
+    assert service.wait(timeout=30)['version'] == graph.version
+    assert service.node_metrics(service.result(), 99) == {'pagerank': 0.0, 'eigenvector': 0.0, 'betweenness': 0.0}
+
+
+def test_service_coalesces_versions_that_change_during_a_run(monkeypatch):
+    people = {n: {'label': f'P{n}'} for n in range(6)}
+    graph = CollaborationGraph()
+    graph.load(people, [(0, 1), (1, 1), (1, 2), (2, 2)])
+    service = CentralityService(graph, samples=0, epsilon=0.1)
+
+    runs = []
+    release = threading.Event()
+
+    def slow_pagerank(adjacency):
+        runs.append(adjacency.shape[0])
+        release.wait(10)
+        return pagerank(adjacency)
+
+    monkeypatch.setattr(centrality, 'pagerank', slow_pagerank)
+
+    assert service.result() is None
+    for project_id in range(10, 40):
+        graph.add_membership(project_id % 6, project_id)
+        graph.add_membership((project_id + 1) % 6, project_id)
+        assert service.result() is None
+        assert len(service.in_flight()) == 1
+    release.set()
+
+    assert service.wait(timeout=30)['version'] == graph.version
+    assert len(runs) <= 2
+    assert service.in_flight() == []
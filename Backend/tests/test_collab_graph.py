@@ -0,0 +1,260 @@
+"""
+Unit tests for the in-memory collaboration graph used by the analytics routes.
+
+These do not need a database; they check that deltas leave the graph in the
+same state a full rebuild would.
+
+To run: pytest tests/test_collab_graph.py -v
+"""
+
+import pytest
+from utils.collab_graph import CollaborationGraph
+
+
+@pytest.fixture
+def people():
+    return {
+        1: {'label': 'Ada', 'institution': 'USM', 'department': 'CS', 'expertise': ['graphs']},
+        2: {'label': 'Grace', 'institution': 'USM', 'department': 'CS', 'expertise': []},
+        3: {'label': 'Alan', 'institution': 'Roux', 'department': None, 'expertise': ['ml']},
+        4: {'label': 'Edsger', 'institution': None, 'department': None, 'expertise': []},
+    }
+
+
+@pytest.fixture
+def memberships():
+    # Project 10: 1, 2, 3 -- project 11: 1, 2
+    return [(1, 10), (2, 10), (3, 10), (1, 11), (2, 11)]
+
+
+def _edges(network):
+    return {(e['source'], e['target']): e['weight'] for e in network['edges']}
+
+
+def _nodes(network):
+    return {n['id']: n for n in network['nodes']}
+
+
+def test_load_builds_weighted_edges(people, memberships):
+    graph = CollaborationGraph()
+    graph.load(people, memberships)
+    network = graph.snapshot()
+
+    assert _edges(network) == {(1, 2): 2, (1, 3): 1, (2, 3): 1}
+    nodes = _nodes(network)
+    assert set(nodes) == {1, 2, 3}
+    assert nodes[1]['degree'] == 2
+    assert nodes[1]['total_projects'] == 2
+    assert nodes[3]['institution'] == 'Roux'
+    assert nodes[3]['department'] == 'Unknown'
+    assert network['statistics']['total_researchers'] == 3
+    assert network['statistics']['total_collaborations'] == 3
+    assert network['statistics']['network_density'] == 1.0
+
+
+def test_include_isolated(people, memberships):
+    graph = CollaborationGraph()
+    graph.load(people, memberships)
+    network = graph.snapshot(include_isolated=True)
+
+    assert 4 in _nodes(network)
+    assert network['statistics']['total_researchers'] == 4
+
+
+def test_deltas_match_full_rebuild(people, memberships):
+    incremental = CollaborationGraph()
+    incremental.load(people, memberships)
+    incremental.add_membership(4, 11)
+    incremental.remove_membership(3, 10)
+    incremental.upsert_person(5, label='Barbara')
+    incremental.add_membership(5, 12)
+    incremental.add_membership(4, 12)
+
+    rebuilt = CollaborationGraph()
+    rebuilt.load(
+        {**people, 5: {'label': 'Barbara'}},
+        [(1, 10), (2, 10), (1, 11), (2, 11), (4, 11), (5, 12), (4, 12)]
+    )
+
+    for include_isolated in (False, True):
+        a = incremental.snapshot(include_isolated)
+        b = rebuilt.snapshot(include_isolated)
+        assert _edges(a) == _edges(b)
+        assert a['statistics'] == b['statistics']
+        for person_id, node in _nodes(b).items():
+            assert _nodes(a)[person_id]['degree'] == node['degree']
+            assert _nodes(a)[person_id]['total_projects'] == node['total_projects']
+
+
+def test_remove_project_and_person(people, memberships):
+    graph = CollaborationGraph()
+    graph.load(people, memberships)
+
+    graph.remove_project(11)
+    assert _edges(graph.snapshot()) == {(1, 2): 1, (1, 3): 1, (2, 3): 1}
+
+    graph.remove_person(3)
+    network = graph.snapshot(include_isolated=True)
+    assert _edges(network) == {(1, 2): 1}
+    assert 3 not in _nodes(network)
+    assert network['statistics']['total_researchers'] == 3
+
+
+def test_version_bumps_and_unloaded_graph_ignores_deltas(people, memberships):
+    graph = CollaborationGraph()
+    graph.add_membership(1, 10)
+    assert graph.version == 0
+
+    graph.load(people, memberships)
+    version = graph.version
+    graph.add_membership(4, 10)
+    assert graph.version == version + 1
+    assert _nodes(graph.snapshot())[4]['community'] == _nodes(graph.snapshot())[1]['community']
+
+
+def test_load_from_collaboration_rows(people, memberships):
+    derived = CollaborationGraph()
+    derived.load(people, memberships)
+
+    materialized = CollaborationGraph()
+    materialized.load(people, memberships, edges=[(1, 2, 2), (1, 3, 1), (2, 3, 1)])
+
+    assert _edges(materialized.snapshot()) == _edges(derived.snapshot())
+    materialized.add_membership(4, 10)
+    assert _edges(materialized.snapshot())[(1, 4)] == 1
+
+
+def test_ego_network_depth_and_limit(people, memberships):
+    graph = CollaborationGraph()
+    graph.load(people, memberships + [(3, 12), (4, 12)])
+
+    one_hop = graph.ego_network(1, depth=1)
+    assert {n['id'] for n in one_hop['nodes']} == {1, 2, 3}
+    assert _edges(one_hop) == {(1, 2): 2, (1, 3): 1, (2, 3): 1}
+    assert {n['id']: n['hops'] for n in one_hop['nodes']}[3] == 1
+
+    two_hops = graph.ego_network(1, depth=2)
+    assert {n['id']: n['hops'] for n in two_hops['nodes']}[4] == 2
+    assert (3, 4) in _edges(two_hops)
+
+    # Strongest tie is kept first when the limit cuts the neighbourhood
+    limited = graph.ego_network(1, depth=2, limit=2)
+    assert {n['id'] for n in limited['nodes']} == {1, 2}
+    assert limited['truncated'] is True
+
+    assert graph.ego_network(99) is None
+
+
+@pytest.fixture
+def chain():
+    # 1-2-3-4-5 chain of single projects, plus a weak shortcut 1-6-5
+    people = {i: {'label': f'P{i}'} for i in range(1, 8)}
+    memberships = []
+    for project_id, pair in enumerate([(1, 2), (2, 3), (3, 4), (4, 5), (1, 6), (6, 5)], start=100):
+        memberships += [(pair[0], project_id), (pair[1], project_id)]
+    # Repeat the long chain's collaborations so they are strong ties
+    for project_id, pair in enumerate([(1, 2), (2, 3), (3, 4), (4, 5)], start=200):
+        for repeat in range(3):
+            memberships += [(pair[0], project_id * 10 + repeat), (pair[1], project_id * 10 + repeat)]
+    graph = CollaborationGraph()
+    graph.load(people, memberships)
+    return graph
+
+
+def test_shortest_path_bidirectional(chain):
+    assert chain.shortest_path(1, 5) == [1, 6, 5]
+    assert chain.shortest_path(2, 4) == [2, 3, 4]
+    assert chain.shortest_path(3, 3) == [3]
+    assert chain.shortest_path(1, 7) is None
+    assert chain.shortest_path(1, 99) is None
+    assert chain.shortest_path(2, 5, max_depth=1) is None
+
+
+def test_weighted_path_prefers_strong_ties(chain):
+    assert chain.shortest_path(1, 5, weighted=True) == [1, 2, 3, 4, 5]
+    assert chain.shortest_path(1, 5, weighted=True, max_depth=2) == [1, 6, 5]
+
+
+def test_weighted_path_keeps_longer_cheap_routes_from_hiding_short_ones():
+    graph = CollaborationGraph()
+    graph._adjacency = {
+        'S': {'A': 1, 'B': 10}, 'A': {'S': 1, 'T': 1, 'C': 10}, 'B': {'S': 10, 'C': 10},
+        'C': {'B': 10, 'A': 10}, 'T': {'A': 1},
+    }
+    assert graph._weighted_path('S', 'T', 3) == ['S', 'A', 'T']
+    assert graph._weighted_path('S', 'T', 5) == ['S', 'B', 'C', 'A', 'T']
+
+
+def test_path_details_lists_shared_projects(chain):
+    nodes, hops = chain.path_details([1, 6, 5])
+    assert [n['id'] for n in nodes] == [1, 6, 5]
+    assert hops[0]['shared_project_ids'] == [104]
+    assert hops[1]['weight'] == 1
+
+
+def _sliceable_graph():
+    people = {
+        1: {'label': 'Ada', 'main_field': 'Computer Science'},
+        2: {'label': 'Grace', 'main_field': 'computer science'},
+        3: {'label': 'Alan', 'main_field': 'Mathematics'},
+        4: {'label': 'Edsger', 'main_field': 'Computer Science'},
+    }
+    # Project 10 (2018-2019): 1, 2, 3 -- project 11 (2022-): 1, 2, 4
+    memberships = [
+        (1, 10, '2018-03-01', '2019-06-30'), (2, 10, '2018-03-01', '2019-06-30'),
+        (3, 10, '2018-09-01', '2019-06-30'),
+        (1, 11, '2022-01-10', None), (2, 11, '2022-01-10', None), (4, 11, '2022-05-01', None),
+    ]
+    affiliations = [(1, 100, 7), (2, 100, 7), (3, 200, 8), (4, 101, 7)]
+    project_tags = [(10, 'Robotics', 1), (11, 'AI', 1), (11, 'robotics', 0)]
+    graph = CollaborationGraph()
+    graph.load(people, memberships, affiliations=affiliations, project_tags=project_tags)
+    return graph
+
+
+def test_slice_by_person_attributes_keeps_induced_edges():
+    graph = _sliceable_graph()
+
+    department = graph.slice(department_id=100)
+    assert _edges(department) == {(1, 2): 2}
+    assert department['statistics']['total_researchers'] == 2
+    assert _nodes(department)[1]['degree'] == 1
+
+    field = graph.slice(institution_id=7, main_field='COMPUTER SCIENCE')
+    assert _edges(field) == {(1, 2): 2, (1, 4): 1, (2, 4): 1}
+    assert _nodes(field)[1]['community'] == _nodes(graph.snapshot())[1]['community']
+
+    assert graph.slice(department_id=999, include_isolated=True)['nodes'] == []
+
+
+def test_slice_by_tag_and_years_counts_qualifying_projects():
+    graph = _sliceable_graph()
+
+    tagged = graph.slice(tag='robotics')
+    assert _edges(tagged) == _edges(graph.snapshot())
+
+    ai = graph.slice(tag='ai')
+    assert _edges(ai) == {(1, 2): 1, (1, 4): 1, (2, 4): 1}
+    assert _nodes(ai)[1]['total_projects'] == 1
+
+    early = graph.slice(end_year=2020)
+    assert _edges(early) == {(1, 2): 1, (1, 3): 1, (2, 3): 1}
+    assert _edges(graph.slice(start_year=2021, department_id=100)) == {(1, 2): 1}
+
+
+def test_slice_indexes_follow_deltas():
+    graph = _sliceable_graph()
+
+    graph.upsert_person(5, label='Barbara', main_field='Mathematics', department_id=200, institution_id=8)
+    graph.set_project_tag(12, 'Quantum')
+    graph.add_membership(5, 12, start_date='2023-02-01')
+    graph.add_membership(3, 12, start_date='2023-02-01')
+    assert _edges(graph.slice(tag='quantum')) == {(3, 5): 1}
+    assert _edges(graph.slice(department_id=200, start_year=2023)) == {(3, 5): 1}
+
+    graph.set_project_tag(11, 'ML')
+    assert _edges(graph.slice(tag='ai')) == {}
+    assert (1, 4) in _edges(graph.slice(tag='robotics'))
+
+    graph.remove_person(5)
+    assert graph.slice(department_id=200, include_isolated=True)['statistics']['total_researchers'] == 1
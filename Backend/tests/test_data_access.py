@@ -0,0 +1,157 @@
+"""
+Unit tests for read/write routing, read modes and read-your-writes stickiness.
+
+A fake ``mysql`` with two fake connections stands in for the primary and
+the replica, so no database is needed.
+
+To run: pytest tests/test_data_access.py -v
+"""
+
+import sys
+import types
+
+import pytest
+from flask import Flask, g, jsonify
+
+import utils.data_access as data_access
+from utils.data_access import reads, writes
+from utils.jwt_utils import generate_access_token
+from utils.shared_cache import LocalRedis, LocalRedisServer, SharedCache
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=()):
+        self.conn.statements.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, name):
+        self.name = name
+        self.statements = []
+        self.autocommits = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def autocommit(self, on):
+        self.autocommits.append(on)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeMySQL:
+    def __init__(self, replica=True, replica_down=False):
+        self.primary = FakeConnection('primary')
+        self.replica = FakeConnection('replica')
+        self.replica_pool = object() if replica else None
+        self.replica_down = replica_down
+
+    @property
+    def connection(self):
+        if g.get('_db_replica') and self.replica_pool is not None:
+            if self.replica_down:
+                raise OSError("Can't connect to MySQL server")
+            return self.replica
+        return self.primary
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    def make(**options):
+        mysql = FakeMySQL(**options)
+        monkeypatch.setitem(sys.modules, 'app', types.SimpleNamespace(mysql=mysql))
+        monkeypatch.setattr(data_access, 'sticky', data_access.Stickiness(seconds=60))
+        app = Flask(__name__)
+
+        @app.route('/people')
+        @reads
+        def people():
+            return jsonify({'server': mysql.connection.name})
+
+        @app.route('/graph')
+        @reads(primary=True)
+        def graph():
+            return jsonify({'server': mysql.connection.name})
+
+        @app.route('/people', methods=['POST'])
+        @writes
+        def create():
+            return jsonify({'server': mysql.connection.name}), 201
+
+        @app.route('/fail', methods=['POST'])
+        @writes
+        def fail():
+            return jsonify({'status': 'error'}), 400
+
+        return app.test_client(), mysql
+    return make
+
+
+def test_reads_go_to_the_replica_in_autocommit(setup, monkeypatch):
+    client, mysql = setup()
+    assert client.get('/people').json['server'] == 'replica'
+    assert client.get('/people').json['server'] == 'replica'
+    # Isolation is set once per connection; autocommit is switched back after each read
+    assert mysql.replica.statements == ['SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED']
+    assert mysql.replica.autocommits == [True, False, True, False]
+
+    monkeypatch.setattr(data_access, 'READ_MODE', 'read_only')
+    client.get('/people')
+    assert mysql.replica.statements[-1] == 'START TRANSACTION READ ONLY' and mysql.replica.commits == 1
+
+
+def test_writes_make_the_callers_reads_sticky(setup):
+    client, mysql = setup()
+    token = generate_access_token(7, 'a@b.c')
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.post('/people', headers=headers).json['server'] == 'primary'
+    assert 'SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ' in mysql.primary.statements
+
+    assert client.get('/people', headers=headers).json['server'] == 'primary'
+    other = {'Authorization': f'Bearer {generate_access_token(8, "d@e.f")}'}
+    assert client.get('/people', headers=other).json['server'] == 'replica'
+
+
+def test_stickiness_is_shared_by_workers_through_the_shared_cache():
+    server = LocalRedisServer()
+    workers = [data_access.Stickiness(seconds=60, shared=SharedCache(LocalRedis(server))) for _ in range(2)]
+    workers[0].mark('user:7')
+    assert workers[1].active('user:7') and not workers[1].active('user:8')
+
+    # Without a store only the worker that handled the write knows
+    alone = [data_access.Stickiness(seconds=60, shared=SharedCache(None)) for _ in range(2)]
+    alone[0].mark('user:7')
+    assert alone[0].active('user:7') and not alone[1].active('user:7')
+
+
+def test_reads_that_load_shared_indexes_stay_on_the_primary(setup):
+    client, mysql = setup()
+    assert client.get('/graph').json['server'] == 'primary'
+    assert 'SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED' in mysql.primary.statements
+    assert client.get('/people').json['server'] == 'replica'
+
+
+def test_failed_writes_roll_back_and_do_not_stick(setup):
+    client, mysql = setup()
+    assert client.post('/fail').status_code == 400
+    assert mysql.primary.rollbacks == 1
+    assert client.get('/people').json['server'] == 'replica'
+
+
+def test_reads_fall_back_to_the_primary(setup):
+    client, _ = setup(replica=False)
+    assert client.get('/people').json['server'] == 'primary'
+    client, _ = setup(replica_down=True)
+    assert client.get('/people').json['server'] == 'primary'
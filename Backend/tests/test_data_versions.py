@@ -0,0 +1,68 @@
+"""
+Unit tests for per-table data versions and conditional GET.
+
+A bare Flask app stands in for the real one, so no database is needed.
+
+To run: pytest tests/test_data_versions.py -v
+"""
+
+from flask import Blueprint, Flask, jsonify
+
+from utils.data_versions import conditional, data_versions
+
+
+def make_app(calls):
+    app = Flask(__name__)
+    person_bp = Blueprint('person', __name__, url_prefix='/person')
+
+    @person_bp.route('/all', methods=['GET'])
+    @conditional('Person')
+    def people():
+        calls.append(1)
+        return jsonify({'status': 'success', 'data': [], 'count': 0})
+
+    @person_bp.route('', methods=['POST'])
+    def create():
+        return jsonify({'status': 'success'}), 201
+
+    @person_bp.route('/fail', methods=['POST'])
+    def fail():
+        return jsonify({'status': 'error'}), 400
+
+    app.register_blueprint(person_bp)
+    app.after_request(data_versions.after_write)
+    return app.test_client()
+
+
+def test_if_none_match_skips_the_view_until_a_write():
+    calls = []
+    client = make_app(calls)
+    first = client.get('/person/all')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Last-Modified'] and len(calls) == 1
+
+    cached = client.get('/person/all', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.headers['ETag'] == etag and len(calls) == 1
+
+    # Other query strings are other representations
+    assert client.get('/person/all?limit=5', headers={'If-None-Match': etag}).status_code == 200
+
+    # Failed writes change nothing; successful ones move the version on
+    client.post('/person/fail')
+    assert client.get('/person/all', headers={'If-None-Match': etag}).status_code == 304
+    client.post('/person')
+    fresh = client.get('/person/all', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200 and fresh.headers['ETag'] != etag
+
+
+def test_last_modified_moves_forward_on_every_bump():
+    calls = []
+    client = make_app(calls)
+    last_modified = client.get('/person/all').headers['Last-Modified']
+    assert client.get('/person/all', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    version = data_versions.version('Person')
+    client.post('/person')
+    assert data_versions.version('Person') == version + 1
+    # Even within the same second
+    assert client.get('/person/all', headers={'If-Modified-Since': last_modified}).status_code == 200
@@ -0,0 +1,107 @@
+"""
+Unit tests for the bounded database connection pool.
+
+Fake connections stand in for MySQLdb ones, so no database is needed.
+
+To run: pytest tests/test_db_pool.py -v
+"""
+
+import threading
+import time
+
+import pytest
+
+from utils.db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, serial):
+        self.serial = serial
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+        self.fail_rollback = False
+
+    def ping(self):
+        if not self.alive:
+            raise OSError("MySQL server has gone away")
+
+    def rollback(self):
+        if self.fail_rollback:
+            raise OSError("Commands out of sync")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**options):
+    made = []
+
+    def connect():
+        made.append(FakeConnection(len(made)))
+        return made[-1]
+
+    options.setdefault('min_size', 0)
+    options.setdefault('max_size', 2)
+    return ConnectionPool(connect, **options), made
+
+
+def test_connections_are_reused_and_reset():
+    pool, made = make_pool()
+    conn = pool.acquire('person.get_all_people')
+    pool.release(conn)
+    assert pool.acquire('project.get_all_projects') is conn
+    assert len(made) == 1 and conn.rollbacks == 1
+
+    stats = pool.stats()
+    assert stats['checkouts'] == 2 and stats['in_use'] == 1 and stats['created'] == 1
+    assert stats['holders'][0]['route'] == 'project.get_all_projects'
+
+
+def test_full_pool_waits_then_times_out():
+    pool, made = make_pool(max_size=1, checkout_timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+
+    # A release wakes a waiting checkout
+    threading.Timer(0.02, pool.release, args=(conn,)).start()
+    pool.checkout_timeout = 1.0
+    assert pool.acquire() is conn
+    stats = pool.stats()
+    assert stats['waits'] == 1 and stats['max_wait_ms'] > 0 and len(made) == 1
+
+
+def test_dead_or_broken_connections_are_replaced():
+    pool, made = make_pool(validate_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.alive = False
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed and pool.stats()['failed_pings'] == 1
+
+    fresh.fail_rollback = True
+    pool.release(fresh)
+    assert fresh.closed and pool.stats()['size'] == 0
+    assert pool.acquire().serial == 2
+
+
+def test_maintenance_trims_idle_refills_and_reports_leaks():
+    pool, made = make_pool(min_size=1, max_size=3, idle_timeout=0.01, leak_seconds=0.01)
+    pool.maintain()
+    assert pool.stats()['idle'] == 1
+
+    held = pool.acquire('person.get_person_full')
+    extra = [pool.acquire(), pool.acquire()]
+    for conn in extra:
+        pool.release(conn)
+    time.sleep(0.02)
+    pool.maintain()
+    stats = pool.stats()
+    # The held connection alone keeps the pool at min_size
+    assert stats['size'] == 1 and stats['idle'] == 0 and stats['leaks'] == 1
+    pool.maintain()
+    assert pool.stats()['leaks'] == 1
+    pool.release(held)
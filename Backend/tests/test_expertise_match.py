@@ -0,0 +1,107 @@
+"""
+Unit tests for the TF-IDF/LSA expertise matching index.
+
+Builds go to a temporary directory; rankings are checked against brute
+force cosine similarity. No database is needed.
+
+To run: pytest tests/test_expertise_match.py -v
+"""
+
+import random
+
+import numpy as np
+
+from utils.expertise_match import ExpertiseIndex, document_terms, query_document, tokenize
+
+DOCUMENTS = {
+    1: {'main_field': 'Biology', 'expertise': ['Genomics', 'Sequencing'],
+        'bio': 'Studies bacterial genomes.', 'projects': [('Soil microbiome sequencing', 'Metagenomic sequencing of soils')]},
+    2: {'main_field': 'Computer Science', 'expertise': ['Machine Learning', 'Neural Networks'],
+        'bio': 'Deep learning for vision.', 'projects': [('Image classifiers', 'Training neural networks on images')]},
+    3: {'main_field': 'Computer Science', 'expertise': ['Distributed Systems'],
+        'bio': 'Builds storage systems.', 'projects': [('Replicated logs', 'Consensus for replicated storage')]},
+    4: {'main_field': 'Physics', 'expertise': ['Quantum Optics'],
+        'bio': 'Photon sources.', 'projects': []},
+}
+
+
+def test_tokenize_and_field_weights():
+    assert tokenize('The Neural Networks of systems') == ['neural', 'network', 'system']
+    counts = document_terms({'expertise': ['Genomics'], 'bio': 'genomics', 'main_field': 'Biology'})
+    assert counts == {'genomic': 4.0, 'biology': 2.0}
+
+
+def test_ranks_matching_researchers(tmp_path):
+    index = ExpertiseIndex(str(tmp_path), dimensions=128)
+    index.build(DOCUMENTS)
+    assert not index.stats()['lsa']
+
+    results = index.top_k([
+        query_document('Gut microbiome', 'Sequencing bacterial genomes'),
+        query_document('Vision models', 'Neural networks for image recognition'),
+    ], k=2)
+    assert results[0][0][0] == 1 and results[1][0][0] == 2
+    assert all(score > 0 for batch in results for _, score in batch)
+    assert index.top_k([query_document('Quantum', 'optics')], k=5, exclude=[4]) == [[]]
+
+
+def test_build_is_memory_mapped_by_new_workers(tmp_path):
+    ExpertiseIndex(str(tmp_path)).build(DOCUMENTS)
+    worker = ExpertiseIndex(str(tmp_path))
+    assert not worker.loaded
+    assert worker.open()
+    assert isinstance(worker._base, np.memmap)
+    assert worker.top_k([query_document('Consensus', 'replicated storage systems')], k=1)[0][0][0] == 3
+
+    # Another worker's rebuild is picked up once CURRENT changes
+    builder = ExpertiseIndex(str(tmp_path))
+    builder.build({**DOCUMENTS, 5: {'expertise': ['Consensus Protocols'], 'projects': [('Consensus', 'storage')]}})
+    assert worker.refresh_build()
+    assert len(worker) == 5
+    assert not worker.refresh_build()
+
+
+def test_edits_override_stored_rows(tmp_path):
+    index = ExpertiseIndex(str(tmp_path))
+    index.build(DOCUMENTS)
+    query = [query_document('Photon sources', 'Quantum optics experiments')]
+    assert index.top_k(query, k=1)[0][0][0] == 4
+
+    index.upsert({4: {'main_field': 'Biology', 'expertise': ['Genomics']},
+                  9: {'expertise': ['Quantum Optics'], 'bio': 'Photon sources'}})
+    assert index.top_k(query, k=1)[0][0][0] == 9
+    assert len(index) == 5
+
+    index.remove(9)
+    assert 9 not in [p for p, _ in index.top_k(query, k=5)[0]]
+
+    assert set(index.model.shared_terms(document_terms(query[0]), document_terms(DOCUMENTS[4]))) == {'photon', 'source', 'quantum', 'optic'}
+
+    index.mark_stale(person_ids=[1], project_ids=[7])
+    assert index.take_stale() == ({1}, {7})
+    assert index.take_stale() == (set(), set())
+
+
+def test_top_k_matches_brute_force_with_lsa(tmp_path):
+    rng = random.Random(4)
+    topics = [['genome', 'sequencing', 'microbe', 'protein'], ['neural', 'vision', 'learning', 'gradient'],
+              ['quantum', 'photon', 'laser', 'optics'], ['market', 'labor', 'wage', 'policy']]
+    vocabulary = [f'w{i}' for i in range(300)]
+    documents = {}
+    for person_id in range(400):
+        topic = topics[person_id % 4]
+        words = rng.choices(topic, k=6) + rng.choices(vocabulary, k=10)
+        documents[person_id] = {'bio': ' '.join(words), 'expertise': [rng.choice(topic)]}
+
+    index = ExpertiseIndex(str(tmp_path), dimensions=32)
+    index.build(documents)
+    assert index.stats()['lsa'] and index.stats()['dimensions'] == 32
+
+    queries = [query_document('', ' '.join(topic[:3])) for topic in topics]
+    embedded = index.model.embed([document_terms(q) for q in queries])
+    expected = embedded @ np.asarray(index._base).T
+    for q, result in enumerate(index.top_k(queries, k=10)):
+        best = np.argsort(-expected[q], kind='stable')[:10]
+        assert [p for p, _ in result] == index._base_ids[best].tolist()
+        # LSA keeps the topic structure: the best matches share the query's topic
+        assert all(p % 4 == q for p, _ in result)
@@ -0,0 +1,145 @@
+"""
+Unit tests for the compressed bitmaps and facet counts.
+
+Bitmap operations and facet counts are checked against plain Python sets;
+no database is needed.
+
+To run: pytest tests/test_facets.py -v
+"""
+
+import random
+
+from utils.facets import ARRAY_MAX, Bitmap, FacetIndex, Facets, PERSON_FACETS, normalize_value
+
+
+def _ids(bitmap):
+    return set(bitmap.to_array().tolist())
+
+
+def test_bitmap_matches_sets_across_container_kinds():
+    rng = random.Random(7)
+    # Sparse ids, a dense run above ARRAY_MAX in one container, and ids in a later chunk
+    a = set(rng.sample(range(200000), 3000)) | set(range(70000, 70000 + ARRAY_MAX + 500))
+    b = set(rng.sample(range(200000), 5000)) | set(range(71000, 80000))
+    left, right = Bitmap.from_ids(sorted(a)), Bitmap.from_ids(sorted(b))
+
+    assert len(left) == len(a) and _ids(left) == a
+    assert _ids(left & right) == a & b
+    assert left.and_count(right) == len(a & b)
+    assert _ids(left | right) == a | b
+    assert 70001 in left
+    assert (69999 in left) == (69999 in a)
+
+
+def test_bitmap_add_and_discard_convert_containers():
+    bitmap = Bitmap()
+    for item_id in range(ARRAY_MAX + 10):
+        bitmap.add(item_id * 2 % 65536)
+    assert len(bitmap) == ARRAY_MAX + 10
+    bitmap.add(4)
+    assert len(bitmap) == ARRAY_MAX + 10
+
+    for item_id in range(20):
+        bitmap.discard(item_id * 2)
+    assert len(bitmap) == ARRAY_MAX - 10
+    assert bitmap == Bitmap.from_ids([i * 2 for i in range(20, ARRAY_MAX + 10)])
+
+    for item_id in range(20, ARRAY_MAX + 10):
+        bitmap.discard(item_id * 2)
+    assert not bitmap and len(bitmap) == 0
+
+
+PEOPLE = {
+    1: [('institution', 10, 'MIT'), ('department', 100, 'CS'), ('main_field', 'cs', 'CS'),
+        ('expertise', 'ml', 'ML'), ('tag', 'ai', 'AI')],
+    2: [('institution', 10, 'MIT'), ('department', 101, 'Bio'), ('main_field', 'biology', 'Biology'),
+        ('tag', 'ai', 'AI'), ('tag', 'genomics', 'Genomics')],
+    3: [('institution', 20, 'USM'), ('department', 200, 'CS'), ('main_field', 'cs', 'CS'),
+        ('expertise', 'ml', 'ML')],
+    4: [('institution', 20, 'USM'), ('main_field', 'biology', 'Biology')],
+    5: [],
+}
+
+
+def _brute_force(people, filters, facet):
+    def passes(rows, skip):
+        for f, values in filters.items():
+            if f != skip and not any(fv == f and v in values for fv, v, _ in rows):
+                return False
+        return True
+    counts = {}
+    for rows in people.values():
+        if passes(rows, facet):
+            for f, value, _ in rows:
+                if f == facet:
+                    counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def _index(people=PEOPLE):
+    index = FacetIndex(PERSON_FACETS)
+    index.load(list(people), [(i, f, v, l) for i, rows in people.items() for f, v, l in rows])
+    return index
+
+
+def test_counts_ignore_own_facet_and_match_brute_force():
+    index = _index()
+    total, counts = index.counts({})
+    assert total == 5
+    assert counts['main_field'] == [('biology', 'Biology', 2), ('cs', 'CS', 2)]
+
+    filters = {'main_field': ['cs'], 'institution': [10, 20]}
+    total, counts = index.counts(filters)
+    assert total == 2
+    for facet in PERSON_FACETS:
+        assert {v: c for v, _, c in counts[facet]} == _brute_force(PEOPLE, filters, facet)
+    # Biology stays visible while CS is selected
+    assert dict((v, c) for v, _, c in counts['main_field']) == {'cs': 2, 'biology': 2}
+
+    total, counts = index.counts({'tag': ['ai']}, facets=['institution'], within=Bitmap.from_ids([2, 3, 4]))
+    assert total == 1 and counts == {'institution': [(10, 'MIT', 1)]}
+
+
+def test_incremental_updates_match_reload():
+    rng = random.Random(3)
+    people = {
+        person_id: [('main_field', rng.choice('abc'), None), ('tag', rng.choice('xyz'), None),
+                    ('institution', rng.randrange(3), None)]
+        for person_id in range(300)
+    }
+    index = _index(people)
+    for _ in range(200):
+        person_id = rng.randrange(350)
+        if rng.random() < 0.2:
+            index.remove(person_id)
+            people.pop(person_id, None)
+        else:
+            rows = [('main_field', rng.choice('abcd'), None), ('institution', rng.randrange(4), None)]
+            index.replace(person_id, rows)
+            people[person_id] = rows
+
+    fresh = _index(people)
+    filters = {'main_field': ['a', 'd'], 'institution': [1]}
+    assert index.counts(filters) == fresh.counts(filters)
+    assert index.counts({}) == fresh.counts({})
+
+
+def test_shared_facets_track_stale_writes_and_deleted_values():
+    shared = Facets()
+    shared.mark_stale(person_ids=[1])
+    assert shared.take_stale() == (set(), set())
+
+    shared.load(list(PEOPLE), [(i, f, v, l) for i, rows in PEOPLE.items() for f, v, l in rows], [7], [])
+    shared.mark_stale(person_ids=[1, None], project_ids=[7])
+    assert shared.take_stale() == ({1}, {7})
+
+    shared.apply({1: [('main_field', 'biology', 'Biology')], 5: None}, {7: [('tag', 'ai', 'AI')]})
+    total, counts = shared.counts('person', {'main_field': ['biology']})
+    assert total == 3 and counts['tag'] == [('ai', 'AI', 1), ('genomics', 'Genomics', 1)]
+    assert shared.counts('project', {'tag': ['ai']})[0] == 1
+
+    shared.relabel('department', 200, 'Computer Science')
+    shared.drop_value('department', 101)
+    counts = shared.counts('person', {})[1]['department']
+    assert counts == [(200, 'Computer Science', 1)]
+    assert normalize_value('  Computer   Science ') == 'computer science'
@@ -0,0 +1,39 @@
+"""
+Unit tests for sparse field selection.
+
+No database is needed.
+
+To run: pytest tests/test_fields.py -v
+"""
+
+import pytest
+
+from utils.fields import PERSON_FIELDS, PROJECT_FIELDS
+
+
+def test_parse_keywords_lists_and_unknown_fields():
+    assert PROJECT_FIELDS.parse(None) is None
+    assert PROJECT_FIELDS.parse('full', default='summary') is None
+    assert PROJECT_FIELDS.parse(None, default='summary') == list(PROJECT_FIELDS.summary)
+    assert PROJECT_FIELDS.parse(' project_title, tag_name,project_title ') == ['project_title', 'tag_name']
+    for bad in ['project_title,password', ',', 'p.*']:
+        with pytest.raises(ValueError):
+            PROJECT_FIELDS.parse(bad)
+
+
+def test_select_pushes_only_whitelisted_columns_down():
+    sql = PROJECT_FIELDS.select(['project_title'])
+    assert sql == "SELECT p.project_id AS project_id, p.project_title AS project_title"
+    assert 'project_description' not in PROJECT_FIELDS.select(PROJECT_FIELDS.parse('summary'))
+
+    # Derived fields read their sources; the key is never selected twice
+    sql = PERSON_FIELDS.select(['person_id', 'expertises', 'expertise_1'])
+    assert sql.count('p.person_id') == 1 and sql.count('p.expertise_1') == 1 and 'p.expertise_3' in sql
+    assert 'bio' not in PERSON_FIELDS.select(PERSON_FIELDS.parse('summary'))
+
+
+def test_prune_keeps_the_key_and_requested_fields():
+    row = {'person_id': 7, 'person_name': 'Ada', 'expertise_1': 'ML', 'expertises': ['ML'], 'bio': 'x'}
+    assert PERSON_FIELDS.prune(row, ['expertises']) == {'person_id': 7, 'expertises': ['ML']}
+    assert PERSON_FIELDS.prune(row, None) is row
+    assert PERSON_FIELDS.prune(None, ['person_name']) is None
@@ -0,0 +1,80 @@
+"""
+Unit tests for the server-side network layout.
+
+No database is needed; graphs are built in memory.
+
+To run: pytest tests/test_graph_layout.py -v
+"""
+
+import networkx as nx
+import numpy as np
+
+from utils.collab_graph import CollaborationGraph
+from utils.graph_layout import GraphLayout
+
+
+def _graph(G):
+    people = {n: {'label': f'P{n}', 'institution': None, 'department': None, 'expertise': []} for n in G.nodes}
+    memberships = []
+    for project_id, (a, b) in enumerate(G.edges, start=100):
+        memberships += [(a, project_id), (b, project_id)]
+    graph = CollaborationGraph(engine='sparse')
+    graph.load(people, memberships)
+    return graph
+
+
+def _distance(positions, a, b):
+    return np.hypot(positions[a][0] - positions[b][0], positions[a][1] - positions[b][1])
+
+
+def test_communities_are_drawn_apart():
+    G = nx.connected_caveman_graph(5, 8)
+    layout = GraphLayout(_graph(G))
+    positions = layout.positions()
+
+    assert set(positions) == set(G.nodes)
+    same = np.mean([_distance(positions, a, b) for a in range(8) for b in range(a + 1, 8)])
+    other = np.mean([_distance(positions, a, b) for a in range(8) for b in range(16, 24)])
+    assert same * 2 < other
+
+
+def test_positions_cached_per_version():
+    graph = _graph(nx.path_graph(6))
+    layout = GraphLayout(graph)
+
+    first = layout.positions()
+    assert layout.positions() == first
+    assert layout.stats()['full_layouts'] == 1
+
+
+def test_new_node_placed_incrementally_next_to_collaborator():
+    G = nx.connected_caveman_graph(4, 6)
+    graph = _graph(G)
+    layout = GraphLayout(graph)
+    before = layout.positions()
+
+    graph.upsert_person(99, label='Newcomer')
+    graph.add_membership(99, 100)  # joins the project between 0 and 1
+    after = layout.positions()
+
+    assert layout.stats() == {'version': graph.version, 'nodes': 25, 'full_layouts': 1, 'incremental_layouts': 1}
+    assert all(after[n] == before[n] for n in G.nodes)
+    nearest = min(G.nodes, key=lambda n: _distance(after, 99, n))
+    assert nearest in set(range(6))
+
+
+def test_rebuild_refines_previous_positions():
+    G = nx.connected_caveman_graph(4, 6)
+    graph = _graph(G)
+    layout = GraphLayout(graph)
+    before = layout.positions()
+
+    people = {n: {'label': f'P{n}', 'expertise': []} for n in G.nodes}
+    memberships = [(n, p) for p, (a, b) in enumerate(G.edges, start=100) for n in (a, b)]
+    graph.load(people, memberships)
+    after = layout.positions()
+
+    assert layout.stats()['full_layouts'] == 1
+    span = max(np.ptp([p[0] for p in before.values()]), 1.0)
+    drift = max(_distance({0: before[n], 1: after[n]}, 0, 1) for n in G.nodes)
+    assert drift < span / 2
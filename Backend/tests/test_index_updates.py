@@ -0,0 +1,35 @@
+"""
+Unit tests for the guard around post-commit in-memory index updates.
+
+To run: pytest tests/test_index_updates.py -v
+"""
+
+import pytest
+
+from utils.autocomplete import autocomplete
+from utils.collab_graph import collab_graph
+from utils.facets import facets
+from utils.index_updates import index_updates
+from utils.pagination import row_counts
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    for structure in (collab_graph, autocomplete, facets):
+        monkeypatch.setattr(structure, 'loaded', True)
+    row_counts.get(('Person', ''), lambda: 3)
+    yield
+    row_counts.invalidate()
+
+
+def test_failing_update_is_logged_and_everything_reloads(loaded):
+    with index_updates("updating person"):
+        raise KeyError('person_id')
+    assert not collab_graph.loaded and not autocomplete.loaded and not facets.loaded
+    assert row_counts.get(('Person', ''), lambda: 4) == 4
+
+
+def test_successful_updates_leave_the_indexes_loaded(loaded):
+    with index_updates("updating person"):
+        autocomplete.upsert('person', 1, 'Ada')
+    assert collab_graph.loaded and autocomplete.loaded and facets.loaded
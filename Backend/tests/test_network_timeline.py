@@ -0,0 +1,105 @@
+"""
+Unit tests for the per-period collaboration timeline.
+
+Every period reconstructed from keyframes and deltas is checked against a
+direct computation from the WorkedOn intervals; no database is needed.
+
+To run: pytest tests/test_network_timeline.py -v
+"""
+
+import random
+from collections import Counter
+from datetime import date
+
+import pytest
+
+from utils.network_timeline import NetworkTimeline, parse_period, period_label, period_of
+
+TODAY = date(2026, 10, 16)
+
+
+def _edges(arrays):
+    sources, targets, weights = arrays
+    return dict(zip(zip(sources.tolist(), targets.tolist()), weights.tolist()))
+
+
+def _expected(memberships, period, granularity):
+    projects = {}
+    for person_id, project_id, start, end in memberships:
+        if start is None and end is None:
+            continue
+        first = period_of(start or end, granularity)
+        last = period_of(end, granularity) if end else max(period_of(TODAY, granularity), first)
+        projects.setdefault(project_id, []).append((person_id, first, last))
+    edges = Counter()
+    for members in projects.values():
+        active = sorted(p for p, first, last in members if first <= period <= last)
+        for i, person_1 in enumerate(active):
+            for person_2 in active[i + 1:]:
+                edges[(person_1, person_2)] += 1
+    return dict(edges)
+
+
+def test_links_follow_overlapping_membership_dates():
+    memberships = [
+        (1, 10, date(2018, 1, 1), date(2020, 12, 31)),
+        (2, 10, date(2019, 3, 1), date(2021, 6, 30)),
+        (1, 11, date(2019, 1, 1), None),
+        (2, 11, date(2020, 1, 1), None),
+        (3, 11, None, None),
+    ]
+    timeline = NetworkTimeline(memberships, today=TODAY)
+
+    assert timeline.first == 2019 and timeline.last == 2026
+    assert timeline.undated == 1
+    assert _edges(timeline.edges_at(2018)) == {}
+    assert _edges(timeline.edges_at(2019)) == {(1, 2): 1}
+    assert _edges(timeline.edges_at(2020)) == {(1, 2): 2}
+    assert _edges(timeline.edges_at(2021)) == {(1, 2): 1}
+
+    summary = {row['period']: row for row in timeline.summary()}
+    assert summary['2019'] == {'period': '2019', 'researchers': 2, 'collaborations': 1, 'added': 1, 'removed': 0}
+    assert _edges(timeline.delta(2020)) == {(1, 2): 2}
+    assert _edges(timeline.delta(2021)) == {(1, 2): 1}
+    assert _edges(timeline.delta(2022)) == {}
+
+
+@pytest.mark.parametrize('granularity', ['year', 'quarter'])
+def test_every_period_matches_direct_computation(granularity):
+    rng = random.Random(4)
+    memberships = []
+    for project_id in range(300):
+        for person_id in rng.sample(range(120), rng.randint(1, 6)):
+            start = date(rng.randint(2005, 2025), rng.randint(1, 12), 1)
+            end = None if rng.random() < 0.2 else date(min(2026, start.year + rng.randint(0, 4)), 12, 31)
+            memberships.append((person_id, project_id, start, end))
+
+    timeline = NetworkTimeline(memberships, granularity, today=TODAY, keyframe_every=4)
+    for period in range(timeline.first - 1, timeline.last + 1):
+        assert _edges(timeline.edges_at(period)) == _expected(memberships, period, granularity)
+
+
+def test_replaying_deltas_rebuilds_each_period():
+    rng = random.Random(9)
+    memberships = [
+        (rng.randrange(40), rng.randrange(60), date(rng.randint(2010, 2020), 6, 1), date(2022, 1, 1))
+        for _ in range(200)
+    ]
+    timeline = NetworkTimeline(memberships, today=TODAY)
+
+    state = {}
+    for period in range(timeline.first, timeline.last + 1):
+        for pair, weight in _edges(timeline.delta(period)).items():
+            if weight:
+                state[pair] = weight
+            else:
+                state.pop(pair, None)
+        assert state == _edges(timeline.edges_at(period))
+
+
+def test_period_labels_round_trip():
+    assert period_label(parse_period('2021-Q3', 'quarter'), 'quarter') == '2021-Q3'
+    assert period_of(date(2021, 8, 5), 'quarter') == parse_period('2021-q3', 'quarter')
+    assert parse_period('2021', 'year') == 2021
+    with pytest.raises(ValueError):
+        parse_period('2021-Q5', 'quarter')
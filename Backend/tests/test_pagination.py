@@ -0,0 +1,61 @@
+"""
+Unit tests for keyset pagination helpers and the cached row counter.
+
+No database is needed.
+
+To run: pytest tests/test_pagination.py -v
+"""
+
+import pytest
+
+from utils.pagination import CountCache, MAX_LIMIT, PageRequest, decode_cursor, encode_cursor, page_response
+
+
+def test_cursor_round_trip_and_bare_ids():
+    for key in [(42,), ('Machine Learning',), (3, 'x y/z')]:
+        token = encode_cursor(key)
+        assert '=' not in token and decode_cursor(token) == key
+    assert decode_cursor('17') == (17,)
+    with pytest.raises(ValueError):
+        decode_cursor('not a token!')
+
+
+def test_page_request_parses_args_and_trims_pages():
+    page = PageRequest.from_args({'after': encode_cursor((10,)), 'limit': '2', 'count': 'true'})
+    assert page.after == (10,) and page.limit == 2 and page.with_total and not page.unpaginated
+    assert page.after_clause('p.person_id', prefix='WHERE') == ('WHERE p.person_id > %s', (10,))
+
+    rows = [{'id': 11}, {'id': 12}, {'id': 13}]
+    trimmed, next_token = page.page(rows, lambda row: (row['id'],))
+    assert trimmed == rows[:2] and decode_cursor(next_token) == (12,)
+    assert page.page(rows[:2], lambda row: (row['id'],)) == (rows[:2], None)
+
+    body = page_response(trimmed, next_token, total=40)
+    assert body['count'] == 2 and body['has_more'] and body['total'] == 40
+
+    assert PageRequest.from_args({'limit': '100000'}).limit == MAX_LIMIT
+    assert PageRequest.from_args({'all': 'true'}).unpaginated
+    assert PageRequest.from_args({}).after_clause('project_id') == ('', ())
+    with pytest.raises(ValueError):
+        PageRequest.from_args({'limit': 'ten'})
+    with pytest.raises(ValueError):
+        PageRequest.from_args({'after': encode_cursor((1, 2))})
+
+
+def test_count_cache_reuses_until_invalidated():
+    calls = []
+
+    def count():
+        calls.append(1)
+        return len(calls)
+
+    counts = CountCache(ttl=60)
+    assert counts.get(('Person',), count) == 1
+    assert counts.get(('Person',), count) == 1
+    assert counts.get(('Project_Tag', 'AI'), count) == 2
+
+    counts.invalidate('Person')
+    assert counts.get(('Person',), count) == 3
+    assert counts.get(('Project_Tag', 'AI'), count) == 2
+
+    assert CountCache(ttl=0).get(('Person',), count) == 4
@@ -0,0 +1,217 @@
+"""
+Unit tests for the stored procedure result cache.
+
+Fake cursors and connections stand in for MySQLdb ones (with the same
+stored-result attributes), so no database is needed.
+
+To run: pytest tests/test_query_cache.py -v
+"""
+
+import time
+
+import pytest
+
+import utils.query_cache as qc
+from utils.query_cache import InvalidatingConnectionMixin, QueryCache, caching_cursor, written_tables
+
+
+class FakeCursor:
+    """Just enough of MySQLdb's stored-result cursor."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._rows = None
+        self._result = None
+        self._executed = None
+        self.description = None
+        self.rownumber = 0
+        self.rowcount = -1
+        self.pending_sets = 0
+
+    def callproc(self, procname, args=()):
+        self.connection.calls.append(procname)
+        self._rows = tuple(dict(row) for row in self.connection.results.get(procname, []))
+        self.rownumber = 0
+        self._executed = procname
+        self.pending_sets = 1
+        return args
+
+    def execute(self, query, args=None):
+        self.connection.calls.append(query)
+        self._rows = ()
+        return 0
+
+    def executemany(self, query, args):
+        self.connection.calls.append(query)
+        return len(args)
+
+    def fetchone(self):
+        if self.rownumber >= len(self._rows):
+            return None
+        self.rownumber += 1
+        return self._rows[self.rownumber - 1]
+
+    def fetchall(self):
+        rows = self._rows[self.rownumber:]
+        self.rownumber = len(self._rows)
+        return rows
+
+    def nextset(self):
+        if self.pending_sets:
+            self.pending_sets -= 1
+            self._rows = ()
+            return True
+        return None
+
+
+class FakeBaseConnection:
+    def __init__(self, results=None, autocommit=True, isolation='READ COMMITTED'):
+        self.results = results or {}
+        self.calls = []
+        self._autocommit = autocommit
+        self._collab_isolation = isolation
+
+    def cursor(self):
+        return caching_cursor(FakeCursor)(self)
+
+    def get_autocommit(self):
+        return self._autocommit
+
+    def autocommit(self, on):
+        self._autocommit = on
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakeConnection(InvalidatingConnectionMixin, FakeBaseConnection):
+    pass
+
+
+RESULTS = {
+    'SelectPersonFullContextByID': [{'person_id': 1, 'person_name': 'Ada', 'department_name': 'CS'}],
+    'GetProjectTags': [{'project_id': 3, 'tag_name': 'ml'}],
+}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = QueryCache(max_entries=100, max_bytes=1024 * 1024, ttl=60, replica_lag=5, enabled=True)
+    monkeypatch.setattr(qc, 'query_cache', cache)
+    return cache
+
+
+def call(conn, name, args):
+    cursor = conn.cursor()
+    cursor.callproc(name, args)
+    rows = cursor.fetchall()
+    while cursor.nextset():
+        pass
+    return rows
+
+
+def test_repeated_calls_are_served_from_the_cache(cache):
+    conn = FakeConnection(RESULTS)
+    first = call(conn, 'SelectPersonFullContextByID', [1])
+    first[0]['person_name'] = 'changed by the route'
+    cursor = conn.cursor()
+    cursor.callproc('SelectPersonFullContextByID', [1])
+    assert cursor.fetchone() == RESULTS['SelectPersonFullContextByID'][0]
+    assert cursor.fetchone() is None and cursor.nextset() is None
+
+    assert conn.calls == ['SelectPersonFullContextByID']
+    call(conn, 'SelectPersonFullContextByID', [2])
+    assert conn.calls.count('SelectPersonFullContextByID') == 2
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2 and stats['entries'] == 2
+    assert stats['procedures']['SelectPersonFullContextByID']['hit_ratio'] == round(1 / 3, 4)
+    assert stats['bytes'] > 0
+
+
+def test_commit_invalidates_only_the_tables_written(cache):
+    conn = FakeConnection(RESULTS, autocommit=False)
+    call(conn, 'SelectPersonFullContextByID', [1])
+    call(conn, 'GetProjectTags', [3])
+
+    conn.cursor().callproc('AddTagToProject', [3, 'nlp'])
+    # The transaction's own uncommitted write is read from MySQL
+    call(conn, 'GetProjectTags', [3])
+    assert conn.calls.count('GetProjectTags') == 2
+    assert cache.stats()['entries'] == 2
+
+    conn.commit()
+    assert cache.stats()['entries'] == 1
+    call(conn, 'SelectPersonFullContextByID', [1])
+    assert conn.calls.count('SelectPersonFullContextByID') == 1
+
+    conn.cursor().callproc('UpdatePerson', [1, 'Ada L.'])
+    conn.rollback()
+    assert cache.stats()['entries'] == 1
+
+
+def test_plain_sql_writes_invalidate_with_cascades(cache):
+    conn = FakeConnection(RESULTS)
+    call(conn, 'GetProjectTags', [3])
+    conn.cursor().execute("UPDATE Person SET bio = %s WHERE person_id = %s", ("x", 1))
+    assert cache.stats()['entries'] == 1
+    conn.cursor().execute("DELETE FROM Project WHERE project_id = %s", (3,))
+    assert cache.stats()['entries'] == 0
+
+    assert written_tables("  insert ignore into `WorkedOn` (a) VALUES (1)") == {'WorkedOn'}
+    assert written_tables("SELECT * FROM Person") is None
+
+
+def test_unmapped_procedures_clear_the_cache(cache):
+    conn = FakeConnection(RESULTS)
+    call(conn, 'GetProjectTags', [3])
+    conn.cursor().callproc('SomeNewProcedure', [])
+    assert cache.stats()['entries'] == 0
+
+
+def test_connections_that_may_read_old_snapshots_are_not_cached(cache):
+    conn = FakeConnection(RESULTS, autocommit=False, isolation='REPEATABLE READ')
+    call(conn, 'GetProjectTags', [3])
+    call(conn, 'GetProjectTags', [3])
+    assert conn.calls.count('GetProjectTags') == 2 and cache.stats()['entries'] == 0
+
+
+def test_reads_racing_an_invalidation_are_not_stored(cache):
+    rows, token = cache.lookup('GetProjectTags', [3])
+    assert rows is None
+    cache.invalidate({'Project_Tag'})
+    cache.store(token, RESULTS['GetProjectTags'])
+    assert cache.stats()['entries'] == 0
+
+    # A replica may not have the write yet
+    _, token = cache.lookup('GetProjectTags', [3])
+    cache.store(token, RESULTS['GetProjectTags'], replica=True)
+    assert cache.stats()['entries'] == 0
+    cache.store(token, RESULTS['GetProjectTags'])
+    assert cache.stats()['entries'] == 1
+
+
+def test_entries_expire_and_are_evicted_by_count_and_bytes(cache):
+    cache.ttl = 0.01
+    _, token = cache.lookup('SelectProjectByID', [1])
+    cache.store(token, [{'project_id': 1}])
+    time.sleep(0.02)
+    assert cache.lookup('SelectProjectByID', [1])[0] is None
+    assert cache.stats()['expirations'] == 1
+
+    cache.ttl, cache.max_entries = 60, 2
+    for project_id in (1, 2, 3):
+        _, token = cache.lookup('SelectProjectByID', [project_id])
+        cache.store(token, [{'project_id': project_id}])
+    assert cache.lookup('SelectProjectByID', [1])[0] is None
+    assert cache.lookup('SelectProjectByID', [3])[0] == [{'project_id': 3}]
+    assert cache.stats()['evictions'] == 1
+
+    cache.max_bytes = 4096
+    _, token = cache.lookup('GetAllProjects', [])
+    cache.store(token, [{'description': 'x' * 2000}])
+    assert cache.stats()['skipped_stores'] == 1 and cache.stats()['bytes'] <= cache.max_bytes
+    assert cache.lookup('SelectUserByEmail', ['a@b.c']) == (None, None)
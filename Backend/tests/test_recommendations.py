@@ -0,0 +1,101 @@
+"""
+Unit tests for collaborator recommendations over the in-memory graph.
+
+Adamic-Adar scores are checked against networkx; no database is needed.
+
+To run: pytest tests/test_recommendations.py -v
+"""
+
+import networkx as nx
+import pytest
+
+from utils.collab_graph import CollaborationGraph
+from utils.recommendations import CollaboratorRecommender
+
+
+def _graph(edges, expertise=None):
+    expertise = expertise or {}
+    nodes = {n for edge in edges for n in edge} | set(expertise)
+    people = {
+        n: {'label': f'P{n}', 'institution': None, 'department': None, 'expertise': expertise.get(n, [])}
+        for n in nodes
+    }
+    # One project per edge
+    memberships = []
+    for project_id, (a, b) in enumerate(edges, start=100):
+        memberships += [(a, project_id), (b, project_id)]
+    graph = CollaborationGraph(engine='sparse')
+    graph.load(people, memberships)
+    return graph
+
+
+def test_never_suggests_self_or_existing_collaborators():
+    graph = _graph([(1, 2), (2, 3), (3, 4), (1, 5), (5, 3)])
+    suggestions = CollaboratorRecommender(graph).recommend(1, k=10)
+
+    ids = [s['person_id'] for s in suggestions]
+    assert 1 not in ids
+    assert 2 not in ids and 5 not in ids
+    assert ids[0] == 3
+    assert suggestions[0]['common_collaborators'] == 2
+
+
+def test_structure_ranking_matches_networkx_adamic_adar():
+    G = nx.powerlaw_cluster_graph(200, 3, 0.3, seed=5)
+    graph = _graph(list(G.edges))
+    recommender = CollaboratorRecommender(graph, alpha=1.0)
+
+    person = max(G.nodes, key=G.degree)
+    suggestions = recommender.recommend(person, k=5)
+
+    candidates = [(person, v) for v in G.nodes if v != person and not G.has_edge(person, v)]
+    expected = {v: score for _, v, score in nx.adamic_adar_index(G, candidates) if score > 0}
+    best = max(expected.values())
+    for suggestion in suggestions:
+        assert suggestion['score'] == pytest.approx(expected[suggestion['person_id']] / best, abs=1e-4)
+    assert suggestions[0]['score'] == pytest.approx(1.0)
+
+
+def test_shared_expertise_surfaces_unconnected_people():
+    graph = _graph([(1, 2)], expertise={1: ['Graphs', 'ML'], 3: ['graphs'], 4: ['botany']})
+    suggestions = CollaboratorRecommender(graph, alpha=0.5).recommend(1)
+
+    assert [s['person_id'] for s in suggestions] == [3]
+    assert suggestions[0]['expertise_overlap'] == pytest.approx(0.5)
+    assert suggestions[0]['common_collaborators'] == 0
+
+
+def test_rescored_after_graph_changes():
+    graph = _graph([(1, 2), (2, 3)])
+    recommender = CollaboratorRecommender(graph)
+    assert [s['person_id'] for s in recommender.recommend(1)] == [3]
+
+    graph.add_membership(1, 100 + 1)  # joins the 2-3 project
+    assert recommender.recommend(1) == []
+
+
+def test_batch_matches_single_lookups():
+    G = nx.gnm_random_graph(150, 400, seed=2)
+    graph = _graph(list(G.edges))
+    recommender = CollaboratorRecommender(graph, block_size=16)
+
+    batch = dict(recommender.recommend_all(k=8))
+    for person in (0, 17, 99):
+        assert batch.get(person, []) == recommender.recommend(person, k=8)
+    assert recommender.recommend(10_000) == []
+
+
+def test_batch_keeps_scoring_the_graph_it_started_with():
+    G = nx.gnm_random_graph(60, 150, seed=4)
+    graph = _graph(list(G.edges))
+    recommender = CollaboratorRecommender(graph, block_size=8)
+    expected = dict(recommender.recommend_all(k=5))
+
+    batch = recommender.recommend_all(k=5)
+    first = next(batch)
+    # A rebuild for a newer version lands mid-batch
+    graph.upsert_person(1000, label='P1000')
+    graph.add_membership(1000, 100)
+    recommender.recommend(1000)
+
+    assert dict([first, *batch]) == expected
@@ -0,0 +1,37 @@
+"""
+Checks that the schema files survive the naive split db_init uses.
+
+db_init (and backfill_collaboration) split each file on ";" and execute
+every non-empty piece, so a ";" inside a comment breaks the statement
+after it. No database is needed.
+
+To run: pytest tests/test_schema.py -v
+"""
+
+import os
+
+import pytest
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql')
+SCHEMA_FILES = ['tables/create_all_tables.sql', 'indexes/collaboration_indexes.sql']
+
+
+def _statements(path):
+    """Split the way db_init.create_tables does, minus leading comment lines."""
+    with open(os.path.join(SQL_DIR, path), 'r') as f:
+        fragments = [stmt.strip() for stmt in f.read().split(';') if stmt.strip()]
+    statements = []
+    for fragment in fragments:
+        lines = fragment.splitlines()
+        while lines and (not lines[0].strip() or lines[0].strip().startswith('--')):
+            lines.pop(0)
+        statements.append('\n'.join(lines))
+    return statements
+
+
+@pytest.mark.parametrize('path', SCHEMA_FILES)
+def test_every_fragment_is_a_create_statement(path):
+    statements = _statements(path)
+    assert statements
+    for statement in statements:
+        assert statement.upper().startswith('CREATE'), f"{path}: {statement[:80]!r}"
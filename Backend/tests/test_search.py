@@ -0,0 +1,43 @@
+"""
+Unit tests for search term parsing, snippet highlighting and result merging.
+
+The SQL itself needs the FULLTEXT indexes; these cover the Python side and
+need no database.
+
+To run: pytest tests/test_search.py -v
+"""
+
+from utils.search import highlight, merge_by_relevance, query_terms
+
+
+def test_query_terms_strip_boolean_operators():
+    assert query_terms('+machine learn* -biology "neural nets"') == ['machine', 'learn*', 'neural', 'nets']
+    assert query_terms('a AI ai') == ['ai']
+
+
+def test_highlight_marks_every_hit_and_escapes():
+    text = 'Works on <b>machine</b> learning & Machine vision'
+    assert highlight(text, ['machine']) == (
+        'Works on &lt;b&gt;<mark>machine</mark>&lt;/b&gt; learning &amp; <mark>Machine</mark> vision'
+    )
+    assert highlight(text, ['learn*']) == 'Works on &lt;b&gt;machine&lt;/b&gt; <mark>learning</mark> &amp; Machine vision'
+    assert highlight(text, ['genomics']) is None
+    assert highlight(None, ['machine']) is None
+
+
+def test_highlight_windows_long_text_on_word_boundaries():
+    text = ' '.join(['filler'] * 60) + ' quantum ' + ' '.join(['tail'] * 60)
+    snippet = highlight(text, ['quantum'], width=80)
+    assert snippet.startswith('…filler') and snippet.endswith('tail…')
+    assert '<mark>quantum</mark>' in snippet
+    assert len(snippet) <= 80 + len('<mark></mark>') + 2
+
+
+def test_merge_scales_each_type_by_its_best_hit():
+    people = [{'type': 'person', 'id': 1, 'relevance': 20.0}, {'type': 'person', 'id': 2, 'relevance': 10.0}]
+    projects = [{'type': 'project', 'id': 7, 'relevance': 2.0}, {'type': 'project', 'id': 8, 'relevance': 1.5}]
+    merged = merge_by_relevance(people, projects)
+    assert [(r['type'], r['id'], r['score']) for r in merged] == [
+        ('person', 1, 1.0), ('project', 7, 1.0), ('project', 8, 0.75), ('person', 2, 0.5)
+    ]
+    assert merge_by_relevance([], []) == []
@@ -0,0 +1,118 @@
+"""
+Unit tests for the cross-worker shared cache and invalidation channel.
+
+Each "worker" is its own SharedCache client on one LocalRedisServer (the
+in-process stand-in for Redis), so no Redis server is needed.
+
+To run: pytest tests/test_shared_cache.py -v
+"""
+
+import time
+
+import pytest
+
+from utils.data_versions import DataVersions
+from utils.query_cache import QueryCache
+from utils.shared_cache import LocalRedis, LocalRedisServer, SharedCache
+
+TAGS = [{'project_id': 3, 'tag_name': 'ml'}]
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return condition()
+
+
+class Worker:
+    def __init__(self, server):
+        self.shared = SharedCache(LocalRedis(server), prefix="test:", channel="test:invalidate")
+        self.cache = QueryCache(max_entries=100, max_bytes=1024 * 1024, ttl=60, enabled=True, shared=self.shared)
+        self.versions = DataVersions(shared=self.shared)
+        self.shared.on("tables", lambda message: self.cache.invalidate_local(message.get('tables')))
+        self.shared.on("versions", lambda message: self.versions.merge(message['versions']))
+        self.shared.on("reset", lambda message: self.versions.pull())
+
+    def read(self, name, args, rows):
+        """Cached rows, or ``rows`` as if read from MySQL after a miss."""
+        cached, token = self.cache.lookup(name, args)
+        if cached is not None:
+            return cached
+        self.cache.store(token, rows)
+        return rows
+
+
+@pytest.fixture
+def workers():
+    server = LocalRedisServer()
+    started = [Worker(server) for _ in range(3)]
+    yield started
+    for worker in started:
+        worker.shared.stop()
+
+
+def test_results_read_by_one_worker_are_hits_for_the_others(workers):
+    a, b, _ = workers
+    a.read('GetProjectTags', [3], TAGS)
+    assert b.read('GetProjectTags', [3], [{'wrong': 'read from MySQL'}]) == TAGS
+    assert b.cache.stats()['shared_hits'] == 1
+    # Now in b's near cache as well
+    b.read('GetProjectTags', [3], None)
+    assert b.cache.stats()['hits'] == 1
+
+
+def test_invalidations_reach_every_worker(workers):
+    a, b, _ = workers
+    b.shared.start()
+    assert wait_until(lambda: b.shared.subscribed)
+    b.read('GetProjectTags', [3], TAGS)
+    b.read('SelectProjectByID', [3], [{'project_id': 3}])
+
+    a.cache.invalidate({'Project_Tag'})
+    assert wait_until(lambda: b.cache.stats()['entries'] == 1)
+    assert b.cache.lookup('GetProjectTags', [3])[0] is None
+    assert b.cache.lookup('SelectProjectByID', [3])[0] == [{'project_id': 3}]
+
+    stats = b.shared.stats()
+    assert stats['received'] == 1 and stats['max_lag_ms'] < 1000
+    assert a.shared.stats()['received'] == 0
+
+
+def test_shared_entries_from_before_a_write_are_ignored_without_the_message(workers):
+    a, b, c = workers
+    a.read('GetProjectTags', [3], TAGS)
+    # Nobody is listening; the counters still move
+    b.cache.invalidate({'Project_Tag'})
+    assert c.cache.lookup('GetProjectTags', [3])[0] is None
+
+
+def test_data_versions_agree_across_workers(workers):
+    a, b, _ = workers
+    for worker in workers:
+        worker.shared.start()
+    assert wait_until(lambda: all(worker.shared.subscribed for worker in workers))
+    assert wait_until(lambda: a.versions.started == b.versions.started)
+
+    a.versions.bump('Project')
+    assert wait_until(lambda: b.versions.version('Project') == a.versions.version('Project') == 1)
+    assert a.versions.validators(('Project',)) == b.versions.validators(('Project',))
+
+
+def test_unreachable_or_missing_store_falls_back_to_the_local_cache():
+    class Down:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise ConnectionError("Connection refused")
+            return fail
+
+    for shared in (SharedCache(Down()), SharedCache(None)):
+        cache = QueryCache(enabled=True, shared=shared)
+        rows, token = cache.lookup('GetProjectTags', [3])
+        cache.store(token, TAGS)
+        cache.invalidate({'Tag'})
+        assert cache.lookup('GetProjectTags', [3])[0] == TAGS
+    assert shared.stats()['enabled'] is False
+    assert SharedCache(Down()).get_many(['x']) is None
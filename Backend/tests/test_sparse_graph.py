@@ -0,0 +1,78 @@
+"""
+Unit tests for the CSR graph engine used for community detection.
+
+Statistics are checked against networkx on the same graph.
+
+To run: pytest tests/test_sparse_graph.py -v
+"""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from utils.collab_graph import CollaborationGraph
+from utils.sparse_graph import SparseGraph
+
+
+def _from_networkx(G):
+    edges = np.array(G.edges)
+    return SparseGraph.from_edges(list(G.nodes), edges[:, 0], edges[:, 1])
+
+
+def test_statistics_match_networkx():
+    G = nx.powerlaw_cluster_graph(300, 3, 0.4, seed=7)
+    graph = _from_networkx(G)
+
+    assert graph.edge_count == G.number_of_edges()
+    assert graph.degree().tolist() == [G.degree(v) for v in G.nodes]
+    assert graph.density() == pytest.approx(nx.density(G))
+    assert graph.average_clustering() == pytest.approx(nx.average_clustering(G))
+
+
+def test_louvain_finds_planted_cliques():
+    G = nx.connected_caveman_graph(6, 7)
+    graph = _from_networkx(G)
+    labels = graph.louvain()
+
+    assert labels.max() + 1 == 6
+    for clique in range(6):
+        members = [graph.index_of(node) for node in range(clique * 7, clique * 7 + 7)]
+        assert len(set(labels[members].tolist())) == 1
+
+
+def test_louvain_modularity_not_worse_than_networkx():
+    G = nx.gnm_random_graph(400, 1600, seed=3)
+    graph = _from_networkx(G)
+
+    expected = [set(c) for c in nx.community.greedy_modularity_communities(G)]
+    found = graph.communities()
+    groups = {}
+    for node, comm in found.items():
+        groups.setdefault(comm, set()).add(node)
+
+    assert nx.community.modularity(G, groups.values()) >= nx.community.modularity(G, expected) - 0.02
+
+
+def test_collaboration_graph_sparse_engine_matches_shape():
+    people = {i: {'label': f'P{i}'} for i in range(1, 9)}
+    memberships = [(1, 1), (2, 1), (3, 1), (4, 2), (5, 2), (6, 2), (3, 3), (4, 3), (7, 4)]
+
+    by_engine = {}
+    for engine in CollaborationGraph.ENGINES:
+        graph = CollaborationGraph(engine=engine)
+        graph.load(people, memberships)
+        by_engine[engine] = graph.snapshot(include_isolated=True)
+
+    networkx_nodes = {n['id']: n for n in by_engine['networkx']['nodes']}
+    sparse_nodes = {n['id']: n for n in by_engine['sparse']['nodes']}
+    assert set(networkx_nodes) == set(sparse_nodes)
+    assert by_engine['networkx']['statistics'] == by_engine['sparse']['statistics']
+    for person_id, node in sparse_nodes.items():
+        assert set(node) == set(networkx_nodes[person_id])
+    assert sparse_nodes[1]['community'] == sparse_nodes[2]['community']
+    assert sparse_nodes[1]['community'] != sparse_nodes[5]['community']
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        CollaborationGraph(engine='igraph')
@@ -0,0 +1,54 @@
+"""
+Unit tests for the streaming JSON/NDJSON encoders.
+
+A fake cursor stands in for the server-side cursor, so no database is
+needed.
+
+To run: pytest tests/test_streaming.py -v
+"""
+
+import json
+
+from utils.streaming import encode_json, encode_ndjson, fetch_batches, stream_format
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.fetches = 0
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+def test_json_body_matches_the_buffered_response():
+    rows = [{'id': i, 'name': f'n{i}'} for i in range(7)]
+    cursor = FakeCursor(rows)
+    chunks = list(encode_json(fetch_batches(cursor, size=3), json.dumps))
+    # Opening, three batches, closing
+    assert len(chunks) == 5 and cursor.fetches == 4
+    assert json.loads(''.join(chunks)) == {'status': 'success', 'data': rows, 'count': 7}
+
+    assert json.loads(''.join(encode_json(fetch_batches(FakeCursor([])), json.dumps))) == {
+        'status': 'success', 'data': [], 'count': 0
+    }
+
+
+def test_ndjson_lines_and_row_transform():
+    def upper(row):
+        row['name'] = row['name'].upper()
+        return row
+
+    rows = [{'id': i, 'name': f'n{i}'} for i in range(5)]
+    body = ''.join(encode_ndjson(fetch_batches(FakeCursor(rows), size=2, transform=upper), json.dumps))
+    lines = body.splitlines()
+    assert body.endswith('\n') and [json.loads(line)['name'] for line in lines] == ['N0', 'N1', 'N2', 'N3', 'N4']
+
+
+def test_stream_format_from_args():
+    assert stream_format({'format': 'ndjson'}) == 'ndjson'
+    assert stream_format({'stream': 'true'}) == 'json'
+    assert stream_format({'format': 'csv'}) is None
+    assert stream_format({}) is None
@@ -0,0 +1,107 @@
+"""
+Unit tests for the versioned, single-flight cache behind /api/analytics/network.
+
+To run: pytest tests/test_versioned_cache.py -v
+"""
+
+import threading
+import time
+
+import pytest
+from utils.versioned_cache import VersionedCache
+
+
+def test_keys_do_not_evict_each_other():
+    cache = VersionedCache()
+    calls = []
+
+    def builder(key):
+        def build():
+            calls.append(key)
+            return key
+        return build
+
+    for _ in range(3):
+        assert cache.get((True,), 1, builder(True)) is True
+        assert cache.get((False,), 1, builder(False)) is False
+
+    assert calls == [True, False]
+    assert cache.stats()['hits'] == 4
+
+
+def test_newer_version_is_a_miss():
+    cache = VersionedCache()
+    assert cache.get('k', 1, lambda: 'v1') == 'v1'
+    assert cache.get('k', 2, lambda: 'v2') == 'v2'
+    assert cache.get('k', 2, lambda: 'v3') == 'v2'
+
+
+def test_concurrent_misses_share_one_build():
+    cache = VersionedCache()
+    builds = []
+    release = threading.Event()
+
+    def slow_builder():
+        builds.append(1)
+        release.wait(timeout=5)
+        return 'value'
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get('k', 1, slow_builder)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert builds == [1]
+    assert results == ['value'] * 8
+    assert cache.stats()['shared_waits'] == 7
+
+
+def test_stale_while_revalidate_serves_previous_snapshot():
+    cache = VersionedCache(stale_while_revalidate=True)
+    cache.get('k', 1, lambda: 'old')
+
+    release = threading.Event()
+
+    def slow_builder():
+        release.wait(timeout=5)
+        return 'new'
+
+    assert cache.get('k', 2, slow_builder) == 'old'
+    release.set()
+    for _ in range(50):
+        if cache.stats()['in_flight'] == 0:
+            break
+        time.sleep(0.01)
+    assert cache.get('k', 2, lambda: 'unused') == 'new'
+    assert cache.stats()['stale_hits'] == 1
+
+
+def test_builder_errors_propagate_and_are_not_cached():
+    cache = VersionedCache()
+
+    def broken():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        cache.get('k', 1, broken)
+    assert cache.get('k', 1, lambda: 'ok') == 'ok'
+    assert cache.stats()['rebuild_errors'] == 1
+
+
+def test_max_entries_evicts_least_recently_used():
+    cache = VersionedCache(max_entries=2)
+    cache.get('a', 1, lambda: 'a')
+    cache.get('b', 1, lambda: 'b')
+    cache.get('a', 1, lambda: 'stale')
+    cache.get('c', 1, lambda: 'c')
+
+    keys = [entry['key'] for entry in cache.stats()['entries']]
+    assert keys == ['a', 'c']
+    assert cache.stats()['evictions'] == 1
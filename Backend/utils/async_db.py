@@ -0,0 +1,141 @@
+"""
+aiomysql pools for the ASGI read endpoints (asgi.py).
+
+The async routes wait on MySQL without holding a thread, so a process can
+keep thousands of requests in flight. They queue on a pool of at most
+``pool_max_size`` connections instead of each holding one. The settings
+follow utils/data_access.py:
+
+- reads use the ``[Replica]`` pool when one is configured, unless the
+  caller wrote recently (the same Stickiness the Flask routes mark);
+- connections run at ``read_isolation``;
+- with ``read_mode = read_only``, each read runs inside
+  ``START TRANSACTION READ ONLY``; otherwise it runs in autocommit.
+
+Waiting longer than ``checkout_timeout`` for a connection raises
+PoolTimeout, as in utils/db_pool.py. Stored procedure results share
+utils/query_cache.py with the Flask routes.
+"""
+
+import asyncio
+import configparser
+from contextlib import asynccontextmanager
+
+import aiomysql
+from utils import data_access
+from utils.db_pool import PoolTimeout
+from utils.query_cache import query_cache
+from utils.logger import log_info, log_error
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+ASYNC_MIN_SIZE = config.getint("AsyncDatabase", "pool_min_size", fallback=5)
+ASYNC_MAX_SIZE = config.getint("AsyncDatabase", "pool_max_size", fallback=50)
+ASYNC_CHECKOUT_TIMEOUT = config.getfloat("AsyncDatabase", "checkout_timeout", fallback=5.0)
+# Reconnect connections older than this many seconds (below MySQL's wait_timeout)
+ASYNC_RECYCLE_SECONDS = config.getint("AsyncDatabase", "recycle_seconds", fallback=3600)
+
+
+def _settings(section):
+    def setting(name, fallback=None):
+        return config.get(section, name, fallback="") or config.get("Database", name, fallback=fallback)
+    return {
+        'host': setting("db_host", "127.0.0.1"),
+        'port': int(setting("db_port", 3306)),
+        'user': setting("db_user", "root"),
+        'password': setting("db_password", ""),
+        'db': setting("db_name", "collab_connect_db"),
+    }
+
+
+class AsyncMySQL:
+    """Primary and optional replica aiomysql pools, opened on startup."""
+
+    def __init__(self):
+        self.pool = None
+        self.replica_pool = None
+
+    async def start(self):
+        options = dict(
+            minsize=ASYNC_MIN_SIZE, maxsize=ASYNC_MAX_SIZE, autocommit=True,
+            cursorclass=aiomysql.DictCursor, pool_recycle=ASYNC_RECYCLE_SECONDS,
+            init_command=f"SET SESSION TRANSACTION ISOLATION LEVEL {data_access.READ_ISOLATION}"
+        )
+        self.pool = await aiomysql.create_pool(**_settings("Database"), **options)
+        if config.get("Replica", "db_host", fallback=""):
+            try:
+                self.replica_pool = await aiomysql.create_pool(**_settings("Replica"), **options)
+            except Exception as e:
+                log_error(f"Replica unavailable for async reads, using the primary: {str(e)}")
+        log_info(f"Async database pool ready - min: {ASYNC_MIN_SIZE}, max: {ASYNC_MAX_SIZE}, "
+                 f"replica: {self.replica_pool is not None}")
+
+    async def close(self):
+        for pool in (self.pool, self.replica_pool):
+            if pool is not None:
+                pool.close()
+                await pool.wait_closed()
+
+    def _on_replica(self, caller):
+        return self.replica_pool is not None and not (caller and data_access.sticky.active(caller))
+
+    @asynccontextmanager
+    async def read(self, caller=None):
+        """A DictCursor for read-only work, on the replica unless ``caller`` is sticky."""
+        pool = self.replica_pool if self._on_replica(caller) else self.pool
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), ASYNC_CHECKOUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"No database connection free within {ASYNC_CHECKOUT_TIMEOUT}s "
+                              f"({pool.size - pool.freesize} in use)")
+        try:
+            async with conn.cursor() as cursor:
+                if data_access.READ_MODE == 'read_only':
+                    await cursor.execute("START TRANSACTION READ ONLY")
+                try:
+                    yield cursor
+                finally:
+                    if data_access.READ_MODE == 'read_only':
+                        await conn.commit()
+        finally:
+            pool.release(conn)
+
+    async def fetchall(self, query, params=(), caller=None):
+        async with self.read(caller) as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall()
+
+    async def callproc(self, name, args=(), caller=None):
+        """Rows of a stored procedure's first result set, from query_cache when possible."""
+        # The shared store's client blocks, so it is kept off the event loop
+        if query_cache.sharing:
+            cached, token = await asyncio.to_thread(query_cache.lookup, name, args)
+        else:
+            cached, token = query_cache.lookup(name, args)
+        if cached is not None:
+            return cached
+        replica = self._on_replica(caller)
+        async with self.read(caller) as cursor:
+            await cursor.callproc(name, args)
+            rows = await cursor.fetchall()
+            # Consume remaining result sets from stored procedure
+            while await cursor.nextset():
+                pass
+        if query_cache.sharing:
+            await asyncio.to_thread(query_cache.store, token, rows, replica)
+        else:
+            query_cache.store(token, rows, replica=replica)
+        return rows
+
+    def stats(self):
+        def describe(pool):
+            if pool is None:
+                return None
+            return {'size': pool.size, 'in_use': pool.size - pool.freesize, 'idle': pool.freesize,
+                    'min_size': pool.minsize, 'max_size': pool.maxsize}
+        return dict(describe(self.pool) or {}, replica=describe(self.replica_pool))
+
+
+# Shared by asgi.py
+async_mysql = AsyncMySQL()
@@ -2,9 +2,19 @@
 Decorators to make sure users only change their own projects and data
 """
 
+import configparser
 from functools import wraps
 from flask import request, jsonify
 
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+# Users allowed to call operator endpoints (full rebuilds); empty allows nobody
+OPERATOR_USER_IDS = {
+    int(user_id) for user_id in config.get("Operators", "user_ids", fallback="").replace(",", " ").split()
+    if user_id.isdigit()
+}
+
 def verify_project_ownership(f):
     """Verify user owns the project being modified. Use after @token_required."""
     @wraps(f)
@@ -67,3 +77,18 @@ def verify_user_access(f):
         return f(*args, **kwargs)
     
     return decorated
+
+
+def verify_operator(f):
+    """Only let users listed in [Operators] user_ids through. Use after @token_required."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not hasattr(request, 'current_user'):
+            return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
+
+        if request.current_user.get('user_id') not in OPERATOR_USER_IDS:
+            return jsonify({'status': 'error', 'message': 'Operator access required'}), 403
+
+        return f(*args, **kwargs)
+
+    return decorated
@@ -0,0 +1,385 @@
+"""
+In-process autocomplete for researcher, institution, department and tag names.
+
+Each name is indexed under every word it contains ("Jane Smith" is found by
+"ja" and by "smi"). An index keeps:
+
+- a sorted array of (token, key) pairs, so any prefix is a bisect range;
+- a shallow trie over the first TRIE_DEPTH characters of each token whose
+  nodes cache the most popular keys below them, because one- and
+  two-letter prefixes cover thousands of tokens and should not be scanned;
+- a trigram index over the words, used when the prefix itself has too few
+  completions: candidates sharing enough trigrams with the prefix are
+  checked by prefix edit distance, so "quantm" still finds "Quantum
+  Computing".
+
+Popularity is the number of projects behind a name. Inserts and popularity
+bumps update all three structures in place.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+KINDS = ('person', 'institution', 'department', 'tag')
+
+TRIE_DEPTH = 3
+TOP_CACHE = 50
+FUZZY_MIN_LENGTH = 3
+FUZZY_CANDIDATES = 100
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize(name):
+    """Lowercase, accents stripped, runs of punctuation/space as one space."""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', stripped.lower()).strip()
+
+
+def tokens_of(name):
+    """The normalized name from each word on: 'jane smith', 'smith'."""
+    words = normalize(name).split(' ')
+    return list(dict.fromkeys(' '.join(words[i:]) for i in range(len(words)) if words[i]))
+
+
+def trigrams(word, pad_end=True):
+    padded = '  ' + word + (' ' if pad_end else '')
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_typos(length):
+    return 1 if length <= 5 else 2
+
+
+def prefix_distance(prefix, text, limit):
+    """Edit distance from ``prefix`` to the closest prefix of ``text``.
+
+    Returns ``limit + 1`` as soon as every alignment is over ``limit``.
+    """
+    previous = list(range(len(text) + 1))
+    for i, char in enumerate(prefix, 1):
+        current = [i]
+        for j, other in enumerate(text, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char != other)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous)
+
+
+class AutocompleteIndex:
+    """Prefix and typo-tolerant lookup over one kind of name."""
+
+    def __init__(self):
+        self._entries = {}
+        self._tokens = []
+        self._trie = {}
+        # word -> keys whose name contains it, trigram -> words
+        self._words = defaultdict(set)
+        self._grams = defaultdict(set)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self, entries):
+        """Replace the contents with ``(key, name, popularity)`` rows."""
+        self._entries = {}
+        self._words = defaultdict(set)
+        self._grams = defaultdict(set)
+        pairs = []
+        for key, name, popularity in entries:
+            tokens = tokens_of(name)
+            if not tokens:
+                continue
+            self._entries[key] = (name, tokens, popularity or 0)
+            pairs.extend((token, key) for token in tokens)
+            self._index_words(key, tokens)
+        pairs.sort()
+        self._tokens = pairs
+
+        # Walking the keys best first fills every top list in one pass
+        self._trie = {}
+        for key in sorted(self._entries, key=self._rank):
+            for prefix in self._prefixes(self._entries[key][1]):
+                top = self._trie.setdefault(prefix, [])
+                if len(top) < TOP_CACHE:
+                    top.append(key)
+
+    def upsert(self, key, name, popularity=None):
+        """Add a name or rename/re-rank an existing one."""
+        current = self._entries.get(key)
+        if popularity is None:
+            popularity = current[2] if current else 0
+        if current is not None and current[0] == name:
+            self._set_popularity(key, popularity)
+            return
+        if current is not None:
+            self.remove(key)
+        tokens = tokens_of(name)
+        if not tokens:
+            return
+        self._entries[key] = (name, tokens, popularity)
+        for token in tokens:
+            bisect.insort(self._tokens, (token, key))
+        self._index_words(key, tokens)
+        self._promote(key)
+
+    def bump(self, key, delta=1):
+        """Change the popularity of an indexed name by ``delta``."""
+        if key in self._entries:
+            self._set_popularity(key, max(0, self._entries[key][2] + delta))
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, tokens, _ = entry
+        for token in tokens:
+            i = bisect.bisect_left(self._tokens, (token, key))
+            if i < len(self._tokens) and self._tokens[i] == (token, key):
+                del self._tokens[i]
+        for word in set(tokens[0].split(' ')):
+            keys = self._words.get(word)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._words[word]
+                for gram in trigrams(word):
+                    self._grams[gram].discard(word)
+        self._demote(key, tokens)
+
+    def complete(self, prefix, k=10, fuzzy=True):
+        """Up to ``k`` ``(key, name, popularity, typos)`` rows, best first.
+
+        Exact prefix matches come first, most popular first; fuzzy matches
+        fill any remaining slots, fewest typos first.
+        """
+        query = normalize(prefix)
+        if not query or k <= 0:
+            return []
+        if len(query) <= TRIE_DEPTH and k <= TOP_CACHE:
+            keys = self._trie.get(query, [])[:k]
+        else:
+            keys = self._scan_top(query, k)
+        results = [(key, *self._entries[key][0::2], 0) for key in keys]
+        if fuzzy and len(results) < k:
+            results.extend(self._fuzzy(query, k - len(results), exclude=set(keys)))
+        return results
+
+    def stats(self):
+        return {
+            'names': len(self._entries),
+            'tokens': len(self._tokens),
+            'words': len(self._words),
+            'trie_nodes': len(self._trie),
+            'trigrams': len(self._grams)
+        }
+
+    # ------------------------------------------------------------------
+
+    def _rank(self, key):
+        _, tokens, popularity = self._entries[key]
+        return (-popularity, tokens[0], str(key))
+
+    def _range(self, prefix):
+        start = bisect.bisect_left(self._tokens, (prefix,))
+        end = bisect.bisect_left(self._tokens, (prefix + '\U0010ffff',), start)
+        return start, end
+
+    def _scan_top(self, prefix, k):
+        start, end = self._range(prefix)
+        keys = {key for _, key in self._tokens[start:end]}
+        return heapq.nsmallest(k, keys, key=self._rank)
+
+    def _index_words(self, key, tokens):
+        # The first token is the whole name, so its words cover every word
+        for word in tokens[0].split(' '):
+            if word not in self._words:
+                for gram in trigrams(word):
+                    self._grams[gram].add(word)
+            self._words[word].add(key)
+
+    def _prefixes(self, tokens):
+        return {token[:depth] for token in tokens for depth in range(1, min(TRIE_DEPTH, len(token)) + 1)}
+
+    def _promote(self, key):
+        """Place ``key`` in the cached top lists after it was added or gained popularity."""
+        rank = self._rank(key)
+        for prefix in self._prefixes(self._entries[key][1]):
+            top = self._trie.setdefault(prefix, [])
+            if key in top:
+                top.remove(key)
+            elif len(top) >= TOP_CACHE and rank >= self._rank(top[-1]):
+                continue
+            _insort_by(top, key, self._rank)
+            del top[TOP_CACHE:]
+
+    def _demote(self, key, tokens):
+        """Refill cached top lists that held ``key`` after it was removed or lost popularity."""
+        for prefix in self._prefixes(tokens):
+            top = self._trie.get(prefix)
+            if top is None or key not in top:
+                continue
+            if len(top) < TOP_CACHE:
+                # Not full, so it already holds every key under the prefix
+                top.remove(key)
+                if key in self._entries:
+                    _insort_by(top, key, self._rank)
+                elif not top:
+                    del self._trie[prefix]
+            else:
+                refreshed = self._scan_top(prefix, TOP_CACHE)
+                if refreshed:
+                    self._trie[prefix] = refreshed
+                else:
+                    del self._trie[prefix]
+
+    def _set_popularity(self, key, popularity):
+        name, tokens, previous = self._entries[key]
+        if popularity == previous:
+            return
+        self._entries[key] = (name, tokens, popularity)
+        if popularity > previous:
+            self._promote(key)
+        else:
+            self._demote(key, tokens)
+
+    def _fuzzy(self, query, k, exclude):
+        words = query.split(' ')
+        # Typos are only allowed in the last (partly typed) word
+        head, last = words[:-1], words[-1]
+        if len(last) < FUZZY_MIN_LENGTH:
+            return []
+        limit = max_typos(len(last))
+        grams = trigrams(last, pad_end=False)
+        needed = max(1, len(grams) - 3 * limit)
+
+        # Words sharing enough trigrams, most shared first, then checked
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._grams.get(gram, ()))
+        candidates = heapq.nsmallest(
+            FUZZY_CANDIDATES,
+            (word for word, count in counts.items() if count >= needed),
+            key=lambda word: (-counts[word], word)
+        )
+        matched = {}
+        for word in candidates:
+            distance = prefix_distance(last, word[:len(last) + limit], limit)
+            if distance <= limit:
+                matched[word] = distance
+
+        typos = {}
+        for word, distance in matched.items():
+            for key in self._words[word]:
+                if key in exclude:
+                    continue
+                if head:
+                    if key not in typos:
+                        typos[key] = self._typos(key, head, matched)
+                elif distance < typos.get(key, limit + 1):
+                    typos[key] = distance
+        typos = {key: distance for key, distance in typos.items() if distance is not None}
+        best = heapq.nsmallest(k, typos, key=lambda key: (typos[key], self._rank(key)))
+        return [(key, *self._entries[key][0::2], typos[key]) for key in best]
+
+    def _typos(self, key, head, matched):
+        """Fewest typos over the places ``head`` is followed by a matched word."""
+        words = self._entries[key][1][0].split(' ')
+        found = [
+            matched[words[i + len(head)]]
+            for i in range(len(words) - len(head))
+            if words[i:i + len(head)] == head and words[i + len(head)] in matched
+        ]
+        return min(found) if found else None
+
+
+def _insort_by(items, item, key):
+    """Insert ``item`` into ``items``, kept sorted by ``key``."""
+    rank = key(item)
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(items[mid]) < rank:
+            lo = mid + 1
+        else:
+            hi = mid
+    items.insert(lo, item)
+
+
+class Autocomplete:
+    """One index per kind, with the same load/delta contract as the graph.
+
+    Deltas received before the first ``load`` are ignored; the load will
+    read them from the database anyway.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._indexes = {kind: AutocompleteIndex() for kind in KINDS}
+        self.loaded = False
+        self.built_at = None
+
+    def load(self, entries_by_kind, built_at=None):
+        indexes = {kind: AutocompleteIndex() for kind in KINDS}
+        for kind, entries in entries_by_kind.items():
+            indexes[kind].load(entries)
+        with self._lock:
+            self._indexes = indexes
+            self.loaded = True
+            self.built_at = built_at
+
+    def mark_stale(self):
+        """Have the next request reload every index; until then the current ones keep serving."""
+        with self._lock:
+            self.loaded = False
+
+    def upsert(self, kind, key, name, popularity=None):
+        if key is None or not name:
+            return
+        with self._lock:
+            if self.loaded:
+                self._indexes[kind].upsert(key, name, popularity)
+
+    def bump(self, kind, key, delta=1):
+        if key is None:
+            return
+        with self._lock:
+            if self.loaded:
+                self._indexes[kind].bump(key, delta)
+
+    def record(self, kind, key, name, delta=1):
+        """One more (or ``delta`` more) project behind ``name``, adding it if new."""
+        if key is None or not name:
+            return
+        with self._lock:
+            if self.loaded:
+                self._indexes[kind].upsert(key, name)
+                self._indexes[kind].bump(key, delta)
+
+    def remove(self, kind, key):
+        with self._lock:
+            if self.loaded:
+                self._indexes[kind].remove(key)
+
+    def complete(self, kind, prefix, k=10, fuzzy=True):
+        with self._lock:
+            return self._indexes[kind].complete(prefix, k, fuzzy)
+
+    def stats(self):
+        with self._lock:
+            return {kind: index.stats() for kind, index in self._indexes.items()}
+
+
+# Shared instance used by the autocomplete blueprint and the write routes
+autocomplete = Autocomplete()
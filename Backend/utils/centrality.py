@@ -0,0 +1,253 @@
+"""
+Centrality metrics for the collaboration network.
+
+PageRank and eigenvector centrality are power iterations over the CSR
+adjacency (edge weights count shared projects). Betweenness is estimated
+with Brandes' algorithm from a random sample of source researchers: each
+sampled source contributes its dependency vector, and the sum is scaled up
+by n / k. The sources are processed in batches as sparse x dense products,
+one per BFS level, so there is no per-node Python loop.
+
+For k sampled sources the normalized estimate is within ``epsilon`` of the
+exact value for every researcher with probability at least 1 - ``delta``
+whenever k >= ln(2n / delta) / (2 epsilon²) (Hoeffding plus a union bound
+over the n researchers), which gives both the sample count for a target
+error and the error bound for a fixed sample count.
+
+CentralityService runs the computation on a worker thread and keeps the
+last finished result, so request threads never wait for it. At most one
+computation is in flight: versions that appear meanwhile are coalesced
+into a single follow-up run for whatever version is current when it ends,
+and readers get the older result (``version`` behind the graph's) until
+then.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import scipy.sparse as sp
+
+BETWEENNESS_BATCH = 64
+
+
+def pagerank(adjacency, damping=0.85, tol=1e-10, max_iter=200):
+    """Weighted PageRank; dangling nodes spread their rank uniformly."""
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    strength = np.asarray(adjacency.sum(axis=1)).ravel()
+    dangling = strength == 0
+    transition = sp.diags(np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, strength))) @ adjacency
+    transition_t = transition.T.tocsr()
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = rank
+        rank = damping * (transition_t @ rank + rank[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(rank - previous).sum() < n * tol:
+            break
+    return rank / rank.sum()
+
+
+def eigenvector(adjacency, tol=1e-10, max_iter=500):
+    """Eigenvector centrality by power iteration on A + I, unit length."""
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    vector = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        previous = vector
+        vector = adjacency @ vector + vector
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return np.zeros(n)
+        vector = vector / norm
+        if np.abs(vector - previous).sum() < n * tol:
+            break
+    return vector
+
+
+def betweenness_samples_for(n, epsilon, delta=0.1):
+    """Sources needed for an absolute error of ``epsilon`` w.p. 1 - ``delta``."""
+    if n < 3:
+        return n
+    return min(n, math.ceil(math.log(2 * n / delta) / (2 * epsilon * epsilon)))
+
+
+def betweenness_error_bound(n, samples, delta=0.1):
+    """Absolute error on normalized betweenness for ``samples`` sources; 0 when exact."""
+    if samples >= n or n < 3:
+        return 0.0
+    return math.sqrt(math.log(2 * n / delta) / (2 * samples))
+
+
+def _dependencies(binary, sources):
+    """Summed Brandes dependencies of a batch of BFS sources."""
+    n = binary.shape[0]
+    columns = np.arange(len(sources))
+    sigma = np.zeros((n, len(sources)))
+    sigma[sources, columns] = 1.0
+    distance = np.full((n, len(sources)), -1, dtype=np.int32)
+    distance[sources, columns] = 0
+
+    frontier = sigma.copy()
+    depth = 0
+    while True:
+        reached = binary @ frontier
+        reached[distance >= 0] = 0.0
+        newly = reached > 0
+        if not newly.any():
+            break
+        depth += 1
+        distance[newly] = depth
+        sigma[newly] = reached[newly]
+        frontier = np.where(newly, sigma, 0.0)
+
+    dependency = np.zeros((n, len(sources)))
+    safe_sigma = np.where(sigma > 0, sigma, 1.0)
+    for level in range(depth - 1, 0, -1):
+        below = np.where(distance == level + 1, (1.0 + dependency) / safe_sigma, 0.0)
+        dependency = np.where(distance == level, sigma * (binary @ below), dependency)
+    return dependency.sum(axis=1)
+
+
+def sampled_betweenness(adjacency, samples, seed=0):
+    """Normalized (undirected, hop-count) betweenness from ``samples`` sources.
+
+    With ``samples >= n`` every node is a source and the result is exact.
+    """
+    n = adjacency.shape[0]
+    if n < 3:
+        return np.zeros(n)
+    binary = adjacency.copy().tocsr()
+    binary.setdiag(0)
+    binary.eliminate_zeros()
+    binary.data = np.ones_like(binary.data)
+
+    rng = np.random.default_rng(seed)
+    samples = min(samples, n)
+    sources = np.arange(n) if samples == n else rng.choice(n, size=samples, replace=False)
+
+    total = np.zeros(n)
+    for start in range(0, len(sources), BETWEENNESS_BATCH):
+        total += _dependencies(binary, sources[start:start + BETWEENNESS_BATCH])
+
+    # Each pair is seen from both ends; scale the sample up to all sources
+    estimate = total * (n / samples) / 2
+    return estimate / ((n - 1) * (n - 2) / 2)
+
+
+class CentralityService:
+    """Centrality per graph version, computed off the request threads."""
+
+    def __init__(self, graph, workers=1, samples=0, epsilon=0.05, delta=0.1):
+        self.graph = graph
+        self.samples = samples
+        self.epsilon = epsilon
+        self.delta = delta
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='centrality')
+        self._lock = threading.Lock()
+        self._latest = None
+        # Version being computed and its future; None when idle
+        self._running = None
+        self._future = None
+        self.last_error = None
+
+    def _start_if_needed(self):
+        """Start a run for the current version if idle and behind; call with the lock held."""
+        version = self.graph.version
+        if self._running is not None or (self._latest is not None and self._latest['version'] >= version):
+            return
+        self._running = version
+        self._future = self._executor.submit(self._compute, version)
+
+    def refresh(self):
+        """Compute the current graph version unless it is done or a run is in flight."""
+        with self._lock:
+            self._start_if_needed()
+
+    def result(self):
+        """The most recent finished result (possibly for an older version) or None."""
+        self.refresh()
+        with self._lock:
+            return self._latest
+
+    def wait(self, timeout=None):
+        """Block until the current version is computed; for tests and scripts."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.refresh()
+            with self._lock:
+                future = self._future
+                done = self._latest is not None and self._latest['version'] >= self.graph.version
+            if done or future is None:
+                return self.result()
+            future.result(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def in_flight(self):
+        with self._lock:
+            return [] if self._running is None else [self._running]
+
+    def _compute(self, version):
+        started = time.perf_counter()
+        try:
+            sparse = self.graph.to_sparse()
+            n = sparse.n
+            samples = self.samples or betweenness_samples_for(n, self.epsilon, self.delta)
+            samples = min(samples, n)
+            metrics = {
+                'pagerank': pagerank(sparse.adjacency),
+                'eigenvector': eigenvector(sparse.adjacency),
+                'betweenness': sampled_betweenness(sparse.adjacency, samples, seed=version)
+            }
+            result = {
+                'version': version,
+                'computed_at': datetime.now(timezone.utc),
+                'seconds': round(time.perf_counter() - started, 3),
+                'node_ids': sparse.node_ids,
+                'index': {person_id: i for i, person_id in enumerate(sparse.node_ids.tolist())},
+                'metrics': metrics,
+                'betweenness': {
+                    'samples': samples,
+                    'exact': samples >= n,
+                    'error_bound': round(betweenness_error_bound(n, samples, self.delta), 6),
+                    'confidence': 1 - self.delta
+                }
+            }
+            with self._lock:
+                if self._latest is None or self._latest['version'] < version:
+                    self._latest = result
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            with self._lock:
+                self._running = self._future = None
+            raise
+        with self._lock:
+            self._running = self._future = None
+            # Writes landed while this ran: one follow-up for the latest version
+            self._start_if_needed()
+
+    def node_metrics(self, result, person_id):
+        """``{'pagerank', 'eigenvector', 'betweenness'}`` for one researcher."""
+        i = result['index'].get(person_id)
+        if i is None:
+            return {'pagerank': 0.0, 'eigenvector': 0.0, 'betweenness': 0.0}
+        return {name: round(float(values[i]), 6) for name, values in result['metrics'].items()}
+
+    def top(self, result, metric, n):
+        """``(person_id, metrics)`` for the ``n`` highest scorers on ``metric``."""
+        values = result['metrics'][metric]
+        n = min(n, len(values))
+        if n == 0:
+            return []
+        best = np.argpartition(-values, n - 1)[:n]
+        best = best[np.lexsort((result['node_ids'][best], -values[best]))]
+        return [
+            (int(result['node_ids'][i]), {name: round(float(v[i]), 6) for name, v in result['metrics'].items()})
+            for i in best
+        ]
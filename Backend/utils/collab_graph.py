@@ -0,0 +1,751 @@
+"""
+In-memory collaboration graph for the analytics endpoints.
+
+The graph is loaded once from Person/WorkedOn and then kept current by the
+write routes, which report WorkedOn and Person changes as deltas. Degree,
+edge weights, project counts and the network statistics are maintained on
+every delta, so only the touched edges are visited. Community detection
+is the one piece that still needs the whole graph; it is recomputed on a
+full rebuild and new nodes inherit a community from their neighbours until
+then.
+
+Filtered views (by institution, department, main field, project tag or a
+year window) are cut from the same graph with per-attribute indexes, so
+they never go back to the database or rerun community detection.
+"""
+
+import heapq
+import threading
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+
+import networkx as nx
+
+
+def node_size(degree):
+    """Node radius used by the force graph on the frontend."""
+    return max(50, 50 + (degree * 15))
+
+
+def date_of(value):
+    """A DATE column value or ISO date string as a ``date``, None when missing."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def network_statistics(total_researchers, total_connections, degree_sum):
+    """Summary statistics shown above the network view."""
+    avg_collaborators = total_researchers / max(1, total_researchers) if total_researchers > 0 else 0
+    if total_researchers > 1:
+        avg_collaborators = degree_sum / total_researchers
+
+    max_edges = (total_researchers * (total_researchers - 1)) / 2 if total_researchers > 1 else 1
+    network_density = total_connections / max_edges if max_edges > 0 else 0
+
+    return {
+        'total_researchers': total_researchers,
+        'total_collaborations': total_connections,
+        'avg_collaborators_per_person': round(avg_collaborators, 2),
+        'network_density': round(network_density, 4)
+    }
+
+
+class CollaborationGraph:
+    """Co-authorship graph built from WorkedOn and updated by deltas.
+
+    Every mutating method bumps ``version`` so callers can tell whether a
+    snapshot they hold is still current. Deltas received before the first
+    ``load`` are ignored; the load will read them from the database anyway.
+    """
+
+    ENGINES = ('networkx', 'sparse')
+
+    def __init__(self, engine='networkx'):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown graph engine: {engine}")
+        self.engine = engine
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.version = 0
+        self.built_at = None
+        self._reset()
+
+    def _reset(self):
+        self._people = {}
+        self._projects = defaultdict(set)
+        self._person_projects = defaultdict(set)
+        self._adjacency = defaultdict(dict)
+        self._edge_count = 0
+        self._connected_count = 0
+        self._communities = {}
+        self._next_community = 0
+        # Slice indexes: attribute value -> person ids, tag -> project ids
+        self._facets = {}
+        self._field_index = defaultdict(set)
+        self._institution_index = defaultdict(set)
+        self._department_index = defaultdict(set)
+        self._primary_tags = {}
+        self._extra_tags = defaultdict(set)
+        self._project_tag_keys = {}
+        self._tag_index = defaultdict(set)
+        self._membership_dates = {}
+
+    # ------------------------------------------------------------------
+    # Full rebuild
+    # ------------------------------------------------------------------
+
+    def load(self, people, memberships, edges=None, affiliations=None, project_tags=None):
+        """Replace the graph with a fresh copy.
+
+        ``people`` maps person_id to a dict with ``label``, ``institution``,
+        ``department``, ``expertise`` and optionally ``main_field``.
+        ``memberships`` is an iterable of ``(person_id, project_id)`` pairs
+        taken from WorkedOn, optionally extended with ``start_date`` and
+        ``end_date``. ``edges`` is an optional iterable of ``(person_a,
+        person_b, weight)`` rows from the Collaboration table; without it the
+        edges are derived from the memberships.
+
+        ``affiliations`` (``(person_id, department_id, institution_id)``)
+        and ``project_tags`` (``(project_id, tag_name, is_primary)``) only
+        feed the slice indexes.
+        """
+        with self._lock:
+            self._reset()
+            for person_id, attrs in people.items():
+                self._people[person_id] = self._person_attrs(person_id, attrs)
+                self._index_person(person_id, main_field=attrs.get('main_field'))
+
+            for person_id, department_id, institution_id in affiliations or ():
+                if person_id in self._people:
+                    self._index_person(person_id, department_id=department_id, institution_id=institution_id)
+
+            for project_id, tag_name, is_primary in project_tags or ():
+                if is_primary:
+                    self._primary_tags[project_id] = tag_name
+                elif tag_name:
+                    self._extra_tags[project_id].add(tag_name)
+            for project_id in set(self._primary_tags) | set(self._extra_tags):
+                self._reindex_tags(project_id)
+
+            for membership in memberships:
+                person_id, project_id = membership[0], membership[1]
+                if person_id in self._people:
+                    self._projects[project_id].add(person_id)
+                    self._person_projects[person_id].add(project_id)
+                    if len(membership) > 2:
+                        self._membership_dates[(person_id, project_id)] = (
+                            date_of(membership[2]), date_of(membership[3])
+                        )
+
+            if edges is not None:
+                for person_1, person_2, weight in edges:
+                    if person_1 in self._people and person_2 in self._people and weight > 0:
+                        self._bump_edge(person_1, person_2, weight)
+            else:
+                for members in self._projects.values():
+                    ordered = sorted(members)
+                    for i, person_1 in enumerate(ordered):
+                        for person_2 in ordered[i + 1:]:
+                            self._bump_edge(person_1, person_2, 1)
+
+            self._detect_communities()
+            self.loaded = True
+            self.version += 1
+            self.built_at = datetime.now(timezone.utc)
+
+    def mark_stale(self):
+        """Have the next request reload the graph (another worker changed the tables behind it).
+
+        The current graph keeps serving until then; deltas are skipped, as
+        the reload reads them from the database.
+        """
+        with self._lock:
+            self.loaded = False
+
+    def edge_list(self):
+        """``(person_1, person_2, weight)`` for every edge, person_1 < person_2."""
+        with self._lock:
+            return [
+                (person_1, person_2, weight)
+                for person_1, neighbours in self._adjacency.items()
+                for person_2, weight in neighbours.items()
+                if person_1 < person_2
+            ]
+
+    def to_sparse(self, include_isolated=False):
+        """The graph as a SparseGraph (CSR arrays), connected part by default."""
+        from utils.sparse_graph import SparseGraph
+        with self._lock:
+            edges = self.edge_list()
+            if include_isolated:
+                node_ids = sorted(self._people)
+            else:
+                node_ids = sorted(person_id for person_id, neighbours in self._adjacency.items() if neighbours)
+        return SparseGraph.from_edges(
+            node_ids,
+            [e[0] for e in edges],
+            [e[1] for e in edges],
+            [e[2] for e in edges]
+        )
+
+    def _detect_communities(self):
+        self._communities = {}
+        try:
+            if self.engine == 'sparse':
+                self._communities = self.to_sparse().communities()
+            else:
+                from networkx.algorithms import community
+                G = nx.Graph()
+                G.add_weighted_edges_from(self.edge_list())
+                for comm_id, comm_nodes in enumerate(community.greedy_modularity_communities(G)):
+                    for node_id in comm_nodes:
+                        self._communities[node_id] = comm_id
+            self._next_community = len(set(self._communities.values()))
+        except Exception as e:
+            print(f"Community detection failed: {e}, using default communities")
+            self._communities = {
+                person_id: 0 for person_id, neighbours in self._adjacency.items() if neighbours
+            }
+            self._next_community = 1
+
+        # Isolated researchers each sit in their own community, as they did
+        # when networkx saw them as singleton nodes.
+        for person_id in self._people:
+            if person_id not in self._communities:
+                self._communities[person_id] = self._next_community
+                self._next_community += 1
+
+    # ------------------------------------------------------------------
+    # Deltas
+    # ------------------------------------------------------------------
+
+    def upsert_person(self, person_id, label=None, institution=None, department=None, expertise=None,
+                      main_field=None, department_id=None, institution_id=None):
+        """Add a researcher or refresh the attributes of an existing one.
+
+        ``department_id``/``institution_id`` add an affiliation for slicing;
+        earlier affiliations are kept, as WorksIn keeps them.
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            self._index_person(person_id, main_field, department_id, institution_id)
+            current = self._people.get(person_id)
+            if current is None:
+                self._people[person_id] = self._person_attrs(person_id, {
+                    'label': label,
+                    'institution': institution,
+                    'department': department,
+                    'expertise': expertise
+                })
+                self._assign_community(person_id)
+            else:
+                if label is not None:
+                    current['label'] = label
+                if institution is not None:
+                    current['institution'] = institution
+                if department is not None:
+                    current['department'] = department
+                if expertise is not None:
+                    current['expertise'] = [e for e in expertise if e]
+            self.version += 1
+
+    def remove_person(self, person_id):
+        """Drop a researcher and every edge they contribute (DeletePerson)."""
+        with self._lock:
+            if not self.loaded or person_id not in self._people:
+                return
+            for project_id in list(self._person_projects.get(person_id, ())):
+                self._unlink(person_id, project_id)
+            self._person_projects.pop(person_id, None)
+            self._adjacency.pop(person_id, None)
+            self._people.pop(person_id, None)
+            self._communities.pop(person_id, None)
+            self._unindex_person(person_id)
+            self.version += 1
+
+    def add_membership(self, person_id, project_id, start_date=None, end_date=None):
+        """Apply a new WorkedOn row (sp_insert_workedon)."""
+        with self._lock:
+            if not self.loaded:
+                return
+            if person_id not in self._people:
+                self._people[person_id] = self._person_attrs(person_id, {})
+            members = self._projects[project_id]
+            if person_id in members:
+                return
+            if start_date or end_date:
+                self._membership_dates[(person_id, project_id)] = (date_of(start_date), date_of(end_date))
+            touched = members | {person_id}
+            isolated = {p for p in touched if not self._adjacency.get(p)}
+            for other in members:
+                self._bump_edge(person_id, other, 1)
+            members.add(person_id)
+            self._person_projects[person_id].add(project_id)
+            # Nodes that just joined the connected graph take their
+            # neighbours' community instead of keeping a singleton one
+            for node_id in isolated:
+                if self._adjacency.get(node_id) or node_id not in self._communities:
+                    self._assign_community(node_id)
+            self.version += 1
+
+    def remove_membership(self, person_id, project_id):
+        """Apply a deleted WorkedOn row (sp_delete_workedon)."""
+        with self._lock:
+            if not self.loaded or person_id not in self._projects.get(project_id, ()):
+                return
+            self._unlink(person_id, project_id)
+            self.version += 1
+
+    def remove_project(self, project_id):
+        """Drop every WorkedOn row for a project (DeleteProject)."""
+        with self._lock:
+            if not self.loaded or project_id not in self._projects:
+                return
+            for person_id in list(self._projects[project_id]):
+                self._unlink(person_id, project_id)
+            self._projects.pop(project_id, None)
+            self._primary_tags.pop(project_id, None)
+            self._extra_tags.pop(project_id, None)
+            self._reindex_tags(project_id)
+            self.version += 1
+
+    def set_project_tag(self, project_id, tag_name):
+        """Apply a new or changed Project.tag_name (InsertIntoProject, UpdateProjectDetails)."""
+        with self._lock:
+            if not self.loaded:
+                return
+            self._primary_tags[project_id] = tag_name
+            self._reindex_tags(project_id)
+            self.version += 1
+
+    def _unlink(self, person_id, project_id):
+        members = self._projects.get(project_id)
+        if members is None:
+            return
+        members.discard(person_id)
+        self._person_projects[person_id].discard(project_id)
+        self._membership_dates.pop((person_id, project_id), None)
+        for other in members:
+            self._bump_edge(person_id, other, -1)
+        if not members:
+            self._projects.pop(project_id, None)
+
+    def _bump_edge(self, person_1, person_2, delta):
+        neighbours_1 = self._adjacency[person_1]
+        neighbours_2 = self._adjacency[person_2]
+        weight = neighbours_1.get(person_2, 0) + delta
+
+        if weight > 0:
+            if person_2 not in neighbours_1:
+                self._edge_count += 1
+                self._connected_count += (not neighbours_1) + (not neighbours_2)
+            neighbours_1[person_2] = weight
+            neighbours_2[person_1] = weight
+        elif person_2 in neighbours_1:
+            del neighbours_1[person_2]
+            del neighbours_2[person_1]
+            self._edge_count -= 1
+            self._connected_count -= (not neighbours_1) + (not neighbours_2)
+
+    def _assign_community(self, person_id):
+        """Place a new node in the most common community among its neighbours."""
+        neighbour_communities = Counter(
+            self._communities[other]
+            for other in self._adjacency.get(person_id, ())
+            if other in self._communities
+        )
+        if neighbour_communities:
+            self._communities[person_id] = neighbour_communities.most_common(1)[0][0]
+        else:
+            self._communities[person_id] = self._next_community
+            self._next_community += 1
+
+    def _index_person(self, person_id, main_field=None, department_id=None, institution_id=None):
+        facets = self._facets.setdefault(
+            person_id, {'main_field': None, 'department_ids': set(), 'institution_ids': set()}
+        )
+        if main_field:
+            key = main_field.strip().lower()
+            if facets['main_field'] is not None:
+                self._field_index[facets['main_field']].discard(person_id)
+            facets['main_field'] = key
+            self._field_index[key].add(person_id)
+        if department_id is not None:
+            facets['department_ids'].add(department_id)
+            self._department_index[department_id].add(person_id)
+        if institution_id is not None:
+            facets['institution_ids'].add(institution_id)
+            self._institution_index[institution_id].add(person_id)
+
+    def _unindex_person(self, person_id):
+        facets = self._facets.pop(person_id, None)
+        if facets is None:
+            return
+        if facets['main_field'] is not None:
+            self._field_index[facets['main_field']].discard(person_id)
+        for department_id in facets['department_ids']:
+            self._department_index[department_id].discard(person_id)
+        for institution_id in facets['institution_ids']:
+            self._institution_index[institution_id].discard(person_id)
+
+    def _reindex_tags(self, project_id):
+        for key in self._project_tag_keys.pop(project_id, ()):
+            self._tag_index[key].discard(project_id)
+        tags = set(self._extra_tags.get(project_id, ()))
+        if self._primary_tags.get(project_id):
+            tags.add(self._primary_tags[project_id])
+        keys = {tag.strip().lower() for tag in tags if tag and tag.strip()}
+        for key in keys:
+            self._tag_index[key].add(project_id)
+        if keys:
+            self._project_tag_keys[project_id] = keys
+
+    @staticmethod
+    def _person_attrs(person_id, attrs):
+        return {
+            'id': person_id,
+            'label': attrs.get('label'),
+            'institution': attrs.get('institution') or 'Unknown',
+            'department': attrs.get('department') or 'Unknown',
+            'expertise': [e for e in (attrs.get('expertise') or []) if e]
+        }
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def __contains__(self, person_id):
+        return person_id in self._people
+
+    def node(self, person_id):
+        """API payload for one researcher, or None."""
+        with self._lock:
+            return self._node_payload(person_id) if person_id in self._people else None
+
+    def expertise_map(self):
+        """person_id -> expertise list, for every researcher."""
+        with self._lock:
+            return {person_id: list(attrs['expertise']) for person_id, attrs in self._people.items()}
+
+    def project_members(self, project_id):
+        """Sorted person ids on a project (empty before the first load)."""
+        with self._lock:
+            return sorted(self._projects.get(project_id, ()))
+
+    def membership_dates(self):
+        """``(person_id, project_id, start_date, end_date)`` for every membership."""
+        with self._lock:
+            return [
+                (person_id, project_id) + self._membership_dates.get((person_id, project_id), (None, None))
+                for project_id, members in self._projects.items()
+                for person_id in members
+            ]
+
+    def affiliations(self, level='institution'):
+        """person_id -> set of institution (or department) ids."""
+        key = 'institution_ids' if level == 'institution' else 'department_ids'
+        with self._lock:
+            return {
+                person_id: set(facets[key])
+                for person_id, facets in self._facets.items()
+                if facets[key] and person_id in self._people
+            }
+
+    def community_map(self):
+        """person_id -> community id, for every researcher."""
+        with self._lock:
+            return dict(self._communities)
+
+    def statistics(self, include_isolated=False):
+        """Network statistics from the maintained counters, O(1)."""
+        with self._lock:
+            total = len(self._people) if include_isolated else self._connected_count
+            return network_statistics(total, self._edge_count, 2 * self._edge_count)
+
+    def _node_payload(self, person_id):
+        attrs = self._people[person_id]
+        degree = len(self._adjacency.get(person_id, ()))
+        node = dict(attrs)
+        node['expertise'] = list(attrs['expertise'])
+        node['degree'] = degree
+        node['total_projects'] = len(self._person_projects.get(person_id, ()))
+        node['community'] = self._communities.get(person_id, 0)
+        node['size'] = node_size(degree)
+        return node
+
+    def snapshot(self, include_isolated=False):
+        """Materialize the ``nodes/edges/statistics`` payload for the API."""
+        with self._lock:
+            nodes = [
+                self._node_payload(person_id)
+                for person_id in self._people
+                if include_isolated or self._adjacency.get(person_id)
+            ]
+
+            edges = [
+                {'source': person_1, 'target': person_2, 'weight': weight}
+                for person_1, person_2, weight in self.edge_list()
+            ]
+
+            return {
+                'nodes': nodes,
+                'edges': edges,
+                'statistics': self.statistics(include_isolated)
+            }
+
+    def slice(self, institution_id=None, department_id=None, main_field=None, tag=None,
+              start_year=None, end_year=None, include_isolated=False):
+        """The ``snapshot`` payload restricted to a filtered subnetwork.
+
+        Researcher filters (institution, department, main field) intersect
+        the attribute indexes and keep the edges between the survivors.
+        Project filters (tag, year window) instead rebuild the edges from
+        the qualifying projects only, counting a researcher on a project
+        when their WorkedOn dates overlap the window; edge weights are then
+        the number of qualifying shared projects. Communities come from the
+        full graph; degree, size and the statistics describe the slice.
+        """
+        with self._lock:
+            people = self._filter_people(institution_id, department_id, main_field)
+
+            if tag is not None or start_year is not None or end_year is not None:
+                if tag is not None:
+                    projects = self._tag_index.get(tag.strip().lower(), ())
+                else:
+                    projects = self._projects.keys()
+                weights = Counter()
+                project_counts = Counter()
+                for project_id in projects:
+                    members = sorted(
+                        person_id for person_id in self._projects.get(project_id, ())
+                        if person_id in people
+                        and self._in_window(person_id, project_id, start_year, end_year)
+                    )
+                    for i, person_1 in enumerate(members):
+                        project_counts[person_1] += 1
+                        for person_2 in members[i + 1:]:
+                            weights[(person_1, person_2)] += 1
+                members = set(project_counts)
+            else:
+                members = people
+                weights = {
+                    (person_1, person_2): weight
+                    for person_1 in members
+                    for person_2, weight in self._adjacency.get(person_1, {}).items()
+                    if person_1 < person_2 and person_2 in members
+                }
+                project_counts = None
+
+            degree = Counter()
+            for person_1, person_2 in weights:
+                degree[person_1] += 1
+                degree[person_2] += 1
+
+            nodes = []
+            for person_id in sorted(members):
+                if not include_isolated and not degree[person_id]:
+                    continue
+                node = self._node_payload(person_id)
+                node['degree'] = degree[person_id]
+                node['size'] = node_size(degree[person_id])
+                if project_counts is not None:
+                    node['total_projects'] = project_counts[person_id]
+                nodes.append(node)
+
+            edges = [
+                {'source': person_1, 'target': person_2, 'weight': weight}
+                for (person_1, person_2), weight in weights.items()
+            ]
+
+            return {
+                'nodes': nodes,
+                'edges': edges,
+                'statistics': network_statistics(len(nodes), len(edges), 2 * len(edges))
+            }
+
+    def _filter_people(self, institution_id, department_id, main_field):
+        """People matching every given attribute, smallest index first."""
+        candidates = []
+        if institution_id is not None:
+            candidates.append(self._institution_index.get(institution_id, set()))
+        if department_id is not None:
+            candidates.append(self._department_index.get(department_id, set()))
+        if main_field is not None:
+            candidates.append(self._field_index.get(main_field.strip().lower(), set()))
+        if not candidates:
+            return self._people.keys()
+        candidates.sort(key=len)
+        people = set(candidates[0])
+        for other in candidates[1:]:
+            people &= other
+        return people
+
+    def _in_window(self, person_id, project_id, start_year, end_year):
+        """Whether a WorkedOn row overlaps ``[start_year, end_year]``.
+
+        Missing dates are treated as open-ended, like an ongoing project.
+        """
+        first, last = self._membership_dates.get((person_id, project_id), (None, None))
+        if end_year is not None and first is not None and first.year > end_year:
+            return False
+        if start_year is not None and last is not None and last.year < start_year:
+            return False
+        return True
+
+    def ego_network(self, person_id, depth=1, limit=200):
+        """Induced subgraph within ``depth`` hops of a researcher.
+
+        Breadth-first from ``person_id``, visiting the strongest ties of each
+        node first and stopping once ``limit`` nodes are collected, so the
+        work depends on the neighbourhood and not on the size of the graph.
+        Returns None for an unknown person. Node attributes are the same as
+        in ``snapshot`` (degree is the full-graph degree) plus ``hops``.
+        """
+        with self._lock:
+            if person_id not in self._people:
+                return None
+
+            hops = {person_id: 0}
+            frontier = [person_id]
+            for level in range(1, depth + 1):
+                next_frontier = []
+                for current in frontier:
+                    neighbours = self._adjacency.get(current, {})
+                    for other in sorted(neighbours, key=neighbours.get, reverse=True):
+                        if len(hops) >= limit:
+                            break
+                        if other not in hops:
+                            hops[other] = level
+                            next_frontier.append(other)
+                if not next_frontier or len(hops) >= limit:
+                    break
+                frontier = next_frontier
+
+            nodes = []
+            for node_id, distance in hops.items():
+                node = self._node_payload(node_id)
+                node['hops'] = distance
+                nodes.append(node)
+
+            edges = [
+                {'source': node_id, 'target': other, 'weight': weight}
+                for node_id in hops
+                for other, weight in self._adjacency.get(node_id, {}).items()
+                if node_id < other and other in hops
+            ]
+
+            return {
+                'center': person_id,
+                'depth': depth,
+                'truncated': len(hops) >= limit,
+                'nodes': nodes,
+                'edges': edges,
+                'statistics': network_statistics(len(nodes), len(edges), 2 * len(edges))
+            }
+
+    def shortest_path(self, source, target, max_depth=6, weighted=False):
+        """Shortest collaboration chain between two researchers.
+
+        Unweighted mode is a bidirectional BFS that always grows the smaller
+        frontier. Weighted mode is a Dijkstra search where an edge costs
+        1 / weight, so repeated collaborators are preferred over one-off
+        ties. Both stop after ``max_depth`` hops. Returns the list of person
+        ids from source to target, or None when the people are unknown or
+        not connected within the cutoff.
+        """
+        with self._lock:
+            if source not in self._people or target not in self._people:
+                return None
+            if source == target:
+                return [source]
+            if weighted:
+                return self._weighted_path(source, target, max_depth)
+
+            parents = ({source: None}, {target: None})
+            frontiers = ([source], [target])
+            for _ in range(max_depth):
+                if not frontiers[0] or not frontiers[1]:
+                    return None
+                side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+                seen, other_seen = parents[side], parents[1 - side]
+                next_frontier = []
+                for current in frontiers[side]:
+                    for neighbour in self._adjacency.get(current, ()):
+                        if neighbour in seen:
+                            continue
+                        seen[neighbour] = current
+                        if neighbour in other_seen:
+                            return self._join_paths(parents, neighbour)
+                        next_frontier.append(neighbour)
+                frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+            return None
+
+    @staticmethod
+    def _join_paths(parents, meeting):
+        forward, backward = parents
+        path = []
+        node = meeting
+        while node is not None:
+            path.append(node)
+            node = forward[node]
+        path.reverse()
+        node = backward[meeting]
+        while node is not None:
+            path.append(node)
+            node = backward[node]
+        return path
+
+    def _weighted_path(self, source, target, max_depth):
+        # States are (person, hops): a cheaper route that uses more hops must
+        # not hide a dearer one that still fits under max_depth
+        best = {(source, 0): 0.0}
+        parents = {(source, 0): None}
+        # Fewest hops each person was expanded with; states are popped in
+        # cost order, so a later one with as many hops or more is dominated
+        expanded = {}
+        queue = [(0.0, 0, source)]
+        while queue:
+            cost, hops, current = heapq.heappop(queue)
+            if current == target:
+                path = []
+                state = (current, hops)
+                while state is not None:
+                    path.append(state[0])
+                    state = parents[state]
+                return path[::-1]
+            if hops >= max_depth or hops >= expanded.get(current, max_depth):
+                continue
+            expanded[current] = hops
+            for neighbour, weight in self._adjacency.get(current, {}).items():
+                next_cost = cost + 1.0 / weight
+                state = (neighbour, hops + 1)
+                if next_cost < best.get(state, float('inf')):
+                    best[state] = next_cost
+                    parents[state] = (current, hops)
+                    heapq.heappush(queue, (next_cost, hops + 1, neighbour))
+        return None
+
+    def path_details(self, path):
+        """Node payloads, and per hop the edge weight and shared project ids."""
+        with self._lock:
+            hops = []
+            for person_1, person_2 in zip(path, path[1:]):
+                hops.append({
+                    'source': person_1,
+                    'target': person_2,
+                    'weight': self._adjacency[person_1].get(person_2, 0),
+                    'shared_project_ids': sorted(
+                        self._person_projects.get(person_1, set()) & self._person_projects.get(person_2, set())
+                    )
+                })
+            return [self._node_payload(person_id) for person_id in path], hops
+
+
+# Shared instance used by the analytics blueprint and the write routes
+collab_graph = CollaborationGraph()
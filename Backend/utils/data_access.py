@@ -0,0 +1,198 @@
+"""
+Read/write routing and transactions for route handlers.
+
+Routes declare what they do instead of wrapping each SELECT in
+``START TRANSACTION`` ... ``commit()``:
+
+- ``@reads`` runs the handler's queries either in autocommit (one round
+  trip per statement, no snapshot held between them) or inside
+  ``START TRANSACTION READ ONLY`` (one consistent snapshot, no write
+  bookkeeping in InnoDB). ``read_mode`` in ``[DataAccess]`` chooses. The
+  connection comes from the replica pool when a ``[Replica]`` is
+  configured. ``@reads(primary=True)`` keeps the view on the primary:
+  views that (re)load an in-memory index shared by later requests use it,
+  since an index built from a lagging replica would miss writes until its
+  next full rebuild.
+- ``@writes`` always uses the primary. The handler still commits itself,
+  because the in-memory indexes (graph, facets, autocomplete) must be
+  updated after the commit. After a successful write the caller's reads
+  stay on the primary for ``sticky_seconds``, so the caller reads its own
+  writes while the replica catches up. Callers are told apart by the JWT
+  user id, or by address when there is none. With ``[SharedCache] url``
+  set the deadlines are kept in the shared store and hold on every
+  worker; otherwise they are per process, and a read served by another
+  worker may still come from a lagging replica.
+
+Both set the session isolation level of the connection they use
+(``read_isolation`` / ``write_isolation``), once per pooled connection
+while it stays the same. If the replica cannot be reached, reads fall
+back to the primary.
+"""
+
+import configparser
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import g, make_response, request
+from utils.jwt_utils import decode_access_token
+from utils.logger import log_error
+from utils.shared_cache import shared_cache
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+ISOLATION_LEVELS = ('READ UNCOMMITTED', 'READ COMMITTED', 'REPEATABLE READ', 'SERIALIZABLE')
+READ_MODES = ('autocommit', 'read_only')
+
+
+def _isolation(option, fallback):
+    level = config.get("DataAccess", option, fallback=fallback).strip().upper()
+    if level not in ISOLATION_LEVELS:
+        log_error(f"Unknown {option} '{level}' in config.ini, using {fallback}")
+        return fallback
+    return level
+
+
+READ_MODE = config.get("DataAccess", "read_mode", fallback="autocommit").strip().lower()
+if READ_MODE not in READ_MODES:
+    log_error(f"Unknown read_mode '{READ_MODE}' in config.ini, using autocommit")
+    READ_MODE = "autocommit"
+READ_ISOLATION = _isolation("read_isolation", "READ COMMITTED")
+WRITE_ISOLATION = _isolation("write_isolation", "REPEATABLE READ")
+STICKY_SECONDS = config.getfloat("DataAccess", "sticky_seconds", fallback=5.0)
+
+
+class Stickiness:
+    """Callers whose reads stay on the primary until a deadline.
+
+    Deadlines are kept in this process and, when ``shared`` is enabled, as
+    ``sticky:<caller>`` keys expiring in the shared store, so a write
+    handled by one worker makes the caller sticky on all of them. If the
+    store cannot be reached only this worker's own deadlines count.
+    """
+
+    def __init__(self, seconds=STICKY_SECONDS, shared=None):
+        self.seconds = seconds
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._until = {}
+
+    def _shared_key(self, caller):
+        if self.shared is None or not self.shared.enabled:
+            return None
+        return self.shared.key("sticky", caller)
+
+    def mark(self, caller):
+        now = time.monotonic()
+        with self._lock:
+            self._until[caller] = now + self.seconds
+            # Forget expired callers now and then so the map stays small
+            if len(self._until) > 1024:
+                self._until = {c: t for c, t in self._until.items() if t > now}
+        key = self._shared_key(caller)
+        if key is not None:
+            # The store expires keys in whole seconds; round up, never down
+            self.shared.set(key, 1, ttl=math.ceil(self.seconds))
+
+    def active(self, caller):
+        with self._lock:
+            until = self._until.get(caller)
+        if until is not None and until > time.monotonic():
+            return True
+        key = self._shared_key(caller)
+        if key is None:
+            return False
+        values = self.shared.get_many([key])
+        return bool(values) and values[0] is not None
+
+
+sticky = Stickiness(shared=shared_cache)
+
+
+def identity_from(authorization, remote_addr):
+    """The JWT user id in an Authorization header, or the client address."""
+    if authorization and authorization.startswith('Bearer '):
+        payload = decode_access_token(authorization[7:])
+        if payload and payload.get('user_id') is not None:
+            return f"user:{payload['user_id']}"
+    return f"addr:{remote_addr}"
+
+
+def caller_identity():
+    """Identity of the current Flask request for read-your-writes stickiness."""
+    return identity_from(request.headers.get('Authorization', ''), request.remote_addr)
+
+
+def set_isolation(conn, level):
+    """Set the session isolation level unless this connection already has it."""
+    if getattr(conn, '_collab_isolation', None) == level:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SET SESSION TRANSACTION ISOLATION LEVEL {level}")
+    finally:
+        cursor.close()
+    conn._collab_isolation = level
+
+
+def _read_connection(mysql, primary=False):
+    """The replica connection for this request unless the caller is sticky or it is unreachable."""
+    g._db_replica = not primary and mysql.replica_pool is not None and not sticky.active(caller_identity())
+    if g._db_replica:
+        try:
+            return mysql.connection
+        except Exception as e:
+            log_error(f"Replica unavailable, reading from the primary: {str(e)}")
+            g._db_replica = False
+    return mysql.connection
+
+
+def reads(view=None, *, primary=False):
+    """Run a read-only handler in autocommit or a READ ONLY transaction, on the replica if any.
+
+    Use as ``@reads``, or ``@reads(primary=True)`` to never use the replica.
+    """
+    if view is None:
+        return lambda view: reads(view, primary=primary)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from app import mysql
+        conn = _read_connection(mysql, primary)
+        set_isolation(conn, READ_ISOLATION)
+        if READ_MODE == 'read_only':
+            cursor = conn.cursor()
+            cursor.execute("START TRANSACTION READ ONLY")
+            cursor.close()
+        else:
+            conn.autocommit(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            try:
+                if READ_MODE == 'read_only':
+                    conn.commit()
+                else:
+                    conn.autocommit(False)
+            except Exception as e:
+                log_error(f"Could not end read on {request.endpoint}: {str(e)}")
+    return wrapper
+
+
+def writes(view):
+    """Run a writing handler on the primary; successful writes make the caller's reads sticky."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from app import mysql
+        g._db_replica = False
+        set_isolation(mysql.connection, WRITE_ISOLATION)
+        response = make_response(view(*args, **kwargs))
+        if response.status_code < 400:
+            sticky.mark(caller_identity())
+        else:
+            # Nothing a failed request left uncommitted should survive it
+            mysql.connection.rollback()
+        return response
+    return wrapper
@@ -0,0 +1,172 @@
+"""
+Per-table data versions and conditional GET.
+
+Every table has a version counter and a last-modified time. The app bumps
+them after each successful write request, using the tables that
+blueprint's routes (and the procedures they call) write to (WRITES). GET
+endpoints decorated with ``conditional(...)`` derive an ETag and a
+Last-Modified header from the versions of the tables they read. A request
+whose ``If-None-Match`` (or, without one, ``If-Modified-Since``) still
+matches is answered ``304 Not Modified`` before the view runs, so it costs
+no query and no serialization.
+
+Validators are taken before the view runs. A write that lands while the
+query is in flight therefore yields a response tagged with the older
+version, and the next poll fetches again instead of missing the change.
+
+Versions live in this process and start over on restart. The process's
+start time is part of every ETag, so tags from before a restart never
+match. With ``[SharedCache]`` configured, the counters and that start
+time (an epoch set once per store) come from the shared store instead:
+every bump is published, so all workers hand out the same validators and
+a 304 from any of them reflects writes handled by the others. Rows
+changed outside the API are not seen.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+from utils.shared_cache import shared_cache
+
+# Blueprint -> tables its POST/PUT/PATCH/DELETE routes write
+WRITES = {
+    'person': ('Person', 'Department', 'Institution', 'User', 'WorkedOn'),
+    'user': ('User', 'Person', 'Department', 'Institution', 'Project', 'Project_Tag', 'WorkedOn'),
+    'project': ('Project', 'Project_Tag', 'WorkedOn'),
+    'project_tag': ('Project_Tag', 'Project', 'Tag'),
+    'tags': ('Tag', 'Project_Tag', 'Project'),
+    'department': ('Department', 'Person'),
+    'institution': ('Institution', 'Department'),
+}
+
+_WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+_TABLES = sorted({table for tables in WRITES.values() for table in tables})
+
+
+class DataVersions:
+    """Version counter and last-modified second per table."""
+
+    def __init__(self, shared=None):
+        self._lock = threading.Lock()
+        self.started = int(time.time())
+        self._versions = {}
+        self._modified = {}
+        # utils/shared_cache.py store and channel, if enabled
+        self.shared = shared
+
+    def _sharing(self):
+        return self.shared is not None and self.shared.enabled
+
+    def bump(self, *tables):
+        counters = None
+        if self._sharing():
+            counters = self.shared.incr_many([self.shared.key("version", t) for t in tables])
+        changes = {}
+        with self._lock:
+            for i, table in enumerate(tables):
+                version = self._versions.get(table, 0) + 1
+                self._versions[table] = max(version, counters[i]) if counters else version
+                # Whole seconds that always move forward, so If-Modified-Since
+                # cannot match across two writes in the same second
+                self._modified[table] = max(int(time.time()), self._modified.get(table, self.started) + 1)
+                changes[table] = [self._versions[table], self._modified[table]]
+        if counters is not None:
+            for table, (_, modified) in changes.items():
+                self.shared.set(self.shared.key("modified", table), modified)
+            self.shared.publish("versions", versions=changes)
+
+    def merge(self, versions):
+        """Adopt newer ``{table: [version, modified]}`` published by another worker."""
+        with self._lock:
+            for table, (version, modified) in versions.items():
+                self._versions[table] = max(self._versions.get(table, 0), int(version))
+                self._modified[table] = max(self._modified.get(table, self.started), int(modified))
+
+    def pull(self):
+        """Adopt the shared epoch and counters, e.g. after (re)joining the channel."""
+        if not self._sharing():
+            return
+        epoch = self.shared.key("version", "epoch")
+        self.shared.set(epoch, int(time.time()), only_if_missing=True)
+        values = self.shared.get_many([epoch] + [self.shared.key("version", t) for t in _TABLES]
+                                      + [self.shared.key("modified", t) for t in _TABLES])
+        if values is None or values[0] is None:
+            return
+        count = len(_TABLES)
+        with self._lock:
+            self.started = int(values[0])
+            for table, version, modified in zip(_TABLES, values[1:count + 1], values[count + 1:]):
+                if version is not None:
+                    self._versions[table] = max(self._versions.get(table, 0), int(version))
+                if modified is not None:
+                    self._modified[table] = max(self._modified.get(table, self.started), int(modified))
+
+    def version(self, table):
+        with self._lock:
+            return self._versions.get(table, 0)
+
+    def validators(self, tables, variant='', extra=()):
+        """``(etag, last_modified)`` for a response built from ``tables``.
+
+        ``variant`` separates responses that differ by query string; ``extra``
+        mixes in other versions the response depends on.
+        """
+        with self._lock:
+            versions = [(t, self._versions.get(t, 0)) for t in tables]
+            modified = max([self._modified.get(t, self.started) for t in tables] or [self.started])
+        raw = repr((self.started, versions, variant, extra)).encode()
+        return hashlib.sha1(raw).hexdigest()[:20], datetime.fromtimestamp(modified, timezone.utc)
+
+    def after_write(self, response):
+        """``after_request`` hook: bump what a successful write request touched."""
+        if request.method in _WRITE_METHODS and response.status_code < 400:
+            tables = WRITES.get(request.blueprint)
+            if tables:
+                self.bump(*tables)
+        return response
+
+
+def not_modified(req, etag, last_modified):
+    """Whether ``req`` already holds the representation behind these validators."""
+    if req.if_none_match:
+        return req.if_none_match.contains_weak(etag)
+    return req.if_modified_since is not None and last_modified <= req.if_modified_since
+
+
+def conditional(*tables, extra=None):
+    """Decorator adding ETag/Last-Modified to a GET view and answering 304s.
+
+    ``extra`` is called per request for further version state (e.g. the
+    collaboration graph's version); returning None serves the request
+    without validators.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            more = extra() if extra else ()
+            if more is None:
+                return view(*args, **kwargs)
+            etag, last_modified = data_versions.validators(tables, request.full_path, more)
+            if not_modified(request, etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            # Cacheable, but clients must revalidate before reuse
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+# Shared by every blueprint
+data_versions = DataVersions(shared=shared_cache)
+shared_cache.on("versions", lambda message: data_versions.merge(message.get('versions', {})))
+shared_cache.on("reset", lambda message: data_versions.pull())
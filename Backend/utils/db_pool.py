@@ -0,0 +1,334 @@
+"""
+Bounded MySQL connection pool behind the usual ``mysql.connection``.
+
+``flask_mysqldb.MySQL`` opened a new connection for every application
+context and closed it at teardown. Every request therefore paid the TCP
+and auth handshake, and a burst of requests opened as many connections
+as there were threads, up to MySQL's ``max_connections``. PooledMySQL
+keeps the same interface instead: routes still write
+``mysql.connection.cursor()``. The first access in an app context checks
+a connection out of a ConnectionPool, and teardown puts it back.
+
+The pool:
+
+- holds between ``min_size`` and ``max_size`` connections. Checkouts wait
+  up to ``checkout_timeout`` seconds for one to be returned, then raise
+  PoolTimeout;
+- closes idle connections after ``idle_timeout`` seconds, down to
+  ``min_size``;
+- pings a connection on checkout when it has been idle for more than
+  ``validate_after`` seconds. A dead one is replaced transparently;
+- rolls back whatever a request left open before reuse, so a handler
+  that skipped ``rollback()`` or ``cursor.close()`` on its error path
+  cannot hand a half-finished transaction to the next request;
+- logs connections held longer than ``leak_seconds``, naming the route
+  (Flask endpoint) that checked them out.
+
+``stats()`` reports size, in-use count, wait times, timeouts and leaks.
+It is served at ``/health/pool``.
+"""
+
+import configparser
+import threading
+import time
+
+import MySQLdb
+import MySQLdb.connections
+import MySQLdb.cursors
+from flask import g, has_request_context, request
+from utils.logger import log_info, log_error
+from utils.query_cache import InvalidatingConnectionMixin, caching_cursor
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+POOL_MIN_SIZE = config.getint("DatabasePool", "pool_min_size", fallback=2)
+POOL_MAX_SIZE = config.getint("DatabasePool", "pool_max_size", fallback=10)
+CHECKOUT_TIMEOUT = config.getfloat("DatabasePool", "checkout_timeout", fallback=5.0)
+IDLE_TIMEOUT = config.getfloat("DatabasePool", "idle_timeout", fallback=300.0)
+VALIDATE_AFTER = config.getfloat("DatabasePool", "validate_after", fallback=10.0)
+LEAK_SECONDS = config.getfloat("DatabasePool", "leak_seconds", fallback=60.0)
+MAINTENANCE_SECONDS = config.getfloat("DatabasePool", "maintenance_seconds", fallback=15.0)
+
+
+class PoolTimeout(Exception):
+    """No connection became free within ``checkout_timeout``."""
+
+
+class ConnectionPool:
+    """Thread-safe pool of connections made by ``connect()``."""
+
+    def __init__(self, connect, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 checkout_timeout=CHECKOUT_TIMEOUT, idle_timeout=IDLE_TIMEOUT,
+                 validate_after=VALIDATE_AFTER, leak_seconds=LEAK_SECONDS):
+        self._connect = connect
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.validate_after = validate_after
+        self.leak_seconds = leak_seconds
+        self._cond = threading.Condition()
+        # (connection, returned_at); the most recently returned is reused first
+        self._idle = []
+        # id(connection) -> [connection, owner, checked_out_at, reported]
+        self._in_use = {}
+        # Open connections plus slots reserved by checkouts still connecting
+        self._size = 0
+        self._stats = {
+            'checkouts': 0, 'waits': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0,
+            'timeouts': 0, 'created': 0, 'closed': 0, 'failed_pings': 0, 'leaks': 0
+        }
+        self._timer = None
+
+    def acquire(self, owner=None):
+        """Check a connection out; raises PoolTimeout when the pool stays full."""
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        waited = False
+        with self._cond:
+            while True:
+                conn, returned_at = self._take_idle()
+                if conn is not None or self._size < self.max_size:
+                    if conn is None:
+                        self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"No database connection free within {self.checkout_timeout}s "
+                                      f"({len(self._in_use)} in use)")
+                waited = True
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and time.monotonic() - returned_at > self.validate_after and not self._alive(conn):
+                self._close(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+                self._count('created')
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        wait = time.monotonic() - start
+        with self._cond:
+            self._in_use[id(conn)] = [conn, owner, time.monotonic(), False]
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+            self._stats['wait_seconds'] += wait
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], wait)
+        return conn
+
+    def release(self, conn):
+        """Return a connection, rolling back anything left open; broken ones are closed."""
+        try:
+            conn.rollback()
+            healthy = True
+        except Exception as e:
+            log_error(f"Discarding pooled connection that failed to reset: {str(e)}")
+            healthy = False
+        if not healthy:
+            self._close(conn)
+        with self._cond:
+            self._in_use.pop(id(conn), None)
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+    def _take_idle(self):
+        """Most recently returned idle connection still inside idle_timeout (lock held)."""
+        now = time.monotonic()
+        while self._idle:
+            conn, returned_at = self._idle.pop()
+            if now - returned_at <= self.idle_timeout:
+                return conn, returned_at
+            self._size -= 1
+            self._close(conn)
+        return None, None
+
+    def _alive(self, conn):
+        try:
+            conn.ping()
+            return True
+        except Exception:
+            self._count('failed_pings')
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._count('closed')
+
+    def _count(self, name):
+        with self._cond:
+            self._stats[name] += 1
+
+    def maintain(self):
+        """Close expired idle connections, refill to min_size and report leaks."""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            # Oldest first; keep min_size connections open
+            while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+                expired.append(self._idle.pop(0)[0])
+                self._size -= 1
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+            leaks = []
+            for entry in self._in_use.values():
+                held = now - entry[2]
+                if held > self.leak_seconds and not entry[3]:
+                    entry[3] = True
+                    self._stats['leaks'] += 1
+                    leaks.append((entry[1], held))
+        for conn in expired:
+            self._close(conn)
+        for owner, held in leaks:
+            log_error(f"Database connection held for {held:.0f}s by {owner or 'unknown'}; possible leak")
+        for _ in range(missing):
+            try:
+                conn = self._connect()
+                self._count('created')
+            except Exception as e:
+                log_error(f"Could not open pooled database connection: {str(e)}")
+                with self._cond:
+                    self._size -= 1
+                continue
+            with self._cond:
+                self._idle.insert(0, (conn, time.monotonic()))
+                self._cond.notify()
+
+    def start_maintenance(self, interval=MAINTENANCE_SECONDS):
+        """Run ``maintain()`` now and then every ``interval`` seconds on a daemon timer."""
+        def run():
+            try:
+                self.maintain()
+            except Exception as e:
+                log_error(f"Connection pool maintenance failed: {str(e)}")
+            self._timer = threading.Timer(interval, run)
+            self._timer.daemon = True
+            self._timer.start()
+
+        self._timer = threading.Timer(0, run)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def close(self):
+        """Stop maintenance and close idle connections (checked-out ones close on release)."""
+        if self._timer is not None:
+            self._timer.cancel()
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                size=self._size,
+                in_use=len(self._in_use),
+                idle=len(self._idle),
+                min_size=self.min_size,
+                max_size=self.max_size,
+                holders=sorted(
+                    ({'route': owner, 'seconds': round(now - since, 3)} for _, owner, since, _ in self._in_use.values()),
+                    key=lambda holder: -holder['seconds']
+                )
+            )
+        stats['avg_wait_ms'] = round(1000 * stats['wait_seconds'] / stats['checkouts'], 3) if stats['checkouts'] else 0.0
+        stats['max_wait_ms'] = round(1000 * stats.pop('max_wait_seconds'), 3)
+        stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+        return stats
+
+
+class CachingConnection(InvalidatingConnectionMixin, MySQLdb.connections.Connection):
+    """MySQLdb connection that invalidates utils/query_cache.py entries on commit."""
+
+
+class PooledMySQL:
+    """Drop-in for ``flask_mysqldb.MySQL`` that borrows connections from a pool.
+
+    Reads the same ``MYSQL_*`` settings from ``app.config``. When
+    ``MYSQL_REPLICA_HOST`` is set, a second pool serves the requests that
+    utils/data_access.py routes to the replica (``g._db_replica``). Replica
+    settings that are not given are taken from the primary's. Connections
+    and cursors go through utils/query_cache.py.
+    """
+
+    def __init__(self, app=None, **pool_options):
+        self.pool = None
+        self.replica_pool = None
+        self._pool_options = pool_options
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.pool = ConnectionPool(self._connector(app.config, "MYSQL_"), **self._pool_options)
+        if app.config.get("MYSQL_REPLICA_HOST"):
+            self.replica_pool = ConnectionPool(self._connector(app.config, "MYSQL_REPLICA_"), **self._pool_options)
+        app.teardown_appcontext(self.teardown)
+        if not app.config.get("TESTING"):
+            for pool in self._pools():
+                pool.start_maintenance()
+        log_info(f"Database connection pool ready - min: {self.pool.min_size}, max: {self.pool.max_size}, "
+                 f"replica: {self.replica_pool is not None}")
+
+    @staticmethod
+    def _connector(settings, prefix):
+        def setting(name, default=None):
+            return settings.get(prefix + name) or settings.get("MYSQL_" + name, default)
+
+        def connect():
+            kwargs = {
+                'host': setting("HOST", "localhost"),
+                'port': int(setting("PORT", 3306)),
+                'user': setting("USER"),
+                'passwd': setting("PASSWORD", ""),
+                'db': setting("DB"),
+            }
+            cursorclass = setting("CURSORCLASS")
+            kwargs['cursorclass'] = caching_cursor(getattr(MySQLdb.cursors, cursorclass or "Cursor"))
+            conn = CachingConnection(**kwargs)
+            conn._collab_replica = prefix != "MYSQL_"
+            return conn
+        return connect
+
+    def _pools(self):
+        return [pool for pool in (self.pool, self.replica_pool) if pool is not None]
+
+    @property
+    def connection(self):
+        """This app context's connection, checked out on first use."""
+        if g.get('_db_replica') and self.replica_pool is not None:
+            key, pool = '_pooled_mysql_replica', self.replica_pool
+        else:
+            key, pool = '_pooled_mysql', self.pool
+        conn = g.get(key)
+        if conn is None:
+            owner = request.endpoint if has_request_context() else 'app context'
+            conn = pool.acquire(owner)
+            setattr(g, key, conn)
+        return conn
+
+    def stats(self):
+        stats = self.pool.stats()
+        stats['replica'] = self.replica_pool.stats() if self.replica_pool is not None else None
+        return stats
+
+    def teardown(self, exception):
+        for key, pool in (('_pooled_mysql', self.pool), ('_pooled_mysql_replica', self.replica_pool)):
+            conn = g.pop(key, None)
+            if conn is not None:
+                pool.release(conn)
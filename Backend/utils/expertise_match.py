@@ -0,0 +1,422 @@
+"""
+Expertise matching: rank researchers against a free-text project description.
+
+Every researcher is a document made of their expertise, main field, bio and
+the titles/descriptions of their WorkedOn projects, with the fields
+weighted by how much they say about what the person does. Documents become
+TF-IDF vectors (sublinear term frequency, smoothed IDF, unit length) and,
+when the vocabulary is larger than ``dimensions``, are projected onto the
+top singular vectors of the TF-IDF matrix (LSA), which also lets "neural
+nets" match "deep learning" through co-occurring terms. Scores are cosine
+similarities, computed as one matrix product per block of researchers with
+argpartition picking the top k per query.
+
+A build freezes the vocabulary, IDF and projection and writes them with the
+vectors to ``<directory>/build-<timestamp>/`` as .npy files; CURRENT names
+the live build. Workers memory-map the live build, so they start without
+recomputing and share the pages, and pick up a newer build when CURRENT
+changes. Edits between builds are applied in memory: changed researchers
+are re-embedded with the frozen model and override their stored rows
+(terms the model has not seen are ignored until the next build).
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+import scipy.sparse as sp
+
+FIELD_WEIGHTS = {
+    'expertise': 3.0,
+    'main_field': 2.0,
+    'project_title': 1.5,
+    'bio': 1.0,
+    'project_description': 1.0
+}
+
+STOPWORDS = frozenset("""
+    a about above after again all also an and any are as at be because been before being between both but by
+    can could did do does doing down during each few for from further had has have having he her here hers
+    him his how i if in into is it its itself just me more most my no nor not now of off on once only or
+    other our ours out over own same she should so some such than that the their theirs them then there
+    these they this those through to too under until up very was we were what when where which while who
+    whom why will with would you your yours using use used based new work works working research project
+    projects study studies
+""".split())
+
+BLOCK_ROWS = 65536
+KEEP_BUILDS = 2
+
+_WORD = re.compile(r"[a-z][a-z0-9]+")
+
+
+def _stem(word):
+    """Fold simple plurals so 'systems' and 'system' are one term."""
+    if len(word) > 4 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    return [_stem(word) for word in _WORD.findall((text or '').lower()) if word not in STOPWORDS]
+
+
+def document_terms(document):
+    """Weighted term counts for a researcher or query document.
+
+    ``document`` has any of ``bio``, ``main_field``, ``expertise`` (list of
+    strings) and ``projects`` (list of ``(title, description)``).
+    """
+    counts = Counter()
+    fields = [
+        ('bio', document.get('bio')),
+        ('main_field', document.get('main_field')),
+        ('expertise', ' '.join(e for e in document.get('expertise') or () if e))
+    ]
+    for title, description in document.get('projects') or ():
+        fields.append(('project_title', title))
+        fields.append(('project_description', description))
+    for field, text in fields:
+        weight = FIELD_WEIGHTS[field]
+        for term in tokenize(text):
+            counts[term] += weight
+    return counts
+
+
+def query_document(title, description):
+    """A project description as a document, scored like a researcher's projects."""
+    return {'projects': [(title, description)]}
+
+
+def randomized_svd_components(matrix, k, n_iter=2, oversample=10, seed=0):
+    """Top-``k`` right singular vectors (``k x columns``) of a sparse matrix."""
+    rng = np.random.default_rng(seed)
+    sample = matrix @ rng.standard_normal((matrix.shape[1], k + oversample))
+    basis, _ = np.linalg.qr(sample)
+    for _ in range(n_iter):
+        basis, _ = np.linalg.qr(matrix.T @ basis)
+        basis, _ = np.linalg.qr(matrix @ basis)
+    small = (matrix.T @ basis).T
+    _, _, components = np.linalg.svd(small, full_matrices=False)
+    return components[:k]
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+class ExpertiseModel:
+    """Frozen vocabulary, IDF weights and (optional) LSA projection."""
+
+    def __init__(self, terms, idf, projection=None):
+        self.terms = list(terms)
+        self.term_index = {term: i for i, term in enumerate(self.terms)}
+        self.idf = np.asarray(idf, dtype=np.float32)
+        # vocabulary x dimensions; None keeps the plain TF-IDF space
+        self.projection = projection
+
+    @property
+    def dimensions(self):
+        return len(self.terms) if self.projection is None else self.projection.shape[1]
+
+    @classmethod
+    def fit(cls, term_counts, dimensions=128, min_df=1, max_df_ratio=0.5, seed=0):
+        """Learn the model from every researcher's term counts.
+
+        Returns the model and the TF-IDF matrix of ``term_counts``, so the
+        caller can project it without recomputing.
+        """
+        n = len(term_counts)
+        df = Counter()
+        for counts in term_counts:
+            df.update(counts.keys())
+        # Very common terms only separate researchers once there are enough of them
+        max_df = max_df_ratio * n if n >= 20 else n
+        terms = sorted(term for term, count in df.items() if min_df <= count <= max_df)
+        idf = np.array([math.log((1 + n) / (1 + df[term])) + 1 for term in terms], dtype=np.float32)
+        model = cls(terms, idf)
+        tfidf = model.tfidf(term_counts)
+        if len(terms) > dimensions and n > dimensions:
+            components = randomized_svd_components(tfidf, dimensions, seed=seed)
+            model.projection = np.ascontiguousarray(components.T, dtype=np.float32)
+        return model, tfidf
+
+    def tfidf(self, term_counts):
+        """Unit-length TF-IDF rows (CSR) over the frozen vocabulary."""
+        index = self.term_index
+        indptr, cols, counts = [0], [], []
+        for document in term_counts:
+            for term, count in document.items():
+                col = index.get(term)
+                if col is not None:
+                    cols.append(col)
+                    counts.append(count)
+            indptr.append(len(cols))
+        cols = np.array(cols, dtype=np.int64)
+        # Field weights are >= 1, so every count is too
+        values = (1 + np.log(np.array(counts, dtype=np.float32))) * self.idf[cols]
+        matrix = sp.csr_matrix((values, cols, np.array(indptr)), shape=(len(term_counts), len(self.terms)))
+        matrix.sum_duplicates()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        return (sp.diags(1.0 / np.where(norms > 0, norms, 1.0)).astype(np.float32) @ matrix).tocsr()
+
+    def project(self, tfidf):
+        """Dense unit-length vectors for TF-IDF rows (float32)."""
+        dense = tfidf.toarray() if self.projection is None else tfidf @ self.projection
+        return _normalize_rows(np.asarray(dense, dtype=np.float32))
+
+    def embed(self, term_counts):
+        """Dense unit-length vectors (``len(term_counts) x dimensions``, float32)."""
+        return self.project(self.tfidf(term_counts))
+
+    def shared_terms(self, query_counts, person_counts, n=5):
+        """Terms contributing most to the TF-IDF overlap of two documents."""
+        vectors = self.tfidf([query_counts, person_counts])
+        overlap = vectors[0].multiply(vectors[1]).tocoo()
+        best = np.argsort(-overlap.data)[:n]
+        return [self.terms[overlap.col[i]] for i in best]
+
+    def save(self, directory):
+        with open(os.path.join(directory, 'terms.json'), 'w') as f:
+            json.dump(self.terms, f)
+        np.save(os.path.join(directory, 'idf.npy'), self.idf)
+        if self.projection is not None:
+            np.save(os.path.join(directory, 'projection.npy'), self.projection)
+
+    @classmethod
+    def open(cls, directory):
+        with open(os.path.join(directory, 'terms.json')) as f:
+            terms = json.load(f)
+        idf = np.load(os.path.join(directory, 'idf.npy'))
+        path = os.path.join(directory, 'projection.npy')
+        projection = np.load(path, mmap_mode='r') if os.path.exists(path) else None
+        return cls(terms, idf, projection)
+
+
+class ExpertiseIndex:
+    """Researcher vectors on disk plus in-memory edits since the last build."""
+
+    def __init__(self, directory, dimensions=128):
+        self.directory = directory
+        self.dimensions = dimensions
+        self._lock = threading.RLock()
+        self._stale_people = set()
+        self._stale_projects = set()
+        self._current = None
+        self._clear()
+
+    def _clear(self):
+        self.model = None
+        self.built_at = None
+        self._base_ids = np.zeros(0, dtype=np.int64)
+        self._base = np.zeros((0, 0), dtype=np.float32)
+        self._base_row = {}
+        self._masked = np.zeros(0, dtype=bool)
+        self._extra_ids = []
+        self._extra = np.zeros((0, 0), dtype=np.float32)
+        self._extra_row = {}
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    def __len__(self):
+        with self._lock:
+            return int((~self._masked).sum()) + len(self._extra_row)
+
+    # ------------------------------------------------------------------
+    # Builds on disk
+    # ------------------------------------------------------------------
+
+    def build(self, documents):
+        """Fit, embed and persist every researcher, then switch to the new build.
+
+        ``documents`` maps person_id to a document (see ``document_terms``).
+        """
+        person_ids = np.array(sorted(documents), dtype=np.int64)
+        term_counts = [document_terms(documents[person_id]) for person_id in person_ids.tolist()]
+        model, tfidf = ExpertiseModel.fit(term_counts, dimensions=self.dimensions)
+        vectors = model.project(tfidf)
+
+        built_at = datetime.now(timezone.utc)
+        name = 'build-' + built_at.strftime('%Y%m%dT%H%M%S%f')
+        path = os.path.join(self.directory, name)
+        os.makedirs(path)
+        model.save(path)
+        np.save(os.path.join(path, 'person_ids.npy'), person_ids)
+        np.save(os.path.join(path, 'vectors.npy'), vectors)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'built_at': built_at.isoformat(), 'people': len(person_ids),
+                       'terms': len(model.terms), 'dimensions': model.dimensions}, f)
+
+        pointer = os.path.join(self.directory, 'CURRENT')
+        with open(pointer + '.tmp', 'w') as f:
+            f.write(name)
+        os.replace(pointer + '.tmp', pointer)
+        self._prune(keep=name)
+        self.open()
+
+    def _prune(self, keep):
+        builds = sorted(d for d in os.listdir(self.directory) if d.startswith('build-'))
+        for name in builds[:-KEEP_BUILDS]:
+            if name != keep:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _pointer(self):
+        try:
+            with open(os.path.join(self.directory, 'CURRENT')) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def open(self):
+        """Memory-map the live build; returns False when none exists yet."""
+        name = self._pointer()
+        if name is None:
+            return False
+        path = os.path.join(self.directory, name)
+        model = ExpertiseModel.open(path)
+        base_ids = np.load(os.path.join(path, 'person_ids.npy'))
+        base = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        with self._lock:
+            self._clear()
+            self.model = model
+            self.built_at = meta['built_at']
+            self._base_ids = base_ids
+            self._base = base
+            self._base_row = {person_id: i for i, person_id in enumerate(base_ids.tolist())}
+            self._masked = np.zeros(len(base_ids), dtype=bool)
+            self._extra = np.zeros((0, model.dimensions), dtype=np.float32)
+            self._current = name
+        return True
+
+    def refresh_build(self):
+        """Switch to a newer build written by another worker, if there is one.
+
+        Edits applied here since the old build are dropped; the new build
+        read them from the database.
+        """
+        name = self._pointer()
+        if name is not None and name != self._current:
+            return self.open()
+        return False
+
+    # ------------------------------------------------------------------
+    # Edits between builds
+    # ------------------------------------------------------------------
+
+    def mark_stale(self, person_ids=(), project_ids=()):
+        """Record researchers (or every member of projects) to re-embed."""
+        with self._lock:
+            self._stale_people.update(p for p in person_ids if p is not None)
+            self._stale_projects.update(p for p in project_ids if p is not None)
+
+    def take_stale(self):
+        """``(person_ids, project_ids)`` marked since the last call."""
+        with self._lock:
+            stale = (self._stale_people, self._stale_projects)
+            self._stale_people, self._stale_projects = set(), set()
+            return stale
+
+    def upsert(self, documents):
+        """Re-embed researchers with the frozen model, overriding stored rows."""
+        if not self.loaded or not documents:
+            return
+        person_ids = list(documents)
+        vectors = self.model.embed([document_terms(documents[p]) for p in person_ids])
+        with self._lock:
+            fresh = []
+            for person_id, vector in zip(person_ids, vectors):
+                if person_id in self._base_row:
+                    self._masked[self._base_row[person_id]] = True
+                row = self._extra_row.get(person_id)
+                if row is None:
+                    fresh.append((person_id, vector))
+                else:
+                    self._extra[row] = vector
+            if fresh:
+                start = len(self._extra_ids)
+                self._extra = np.vstack([self._extra, np.array([v for _, v in fresh], dtype=np.float32)])
+                for offset, (person_id, _) in enumerate(fresh):
+                    self._extra_ids.append(person_id)
+                    self._extra_row[person_id] = start + offset
+
+    def remove(self, person_id):
+        with self._lock:
+            if person_id in self._base_row:
+                self._masked[self._base_row[person_id]] = True
+            row = self._extra_row.pop(person_id, None)
+            if row is not None:
+                self._extra[row] = 0.0
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def top_k(self, documents, k=10, exclude=()):
+        """Best ``(person_id, score)`` lists, one per query document."""
+        if not self.loaded or not documents:
+            return [[] for _ in documents]
+        queries = self.model.embed([document_terms(d) for d in documents])
+        excluded = set(exclude)
+        with self._lock:
+            blocks = [(self._base_ids[start:start + BLOCK_ROWS], self._base[start:start + BLOCK_ROWS],
+                       self._masked[start:start + BLOCK_ROWS])
+                      for start in range(0, len(self._base_ids), BLOCK_ROWS)]
+            if self._extra_ids:
+                extra_ids = np.array(self._extra_ids, dtype=np.int64)
+                alive = np.array([self._extra_row.get(p) == i for i, p in enumerate(self._extra_ids)])
+                blocks.append((extra_ids, self._extra.copy(), ~alive))
+
+        candidate_ids, candidate_scores = [], []
+        for ids, vectors, masked in blocks:
+            scores = queries @ np.asarray(vectors).T
+            hidden = masked | np.isin(ids, list(excluded)) if excluded else masked
+            scores[:, hidden] = -np.inf
+            take = min(k, scores.shape[1])
+            if take == 0:
+                continue
+            best = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            candidate_ids.append(ids[best])
+            candidate_scores.append(np.take_along_axis(scores, best, axis=1))
+        if not candidate_ids:
+            return [[] for _ in documents]
+
+        ids = np.hstack(candidate_ids)
+        scores = np.hstack(candidate_scores)
+        results = []
+        for row_ids, row_scores in zip(ids, scores):
+            order = np.lexsort((row_ids, -row_scores))[:k]
+            results.append([
+                (int(row_ids[i]), round(float(row_scores[i]), 4))
+                for i in order if np.isfinite(row_scores[i]) and row_scores[i] > 0
+            ])
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'build': self._current,
+                'built_at': self.built_at,
+                'people': int((~self._masked).sum()) + len(self._extra_row),
+                'edited_since_build': len(self._extra_row),
+                'terms': len(self.model.terms) if self.model else 0,
+                'dimensions': self.model.dimensions if self.model else 0,
+                'lsa': bool(self.model is not None and self.model.projection is not None),
+                'stale': len(self._stale_people) + len(self._stale_projects)
+            }
+
+
+# Shared index; routes/match_routes.py points it at the configured directory
+expertise_index = ExpertiseIndex(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                              'data', 'expertise_index'))
@@ -0,0 +1,435 @@
+"""
+Facet counts over people and projects from precomputed bitmaps.
+
+Every facet value (an institution, a department, a main field, an
+expertise, a tag) keeps a compressed bitmap of the people, and of the
+projects, it applies to. Counts for any filter combination are bitmap
+intersections instead of GROUP BY queries:
+
+- values of one facet are OR-ed, filters on different facets are AND-ed;
+- a facet's own counts ignore its own filter, so selecting "Biology" still
+  shows how many people each other main field has.
+
+Bitmaps are roaring-style: ids are split by their high 16 bits into
+containers that hold either a sorted uint16 array (up to ARRAY_MAX ids) or
+a 1024-word bitset, so sparse values stay small and dense ones intersect
+with a word-wise AND and popcount.
+"""
+
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+ARRAY_MAX = 4096
+WORDS = 1024
+
+PERSON_FACETS = ('institution', 'department', 'main_field', 'expertise', 'tag')
+PROJECT_FACETS = ('institution', 'department', 'tag')
+# Facets keyed by database id; the others are keyed by normalized text
+ID_FACETS = ('institution', 'department')
+
+_ONE = np.uint64(1)
+
+
+def normalize_value(value):
+    """Case- and whitespace-insensitive key for text facets ('' for blanks)."""
+    return ' '.join(str(value or '').split()).casefold()
+
+
+def _popcount(words):
+    return int(np.bitwise_count(words).sum())
+
+
+def _is_array(container):
+    return container.dtype == np.uint16
+
+
+def _to_bits(low):
+    words = np.zeros(WORDS, dtype=np.uint64)
+    np.bitwise_or.at(words, low >> 6, _ONE << (low & 63).astype(np.uint64))
+    return words
+
+
+def _to_array(words):
+    nonzero = np.flatnonzero(words)
+    bits = np.unpackbits(words[nonzero].astype('<u8').view(np.uint8), bitorder='little').reshape(-1, 64)
+    rows, cols = np.nonzero(bits)
+    return (nonzero[rows] * 64 + cols).astype(np.uint16)
+
+
+def _contains(words, low):
+    return ((words[low >> 6] >> (low & 63).astype(np.uint64)) & _ONE).astype(bool)
+
+
+def _shrink(words):
+    return _to_array(words) if _popcount(words) <= ARRAY_MAX else words
+
+
+def _cardinality(container):
+    return len(container) if _is_array(container) else _popcount(container)
+
+
+def _and(a, b):
+    if _is_array(a) and _is_array(b):
+        return np.intersect1d(a, b, assume_unique=True)
+    if _is_array(a):
+        return a[_contains(b, a)]
+    if _is_array(b):
+        return b[_contains(a, b)]
+    return _shrink(a & b)
+
+
+def _and_count(a, b):
+    if not _is_array(a) and not _is_array(b):
+        return _popcount(a & b)
+    return len(_and(a, b))
+
+
+def _or(a, b):
+    if _is_array(a) and _is_array(b):
+        union = np.union1d(a, b)
+        return union if len(union) <= ARRAY_MAX else _to_bits(union)
+    return (a if not _is_array(a) else _to_bits(a)) | (b if not _is_array(b) else _to_bits(b))
+
+
+class Bitmap:
+    """Compressed set of non-negative integer ids."""
+
+    __slots__ = ('_containers',)
+
+    def __init__(self, containers=None):
+        self._containers = containers or {}
+
+    @classmethod
+    def from_ids(cls, ids):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if len(ids) and ids[0] < 0:
+            raise ValueError("Bitmap ids must be non-negative")
+        high = ids >> 16
+        low = (ids & 0xFFFF).astype(np.uint16)
+        keys, starts = np.unique(high, return_index=True)
+        ends = np.append(starts[1:], len(ids))
+        containers = {}
+        for key, start, end in zip(keys.tolist(), starts.tolist(), ends.tolist()):
+            chunk = low[start:end]
+            containers[key] = chunk.copy() if len(chunk) <= ARRAY_MAX else _to_bits(chunk)
+        return cls(containers)
+
+    def __len__(self):
+        return sum(_cardinality(c) for c in self._containers.values())
+
+    def __bool__(self):
+        return bool(self._containers)
+
+    def __contains__(self, item_id):
+        container = self._containers.get(item_id >> 16)
+        if container is None:
+            return False
+        low = np.uint16(item_id & 0xFFFF)
+        if _is_array(container):
+            i = np.searchsorted(container, low)
+            return bool(i < len(container) and container[i] == low)
+        return bool(_contains(container, np.array([low]))[0])
+
+    def __eq__(self, other):
+        return isinstance(other, Bitmap) and np.array_equal(self.to_array(), other.to_array())
+
+    def add(self, item_id):
+        key, low = item_id >> 16, np.uint16(item_id & 0xFFFF)
+        container = self._containers.get(key)
+        if container is None:
+            self._containers[key] = np.array([low], dtype=np.uint16)
+        elif _is_array(container):
+            i = np.searchsorted(container, low)
+            if i < len(container) and container[i] == low:
+                return
+            container = np.insert(container, i, low)
+            self._containers[key] = container if len(container) <= ARRAY_MAX else _to_bits(container)
+        else:
+            container[low >> 6] |= _ONE << np.uint64(low & 63)
+
+    def discard(self, item_id):
+        key, low = item_id >> 16, np.uint16(item_id & 0xFFFF)
+        container = self._containers.get(key)
+        if container is None:
+            return
+        if _is_array(container):
+            i = np.searchsorted(container, low)
+            if i < len(container) and container[i] == low:
+                container = np.delete(container, i)
+        else:
+            container[low >> 6] &= ~(_ONE << np.uint64(low & 63))
+            container = _shrink(container)
+        if len(container):
+            self._containers[key] = container
+        else:
+            del self._containers[key]
+
+    def __and__(self, other):
+        small, large = sorted((self._containers, other._containers), key=len)
+        containers = {}
+        for key, container in small.items():
+            match = large.get(key)
+            if match is not None:
+                both = _and(container, match)
+                if len(both):
+                    containers[key] = both
+        return Bitmap(containers)
+
+    def __or__(self, other):
+        containers = dict(self._containers)
+        for key, container in other._containers.items():
+            current = containers.get(key)
+            containers[key] = container.copy() if current is None else _or(current, container)
+        return Bitmap(containers)
+
+    def and_count(self, other):
+        """``len(self & other)`` without building the intersection."""
+        small, large = sorted((self._containers, other._containers), key=len)
+        total = 0
+        for key, container in small.items():
+            match = large.get(key)
+            if match is not None:
+                total += _and_count(container, match)
+        return total
+
+    def to_array(self):
+        """Sorted ids as an int64 array."""
+        parts = [
+            (np.int64(key) << 16) + (c if _is_array(c) else _to_array(c)).astype(np.int64)
+            for key, c in sorted(self._containers.items())
+        ]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self._containers.values())
+
+
+def union(bitmaps):
+    result = Bitmap()
+    for bitmap in bitmaps:
+        result = result | bitmap
+    return result
+
+
+def intersection(bitmaps):
+    """Intersection of ``bitmaps``, smallest first; None when there are none."""
+    result = None
+    for bitmap in sorted(bitmaps, key=len):
+        result = bitmap if result is None else result & bitmap
+        if not result:
+            break
+    return result
+
+
+class FacetIndex:
+    """Bitmaps per facet value over one kind of item (people or projects)."""
+
+    def __init__(self, facets):
+        self.facets = facets
+        self._clear()
+
+    def _clear(self):
+        self.all = Bitmap()
+        self._bitmaps = {facet: {} for facet in self.facets}
+        self._labels = {facet: {} for facet in self.facets}
+        # item id -> {facet: set of values}, to undo an item's old values
+        self._assigned = {}
+
+    def __len__(self):
+        return len(self._assigned)
+
+    def load(self, item_ids, rows):
+        """Replace the contents with ``(item_id, facet, value, label)`` rows."""
+        self._clear()
+        members = {facet: defaultdict(list) for facet in self.facets}
+        assigned = {item_id: {} for item_id in item_ids}
+        for item_id, facet, value, label in rows:
+            if value is None or value == '' or item_id not in assigned:
+                continue
+            members[facet][value].append(item_id)
+            assigned[item_id].setdefault(facet, set()).add(value)
+            self._labels[facet].setdefault(value, label)
+        self.all = Bitmap.from_ids(list(assigned))
+        self._assigned = assigned
+        for facet, values in members.items():
+            self._bitmaps[facet] = {value: Bitmap.from_ids(ids) for value, ids in values.items()}
+
+    def replace(self, item_id, rows):
+        """Set an item's values to ``(facet, value, label)`` rows, adding it if new."""
+        self.remove(item_id)
+        assigned = {}
+        for facet, value, label in rows:
+            if value is None or value == '':
+                continue
+            bitmap = self._bitmaps[facet].get(value)
+            if bitmap is None:
+                bitmap = self._bitmaps[facet][value] = Bitmap()
+            bitmap.add(item_id)
+            assigned.setdefault(facet, set()).add(value)
+            self._labels[facet].setdefault(value, label)
+        self._assigned[item_id] = assigned
+        self.all.add(item_id)
+
+    def remove(self, item_id):
+        assigned = self._assigned.pop(item_id, None)
+        if assigned is None:
+            return
+        self.all.discard(item_id)
+        for facet, values in assigned.items():
+            for value in values:
+                bitmap = self._bitmaps[facet].get(value)
+                if bitmap is None:
+                    continue
+                bitmap.discard(item_id)
+                if not bitmap:
+                    del self._bitmaps[facet][value]
+                    self._labels[facet].pop(value, None)
+
+    def drop_value(self, facet, value):
+        """Forget a value that no longer exists (a deleted department)."""
+        bitmap = self._bitmaps[facet].pop(value, None)
+        self._labels[facet].pop(value, None)
+        if bitmap is None:
+            return
+        for item_id in bitmap.to_array().tolist():
+            values = self._assigned.get(item_id, {}).get(facet)
+            if values is not None:
+                values.discard(value)
+
+    def relabel(self, facet, value, label):
+        if value in self._labels[facet] and label:
+            self._labels[facet][value] = label
+
+    def _selection(self, facet, values):
+        return union(self._bitmaps[facet][v] for v in values if v in self._bitmaps[facet])
+
+    def matching(self, filters, within=None, skip=None):
+        """Items passing every filter except ``skip``'s (None means all items)."""
+        bitmaps = [self._selection(f, values) for f, values in filters.items() if f != skip and values]
+        if within is not None:
+            bitmaps.append(within)
+        return intersection(bitmaps)
+
+    def counts(self, filters, facets=None, limit=None, within=None):
+        """Total and ``{facet: [(value, label, count), ...]}`` for a filter combination.
+
+        ``filters`` maps facets to the values selected on them; ``within``
+        optionally restricts everything to a precomputed bitmap (search hits).
+        Values are ordered by count, then label; zero counts are left out.
+        """
+        selected = self.matching(filters, within)
+        total = len(self.all) if selected is None else len(selected)
+        results = {}
+        for facet in facets or self.facets:
+            base = self.matching(filters, within, skip=facet)
+            labels = self._labels[facet]
+            counted = []
+            for value, bitmap in self._bitmaps[facet].items():
+                count = len(bitmap) if base is None else base.and_count(bitmap)
+                if count:
+                    counted.append((value, labels.get(value), count))
+            counted.sort(key=lambda row: (-row[2], str(row[1]).casefold(), str(row[0])))
+            results[facet] = counted[:limit] if limit else counted
+        return total, results
+
+    def stats(self):
+        return {
+            'items': len(self.all),
+            'values': {facet: len(values) for facet, values in self._bitmaps.items()},
+            'bytes': self.all.nbytes + sum(
+                bitmap.nbytes for values in self._bitmaps.values() for bitmap in values.values()
+            )
+        }
+
+
+class Facets:
+    """People and project facet indexes, with stale tracking for writes.
+
+    Write routes only record which people and projects changed; the
+    blueprint re-reads those rows before the next count. Marks received
+    before the first ``load`` are dropped; the load reads them anyway.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.people = FacetIndex(PERSON_FACETS)
+        self.projects = FacetIndex(PROJECT_FACETS)
+        self.loaded = False
+        self.built_at = None
+        self._stale_people = set()
+        self._stale_projects = set()
+
+    def load(self, person_ids, person_rows, project_ids, project_rows, built_at=None):
+        people = FacetIndex(PERSON_FACETS)
+        people.load(person_ids, person_rows)
+        projects = FacetIndex(PROJECT_FACETS)
+        projects.load(project_ids, project_rows)
+        with self._lock:
+            self.people, self.projects = people, projects
+            self.loaded = True
+            self.built_at = built_at
+
+    def mark_stale(self, person_ids=(), project_ids=()):
+        with self._lock:
+            if self.loaded:
+                self._stale_people.update(p for p in person_ids if p is not None)
+                self._stale_projects.update(p for p in project_ids if p is not None)
+
+    def mark_all_stale(self):
+        """Have the next request reload both indexes (a delta could not be applied)."""
+        with self._lock:
+            self.loaded = False
+
+    def take_stale(self):
+        """``(person_ids, project_ids)`` marked since the last call."""
+        with self._lock:
+            stale = (self._stale_people, self._stale_projects)
+            self._stale_people, self._stale_projects = set(), set()
+            return stale
+
+    def apply(self, person_rows, project_rows):
+        """Replace items with freshly read rows; ids mapped to None are removed.
+
+        Rows are ``{item_id: [(facet, value, label), ...] or None}``.
+        """
+        with self._lock:
+            for index, rows in ((self.people, person_rows), (self.projects, project_rows)):
+                for item_id, item_rows in rows.items():
+                    if item_rows is None:
+                        index.remove(item_id)
+                    else:
+                        index.replace(item_id, item_rows)
+
+    def drop_value(self, facet, value):
+        with self._lock:
+            for index in (self.people, self.projects):
+                if facet in index.facets:
+                    index.drop_value(facet, value)
+
+    def relabel(self, facet, value, label):
+        with self._lock:
+            for index in (self.people, self.projects):
+                if facet in index.facets:
+                    index.relabel(facet, value, label)
+
+    def counts(self, kind, filters, facets=None, limit=None, within=None):
+        with self._lock:
+            index = self.people if kind == 'person' else self.projects
+            return index.counts(filters, facets, limit, within)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'built_at': self.built_at.isoformat() if self.built_at else None,
+                'person': self.people.stats(),
+                'project': self.projects.stats(),
+                'stale': len(self._stale_people) + len(self._stale_projects)
+            }
+
+
+# Shared instance used by the facets blueprint and the write routes
+facets = Facets()
@@ -0,0 +1,118 @@
+"""
+Sparse field selection (``?fields=``) for list and detail endpoints.
+
+Each resource whitelists the fields a client may ask for and the SQL
+expression behind each one, so the selection is pushed down into the
+column list instead of trimming ``SELECT *`` rows in Python: TEXT columns
+such as ``bio`` and ``project_description`` are not read at all unless
+asked for.
+
+``fields`` is a comma-separated list of field names, or one of:
+
+- ``summary``: the compact projection list cards need (names, titles,
+  ids), the default for paginated lists;
+- ``full``: every column, the default elsewhere and for ``all=true``.
+
+The resource's key is always included. Derived fields (``expertises``)
+pull in the columns they are computed from; those columns are dropped
+again unless they were asked for too.
+"""
+
+
+class FieldSet:
+    """Whitelisted fields of one resource and the SQL that selects them."""
+
+    def __init__(self, key, columns, summary, derived=None):
+        self.key = key
+        # field -> SQL expression
+        self.columns = columns
+        self.summary = tuple(summary)
+        # derived field -> fields it is computed from
+        self.derived = derived or {}
+
+    @property
+    def allowed(self):
+        return tuple(self.columns) + tuple(self.derived)
+
+    def parse(self, value, default='full'):
+        """Requested fields in order, or None for the full row.
+
+        Raises ValueError naming the allowed fields for anything unknown.
+        """
+        value = (value or default).strip()
+        if value == 'full':
+            return None
+        if value == 'summary':
+            return list(self.summary)
+        fields = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+        unknown = [f for f in fields if f not in self.columns and f not in self.derived]
+        if unknown or not fields:
+            raise ValueError(
+                f"Unknown fields: {', '.join(unknown) or '(none given)'}; "
+                f"allowed: summary, full, {', '.join(self.allowed)}"
+            )
+        return fields
+
+    def _sources(self, fields):
+        sources = [self.key]
+        for field in fields:
+            sources.extend(self.derived.get(field, (field,)))
+        return list(dict.fromkeys(sources))
+
+    def select(self, fields):
+        """``SELECT`` clause for ``fields`` (plus the key and derived sources)."""
+        return "SELECT " + ", ".join(f"{self.columns[f]} AS {f}" for f in self._sources(fields))
+
+    def prune(self, row, fields):
+        """Only the key and the requested fields of a row (all of it for None)."""
+        if fields is None or row is None:
+            return row
+        return {f: row.get(f) for f in [self.key] + [f for f in fields if f != self.key]}
+
+
+_EXPERTISE = ('expertise_1', 'expertise_2', 'expertise_3')
+
+# Columns of Person joined to Department, Institution and User (see person_routes)
+PERSON_FIELDS = FieldSet(
+    key='person_id',
+    columns={
+        'person_id': 'p.person_id',
+        'person_name': 'p.person_name',
+        'person_email': 'p.person_email',
+        'person_phone': 'p.person_phone',
+        'bio': 'p.bio',
+        'expertise_1': 'p.expertise_1',
+        'expertise_2': 'p.expertise_2',
+        'expertise_3': 'p.expertise_3',
+        'main_field': 'p.main_field',
+        'department_id': 'p.department_id',
+        'department_name': 'd.department_name',
+        'department_email': 'd.department_email',
+        'department_phone': 'd.department_phone',
+        'institution_id': 'd.institution_id',
+        'institution_name': 'i.institution_name',
+        'institution_type': 'i.institution_type',
+        'street': 'i.street',
+        'city': 'i.city',
+        'state': 'i.state',
+        'zipcode': 'i.zipcode',
+        'institution_phone': 'i.institution_phone',
+        'is_claimed': 'CASE WHEN u.person_id IS NOT NULL THEN TRUE ELSE FALSE END'
+    },
+    summary=('person_name', 'main_field', 'expertises', 'department_name', 'institution_name', 'is_claimed'),
+    derived={'expertises': _EXPERTISE}
+)
+
+PROJECT_FIELDS = FieldSet(
+    key='project_id',
+    columns={
+        'project_id': 'p.project_id',
+        'project_title': 'p.project_title',
+        'project_description': 'p.project_description',
+        'tag_name': 'p.tag_name',
+        'start_date': 'p.start_date',
+        'end_date': 'p.end_date',
+        'person_id': 'p.person_id'
+    },
+    summary=('project_title', 'tag_name', 'start_date', 'end_date')
+)
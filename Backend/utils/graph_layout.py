@@ -0,0 +1,218 @@
+"""
+Server-side force layout for the collaboration network view.
+
+Positions are computed with a vectorized Fruchterman-Reingold pass over the
+CSR adjacency: attraction along every edge in one array operation, and
+repulsion either exactly (small graphs, in row chunks) or against a random
+sample of other nodes scaled up to the full population (large graphs).
+
+The starting positions come from the detected communities: the community
+graph (Pᵀ·A·P) is laid out first and each researcher starts near their
+community's centre, so the fine pass only has to untangle each cluster.
+
+GraphLayout keeps the positions between graph versions. Researchers that
+appear after the last full layout are placed next to the collaborators
+they already have and relaxed with everyone else held still; a full graph
+rebuild refines the previous positions instead of starting over.
+"""
+
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+# Graphs up to this size get exact all-pairs repulsion
+EXACT_REPULSION_MAX_NODES = 2000
+REPULSION_SAMPLES = 48
+CHUNK_SIZE = 1024
+
+
+def _repulsion(positions, rows, k, rng):
+    """Repulsive displacement (k² / d) for the given rows."""
+    n = len(positions)
+    displacement = np.zeros((len(rows), 2))
+    exact = n <= EXACT_REPULSION_MAX_NODES
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        if exact:
+            others = positions[None, :, :]
+            scale = 1.0
+        else:
+            others = positions[rng.integers(0, n, size=(len(chunk), REPULSION_SAMPLES))]
+            scale = (n - 1) / REPULSION_SAMPLES
+        delta = positions[chunk][:, None, :] - others
+        distance_sq = np.maximum(np.einsum('ijk,ijk->ij', delta, delta), 1e-9)
+        force = k * k / distance_sq
+        # A node does not push itself (distance 0 in the exact case)
+        force[distance_sq <= 1e-9] = 0.0
+        displacement[start:start + len(chunk)] = scale * np.einsum('ij,ijk->ik', force, delta)
+    return displacement
+
+
+def force_layout(adjacency, initial=None, movable=None, iterations=50, temperature=0.1,
+                 gravity=0.05, seed=0):
+    """Fruchterman-Reingold positions for a symmetric sparse adjacency.
+
+    ``initial`` is an (n, 2) array to start from (random when omitted) and
+    ``movable`` an optional boolean mask; unmasked nodes keep their place
+    but still attract and repel the others. Positions are in units where
+    the ideal edge length is ``1 / sqrt(n)``.
+    """
+    rng = np.random.default_rng(seed)
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.zeros((0, 2))
+    positions = rng.uniform(-0.5, 0.5, size=(n, 2)) if initial is None else np.array(initial, dtype=np.float64)
+    moving = np.arange(n) if movable is None else np.flatnonzero(movable)
+    if n == 1 or len(moving) == 0:
+        return positions
+
+    k = 1.0 / np.sqrt(n)
+    upper = sp.triu(adjacency, k=1).tocoo()
+    sources, targets = upper.row, upper.col
+    strength = np.log1p(upper.data)
+
+    for step in range(iterations):
+        displacement = np.zeros((n, 2))
+        displacement[moving] = _repulsion(positions, moving, k, rng)
+
+        delta = positions[sources] - positions[targets]
+        distance = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+        pull = delta * (distance * strength / k)[:, None]
+        np.add.at(displacement, sources, -pull)
+        np.add.at(displacement, targets, pull)
+
+        displacement -= gravity * positions / k
+
+        length = np.maximum(np.sqrt(np.einsum('ij,ij->i', displacement, displacement)), 1e-12)
+        cap = temperature * (1.0 - step / iterations)
+        moved = displacement[moving] * (np.minimum(length[moving], cap) / length[moving])[:, None]
+        positions[moving] += moved
+
+    return positions
+
+
+def community_seed(adjacency, labels, seed=0):
+    """Starting positions that put each community around its own centre.
+
+    The communities are laid out as a weighted graph of their own, then
+    every member is scattered around its community's position within a
+    radius that grows with the community's size.
+    """
+    rng = np.random.default_rng(seed)
+    n = adjacency.shape[0]
+    labels = np.unique(np.asarray(labels), return_inverse=True)[1]
+    count = labels.max() + 1 if n else 0
+    collapse = sp.csr_matrix((np.ones(n), (np.arange(n), labels)), shape=(n, count))
+    community_graph = (collapse.T @ adjacency @ collapse).tocsr()
+    community_graph.setdiag(0)
+    community_graph.eliminate_zeros()
+
+    centres = force_layout(community_graph, iterations=60, seed=seed)
+    sizes = np.bincount(labels, minlength=count)
+    # Members spread over an area proportional to the community's size
+    radius = np.sqrt(sizes / max(n, 1)) * 0.5
+    angle = rng.uniform(0, 2 * np.pi, size=n)
+    spread = radius[labels] * np.sqrt(rng.uniform(0, 1, size=n))
+    offsets = np.stack([np.cos(angle), np.sin(angle)], axis=1) * spread[:, None]
+    return centres[labels] + offsets
+
+
+class GraphLayout:
+    """Node positions for a CollaborationGraph, kept across versions."""
+
+    def __init__(self, graph, spacing=250.0, iterations=50, seed=0):
+        self.graph = graph
+        self.spacing = spacing
+        self.iterations = iterations
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._version = None
+        self._built_at = None
+        self._scale = 1.0
+        self.full_layouts = 0
+        self.incremental_layouts = 0
+
+    def positions(self):
+        """person_id -> ``(x, y)`` in pixels for the current graph version."""
+        with self._lock:
+            if self._version != self.graph.version:
+                self._update()
+            return {
+                person_id: (round(x * self._scale, 1), round(y * self._scale, 1))
+                for person_id, (x, y) in self._positions.items()
+            }
+
+    def _update(self):
+        version = self.graph.version
+        built_at = self.graph.built_at
+        sparse = self.graph.to_sparse(include_isolated=True)
+        node_ids = sparse.node_ids.tolist()
+        n = len(node_ids)
+
+        placed = np.array([person_id in self._positions for person_id in node_ids], dtype=bool)
+        rebuilt = built_at != self._built_at
+
+        if n == 0:
+            positions = np.zeros((0, 2))
+        elif not placed.any():
+            communities = self.graph.community_map()
+            labels = [communities.get(person_id, -1) for person_id in node_ids]
+            initial = community_seed(sparse.adjacency, labels, seed=self.seed)
+            positions = force_layout(sparse.adjacency, initial, iterations=self.iterations, seed=self.seed)
+            self.full_layouts += 1
+        elif rebuilt or not placed.all():
+            initial = self._initial_positions(sparse, node_ids, placed)
+            if rebuilt:
+                # Refine everything from where it already is, with a cooler start
+                positions = force_layout(
+                    sparse.adjacency, initial, iterations=max(10, self.iterations // 3),
+                    temperature=0.02, seed=self.seed
+                )
+            else:
+                positions = force_layout(
+                    sparse.adjacency, initial, movable=~placed,
+                    iterations=max(10, self.iterations // 2), temperature=0.05, seed=self.seed
+                )
+            self.incremental_layouts += 1
+        else:
+            positions = np.array([self._positions[person_id] for person_id in node_ids])
+
+        self._positions = {person_id: tuple(position) for person_id, position in zip(node_ids, positions.tolist())}
+        if rebuilt or not placed.any():
+            # Pixels per layout unit, so an ideal edge is about `spacing`
+            # pixels long; kept between rebuilds so placed nodes stay put
+            self._scale = self.spacing * np.sqrt(max(n, 1))
+        self._version = version
+        self._built_at = built_at
+
+    def _initial_positions(self, sparse, node_ids, placed):
+        """Known positions, with newcomers next to their placed collaborators."""
+        rng = np.random.default_rng(self.seed + len(node_ids))
+        n = len(node_ids)
+        k = 1.0 / np.sqrt(n)
+        positions = np.zeros((n, 2))
+        positions[placed] = [self._positions[person_id] for person_id, known in zip(node_ids, placed) if known]
+
+        adjacency = sparse.adjacency
+        outer = np.sqrt(np.einsum('ij,ij->i', positions[placed], positions[placed])).max()
+        for i in np.flatnonzero(~placed):
+            neighbours = adjacency.indices[adjacency.indptr[i]:adjacency.indptr[i + 1]]
+            neighbours = neighbours[placed[neighbours]]
+            if len(neighbours):
+                positions[i] = positions[neighbours].mean(axis=0) + rng.normal(scale=k, size=2)
+            else:
+                # No placed collaborators yet: start on the rim of the drawing
+                angle = rng.uniform(0, 2 * np.pi)
+                positions[i] = (outer + k) * np.array([np.cos(angle), np.sin(angle)])
+        return positions
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self._version,
+                'nodes': len(self._positions),
+                'full_layouts': self.full_layouts,
+                'incremental_layouts': self.incremental_layouts
+            }
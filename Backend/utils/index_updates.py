@@ -0,0 +1,30 @@
+"""
+Guard for the in-memory index updates the write routes make after commit.
+
+The collaboration graph, autocomplete, facet and COUNT(*) caches are kept
+current by deltas applied once the transaction has committed. The write
+itself has succeeded by then, so a failing delta must not turn into a
+rollback and a 500: it is logged and the structures are reloaded from the
+database on next use instead.
+"""
+
+from contextlib import contextmanager
+
+from utils.autocomplete import autocomplete
+from utils.collab_graph import collab_graph
+from utils.facets import facets
+from utils.logger import log_error
+from utils.pagination import row_counts
+
+
+@contextmanager
+def index_updates(action):
+    """Run post-commit deltas for ``action``; on failure log it and mark everything stale."""
+    try:
+        yield
+    except Exception as e:
+        log_error(f"In-memory index update after {action} failed, reloading on next use: {str(e)}")
+        collab_graph.mark_stale()
+        autocomplete.mark_stale()
+        facets.mark_all_stale()
+        row_counts.invalidate()
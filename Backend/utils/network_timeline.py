@@ -0,0 +1,199 @@
+"""
+Temporal snapshots of the collaboration network.
+
+Two researchers are linked in a period when they share a project and both
+of their WorkedOn rows cover that period; the link's weight is the number
+of such projects. Rows without an end_date run to the current period, and
+rows without any dates are left out of the timeline.
+
+The timeline is stored as a log: for every period only the links whose
+weight changed (weight 0 meaning removed), as parallel NumPy arrays, plus
+a full copy of the link set every ``keyframe_every`` periods. A period is
+rebuilt from the nearest earlier keyframe by replaying at most
+``keyframe_every - 1`` deltas, each one a vectorized sorted merge.
+"""
+
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+
+from utils.collab_graph import date_of
+
+GRANULARITIES = ('year', 'quarter')
+
+
+def period_of(value, granularity):
+    """Integer period of a date: the year, or year * 4 + quarter index."""
+    if granularity == 'year':
+        return value.year
+    return value.year * 4 + (value.month - 1) // 3
+
+
+def period_label(period, granularity):
+    if granularity == 'year':
+        return str(period)
+    return f"{period // 4}-Q{period % 4 + 1}"
+
+
+def parse_period(text, granularity):
+    """Period from ``2021`` (year) or ``2021-Q3`` (quarter); ValueError otherwise."""
+    text = str(text).strip().upper()
+    if granularity == 'year':
+        return int(text)
+    year, _, quarter = text.partition('-Q')
+    if not quarter or not 1 <= int(quarter) <= 4:
+        raise ValueError(f"Expected a quarter like 2021-Q3, got '{text}'")
+    return int(year) * 4 + int(quarter) - 1
+
+
+def _apply(keys, weights, delta_keys, delta_weights):
+    """Merge one period's changes into a sorted link set."""
+    if len(keys):
+        position = np.searchsorted(keys, delta_keys)
+        present = position < len(keys)
+        present[present] = keys[position[present]] == delta_keys[present]
+    else:
+        position = np.zeros(len(delta_keys), dtype=np.int64)
+        present = np.zeros(len(delta_keys), dtype=bool)
+
+    weights = weights.copy()
+    weights[position[present]] = delta_weights[present]
+    added = ~present
+    keys = np.insert(keys, position[added], delta_keys[added])
+    weights = np.insert(weights, position[added], delta_weights[added])
+    alive = weights > 0
+    return keys[alive], weights[alive]
+
+
+class NetworkTimeline:
+    """Per-period link deltas with periodic keyframes."""
+
+    def __init__(self, memberships, granularity='year', today=None, keyframe_every=8):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        self.granularity = granularity
+        self.keyframe_every = keyframe_every
+        self.current = period_of(today or date.today(), granularity)
+        self.undated = 0
+        self._build(memberships)
+
+    def _build(self, memberships):
+        projects = defaultdict(list)
+        for person_id, project_id, start, end in memberships:
+            start, end = date_of(start), date_of(end)
+            if start is None and end is None:
+                self.undated += 1
+                continue
+            first = period_of(start or end, self.granularity)
+            last = period_of(end, self.granularity) if end else max(self.current, first)
+            projects[project_id].append((person_id, first, max(first, last)))
+
+        self.node_ids = np.array(sorted({m[0] for members in projects.values() for m in members}), dtype=np.int64)
+        index = {person_id: i for i, person_id in enumerate(self.node_ids.tolist())}
+        n = max(len(self.node_ids), 1)
+        self._n = n
+
+        keys, periods, changes = [], [], []
+        for members in projects.values():
+            if len(members) < 2:
+                continue
+            people = np.array([index[m[0]] for m in members], dtype=np.int64)
+            starts = np.array([m[1] for m in members], dtype=np.int64)
+            ends = np.array([m[2] for m in members], dtype=np.int64)
+            i, j = np.triu_indices(len(members), 1)
+            low = np.maximum(starts[i], starts[j])
+            high = np.minimum(ends[i], ends[j])
+            overlap = low <= high
+            key = (np.minimum(people[i], people[j]) * n + np.maximum(people[i], people[j]))[overlap]
+            keys += [key, key]
+            periods += [low[overlap], high[overlap] + 1]
+            changes += [np.ones(len(key), dtype=np.int64), -np.ones(len(key), dtype=np.int64)]
+
+        if keys:
+            keys, periods, changes = np.concatenate(keys), np.concatenate(periods), np.concatenate(changes)
+            self.first = int(periods.min())
+            self.last = int(max(self.current, periods.max() - 1))
+        else:
+            keys = periods = changes = np.zeros(0, dtype=np.int64)
+            self.first = self.last = self.current
+
+        # Net change per (link, period), then the running weight per link
+        order = np.lexsort((periods, keys))
+        keys, periods, changes = keys[order], periods[order], changes[order]
+        boundary = np.ones(len(keys), dtype=bool)
+        boundary[1:] = (keys[1:] != keys[:-1]) | (periods[1:] != periods[:-1])
+        starts = np.flatnonzero(boundary)
+        keys, periods = keys[starts], periods[starts]
+        changes = np.add.reduceat(changes, starts) if len(starts) else changes
+        nonzero = changes != 0
+        keys, periods, changes = keys[nonzero], periods[nonzero], changes[nonzero]
+
+        running = np.cumsum(changes)
+        new_link = np.ones(len(keys), dtype=bool)
+        new_link[1:] = keys[1:] != keys[:-1]
+        link_start = np.maximum.accumulate(np.where(new_link, np.arange(len(keys)), 0))
+        before = np.concatenate([[0], running])[link_start]
+        weights = running - before
+
+        within = periods <= self.last
+        order = np.lexsort((keys[within], periods[within]))
+        self._delta_keys = keys[within][order]
+        self._delta_weights = weights[within][order]
+        period_index = periods[within][order] - self.first
+        self._offsets = np.searchsorted(period_index, np.arange(self.last - self.first + 2))
+
+        self._keyframes = {}
+        self._summary = []
+        state_keys = np.zeros(0, dtype=np.int64)
+        state_weights = np.zeros(0, dtype=np.int64)
+        for p in range(self.last - self.first + 1):
+            delta_keys, delta_weights = self._delta(p)
+            existing = np.isin(delta_keys, state_keys, assume_unique=True)
+            state_keys, state_weights = _apply(state_keys, state_weights, delta_keys, delta_weights)
+            if p % self.keyframe_every == 0:
+                self._keyframes[p] = (state_keys, state_weights)
+            researchers = len(np.unique(np.concatenate([state_keys // n, state_keys % n])))
+            self._summary.append({
+                'period': period_label(self.first + p, self.granularity),
+                'researchers': researchers,
+                'collaborations': int(len(state_keys)),
+                'added': int(np.count_nonzero(~existing & (delta_weights > 0))),
+                'removed': int(np.count_nonzero(existing & (delta_weights == 0)))
+            })
+
+    def _delta(self, p):
+        start, end = self._offsets[p], self._offsets[p + 1]
+        return self._delta_keys[start:end], self._delta_weights[start:end]
+
+    def _pairs(self, keys):
+        return self.node_ids[keys // self._n], self.node_ids[keys % self._n]
+
+    def periods(self):
+        """Labels of every period from the first collaboration to now."""
+        return [row['period'] for row in self._summary]
+
+    def summary(self):
+        """Researcher and collaboration counts plus churn for each period."""
+        return [dict(row) for row in self._summary]
+
+    def delta(self, period):
+        """``(sources, targets, weights)`` changed in ``period``; weight 0 means removed."""
+        p = period - self.first
+        if not 0 <= p <= self.last - self.first:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        keys, weights = self._delta(p)
+        sources, targets = self._pairs(keys)
+        return sources, targets, weights
+
+    def edges_at(self, period):
+        """``(sources, targets, weights)`` of every link active in ``period``."""
+        p = min(period, self.last) - self.first
+        if p < 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        frame = p - p % self.keyframe_every
+        keys, weights = self._keyframes[frame]
+        for q in range(frame + 1, p + 1):
+            keys, weights = _apply(keys, weights, *self._delta(q))
+        sources, targets = self._pairs(keys)
+        return sources, targets, weights
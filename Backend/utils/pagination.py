@@ -0,0 +1,156 @@
+"""
+Keyset pagination for the list endpoints.
+
+Pages are ordered by primary key and continue after the last key of the
+previous page (``WHERE key > last ORDER BY key LIMIT n``), so each page
+costs the same no matter how deep it is and rows inserted meanwhile are
+neither skipped nor repeated. The key travels as an opaque ``next`` token;
+a bare integer id is accepted as well.
+
+Totals are optional (``?count=true``) and come from a short-lived cache of
+COUNT(*) results, so paging through a table does not count it every time.
+``?all=true`` keeps the old whole-table response.
+"""
+
+import base64
+import binascii
+import configparser
+import json
+import threading
+import time
+
+from utils.shared_cache import shared_cache
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+DEFAULT_LIMIT = config.getint("Pagination", "default_limit", fallback=50)
+MAX_LIMIT = config.getint("Pagination", "max_limit", fallback=500)
+COUNT_CACHE_SECONDS = config.getint("Pagination", "count_cache_seconds", fallback=30)
+
+_TRUE = ('1', 'true', 'yes')
+
+
+def encode_cursor(key):
+    """Opaque continuation token for a key (a tuple of column values)."""
+    raw = json.dumps(list(key), separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """The key tuple behind a token; raises ValueError for anything else."""
+    token = token.strip()
+    if token.isdigit():
+        return (int(token),)
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("after must be a token returned as 'next'")
+    if not isinstance(key, list) or not key:
+        raise ValueError("after must be a token returned as 'next'")
+    return tuple(key)
+
+
+class PageRequest:
+    """``after``/``limit``/``count``/``all`` query parameters of a list request."""
+
+    def __init__(self, after=None, limit=DEFAULT_LIMIT, with_total=False, unpaginated=False):
+        self.after = after
+        self.limit = limit
+        self.with_total = with_total
+        self.unpaginated = unpaginated
+
+    @classmethod
+    def from_args(cls, args, key_length=1):
+        unpaginated = args.get('all', '').lower() in _TRUE
+        after = args.get('after')
+        after = decode_cursor(after) if after else None
+        if after is not None and len(after) != key_length:
+            raise ValueError("after does not belong to this list")
+        try:
+            limit = int(args.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        return cls(
+            after=after,
+            limit=min(max(1, limit), MAX_LIMIT),
+            with_total=args.get('count', '').lower() in _TRUE,
+            unpaginated=unpaginated
+        )
+
+    def after_clause(self, column, prefix='AND'):
+        """``("AND column > %s", (value,))`` for the current page, or nothing."""
+        if self.after is None:
+            return '', ()
+        return f"{prefix} {column} > %s", (self.after[0],)
+
+    def page(self, rows, key):
+        """Trim rows fetched with ``LIMIT limit + 1``; returns ``(rows, next_token)``."""
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        return rows, encode_cursor(key(rows[-1]))
+
+
+def page_response(rows, next_token, total=None):
+    """The usual ``status/data/count`` body plus paging fields."""
+    body = {
+        'status': 'success',
+        'data': rows,
+        'count': len(rows),
+        'next': next_token,
+        'has_more': next_token is not None
+    }
+    if total is not None:
+        body['total'] = total
+    return body
+
+
+def count_rows(cursor, query, params=()):
+    """Run a ``SELECT COUNT(*) AS total`` query."""
+    cursor.execute(query, params)
+    return cursor.fetchone()['total']
+
+
+class CountCache:
+    """COUNT(*) results kept for ``ttl`` seconds, keyed by table and filter."""
+
+    def __init__(self, ttl=COUNT_CACHE_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def get(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None and now - cached[1] < self.ttl:
+                return cached[0]
+        value = compute()
+        with self._lock:
+            self._counts[key] = (value, now)
+        return value
+
+    def invalidate(self, table=None):
+        """Drop counts for one table (the first part of the key), or all."""
+        with self._lock:
+            if table is None:
+                self._counts.clear()
+            else:
+                for key in [k for k in self._counts if k[0] == table]:
+                    del self._counts[key]
+
+
+# Shared by the list endpoints
+row_counts = CountCache()
+
+
+def _on_remote_write(message):
+    """Drop the counts of tables written by another worker (all of them when unnamed)."""
+    tables = message.get('tables')
+    for table in tables if tables is not None else [None]:
+        row_counts.invalidate(table)
+
+
+shared_cache.on("tables", _on_remote_write)
+shared_cache.on("reset", lambda message: row_counts.invalidate())
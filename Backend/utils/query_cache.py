@@ -0,0 +1,520 @@
+"""
+Result cache for read-only stored procedures, invalidated by table.
+
+Most GET routes are one ``cursor.callproc(name, args)``. Profile pages
+repeat the same few calls (SelectPersonFullContextByID, GetProjectTags,
+SelectProjectByID ...) with the same arguments, and each call is a round
+trip to MySQL. PooledMySQL connections use the cursor and connection
+classes below, so those calls are cached without changes to the routes:
+
+- ``callproc`` of a procedure in PROC_READS looks up (name, args) first.
+  On a hit, the cursor serves the stored rows: ``fetchone``/``fetchall``
+  work as usual and ``nextset`` reports no further result sets. On a
+  miss, the first result set is stored, tagged with the tables the
+  procedure reads.
+- A procedure in PROC_WRITES, or an INSERT/UPDATE/DELETE run through
+  ``execute``, records the tables it changes on the connection. Their
+  entries are dropped when the transaction commits, or straight away in
+  autocommit. Procedures in neither map clear the whole cache.
+
+The cache is off unless ``[SharedCache]`` is configured
+(``enabled = auto``): invalidations would otherwise only reach the worker
+that wrote. ``enabled = true`` turns it on for single-worker deployments.
+
+Entries are pickled, so every hit hands out fresh rows the route may
+modify. An entry lives for ``ttl_seconds``, and the least recently used
+entries are evicted beyond ``max_entries`` or ``max_megabytes``.
+
+Only connections whose queries each see the latest commit are cached:
+autocommit, or READ COMMITTED as set by @reads. A read that raced a
+commit is not stored, nor is a replica read of a table written within
+``replica_lag_seconds``. Procedures reading User (credentials,
+verification codes) are never cached.
+
+With ``[SharedCache]`` configured (utils/shared_cache.py), this LRU is a
+near cache in front of the shared store: a local miss tries the store
+before MySQL, and results are written to both. An invalidation bumps the
+tables' counters in the store and is published to the other workers,
+which drop their own entries for those tables. Shared entries record the
+counters they were read at and are ignored once any of them moves on.
+
+``stats()`` reports hits (local and shared), misses, hit ratio and bytes
+held, overall and per procedure. It is served at ``/health/query-cache``.
+"""
+
+import configparser
+import hashlib
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from utils.logger import log_info
+from utils.shared_cache import SHARED_CACHE_URL, shared_cache
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+# 'auto' caches only when [SharedCache] is configured: without it, a write
+# invalidates the worker that made it and no other, so several workers would
+# serve stale rows for up to ttl_seconds
+QUERY_CACHE_ENABLED = config.get("QueryCache", "enabled", fallback="auto").strip().lower()
+if QUERY_CACHE_ENABLED == "auto":
+    QUERY_CACHE_ENABLED = SHARED_CACHE_URL != ""
+else:
+    QUERY_CACHE_ENABLED = QUERY_CACHE_ENABLED in ("1", "true", "yes", "on")
+QUERY_CACHE_MAX_ENTRIES = config.getint("QueryCache", "max_entries", fallback=10000)
+QUERY_CACHE_MAX_BYTES = int(config.getfloat("QueryCache", "max_megabytes", fallback=64) * 1024 * 1024)
+QUERY_CACHE_TTL_SECONDS = config.getfloat("QueryCache", "ttl_seconds", fallback=300.0)
+# How far a replica may lag behind the primary
+QUERY_CACHE_REPLICA_LAG_SECONDS = config.getfloat("QueryCache", "replica_lag_seconds", fallback=5.0)
+
+# Bookkeeping per entry on top of the pickled rows (key, tags, LRU links)
+_ENTRY_OVERHEAD = 256
+
+# Cacheable procedures and the tables their result depends on
+PROC_READS = {
+    'GetAllInstitutions': {'Institution'},
+    'SelectInstitutionByName': {'Institution'},
+    'GetDepartmentsAndPeopleByInstitutionId': {'Institution', 'Department', 'Person'},
+    'GetAllInstitutionsDepartmentsAndPeople': {'Institution', 'Department', 'Person'},
+    'SelectDepartmentByName': {'Department'},
+    'GetAllPeople': {'Person', 'Department', 'Institution'},
+    'SelectPersonByName': {'Person'},
+    'SelectPersonFullContextByID': {'Person', 'Department', 'Institution'},
+    'GetAllProjects': {'Project'},
+    'SelectProjectByID': {'Project'},
+    'SelectProjectsByPersonID': {'Project'},
+    'SelectActiveProjects': {'Project'},
+    'SelectNumProjectsPerPerson': {'Person', 'Project', 'WorkedOn'},
+    'GetProjectTags': {'Project_Tag'},
+    'GetAllProjectTags': {'Project_Tag'},
+    'GetTagUsageCount': {'Project_Tag'},
+    'GetProjectsByTag': {'Project', 'Project_Tag'},
+    'GetAllTags': {'Tag'},
+    'SelectTagByName': {'Tag'},
+    'GetTagCount': {'Tag'},
+    'SelectCollaboratorsByPersonID': {'Collaboration', 'Person'},
+    'SelectRecommendationsByPersonID': {'CollaboratorRecommendation', 'Person'},
+    'sp_get_belongsto_history': {'BelongsTo'},
+    'sp_get_current_institution_for_department': {'BelongsTo'},
+    'sp_get_workedon_for_project': {'WorkedOn'},
+    'GetAllWorksIn': {'WorksIn', 'Person', 'Department'},
+}
+
+# Tables each mutating procedure changes, including ON DELETE/UPDATE CASCADE
+# and SET NULL effects (sql/tables/create_all_tables.sql)
+PROC_WRITES = {
+    'InsertIntoInstitution': {'Institution'},
+    'UpdateInstitutionDetails': {'Institution'},
+    'UpdateInstitutionPhone': {'Institution'},
+    'UpdateInstitutionType': {'Institution'},
+    'UpdateInstitutionAddress': {'Institution'},
+    'DeleteInstitution': {'Institution'},
+    'InsertIntoDepartment': {'Department'},
+    'UpdateDepartmentDetails': {'Department'},
+    'DeleteDepartment': {'Department', 'BelongsTo'},
+    'InsertPerson': {'Person'},
+    'UpdatePerson': {'Person'},
+    'DeletePerson': {'Person', 'WorkedOn', 'WorksIn', 'Collaboration', 'CollaboratorRecommendation',
+                     'Project', 'User'},
+    'InsertIntoProject': {'Project'},
+    'UpdateProjectDetails': {'Project'},
+    'UpdateProjectTitle': {'Project'},
+    'UpdateProjectDescription': {'Project'},
+    'UpdateProjectDates': {'Project'},
+    'CompleteProject': {'Project'},
+    'DeleteProject': {'Project', 'Project_Tag', 'WorkedOn', 'Collaboration'},
+    'AddTagToProject': {'Project_Tag'},
+    'AddMultipleTagsToProject': {'Project_Tag'},
+    'RemoveTagFromProject': {'Project_Tag'},
+    'RemoveAllTagsFromProject': {'Project_Tag'},
+    'ReplaceProjectTags': {'Project_Tag'},
+    'InsertIntoTag': {'Tag'},
+    'InsertMultipleTags': {'Tag'},
+    'UpdateTagName': {'Tag', 'Project_Tag'},
+    'DeleteTag': {'Tag', 'Project_Tag'},
+    'DeleteTagSafe': {'Tag'},
+    'InsertUser': {'User'},
+    'UpdateUserLastLogin': {'User'},
+    'LinkUserToPerson': {'User'},
+    'DeleteUser': {'User'},
+    'VerifyUserEmail': {'User'},
+    'UpdateVerificationCode': {'User'},
+    'sp_insert_workedon': {'WorkedOn', 'Collaboration'},
+    'sp_update_workedon_role': {'WorkedOn'},
+    'sp_close_workedon': {'WorkedOn', 'Collaboration'},
+    'sp_delete_workedon': {'WorkedOn', 'Collaboration'},
+    'BackfillCollaboration': {'Collaboration'},
+    'RefreshCollaborationPairs': {'Collaboration'},
+    # Only touch the session's temporary pair table
+    'PrepareCollaborationPairs': set(),
+    'QueueCollaborationPairsForMember': set(),
+    'QueueCollaborationPairsForProject': set(),
+    'sp_insert_belongsto': {'BelongsTo'},
+    'sp_close_belongsto': {'BelongsTo'},
+    'sp_delete_belongsto': {'BelongsTo'},
+    'InsertWorksIn': {'WorksIn'},
+    'DeleteWorksIn': {'WorksIn'},
+    'DeleteWorksInByIds': {'WorksIn'},
+}
+
+# Rows deleted from a table also change these (ON DELETE CASCADE / SET NULL)
+DELETE_CASCADES = {
+    'Person': {'WorkedOn', 'Collaboration', 'CollaboratorRecommendation', 'Project', 'User'},
+    'Project': {'Project_Tag', 'WorkedOn'},
+    'Department': {'BelongsTo'},
+}
+
+_WRITE_STATEMENT = re.compile(
+    r"\s*(?:(INSERT|REPLACE)(?:\s+IGNORE)?\s+INTO|(UPDATE)(?:\s+IGNORE)?|(DELETE)\s+FROM)\s+`?(\w+)",
+    re.IGNORECASE
+)
+
+_READ_TABLES = {table for tables in PROC_READS.values() for table in tables}
+
+
+def written_tables(query):
+    """Tables an INSERT/REPLACE/UPDATE/DELETE statement changes, or None for other statements."""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    match = _WRITE_STATEMENT.match(query)
+    if match is None:
+        return None
+    table = match.group(4)
+    tables = {table}
+    if match.group(3):
+        tables |= DELETE_CASCADES.get(table, set())
+    return tables
+
+
+class QueryCache:
+    """LRU of procedure results with a TTL, a byte budget and table tags."""
+
+    def __init__(self, max_entries=QUERY_CACHE_MAX_ENTRIES, max_bytes=QUERY_CACHE_MAX_BYTES,
+                 ttl=QUERY_CACHE_TTL_SECONDS, replica_lag=QUERY_CACHE_REPLICA_LAG_SECONDS,
+                 enabled=QUERY_CACHE_ENABLED, shared=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.replica_lag = replica_lag
+        self.enabled = enabled
+        # utils/shared_cache.py store behind this near cache, if enabled
+        self.shared = shared
+        self._lock = threading.Lock()
+        # key -> (pickled rows, size, expires_at, tables)
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._bytes = 0
+        # Bumped on every invalidation of a table, with the time it happened
+        self._generations = {}
+        self._invalidated_at = {}
+        self._stats = {
+            'hits': 0, 'shared_hits': 0, 'misses': 0, 'stores': 0, 'skipped_stores': 0,
+            'evictions': 0, 'expirations': 0, 'invalidated_entries': 0, 'invalidations': 0
+        }
+        self._procedures = {}
+
+    @staticmethod
+    def key(name, args):
+        try:
+            key = (name, tuple(args or ()))
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @property
+    def sharing(self):
+        return self.shared is not None and self.shared.enabled
+
+    def _shared_key(self, key):
+        return self.shared.key("query", hashlib.sha1(repr(key).encode()).hexdigest())
+
+    def lookup(self, name, args):
+        """``(rows, token)``: cached rows or None, and the token ``store()`` needs after a miss.
+
+        The token is None when the call cannot be cached.
+        """
+        tables = PROC_READS.get(name)
+        key = self.key(name, args)
+        if not self.enabled or tables is None or key is None:
+            return None, None
+        now = time.monotonic()
+        with self._lock:
+            counts = self._procedures.setdefault(name, {'hits': 0, 'misses': 0})
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= now:
+                self._drop(key)
+                self._stats['expirations'] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                counts['hits'] += 1
+            generations = tuple(self._generations.get(t, 0) for t in sorted(tables))
+        if entry is not None:
+            return pickle.loads(entry[0]), None
+
+        payload, shared_generations = self._shared_lookup(key, tables) if self.sharing else (None, None)
+        token = (key, tables, generations, shared_generations)
+        with self._lock:
+            if payload is not None:
+                self._stats['shared_hits'] += 1
+                counts['hits'] += 1
+            else:
+                self._stats['misses'] += 1
+                counts['misses'] += 1
+        if payload is None:
+            return None, token
+        self._put(token, payload)
+        return pickle.loads(payload), None
+
+    def _shared_lookup(self, key, tables):
+        """``(payload, generations)`` from the shared store; the payload only if no table changed since."""
+        names = sorted(tables)
+        values = self.shared.get_many([self._shared_key(key)] + [self.shared.key("gen", t) for t in names])
+        if values is None:
+            return None, None
+        generations = tuple(int(value or 0) for value in values[1:])
+        if values[0] is not None:
+            stored_generations, payload = pickle.loads(values[0])
+            if stored_generations == generations:
+                return payload, generations
+        return None, generations
+
+    def store(self, token, rows, replica=False):
+        """Keep the rows read after ``lookup()`` missed, unless a commit raced the read."""
+        if token is None:
+            return
+        payload = pickle.dumps(list(rows or ()), pickle.HIGHEST_PROTOCOL)
+        if not self._put(token, payload, replica):
+            return
+        key, tables, generations, shared_generations = token
+        if shared_generations is not None:
+            self.shared.set(self._shared_key(key), pickle.dumps((shared_generations, payload), pickle.HIGHEST_PROTOCOL),
+                            ttl=self.ttl)
+
+    def _put(self, token, payload, replica=False):
+        """Add an entry to this process's LRU; False if it was skipped."""
+        key, tables, generations, _ = token
+        size = len(payload) + _ENTRY_OVERHEAD
+        now = time.monotonic()
+        with self._lock:
+            stale = generations != tuple(self._generations.get(t, 0) for t in sorted(tables))
+            lagging = replica and any(now - self._invalidated_at.get(t, float('-inf')) < self.replica_lag
+                                      for t in tables)
+            # One result may not take more than a quarter of the budget
+            if stale or lagging or size > self.max_bytes // 4:
+                self._stats['skipped_stores'] += 1
+                return False
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (payload, size, now + self.ttl, tables)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            self._stats['stores'] += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+        return True
+
+    def _drop(self, key):
+        """Remove one entry and its table tags (lock held)."""
+        payload, size, expires_at, tables = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def invalidate(self, tables=None):
+        """Drop the entries that read any of ``tables``, or every entry when None, in every worker."""
+        if tables is not None and not tables:
+            return
+        self.invalidate_local(tables)
+        if self.sharing:
+            # Counters first, so a worker that looks up after the message sees them
+            names = sorted(tables if tables is not None else _READ_TABLES)
+            self.shared.incr_many([self.shared.key("gen", t) for t in names])
+            self.shared.publish("tables", tables=sorted(tables) if tables is not None else None)
+
+    def invalidate_local(self, tables=None):
+        """Drop entries from this process only (on messages from other workers)."""
+        now = time.monotonic()
+        with self._lock:
+            self._stats['invalidations'] += 1
+            if tables is None:
+                tables = set(self._by_table) | set(self._generations) | _READ_TABLES
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                self._invalidated_at[table] = now
+                for key in list(self._by_table.get(table, ())):
+                    self._drop(key)
+                    self._stats['invalidated_entries'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            procedures = {name: dict(counts, entries=0, bytes=0) for name, counts in self._procedures.items()}
+            for key, entry in self._entries.items():
+                procedure = procedures.setdefault(key[0], {'hits': 0, 'misses': 0, 'entries': 0, 'bytes': 0})
+                procedure['entries'] += 1
+                procedure['bytes'] += entry[1]
+            stats.update(enabled=self.enabled, entries=len(self._entries), bytes=self._bytes,
+                         max_entries=self.max_entries, max_bytes=self.max_bytes, ttl_seconds=self.ttl)
+        lookups = stats['hits'] + stats['shared_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['shared_hits']) / lookups, 4) if lookups else 0.0
+        for counts in procedures.values():
+            calls = counts['hits'] + counts['misses']
+            counts['hit_ratio'] = round(counts['hits'] / calls, 4) if calls else 0.0
+        stats['procedures'] = dict(sorted(procedures.items(), key=lambda item: -item[1]['bytes']))
+        stats['shared'] = self.shared.stats() if self.sharing else None
+        return stats
+
+
+# Shared by every pooled connection and the async read routes
+query_cache = QueryCache(shared=shared_cache)
+shared_cache.on("tables", lambda message: query_cache.invalidate_local(message.get('tables')))
+shared_cache.on("reset", lambda message: query_cache.invalidate_local())
+
+
+def _fresh_reads(conn):
+    """Whether each query on ``conn`` sees the latest committed data."""
+    try:
+        if conn.get_autocommit():
+            return True
+    except Exception:
+        return False
+    return getattr(conn, '_collab_isolation', None) in ('READ COMMITTED', 'READ UNCOMMITTED')
+
+
+def _wrote(conn, tables):
+    """Invalidate ``tables`` now in autocommit, otherwise when ``conn`` commits."""
+    try:
+        autocommit = conn.get_autocommit()
+    except Exception:
+        autocommit = False
+    if autocommit:
+        query_cache.invalidate(tables)
+        return
+    pending = getattr(conn, '_collab_pending_tables', None)
+    if pending is None:
+        pending = conn._collab_pending_tables = set()
+    if tables is None:
+        conn._collab_pending_all = True
+    else:
+        pending |= tables
+
+
+# Unmapped procedures already logged
+_unmapped = set()
+
+
+class CachingCursorMixin:
+    """Serves PROC_READS calls from ``query_cache`` and records writes.
+
+    Mixed into a MySQLdb stored-result cursor class (``caching_cursor``).
+    """
+
+    _collab_cached = False
+
+    def callproc(self, procname, args=()):
+        self._collab_cached = False
+        conn = self.connection
+        if procname not in PROC_READS:
+            result = super().callproc(procname, args)
+            if procname not in PROC_WRITES and procname not in _unmapped:
+                _unmapped.add(procname)
+                log_info(f"Procedure {procname} is not in PROC_READS or PROC_WRITES; its calls clear the query cache")
+            _wrote(conn, PROC_WRITES.get(procname))
+            return result
+
+        pending = getattr(conn, '_collab_pending_tables', None)
+        if (pending and pending & PROC_READS[procname]) or getattr(conn, '_collab_pending_all', False) \
+                or not _fresh_reads(conn):
+            return super().callproc(procname, args)
+
+        rows, token = query_cache.lookup(procname, args)
+        if rows is not None:
+            self._serve(procname, rows)
+            return args
+        result = super().callproc(procname, args)
+        query_cache.store(token, self._rows, replica=getattr(conn, '_collab_replica', False))
+        return result
+
+    def _serve(self, procname, rows):
+        """Set the cursor up as if ``rows`` were the procedure's only result set."""
+        self._collab_cached = True
+        self._result = None
+        self.description = None
+        self._rows = tuple(rows)
+        self.rownumber = 0
+        self.rowcount = len(self._rows)
+        self._executed = f"CALL {procname}"
+
+    def nextset(self):
+        if self._collab_cached:
+            self._collab_cached = False
+            return None
+        return super().nextset()
+
+    def execute(self, query, args=None):
+        self._collab_cached = False
+        result = super().execute(query, args)
+        tables = written_tables(query)
+        if tables:
+            _wrote(self.connection, tables)
+        return result
+
+    def executemany(self, query, args):
+        self._collab_cached = False
+        result = super().executemany(query, args)
+        tables = written_tables(query)
+        if tables:
+            _wrote(self.connection, tables)
+        return result
+
+
+class InvalidatingConnectionMixin:
+    """Applies the invalidations a transaction recorded once it commits."""
+
+    def _collab_flush(self):
+        pending = getattr(self, '_collab_pending_tables', None)
+        everything = getattr(self, '_collab_pending_all', False)
+        self._collab_pending_tables = set()
+        self._collab_pending_all = False
+        if everything:
+            query_cache.invalidate()
+        elif pending:
+            query_cache.invalidate(pending)
+
+    def commit(self):
+        super().commit()
+        self._collab_flush()
+
+    def rollback(self):
+        self._collab_pending_tables = set()
+        self._collab_pending_all = False
+        super().rollback()
+
+    def autocommit(self, on):
+        super().autocommit(on)
+        # Turning autocommit on commits the open transaction
+        if on:
+            self._collab_flush()
+
+
+_cursor_classes = {}
+
+
+def caching_cursor(base):
+    """``base`` cursor class with CachingCursorMixin applied (one class per base)."""
+    cls = _cursor_classes.get(base)
+    if cls is None:
+        cls = _cursor_classes[base] = type(f"Caching{base.__name__}", (CachingCursorMixin, base), {})
+    return cls
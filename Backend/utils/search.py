@@ -0,0 +1,221 @@
+"""
+Full-text search over people and projects.
+
+Queries go through the FULLTEXT indexes created in sql/indexes:
+idx_person_search (person_name, bio), idx_person_expertise
+(expertise_1..3) and idx_project_search (project_title,
+project_description). Each person index is matched in its own branch of a
+UNION so MySQL can use both indexes, and a person's relevance is the sum
+of the two, with expertise matches weighted up.
+
+MySQL relevance values are not comparable across tables, so when people
+and projects are searched together each list is scaled by its best score
+before the two are merged.
+"""
+
+import html
+import re
+
+MODES = {
+    'natural': 'IN NATURAL LANGUAGE MODE',
+    'boolean': 'IN BOOLEAN MODE'
+}
+TYPES = ('person', 'project', 'all')
+
+# Expertise hits say more about a person than a name/bio hit
+EXPERTISE_WEIGHT = 1.5
+
+SNIPPET_WIDTH = 160
+
+_WORD = re.compile(r"\w[\w'-]*\*?", re.UNICODE)
+
+
+def person_search_sql(mode):
+    """Matching people by summed relevance; params ``(q, q, q, q, limit, offset)``."""
+    against = MODES[mode]
+    return f"""
+        SELECT p.person_id, p.person_name, p.main_field, p.bio,
+               p.expertise_1, p.expertise_2, p.expertise_3,
+               r.relevance
+        FROM (
+            SELECT person_id, SUM(score) AS relevance
+            FROM (
+                SELECT person_id, MATCH(person_name, bio) AGAINST (%s {against}) AS score
+                FROM Person
+                WHERE MATCH(person_name, bio) AGAINST (%s {against})
+                UNION ALL
+                SELECT person_id,
+                       {EXPERTISE_WEIGHT} * MATCH(expertise_1, expertise_2, expertise_3) AGAINST (%s {against})
+                FROM Person
+                WHERE MATCH(expertise_1, expertise_2, expertise_3) AGAINST (%s {against})
+            ) matches
+            GROUP BY person_id
+            ORDER BY relevance DESC, person_id
+            LIMIT %s OFFSET %s
+        ) r
+        JOIN Person p ON p.person_id = r.person_id
+        ORDER BY r.relevance DESC, p.person_id
+    """
+
+
+def person_count_sql(mode):
+    against = MODES[mode]
+    return f"""
+        SELECT COUNT(*) AS total FROM (
+            SELECT person_id FROM Person WHERE MATCH(person_name, bio) AGAINST (%s {against})
+            UNION
+            SELECT person_id FROM Person WHERE MATCH(expertise_1, expertise_2, expertise_3) AGAINST (%s {against})
+        ) matches
+    """
+
+
+def project_search_sql(mode):
+    against = MODES[mode]
+    return f"""
+        SELECT project_id, project_title, project_description, tag_name, start_date, end_date,
+               MATCH(project_title, project_description) AGAINST (%s {against}) AS relevance
+        FROM Project
+        WHERE MATCH(project_title, project_description) AGAINST (%s {against})
+        ORDER BY relevance DESC, project_id
+        LIMIT %s OFFSET %s
+    """
+
+
+def project_count_sql(mode):
+    against = MODES[mode]
+    return f"""
+        SELECT COUNT(*) AS total FROM Project
+        WHERE MATCH(project_title, project_description) AGAINST (%s {against})
+    """
+
+
+def person_ids_sql(mode):
+    """Every matching person as ``item_id``; params ``(q, q)``."""
+    against = MODES[mode]
+    return f"""
+        SELECT person_id AS item_id FROM Person WHERE MATCH(person_name, bio) AGAINST (%s {against})
+        UNION
+        SELECT person_id FROM Person WHERE MATCH(expertise_1, expertise_2, expertise_3) AGAINST (%s {against})
+    """
+
+
+def project_ids_sql(mode):
+    """Every matching project as ``item_id``; params ``(q,)``."""
+    against = MODES[mode]
+    return f"""
+        SELECT project_id AS item_id FROM Project
+        WHERE MATCH(project_title, project_description) AGAINST (%s {against})
+    """
+
+
+def query_terms(query):
+    """Words to highlight, with boolean-mode operators stripped.
+
+    A trailing ``*`` (boolean prefix search) is kept so ``highlight`` can
+    match the rest of the word; terms after ``-`` are excluded ones and
+    are not highlighted.
+    """
+    terms = []
+    for match in _WORD.finditer(query):
+        start = match.start()
+        if start > 0 and query[start - 1] == '-':
+            continue
+        term = match.group().rstrip("'-").lower()
+        if len(term.rstrip('*')) >= 2:
+            terms.append(term)
+    return list(dict.fromkeys(terms))
+
+
+def _term_pattern(terms):
+    parts = []
+    for term in sorted(terms, key=len, reverse=True):
+        if term.endswith('*'):
+            parts.append(re.escape(term[:-1]) + r"\w*")
+        else:
+            parts.append(re.escape(term))
+    return re.compile(r"\b(" + "|".join(parts) + r")\b", re.IGNORECASE) if parts else None
+
+
+def highlight(text, terms, width=SNIPPET_WIDTH):
+    """HTML-safe snippet around the first hit, hits wrapped in ``<mark>``.
+
+    Returns None when the text does not contain any of the terms.
+    """
+    if not text:
+        return None
+    pattern = _term_pattern(terms)
+    first = pattern.search(text) if pattern else None
+    if first is None:
+        return None
+
+    start = max(0, first.start() - width // 3)
+    end = min(len(text), start + width)
+    if start > 0:
+        space = text.find(' ', start)
+        start = space + 1 if 0 <= space < first.start() else start
+    if end < len(text):
+        space = text.rfind(' ', first.end(), end)
+        end = space if space > 0 else end
+    window = text[start:end]
+
+    pieces = []
+    last = 0
+    for hit in pattern.finditer(window):
+        pieces.append(html.escape(window[last:hit.start()]))
+        pieces.append('<mark>' + html.escape(hit.group()) + '</mark>')
+        last = hit.end()
+    pieces.append(html.escape(window[last:]))
+    return ('…' if start > 0 else '') + ''.join(pieces) + ('…' if end < len(text) else '')
+
+
+def person_result(row, terms):
+    expertise = [e for e in (row.get('expertise_1'), row.get('expertise_2'), row.get('expertise_3')) if e]
+    snippets = {}
+    for field, text in (('person_name', row.get('person_name')), ('bio', row.get('bio')),
+                        ('expertise', ', '.join(expertise))):
+        snippet = highlight(text, terms)
+        if snippet:
+            snippets[field] = snippet
+    return {
+        'type': 'person',
+        'id': row['person_id'],
+        'title': row['person_name'],
+        'main_field': row.get('main_field'),
+        'expertise': expertise,
+        'relevance': float(row['relevance']),
+        'snippets': snippets
+    }
+
+
+def project_result(row, terms):
+    snippets = {}
+    for field in ('project_title', 'project_description'):
+        snippet = highlight(row.get(field), terms)
+        if snippet:
+            snippets[field] = snippet
+    return {
+        'type': 'project',
+        'id': row['project_id'],
+        'title': row['project_title'],
+        'tag_name': row.get('tag_name'),
+        'start_date': str(row['start_date']) if row.get('start_date') else None,
+        'end_date': str(row['end_date']) if row.get('end_date') else None,
+        'relevance': float(row['relevance']),
+        'snippets': snippets
+    }
+
+
+def merge_by_relevance(*result_lists):
+    """Merge per-type results, each scaled so its best hit scores 1.
+
+    Adds ``score`` (the scaled relevance) to each result and sorts on it,
+    ties broken by type and id so pages are stable.
+    """
+    merged = []
+    for results in result_lists:
+        best = max((r['relevance'] for r in results), default=0.0)
+        for result in results:
+            result['score'] = round(result['relevance'] / best, 4) if best > 0 else 0.0
+            merged.append(result)
+    merged.sort(key=lambda r: (-r['score'], r['type'], r['id']))
+    return merged
@@ -0,0 +1,359 @@
+"""
+Cache store and invalidation channel shared by every worker process.
+
+Each gunicorn/uvicorn worker keeps its own query cache, data versions,
+COUNT(*) cache and collaboration graph. Without coordination, a write
+handled by one worker leaves the others serving what they held before.
+With ``url`` set under ``[SharedCache]``:
+
+- query results are also kept in a Redis-protocol store, so a result read
+  by one worker is a hit for all of them. The in-process LRU stays in
+  front as a near cache;
+- every invalidation is published on ``channel``. Each worker listens on
+  a daemon thread and drops what the message names, typically within a
+  few milliseconds. ``stats()`` reports the observed delay;
+- per-table counters in the store make shared entries from before a
+  write unusable even by a worker that missed the message;
+- after (re)subscribing, a worker treats everything it holds as stale
+  (the ``reset`` event), since messages may have been missed meanwhile.
+
+``url = memory://`` selects LocalRedis, an in-process stand-in with the
+same commands, for tests and single-process development. Without a
+``url`` nothing is shared and every call here is a no-op. If the store
+cannot be reached, reads miss and writes are skipped; each worker's own
+caches keep working and entries still expire by TTL. Cached rows are
+stored pickled, so the store must only be reachable by the app servers.
+"""
+
+import configparser
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+
+from utils.logger import log_info, log_error
+
+config = configparser.ConfigParser()
+config.read("config.ini")
+
+SHARED_CACHE_URL = config.get("SharedCache", "url", fallback="").strip()
+SHARED_CACHE_PREFIX = config.get("SharedCache", "key_prefix", fallback="collab:")
+SHARED_CACHE_CHANNEL = config.get("SharedCache", "channel", fallback="collab:invalidate")
+# Give up on a store command after this long and treat it as a miss
+SHARED_CACHE_TIMEOUT_MS = config.getint("SharedCache", "timeout_ms", fallback=250)
+
+
+class LocalRedisServer:
+    """Keys, expiry and pub/sub channels for LocalRedis clients."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (value, expires_at or None)
+        self.data = {}
+        # channel -> subscriber queues
+        self.channels = {}
+
+
+class LocalPubSub:
+    def __init__(self, server):
+        self._server = server
+        self._queue = queue.Queue()
+        self._channels = []
+
+    def subscribe(self, *channels):
+        with self._server.lock:
+            for channel in channels:
+                self._server.channels.setdefault(channel, []).append(self._queue)
+                self._channels.append(channel)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self._server.lock:
+            for channel in self._channels:
+                subscribers = self._server.channels.get(channel, [])
+                if self._queue in subscribers:
+                    subscribers.remove(self._queue)
+        self._channels = []
+
+
+class LocalRedis:
+    """In-process stand-in for the redis-py commands SharedCache uses.
+
+    Clients made on the same LocalRedisServer see the same keys and
+    messages, the way worker processes share one Redis.
+    """
+
+    def __init__(self, server=None):
+        self.server = server if server is not None else LocalRedisServer()
+
+    def _get(self, key, now):
+        entry = self.server.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self.server.data[key]
+            return None
+        return entry[0] if entry is not None else None
+
+    def ping(self):
+        return True
+
+    def get(self, key):
+        with self.server.lock:
+            return self._get(key, time.monotonic())
+
+    def mget(self, keys):
+        now = time.monotonic()
+        with self.server.lock:
+            return [self._get(key, now) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        now = time.monotonic()
+        if isinstance(value, str):
+            value = value.encode()
+        with self.server.lock:
+            if nx and self._get(key, now) is not None:
+                return None
+            self.server.data[key] = (value, now + ex if ex else None)
+            return True
+
+    def incr(self, key):
+        with self.server.lock:
+            value = int(self._get(key, time.monotonic()) or 0) + 1
+            self.server.data[key] = (str(value).encode(), None)
+            return value
+
+    def delete(self, *keys):
+        with self.server.lock:
+            return sum(self.server.data.pop(key, None) is not None for key in keys)
+
+    def publish(self, channel, message):
+        if isinstance(message, str):
+            message = message.encode()
+        with self.server.lock:
+            subscribers = list(self.server.channels.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.put({'type': 'message', 'channel': channel.encode(), 'data': message})
+        return len(subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return LocalPubSub(self.server)
+
+
+def connect(url, timeout_ms=SHARED_CACHE_TIMEOUT_MS):
+    """A client for ``url``: ``redis://``/``rediss://``/``unix://`` or ``memory://``; None when empty."""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return LocalRedis()
+    import redis
+    return redis.Redis.from_url(url, socket_timeout=timeout_ms / 1000,
+                                socket_connect_timeout=timeout_ms / 1000, health_check_interval=30)
+
+
+class SharedCache:
+    """Shared key/value store plus an invalidation channel; inert without a client."""
+
+    def __init__(self, client=None, prefix=SHARED_CACHE_PREFIX, channel=SHARED_CACHE_CHANNEL):
+        self.client = client
+        self.prefix = prefix
+        self.channel = channel
+        # Tells this worker's own messages apart from other workers'
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._healthy = True
+        self._stats = {
+            'published': 0, 'received': 0, 'resets': 0, 'handler_errors': 0, 'errors': 0,
+            'lag_ms_total': 0.0, 'max_lag_ms': 0.0
+        }
+        self.subscribed = False
+        self.last_error = None
+
+    @classmethod
+    def from_config(cls):
+        try:
+            client = connect(SHARED_CACHE_URL)
+        except Exception as e:
+            log_error(f"Shared cache disabled, could not set up {SHARED_CACHE_URL}: {str(e)}")
+            client = None
+        return cls(client)
+
+    @property
+    def enabled(self):
+        return self.client is not None
+
+    def key(self, *parts):
+        return self.prefix + ":".join(str(part) for part in parts)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _ok(self):
+        if not self._healthy:
+            self._healthy = True
+            log_info("Shared cache reachable again")
+
+    def _failed(self, operation, error):
+        self._count('errors')
+        self.last_error = f"{operation}: {str(error)}"
+        # Log when the store goes away, not on every command after that
+        if self._healthy:
+            self._healthy = False
+            log_error(f"Shared cache {operation} failed: {str(error)}")
+
+    # ------------------------------------------------------------------
+    # Store
+    # ------------------------------------------------------------------
+
+    def get_many(self, keys):
+        """Values for ``keys`` (None where missing), or None if the store failed."""
+        if not self.enabled:
+            return None
+        try:
+            values = self.client.mget(keys)
+        except Exception as e:
+            self._failed("read", e)
+            return None
+        self._ok()
+        return values
+
+    def set(self, key, value, ttl=None, only_if_missing=False):
+        """Store ``value``; returns False if it was not stored."""
+        if not self.enabled:
+            return False
+        try:
+            stored = self.client.set(key, value, ex=max(1, int(ttl)) if ttl else None, nx=only_if_missing)
+        except Exception as e:
+            self._failed("write", e)
+            return False
+        self._ok()
+        return bool(stored)
+
+    def incr_many(self, keys):
+        """Increment each counter; their new values, or None if the store failed."""
+        if not self.enabled:
+            return None
+        try:
+            values = [int(self.client.incr(key)) for key in keys]
+        except Exception as e:
+            self._failed("increment", e)
+            return None
+        self._ok()
+        return values
+
+    # ------------------------------------------------------------------
+    # Channel
+    # ------------------------------------------------------------------
+
+    def on(self, kind, handler):
+        """Call ``handler(message)`` for each ``kind`` message from other workers.
+
+        ``kind='reset'`` handlers run (with ``{}``) each time the channel is
+        (re)subscribed, when messages may have been missed.
+        """
+        self._handlers.setdefault(kind, []).append(handler)
+
+    def publish(self, kind, **data):
+        """Tell the other workers; returns False if the message could not be sent."""
+        if not self.enabled:
+            return False
+        message = json.dumps(dict(data, kind=kind, origin=self.origin, sent_at=time.time()), default=str)
+        try:
+            self.client.publish(self.channel, message)
+        except Exception as e:
+            self._failed("publish", e)
+            return False
+        self._ok()
+        self._count('published')
+        return True
+
+    def _dispatch(self, kind, message):
+        for handler in self._handlers.get(kind, ()):
+            try:
+                handler(message)
+            except Exception as e:
+                self._count('handler_errors')
+                log_error(f"Shared cache {kind} handler failed: {str(e)}")
+
+    def receive(self, raw):
+        """Handle one channel message (the listener thread calls this)."""
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            log_error("Ignoring malformed shared cache message")
+            return
+        if message.get('origin') == self.origin:
+            return
+        lag_ms = max(0.0, 1000 * (time.time() - message.get('sent_at', time.time())))
+        with self._lock:
+            self._stats['received'] += 1
+            self._stats['lag_ms_total'] += lag_ms
+            self._stats['max_lag_ms'] = max(self._stats['max_lag_ms'], lag_ms)
+        self._dispatch(message.get('kind'), message)
+
+    def _listen(self):
+        backoff = 0.5
+        while not self._stopping.is_set():
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.subscribed = True
+                backoff = 0.5
+                self._count('resets')
+                self._dispatch('reset', {})
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        self.receive(message['data'])
+            except Exception as e:
+                self.subscribed = False
+                self._failed("subscribe", e)
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+        self.subscribed = False
+
+    def start(self):
+        """Listen for other workers' messages on a daemon thread."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="shared-cache-listener", daemon=True)
+        self._thread.start()
+        log_info(f"Shared cache listening on {self.channel} as {self.origin}")
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        received = stats['received']
+        stats['avg_lag_ms'] = round(stats.pop('lag_ms_total') / received, 3) if received else 0.0
+        stats['max_lag_ms'] = round(stats['max_lag_ms'], 3)
+        stats.update(enabled=self.enabled, subscribed=self.subscribed, origin=self.origin,
+                     last_error=self.last_error)
+        return stats
+
+
+# Shared by the query cache, data versions, row counts and the collaboration graph
+shared_cache = SharedCache.from_config()
@@ -0,0 +1,109 @@
+"""
+Streaming JSON responses over unbuffered server-side cursors.
+
+Large exports used to ``fetchall()`` into a list of dicts and ``jsonify``
+it, holding the rows, the dicts and the encoded body in memory at once.
+Here rows come from an SSDictCursor (MySQL sends them as they are read
+instead of buffering the whole result in the client) in batches of
+FETCH_ROWS, and each batch is encoded and sent before the next is read,
+so memory stays flat and the first bytes leave as soon as MySQL returns
+the first rows.
+
+Two formats are served:
+
+- ``json``: the usual ``{"status": "success", "data": [...], "count": N}``
+  body, with ``count`` written after the rows;
+- ``ndjson``: one JSON object per line, for clients that process rows as
+  they arrive.
+
+The status line is sent before the query finishes, so an error midway
+cannot become a 500: it is logged, the JSON body is left unterminated and
+NDJSON gets a final ``{"status": "error"}`` line.
+"""
+
+import MySQLdb.cursors
+from flask import Response, current_app, stream_with_context
+from utils.logger import log_info, log_error
+
+FETCH_ROWS = 500
+FORMATS = ('json', 'ndjson')
+MIMETYPES = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+_TRUE = ('1', 'true', 'yes')
+
+
+def stream_format(args):
+    """``'json'``/``'ndjson'`` when a request asks to stream, else None.
+
+    ``?format=ndjson`` streams NDJSON; ``?stream=true`` streams the usual
+    JSON body.
+    """
+    fmt = args.get('format')
+    if fmt in FORMATS:
+        return fmt
+    if args.get('stream', '').lower() in _TRUE:
+        return 'json'
+    return None
+
+
+def encode_json(batches, dumps):
+    """Chunks of the ``status/data/count`` body, one per batch of rows."""
+    yield '{"status": "success", "data": ['
+    count = 0
+    for batch in batches:
+        if not batch:
+            continue
+        yield (',' if count else '') + ','.join(dumps(row) for row in batch)
+        count += len(batch)
+    yield f'], "count": {count}}}'
+
+
+def encode_ndjson(batches, dumps):
+    for batch in batches:
+        if batch:
+            yield ''.join(dumps(row) + '\n' for row in batch)
+
+
+def fetch_batches(cursor, size=FETCH_ROWS, transform=None):
+    """Rows of an executed cursor in lists of ``size``."""
+    while True:
+        batch = cursor.fetchmany(size)
+        if not batch:
+            return
+        yield [transform(row) for row in batch] if transform else list(batch)
+
+
+def stream_query(mysql, query, params=(), fmt='json', transform=None, label='rows'):
+    """A streaming Response for ``query``, read through a server-side cursor.
+
+    ``transform`` is applied to each row dict before it is encoded.
+    """
+    dumps = current_app.json.dumps
+    encode = encode_ndjson if fmt == 'ndjson' else encode_json
+
+    def counted(batches, sent):
+        for batch in batches:
+            sent[0] += len(batch)
+            yield batch
+
+    def generate():
+        cursor = mysql.connection.cursor(MySQLdb.cursors.SSDictCursor)
+        sent = [0]
+        try:
+            cursor.execute(query, params)
+            for chunk in encode(counted(fetch_batches(cursor, transform=transform), sent), dumps):
+                yield chunk
+            log_info(f"Streamed {sent[0]} {label} as {fmt}")
+        except Exception as e:
+            log_error(f"Streaming {label} failed: {str(e)}")
+            if fmt == 'ndjson':
+                yield dumps({'status': 'error', 'message': str(e)}) + '\n'
+        finally:
+            # Closing an unbuffered cursor drains whatever MySQL has left to send
+            cursor.close()
+            mysql.connection.commit()
+
+    response = Response(stream_with_context(generate()), mimetype=MIMETYPES[fmt])
+    # Keep reverse proxies from buffering the whole body before sending it on
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,143 @@
+"""
+Keyed, versioned cache with single-flight rebuilds.
+
+Each entry is stamped with the data version it was built from. A lookup
+with a newer version is a miss; only one caller per key runs the builder
+while the others wait for and share its result. With stale-while-revalidate
+enabled, a caller holding an outdated entry is served it immediately and
+the rebuild runs on a background thread instead.
+
+With ``max_entries`` set, the least recently used keys are evicted once
+the cache holds more than that many.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """One in-progress build that other callers can wait on."""
+
+    def __init__(self, version):
+        self.version = version
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class VersionedCache:
+    """Cache of built values keyed by parameters and stamped by version."""
+
+    def __init__(self, stale_while_revalidate=False, max_entries=None):
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'shared_waits': 0,
+            'rebuilds': 0,
+            'rebuild_errors': 0,
+            'rebuild_seconds_total': 0.0,
+            'rebuild_seconds_last': 0.0,
+            'rebuild_seconds_max': 0.0,
+            'evictions': 0
+        }
+
+    def get(self, key, version, builder):
+        """Return the value for ``key`` at ``version``, building it if needed.
+
+        ``builder`` is called with no arguments and must return the value
+        for the current data version.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if entry is not None and entry['version'] >= version:
+                self._stats['hits'] += 1
+                return entry['value']
+
+            flight = self._flights.get(key)
+            if entry is not None and self.stale_while_revalidate:
+                self._stats['stale_hits'] += 1
+                if flight is None:
+                    flight = self._start_flight(key, version)
+                    threading.Thread(
+                        target=self._run, args=(key, flight, builder), daemon=True
+                    ).start()
+                return entry['value']
+
+            self._stats['misses'] += 1
+            if flight is not None and flight.version >= version:
+                self._stats['shared_waits'] += 1
+                owner = False
+            else:
+                flight = self._start_flight(key, version)
+                owner = True
+
+        if owner:
+            self._run(key, flight, builder)
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _start_flight(self, key, version):
+        flight = _Flight(version)
+        self._flights[key] = flight
+        return flight
+
+    def _run(self, key, flight, builder):
+        started = time.perf_counter()
+        try:
+            flight.value = builder()
+        except Exception as e:
+            flight.error = e
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._stats['rebuilds'] += 1
+            self._stats['rebuild_seconds_total'] += elapsed
+            self._stats['rebuild_seconds_last'] = elapsed
+            self._stats['rebuild_seconds_max'] = max(self._stats['rebuild_seconds_max'], elapsed)
+            if flight.error is None:
+                current = self._entries.get(key)
+                if current is None or current['version'] <= flight.version:
+                    self._entries[key] = {'version': flight.version, 'value': flight.value}
+                    self._entries.move_to_end(key)
+                    while self.max_entries is not None and len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self._stats['evictions'] += 1
+            else:
+                self._stats['rebuild_errors'] += 1
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.done.set()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when ``key`` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Counters plus the keys and versions currently held."""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+            stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+            stats['entries'] = [
+                {'key': list(key) if isinstance(key, tuple) else key, 'version': entry['version']}
+                for key, entry in self._entries.items()
+            ]
+            stats['in_flight'] = len(self._flights)
+            return stats
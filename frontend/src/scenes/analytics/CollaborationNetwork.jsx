@@ -55,44 +55,50 @@ const CollaborationNetwork = () => {
       if (result.success) {
         const { nodes: nodeData, edges: edgeData, statistics: stats } = result.data;
 
-        // Circular layout by community with hub nodes centered
-        const communityGroups = {};
-        nodeData.forEach(node => {
-          const comm = node.community || 0;
-          if (!communityGroups[comm]) communityGroups[comm] = [];
-          communityGroups[comm].push(node);
-        });
+        // Positions are precomputed by the backend; the client-side
+        // community layout is only a fallback for responses without them
+        const hasServerLayout = nodeData.every(node => typeof node.x === 'number' && typeof node.y === 'number');
+        const layoutNodes = hasServerLayout ? nodeData : [];
 
-        // Sort by degree within each community
-        Object.values(communityGroups).forEach(group => {
-          group.sort((a, b) => (b.degree || 0) - (a.degree || 0));
-        });
+        if (!hasServerLayout) {
+          // Circular layout by community with hub nodes centered
+          const communityGroups = {};
+          nodeData.forEach(node => {
+            const comm = node.community || 0;
+            if (!communityGroups[comm]) communityGroups[comm] = [];
+            communityGroups[comm].push(node);
+          });
 
-        // Layout communities
-        const communities = Object.entries(communityGroups);
-        const cols = Math.ceil(Math.sqrt(communities.length));
-        const layoutNodes = [];
+          // Sort by degree within each community
+          Object.values(communityGroups).forEach(group => {
+            group.sort((a, b) => (b.degree || 0) - (a.degree || 0));
+          });
+
+          // Layout communities
+          const communities = Object.entries(communityGroups);
+          const cols = Math.ceil(Math.sqrt(communities.length));
         
-        communities.forEach(([commId, nodes], idx) => {
-          const commX = (idx % cols) * 400 + 250;
-          const commY = Math.floor(idx / cols) * 350 + 250;
+          communities.forEach(([commId, nodes], idx) => {
+            const commX = (idx % cols) * 400 + 250;
+            const commY = Math.floor(idx / cols) * 350 + 250;
           
-          nodes.forEach((node, nodeIdx) => {
-            if (nodeIdx === 0 && nodes.length > 1) {
-              // Hub at center
-              layoutNodes.push({ ...node, x: commX, y: commY });
-            } else {
-              // Others in circle
-              const angle = (2 * Math.PI * nodeIdx) / Math.max(nodes.length - 1, 1);
-              const radius = 100 + nodeIdx * 8;
-              layoutNodes.push({
-                ...node,
-                x: commX + radius * Math.cos(angle),
-                y: commY + radius * Math.sin(angle)
-              });
-            }
+            nodes.forEach((node, nodeIdx) => {
+              if (nodeIdx === 0 && nodes.length > 1) {
+                // Hub at center
+                layoutNodes.push({ ...node, x: commX, y: commY });
+              } else {
+                // Others in circle
+                const angle = (2 * Math.PI * nodeIdx) / Math.max(nodes.length - 1, 1);
+                const radius = 100 + nodeIdx * 8;
+                layoutNodes.push({
+                  ...node,
+                  x: commX + radius * Math.cos(angle),
+                  y: commY + radius * Math.sin(angle)
+                });
+              }
+            });
           });
-        });
+        }
 
         // Transform nodes for ReactFlow
         const flowNodes = layoutNodes.map((node) => {
@@ -31,7 +31,7 @@ const ClaimProfile = () => {
   const fetchAllPeople = async () => {
     setLoadingPeople(true);
     try {
-      const response = await axios.get('/person/all');
+      const response = await axios.get('/person/all?all=true');
       if (response.data.status === 'success') {
         setAllPeople(response.data.data);
       }
@@ -62,7 +62,7 @@ const Connections = () => {
         setFavoritedResearchers(favoritedDetails.filter(r => r !== null));
 
         // Generate recommendations based on favorited researchers
-        const allPeopleResponse = await axios.get('http://127.0.0.1:5001/person/all');
+        const allPeopleResponse = await axios.get('http://127.0.0.1:5001/person/all?all=true');
         const allPeople = allPeopleResponse.data.data;
 
         // Filter out favorited researchers and generate recommendations
@@ -144,7 +144,7 @@ const Connections = () => {
       // Recalculate recommendations based on remaining favorites
       const remainingFavorites = favoritedResearchers.filter(r => r.person_id !== personId);
       
-      axios.get('http://127.0.0.1:5001/person/all')
+      axios.get('http://127.0.0.1:5001/person/all?all=true')
         .then(response => {
           const allPeople = response.data.data;
           const recommendations = allPeople
@@ -425,8 +425,8 @@ const Dashboard = () => {
 
         // Fetch statistics in parallel
         const [peopleRes, projectsRes, institutionsRes] = await Promise.all([
-          axios.get("http://127.0.0.1:5001/person/all"),
-          axios.get("http://127.0.0.1:5001/project/all"),
+          axios.get("http://127.0.0.1:5001/person/all?all=true"),
+          axios.get("http://127.0.0.1:5001/project/all?all=true"),
           axios.get("http://127.0.0.1:5001/institution/all"),
         ]);
 